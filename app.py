@@ -5,19 +5,22 @@ Modular utilities for Genesys Cloud administration.
 Supports hosted deployment on Streamlit Community Cloud with encrypted storage.
 """
 
+import time
 from typing import Dict, Type
 
 import streamlit as st
 
 from core.demo import DemoAPI, is_demo_mode, set_demo_mode
 from core.diagnostics import (
-    cache_report,
     clear_cached_report,
+    diagnostics_running,
     get_cached_report,
     render_diagnostics_summary,
-    run_diagnostics,
+    start_diagnostics,
 )
 from core.encrypted_storage import get_storage
+from core.job_queue import JobQueue
+from core.mirror import LISTERS, MirrorAPI, MirrorSyncError, get_mirror
 from core.services import validate_backend
 
 # Core modules
@@ -33,6 +36,11 @@ from utilities import (
     SkillManagerUtility,
     UserManagerUtility,
 )
+from utilities.base import rerun_when
+from utilities.history import ROLLBACK_ACTIONS, ROLLBACK_STATUSES, get_history
+from utilities.reference import get_reference
+from utilities.resolver import cache_scope
+from utilities.rollback import ENDPOINTS, RollbackEngine, RollbackError
 
 # =============================================================================
 # Configuration
@@ -372,6 +380,8 @@ def init_session_state():
         "demo_mode": False,
         "local_user": None,
         "active_profile_id": None,
+        "use_mirror": False,
+        "mirror_api": None,
     }
     for key, val in defaults.items():
         if key not in st.session_state:
@@ -391,16 +401,35 @@ def init_session_state():
 
 
 def _run_startup_diagnostics(api, is_demo: bool = False):
-    """Run diagnostics after authentication and cache the report."""
+    """Start diagnostics after authentication (the report is cached when done)."""
     # Validate backend interface
     errors = validate_backend(api)
     if errors:
         st.warning(f"Backend missing methods: {', '.join(errors[:5])}")
 
-    # Run endpoint checks
-    report = run_diagnostics(api, is_demo=is_demo)
-    cache_report(report)
-    return report
+    # Run endpoint checks in the background
+    start_diagnostics(api, is_demo=is_demo)
+
+
+def _warm_up(api):
+    """Prefetch reference data (skills, queues, ...) in the background."""
+    get_reference(api).warm_up()
+
+
+def _backend():
+    """
+    Client the utilities read through: the live API, or the local org mirror
+    (core.mirror) when enabled on the Storage page. Writes always go live.
+    """
+    api = st.session_state.api
+    mirror_api = st.session_state.mirror_api
+    if (
+        st.session_state.use_mirror
+        and mirror_api is not None
+        and mirror_api.live is api
+    ):
+        return mirror_api
+    return api
 
 
 def try_auto_auth():
@@ -416,6 +445,7 @@ def try_auto_auth():
             st.session_state.authenticated = True
             st.session_state.auth = auth
             st.session_state.api = GenesysCloudAPI(auth)
+            _warm_up(st.session_state.api)
             _run_startup_diagnostics(st.session_state.api, is_demo=False)
             return
 
@@ -433,6 +463,7 @@ def try_auto_auth():
             st.session_state.authenticated = True
             st.session_state.auth = auth
             st.session_state.api = GenesysCloudAPI(auth)
+            _warm_up(st.session_state.api)
             _run_startup_diagnostics(st.session_state.api, is_demo=False)
 
 
@@ -442,6 +473,7 @@ def activate_demo_mode():
     st.session_state.authenticated = True
     st.session_state.auth = None
     st.session_state.api = DemoAPI()
+    _warm_up(st.session_state.api)
     # Skip diagnostics in demo mode – demo always returns OK which is misleading
 
 
@@ -451,6 +483,8 @@ def deactivate_session():
     st.session_state.authenticated = False
     st.session_state.auth = None
     st.session_state.api = None
+    st.session_state.use_mirror = False
+    st.session_state.mirror_api = None
     st.session_state.current_utility = None
     st.session_state.page = "home"
     clear_cached_report()
@@ -548,6 +582,18 @@ def render_sidebar():
                 st.session_state.page = "connect"
                 st.rerun()
 
+        # Background jobs
+        if st.button("📦 Background Jobs", use_container_width=True, key="nav_jobs"):
+            st.session_state.page = "jobs"
+            st.session_state.current_utility = None
+            st.rerun()
+
+        # Action history
+        if st.button("📜 Action History", use_container_width=True, key="nav_history"):
+            st.session_state.page = "history"
+            st.session_state.current_utility = None
+            st.rerun()
+
         # Storage info
         if st.button("🔒 Storage Info", use_container_width=True, key="nav_storage"):
             st.session_state.page = "storage_info"
@@ -566,7 +612,7 @@ def render_utility_sidebar():
         return
 
     util_class = UTILITIES[util_id]
-    utility = util_class(st.session_state.api)
+    utility = util_class(_backend())
 
     with st.sidebar:
         st.markdown("---")
@@ -654,22 +700,18 @@ and encrypted local storage.
         report = get_cached_report()
         if report:
             render_diagnostics_summary(report)
-        else:
-            if st.session_state.api:
-                with st.spinner("Running endpoint diagnostics..."):
-                    report = _run_startup_diagnostics(
-                        st.session_state.api, is_demo=False
-                    )
-                render_diagnostics_summary(report)
+        elif st.session_state.api:
+            if not diagnostics_running():
+                _run_startup_diagnostics(st.session_state.api, is_demo=False)
+            st.info("Running endpoint diagnostics in the background...")
+            rerun_when(lambda: not diagnostics_running())
 
         c_diag, _ = st.columns([1, 3])
         with c_diag:
             if st.button("Re-run Diagnostics", key="home_rerun_diag"):
                 if st.session_state.api:
-                    with st.spinner("Running diagnostics..."):
-                        report = _run_startup_diagnostics(
-                            st.session_state.api, is_demo=False
-                        )
+                    clear_cached_report()
+                    _run_startup_diagnostics(st.session_state.api, is_demo=False)
                     st.rerun()
 
     st.markdown("---")
@@ -766,16 +808,18 @@ def page_connect():
                 )
                 if st.form_submit_button("Add Profile", use_container_width=True):
                     if name and email:
-                        new_id = storage.add_profile(
-                            {
-                                "name": name,
-                                "email": email,
-                                "company": company,
-                            }
-                        )
-                        # Auto-activate if first profile
+                        with storage.batch():
+                            new_id = storage.add_profile(
+                                {
+                                    "name": name,
+                                    "email": email,
+                                    "company": company,
+                                }
+                            )
+                            # Auto-activate if first profile
+                            if len(profiles) == 0:
+                                storage.set_active_profile(new_id)
                         if len(profiles) == 0:
-                            storage.set_active_profile(new_id)
                             new_profile = storage.get_profile(new_id)
                             st.session_state.local_user = new_profile
                             st.session_state.active_profile_id = new_id
@@ -830,6 +874,7 @@ def page_connect():
                         st.session_state.authenticated = True
                         st.session_state.auth = auth
                         st.session_state.api = GenesysCloudAPI(auth)
+                        _warm_up(st.session_state.api)
                         _run_startup_diagnostics(st.session_state.api, is_demo=False)
                         st.session_state.page = "home"
                         st.rerun()
@@ -893,7 +938,7 @@ def page_utility():
         return
 
     util_class = UTILITIES[util_id]
-    utility = util_class(st.session_state.api)
+    utility = util_class(_backend())
     utility.render_main()
 
 
@@ -910,10 +955,12 @@ def page_storage_info():
         st.markdown("**Algorithm:**")
         st.markdown("**Key Source:**")
         st.markdown("**Persistent:**")
+        st.markdown("**Compression:**")
     with col2:
         st.markdown(info["encryption"])
         st.markdown(info["key_source"])
         st.markdown("Yes" if info["persistent"] else "No (session only)")
+        st.markdown(info["compression"])
 
     st.markdown("### Storage Backend")
     col1, col2 = st.columns(2)
@@ -921,10 +968,12 @@ def page_storage_info():
         st.markdown("**Backend:**")
         if info["storage_dir"]:
             st.markdown("**Location:**")
+            st.markdown("**Layout:**")
     with col2:
         st.markdown(info["backend"])
         if info["storage_dir"]:
             st.markdown(f"`{info['storage_dir']}`")
+            st.markdown(info["layout"])
 
     st.markdown("---")
 
@@ -941,9 +990,10 @@ def page_storage_info():
 - Session data is cleared when the tab closes
 
 **Action History:**
-- All operations logged locally in encrypted storage
+- All operations logged locally in an indexed history database
 - History retained for audit and rollback purposes
-- Maximum 500 records maintained
+- Retention set by `ADMIN_LAYERS_HISTORY_MAX_RECORDS` / `ADMIN_LAYERS_HISTORY_MAX_AGE_DAYS` (default: keep everything)
+- Actions older than `ADMIN_LAYERS_HISTORY_ARCHIVE_DAYS` (default: 30) move to compressed, encrypted day segments, searchable from the history page
 
 **Local User Profile:**
 - Optional profile stored locally for SaaS-style deployments
@@ -974,6 +1024,9 @@ def page_storage_info():
     else:
         st.info("No saved credentials")
 
+    st.markdown("### Local Org Mirror")
+    _render_mirror()
+
     st.markdown("### Local User Profile")
     profile = storage.retrieve_local_user()
     if profile:
@@ -991,6 +1044,293 @@ def page_storage_info():
         st.info("No local profile saved")
 
 
+def _render_mirror():
+    """Sync controls of the local org mirror and the switch to read from it."""
+    api = st.session_state.api
+    scope = cache_scope(api) if api is not None else None
+    if scope is None:
+        st.info("Connect to an org to keep a local mirror (not in demo mode).")
+        return
+
+    mirror = get_mirror(scope)
+    st.caption(
+        "An indexed copy of users, groups, queues, skills and memberships that "
+        "answers list pages and searches locally. Stored unencrypted "
+        f"(owner-only file): `{mirror.path}`"
+    )
+    synced_at = mirror.synced_at()
+    if synced_at is None:
+        st.caption("Not synced yet")
+    else:
+        counts = ", ".join(f"{mirror.count(r)} {r}" for r in LISTERS)
+        synced = time.strftime("%Y-%m-%d %H:%M", time.localtime(synced_at))
+        st.caption(f"Last synced {synced}: {counts}")
+
+    col1, col2 = st.columns(2)
+    full = None
+    with col1:
+        if st.button("🔄 Sync Mirror", key="storage_mirror_sync"):
+            full = False
+    with col2:
+        if st.button("♻️ Full Resync", key="storage_mirror_full"):
+            full = True
+    if full is not None:
+        try:
+            with st.spinner("Syncing mirror..."):
+                result = mirror.sync(api, full=full)
+        except MirrorSyncError as e:
+            st.error(f"Sync failed, mirror left unchanged: {e}")
+        else:
+            st.success(
+                f"Synced: {result.total_changed} change(s), "
+                f"{result.calls} API calls in {result.elapsed:.1f}s"
+            )
+            synced_at = mirror.synced_at()
+
+    use_mirror = st.checkbox(
+        "Serve list pages and searches from the mirror",
+        value=st.session_state.use_mirror and synced_at is not None,
+        disabled=synced_at is None,
+        key="storage_use_mirror",
+    )
+    st.session_state.use_mirror = use_mirror
+    mirror_api = st.session_state.mirror_api
+    if use_mirror and (mirror_api is None or mirror_api.live is not api):
+        # One adapter per client, so per-client caches keyed on it persist
+        st.session_state.mirror_api = MirrorAPI(mirror, api)
+
+
+def _render_job_table():
+    """Job list with live progress (cheap: no payload decryption)."""
+    jobs = JobQueue().list_jobs()
+    if not jobs:
+        st.info("No background jobs yet.")
+        return
+
+    queue = JobQueue()
+    active = [j for j in jobs if j["status"] in ("queued", "running")]
+    if active:
+        st.markdown("### Active")
+        for job in active:
+            label = f"**{job['kind']}** → {job['target_name'] or job['target_id']}"
+            c_info, c_pause, c_cancel = st.columns([6, 1, 1])
+            with c_info:
+                if job["status"] == "queued":
+                    st.markdown(f"{label} · queued `{job['id']}`")
+                else:
+                    total = job["total"] or 0
+                    fraction = job["completed"] / total if total else 0.0
+                    state = " · ⏸ paused" if job["control"] == "pause" else ""
+                    st.progress(
+                        min(fraction, 1.0),
+                        text=f"{label} · {job['completed']}/{total} "
+                        f"({job['failed']} failed) · "
+                        f"{job['requests_per_second']:.1f} req/s · "
+                        f"{job['retries']} retries · {job['elapsed']:.0f}s{state}",
+                    )
+            if job["status"] == "running":
+                paused = job["control"] == "pause"
+                if c_pause.button(
+                    "▶️" if paused else "⏸",
+                    help="Resume" if paused else "Pause after the current batch",
+                    key=f"jobs_pause_{job['id']}",
+                ):
+                    queue.set_control(job["id"], "resume" if paused else "pause")
+                    st.rerun()
+            if c_cancel.button(
+                "⏹",
+                help="Cancel (completed items are kept)",
+                key=f"jobs_cancel_{job['id']}",
+                disabled=job["control"] == "cancel",
+            ):
+                queue.set_control(job["id"], "cancel")
+                st.rerun()
+
+    st.markdown("### Recent")
+    rows = []
+    for job in jobs:
+        summary = job["summary"] or {}
+        rows.append(
+            {
+                "Job": job["id"],
+                "Kind": job["kind"],
+                "Target": job["target_name"] or job["target_id"],
+                "Status": job["status"],
+                "Succeeded": summary.get("succeeded", job["succeeded"]),
+                "Failed": summary.get("failed", job["failed"]),
+                "Cancelled": summary.get("cancelled", 0),
+                "Not found": len(summary.get("missing", [])),
+                "Lookup failed": len(summary.get("lookup_failed", [])),
+                "Created": job["created_at"][:19].replace("T", " "),
+            }
+        )
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+
+    failed = [j for j in jobs if (j["summary"] or {}).get("errors")]
+    for job in failed[:5]:
+        with st.expander(f"Errors for {job['id']} ({job['kind']})"):
+            for error in job["summary"]["errors"]:
+                st.caption(f"- {error}")
+
+
+def page_jobs():
+    """Background jobs page."""
+    st.markdown("## Background Jobs")
+    st.caption(
+        "Bulk jobs queued with 'Run in background worker' are processed by "
+        "`admin-layers-worker` (or `python -m utilities.worker`), which must "
+        "use the same ADMIN_LAYERS_KEY as this app."
+    )
+
+    if hasattr(st, "fragment"):
+        st.fragment(run_every=2)(_render_job_table)()
+    else:
+        if st.button("🔄 Refresh", key="jobs_refresh"):
+            st.rerun()
+        _render_job_table()
+
+
+HISTORY_PAGE_SIZE = 50
+
+
+def page_history():
+    """Action history page (keyset-paginated, newest first)."""
+    st.markdown("## Action History")
+    history = get_history()
+    archived = history.archived_count()
+    st.caption(
+        f"{history.count()} records"
+        + (f" (+{archived} archived)" if archived else "")
+        + f" · {history.backend_info}"
+    )
+
+    c1, c2, c3, c4 = st.columns(4)
+    filters = {
+        "utility": c1.text_input("Utility", key="hist_utility"),
+        "action": c2.text_input("Action", key="hist_action"),
+        "target_id": c3.text_input("Target ID", key="hist_target"),
+        "status": c4.selectbox(
+            "Status", ["", "success", "partial", "failed"], key="hist_status"
+        ),
+    }
+    filters = {k: v.strip() for k, v in filters.items() if v and v.strip()}
+    include_archive = st.checkbox(
+        "Include archived actions",
+        key="hist_archive",
+        disabled=not archived,
+        help="Continue into older actions once recent ones are exhausted",
+    )
+
+    # Cursors of the pages before the current one, reset when filters change
+    if st.session_state.get("hist_filters") != (filters, include_archive):
+        st.session_state.hist_filters = (filters, include_archive)
+        st.session_state.hist_cursors = [None]
+    cursors = st.session_state.hist_cursors
+
+    page = history.get_history_page(
+        limit=HISTORY_PAGE_SIZE,
+        before=cursors[-1],
+        include_archive=include_archive,
+        **filters,
+    )
+    if not page.records:
+        st.info("No matching actions.")
+    else:
+        st.dataframe(
+            [
+                {
+                    "Time": r["timestamp"][:19].replace("T", " "),
+                    "Utility": r["utility"],
+                    "Action": r["action"],
+                    "Target": r["target"] or r["target_id"],
+                    "Status": r["status"],
+                    "Affected": r["affected_count"],
+                    "ID": r["id"],
+                }
+                for r in page.records
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+
+    c_newer, c_page, c_older = st.columns([1, 2, 1])
+    if c_newer.button("← Newer", disabled=len(cursors) == 1, key="hist_newer"):
+        cursors.pop()
+        st.rerun()
+    c_page.caption(f"Page {len(cursors)}")
+    if c_older.button("Older →", disabled=not page.next_cursor, key="hist_older"):
+        cursors.append(page.next_cursor)
+        st.rerun()
+
+    _render_rollback(page.records)
+
+
+def _render_rollback(records):
+    """Roll back member changes selected from the current history page."""
+    options = {
+        f"{r['timestamp'][:19].replace('T', ' ')} · {r['action']} · "
+        f"{r['target'] or r['target_id']} ({r['affected_count']})": r["id"]
+        for r in records
+        if r["utility"] in ENDPOINTS
+        and r["action"] in ROLLBACK_ACTIONS
+        and r["status"] in ROLLBACK_STATUSES
+    }
+    if not options:
+        return
+    with st.expander("↩️ Roll back actions"):
+        api = st.session_state.get("api")
+        if api is None:
+            st.caption("Connect to an org (or demo mode) to roll back actions.")
+            return
+        selected = st.multiselect(
+            "Group and queue member changes on this page",
+            list(options),
+            key="hist_rb_sel",
+        )
+        action_ids = [options[s] for s in selected]
+        engine = RollbackEngine(api, history=get_history())
+        if st.button("Preview", disabled=not action_ids, key="hist_rb_preview"):
+            try:
+                st.session_state.hist_rb_plan = engine.plan(action_ids)
+            except RollbackError as e:
+                st.session_state.hist_rb_plan = None
+                st.error(f"Cannot plan the rollback: {e}")
+
+        plan = st.session_state.get("hist_rb_plan")
+        if plan is None or set(plan.action_ids) | set(plan.skipped) != set(action_ids):
+            return
+        for action_id, reason in plan.skipped.items():
+            st.warning(f"{action_id}: {reason}")
+        cols = st.columns(3)
+        cols[0].metric("Changes", plan.change_count)
+        cols[1].metric("API calls", plan.request_count)
+        cols[2].metric("Already rolled back", sum(t.unchanged for t in plan.targets))
+        confirm = st.checkbox("I confirm this rollback", key="hist_rb_confirm")
+        if st.button(
+            "Roll back",
+            type="primary",
+            disabled=not (confirm and plan.action_ids),
+            key="hist_rb_run",
+        ):
+            bar = st.progress(0.0)
+            result = engine.run(
+                plan,
+                on_progress=lambda p: bar.progress(p.fraction, text=p.describe()),
+            )
+            st.session_state.hist_rb_plan = None
+            if result.status == "success":
+                st.success(f"Rolled back: {result.changed} membership changes.")
+            else:
+                st.warning(
+                    f"Rollback {result.status}: {result.changed} changed, "
+                    f"{result.failed} failed, {result.mismatched} not confirmed "
+                    "by the current membership."
+                )
+            for target in plan.targets:
+                for error in target.errors[:5]:
+                    st.error(f"{target.target}: {error}")
+
+
 # =============================================================================
 # Main
 # =============================================================================
@@ -998,6 +1338,21 @@ def page_storage_info():
 
 def main():
     init_session_state()
+
+    # Commit the storage writes of this rerun together (one write and fsync
+    # with the single-file backend). Writes are committed even when the run
+    # ends with st.rerun()/st.stop() or an error, as they were unbatched.
+    raised = None
+    with get_storage().batch():
+        try:
+            render_app()
+        except BaseException as e:
+            raised = e
+    if raised is not None:
+        raise raised
+
+
+def render_app():
     try_auto_auth()
 
     # Main sidebar
@@ -1018,6 +1373,10 @@ def main():
         page_utility()
     elif page == "storage_info":
         page_storage_info()
+    elif page == "jobs":
+        page_jobs()
+    elif page == "history":
+        page_history()
     else:
         page_home()
 
@@ -8,9 +8,11 @@ from .diagnostics import (
     EndpointResult,
     cache_report,
     clear_cached_report,
+    diagnostics_running,
     get_cached_report,
     render_diagnostics_summary,
     run_diagnostics,
+    start_diagnostics,
 )
 from .encrypted_storage import EncryptedStorage, get_storage
 from .services import (
@@ -22,15 +24,31 @@ from .services import (
     UsersEndpoint,
     validate_backend,
 )
+from .state import (
+    FileState,
+    MemoryState,
+    StateBackend,
+    StreamlitState,
+    get_state_backend,
+    set_state_backend,
+)
 
 __all__ = [
     "EncryptedStorage",
     "get_storage",
+    "StateBackend",
+    "StreamlitState",
+    "MemoryState",
+    "FileState",
+    "get_state_backend",
+    "set_state_backend",
     "DemoAPI",
     "DEMO_DATA",
     "is_demo_mode",
     "set_demo_mode",
     "run_diagnostics",
+    "start_diagnostics",
+    "diagnostics_running",
     "get_cached_report",
     "cache_report",
     "clear_cached_report",
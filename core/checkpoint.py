@@ -0,0 +1,381 @@
+"""
+Checkpoint Journal
+Encrypted, append-only journal of bulk job progress, so a job interrupted
+by a Streamlit rerun, browser refresh or process restart resumes exactly
+where it stopped instead of repeating API calls.
+
+Journals live in ~/.admin_layers/jobs/<job_id>.journal. Each line is a
+Fernet token wrapping one JSON event:
+    {"type": "header", ...}                            job description
+    {"type": "item", "phase", "key", "status", ...}    item finished
+    {"type": "complete", ...}                          job finished
+
+The job ID is derived from the operation, target, input items and
+details (e.g. proficiency), so submitting the same input again finds and
+resumes the unfinished journal, while the same users with another
+proficiency start a new job.
+Without a writable filesystem, journals are kept in process memory, which
+still survives reruns of the same server process.
+
+A journal holds user emails and IDs, so it is deleted as soon as its job
+completes. Journals of jobs never resumed are pruned after JOURNAL_MAX_AGE,
+and at most MAX_MEMORY_JOURNALS are kept in memory.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from .encrypted_storage import EncryptedStorage, get_storage
+
+# Flush to disk with fsync after this many item events
+FSYNC_EVERY = 50
+
+# Seconds an unfinished journal is kept after its last write
+JOURNAL_MAX_AGE = 7 * 24 * 3600
+
+# In-memory journals kept (oldest dropped first)
+MAX_MEMORY_JOURNALS = 100
+
+# In-memory journals (job_id -> encrypted lines) when no filesystem is available
+_memory_journals: Dict[str, List[str]] = {}
+
+
+@dataclass
+class CheckpointEntry:
+    """Recorded outcome of one item."""
+
+    status: str  # 'done' or 'failed'
+    data: Any = None
+    error: Optional[str] = None
+
+
+def make_job_id(
+    operation: str,
+    target_id: str,
+    items: Iterable[Any],
+    details: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Deterministic job ID for an operation (with details) over a list of items."""
+    digest = hashlib.sha256()
+    for part in [operation, target_id, *items]:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    if details:
+        # Jobs without details keep the IDs of earlier versions
+        digest.update(b"\1" + json.dumps(details, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:20]
+
+
+class JournalPhase:
+    """
+    View of a journal for one phase of a job (e.g. 'resolve', 'apply').
+
+    Passed to BulkExecutor.run(checkpoint=...) which skips items already
+    recorded as done and records every new outcome.
+    """
+
+    def __init__(self, journal: "JobJournal", name: str, keep_data: bool = False):
+        self.journal = journal
+        self.name = name
+        self.keep_data = keep_data
+
+    def get(self, key: str) -> Optional[CheckpointEntry]:
+        """Recorded outcome for an item, if any."""
+        return self.journal.get(self.name, key)
+
+    def record(
+        self, key: str, success: bool, data: Any = None, error: Optional[str] = None
+    ) -> None:
+        """Record an item outcome."""
+        self.journal.record(
+            self.name,
+            key,
+            "done" if success else "failed",
+            data=data if self.keep_data else None,
+            error=error,
+        )
+
+
+class JobJournal:
+    """
+    Checkpoint journal for one bulk job.
+
+    Usage:
+        journal = JobJournal.open("assign_skill", skill_id, emails)
+        if journal.resumed:
+            print(journal.counts())
+        executor.run(users, fn, checkpoint=journal.phase("apply"))
+        journal.complete()
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        storage: Optional[EncryptedStorage] = None,
+        jobs_dir: Optional[str] = None,
+    ):
+        """
+        Initialize journal (use JobJournal.open() to create or resume one).
+
+        Args:
+            job_id: Job identifier
+            storage: Encrypted storage providing the key (default: global)
+            jobs_dir: Directory for journal files (default: <storage>/jobs)
+        """
+        self.job_id = job_id
+        self._storage = storage or get_storage()
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, CheckpointEntry]] = {}
+        self._unsynced = 0
+        self._file = None
+        self.header: Optional[Dict[str, Any]] = None
+        self.completed = False
+        self.resumed = False
+
+        if jobs_dir is None and self._storage.storage_dir:
+            jobs_dir = os.path.join(self._storage.storage_dir, "jobs")
+        self.path: Optional[str] = None
+        if jobs_dir:
+            try:
+                os.makedirs(jobs_dir, exist_ok=True)
+                self.path = os.path.join(jobs_dir, f"{job_id}.journal")
+            except (OSError, PermissionError):
+                self.path = None
+
+    @classmethod
+    def open(
+        cls,
+        operation: str,
+        target_id: str,
+        items: List[Any],
+        storage: Optional[EncryptedStorage] = None,
+        jobs_dir: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None,
+    ) -> "JobJournal":
+        """
+        Open the journal for a job, resuming it if it was interrupted.
+
+        A journal whose job already completed is discarded, so running the
+        same input again starts a fresh job.
+
+        Args:
+            operation: Operation name (e.g. 'group_add_members')
+            target_id: Target entity ID
+            items: Input items (their order is part of the job identity)
+            storage: Encrypted storage providing the key
+            jobs_dir: Directory for journal files
+            details: Parameters of the job (e.g. proficiency), part of its
+                identity and stored in the header
+
+        Returns:
+            JobJournal ready for recording
+        """
+        journal = cls(
+            make_job_id(operation, target_id, items, details), storage, jobs_dir
+        )
+        journal._load()
+        if journal.completed:
+            journal.reset()
+        journal.resumed = any(journal._entries.values())
+        if journal.header is None:
+            journal._append(
+                {
+                    "type": "header",
+                    "job_id": journal.job_id,
+                    "operation": operation,
+                    "target_id": target_id,
+                    "total": len(items),
+                    "created_at": datetime.now().isoformat(),
+                    **(details or {}),
+                }
+            )
+        return journal
+
+    # -- persistence --
+
+    def _read_lines(self) -> List[str]:
+        if self.path:
+            if not os.path.exists(self.path):
+                return []
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return f.read().splitlines()
+            except (OSError, IOError):
+                return []
+        return list(_memory_journals.get(self.job_id, []))
+
+    def _load(self) -> None:
+        for line in self._read_lines():
+            decrypted = self._storage.decrypt(line.strip()) if line.strip() else None
+            if decrypted is None:
+                # Written with another key or truncated by a crash
+                continue
+            try:
+                self._apply(json.loads(decrypted))
+            except json.JSONDecodeError:
+                continue
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        kind = event.get("type")
+        if kind == "header":
+            self.header = event
+        elif kind == "item":
+            phase = self._entries.setdefault(event.get("phase", ""), {})
+            phase[event["key"]] = CheckpointEntry(
+                status=event.get("status", "done"),
+                data=event.get("data"),
+                error=event.get("error"),
+            )
+        elif kind == "complete":
+            self.completed = True
+
+    def _append(self, event: Dict[str, Any]) -> None:
+        self._apply(event)
+        line = self._storage.encrypt(json.dumps(event, default=str))
+        if not self.path:
+            if self.job_id not in _memory_journals:
+                while len(_memory_journals) >= MAX_MEMORY_JOURNALS:
+                    _memory_journals.pop(next(iter(_memory_journals)))
+                _memory_journals[self.job_id] = []
+            _memory_journals[self.job_id].append(line)
+            return
+        try:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= FSYNC_EVERY or event["type"] != "item":
+                self.sync()
+        except (OSError, IOError):
+            pass
+
+    def sync(self) -> None:
+        """Force recorded events to disk."""
+        if self._file is not None:
+            try:
+                os.fsync(self._file.fileno())
+            except (OSError, IOError):
+                pass
+        self._unsynced = 0
+
+    def close(self) -> None:
+        """Sync and close the journal file."""
+        with self._lock:
+            if self._file is not None:
+                self.sync()
+                self._file.close()
+                self._file = None
+
+    # -- recording --
+
+    def phase(self, name: str, keep_data: bool = False) -> JournalPhase:
+        """Get a view of this journal for one phase of the job."""
+        return JournalPhase(self, name, keep_data=keep_data)
+
+    def get(self, phase: str, key: str) -> Optional[CheckpointEntry]:
+        """Recorded outcome for an item in a phase, if any."""
+        return self._entries.get(phase, {}).get(key)
+
+    def record(
+        self,
+        phase: str,
+        key: str,
+        status: str,
+        data: Any = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Record the outcome of an item."""
+        event = {"type": "item", "phase": phase, "key": key, "status": status}
+        if data is not None:
+            event["data"] = data
+        if error:
+            event["error"] = error
+        with self._lock:
+            self._append(event)
+
+    def counts(self, phase: Optional[str] = None) -> Dict[str, int]:
+        """Number of done and failed items (in one phase or all)."""
+        counts = {"done": 0, "failed": 0}
+        phases = [phase] if phase else list(self._entries)
+        for name in phases:
+            for entry in self._entries.get(name, {}).values():
+                counts[entry.status] = counts.get(entry.status, 0) + 1
+        return counts
+
+    def complete(self, status: str = "success") -> None:
+        """
+        Mark the job finished and delete its journal.
+
+        The complete event is written first, so a journal that cannot be
+        deleted is still discarded by the next open(). Abandoned journals of
+        other jobs are pruned at the same time.
+        """
+        with self._lock:
+            self._append(
+                {
+                    "type": "complete",
+                    "status": status,
+                    "completed_at": datetime.now().isoformat(),
+                }
+            )
+        self.close()
+        with self._lock:
+            self._remove()
+        if self.path:
+            prune_journals(os.path.dirname(self.path))
+
+    def reset(self) -> None:
+        """Discard all recorded progress."""
+        self.close()
+        with self._lock:
+            self._remove()
+            self._entries = {}
+            self.header = None
+            self.completed = False
+            self.resumed = False
+
+    def _remove(self) -> None:
+        """Delete the journal file and its in-memory copy."""
+        if self.path and os.path.exists(self.path):
+            try:
+                os.remove(self.path)
+            except (OSError, IOError):
+                pass
+        _memory_journals.pop(self.job_id, None)
+
+
+def prune_journals(jobs_dir: str, max_age: float = JOURNAL_MAX_AGE) -> int:
+    """
+    Delete journals not written to for max_age seconds.
+
+    Args:
+        jobs_dir: Directory of journal files
+        max_age: Seconds since the last write
+
+    Returns:
+        Number of journals deleted
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        names = os.listdir(jobs_dir)
+    except (OSError, IOError):
+        return 0
+    for name in names:
+        if not name.endswith(".journal"):
+            continue
+        path = os.path.join(jobs_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except (OSError, IOError):
+            continue
+    return removed
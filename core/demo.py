@@ -15,6 +15,13 @@ from typing import Any, Dict, Generator, List, Optional
 
 import streamlit as st
 
+from genesys_cloud.membership import (
+    GROUP_MEMBER_BATCH_SIZE,
+    QUEUE_MEMBER_BATCH_SIZE,
+    SyncResult,
+    sync_members,
+)
+
 # =============================================================================
 # Demo Data
 # =============================================================================
@@ -297,6 +304,11 @@ class DemoUsersAPI:
                 return u
         return None
 
+    def find_by_email(self, email: str) -> MockAPIResponse:
+        return MockAPIResponse(
+            success=True, data=self.search_by_email(email), status_code=200
+        )
+
     def get_queues(self, user_id: str) -> List[Dict]:
         result = []
         for qid, members in DEMO_QUEUE_MEMBERS.items():
@@ -316,11 +328,23 @@ class DemoUsersAPI:
         return MockAPIResponse(success=True, data={"entities": result}, status_code=200)
 
     def list(
-        self, page_size: int = 100, max_pages: Optional[int] = None
+        self,
+        page_size: int = 100,
+        max_pages: Optional[int] = None,
+        expand: Optional[List[str]] = None,
     ) -> Generator[Dict, None, None]:
         for u in DEMO_USERS:
+            if expand and "skills" in expand:
+                u = {**u, "skills": DEMO_USER_SKILLS.get(u["id"], [])}
             yield u
 
+    def list_all(
+        self, page_size: int = 100, expand: Optional[List[str]] = None
+    ) -> MockAPIResponse:
+        return MockAPIResponse(
+            success=True, data=list(self.list(expand=expand)), status_code=200
+        )
+
     def list_page(self, page_size: int = 25, page_number: int = 1) -> MockAPIResponse:
         start = (page_number - 1) * page_size
         end = start + page_size
@@ -363,6 +387,11 @@ class DemoGroupsAPI:
     def get_members(self, group_id: str) -> List[Dict]:
         return DEMO_GROUP_MEMBERS.get(group_id, [])
 
+    def list_members(self, group_id: str) -> MockAPIResponse:
+        return MockAPIResponse(
+            success=True, data=list(self.get_members(group_id)), status_code=200
+        )
+
     def add_members(self, group_id: str, member_ids: List[str]) -> MockAPIResponse:
         members = DEMO_GROUP_MEMBERS.setdefault(group_id, [])
         existing_ids = {m["id"] for m in members}
@@ -380,10 +409,31 @@ class DemoGroupsAPI:
         DEMO_GROUP_MEMBERS[group_id] = [m for m in members if m["id"] not in member_ids]
         return MockAPIResponse(success=True, data=None, status_code=204)
 
+    def sync_members(
+        self,
+        group_id: str,
+        target_ids: List[str],
+        remove_extra: bool = True,
+        dry_run: bool = False,
+        current_ids: Optional[List[str]] = None,
+    ) -> SyncResult:
+        return sync_members(
+            self,
+            group_id,
+            target_ids,
+            GROUP_MEMBER_BATCH_SIZE,
+            remove_extra=remove_extra,
+            dry_run=dry_run,
+            current_ids=current_ids,
+        )
+
     def list(self, page_size: int = 100) -> Generator[Dict, None, None]:
         for g in DEMO_GROUPS:
             yield g
 
+    def list_all(self, page_size: int = 100) -> MockAPIResponse:
+        return MockAPIResponse(success=True, data=list(DEMO_GROUPS), status_code=200)
+
     def list_page(self, page_size: int = 25, page_number: int = 1) -> MockAPIResponse:
         start = (page_number - 1) * page_size
         end = start + page_size
@@ -452,6 +502,11 @@ class DemoQueuesAPI:
     def get_members(self, queue_id: str) -> List[Dict]:
         return DEMO_QUEUE_MEMBERS.get(queue_id, [])
 
+    def list_members(self, queue_id: str) -> MockAPIResponse:
+        return MockAPIResponse(
+            success=True, data=list(self.get_members(queue_id)), status_code=200
+        )
+
     def add_members(self, queue_id: str, member_ids: List[str]) -> MockAPIResponse:
         members = DEMO_QUEUE_MEMBERS.setdefault(queue_id, [])
         existing_ids = {m["id"] for m in members}
@@ -469,12 +524,33 @@ class DemoQueuesAPI:
         DEMO_QUEUE_MEMBERS[queue_id] = [m for m in members if m["id"] not in member_ids]
         return MockAPIResponse(success=True, data=None, status_code=200)
 
+    def sync_members(
+        self,
+        queue_id: str,
+        target_ids: List[str],
+        remove_extra: bool = True,
+        dry_run: bool = False,
+        current_ids: Optional[List[str]] = None,
+    ) -> SyncResult:
+        return sync_members(
+            self,
+            queue_id,
+            target_ids,
+            QUEUE_MEMBER_BATCH_SIZE,
+            remove_extra=remove_extra,
+            dry_run=dry_run,
+            current_ids=current_ids,
+        )
+
     def list(
         self, page_size: int = 100, max_pages: Optional[int] = None
     ) -> Generator[Dict, None, None]:
         for q in DEMO_QUEUES:
             yield q
 
+    def list_all(self, page_size: int = 100) -> MockAPIResponse:
+        return MockAPIResponse(success=True, data=list(DEMO_QUEUES), status_code=200)
+
     def list_page(self, page_size: int = 25, page_number: int = 1) -> MockAPIResponse:
         start = (page_number - 1) * page_size
         end = start + page_size
@@ -578,6 +654,11 @@ class DemoRoutingAPI:
     def get_user_skills(self, user_id: str) -> List[Dict]:
         return DEMO_USER_SKILLS.get(user_id, [])
 
+    def list_user_skills(self, user_id: str) -> MockAPIResponse:
+        return MockAPIResponse(
+            success=True, data=list(self.get_user_skills(user_id)), status_code=200
+        )
+
     def add_user_skill(
         self, user_id: str, skill_id: str, proficiency: float = 1.0
     ) -> MockAPIResponse:
@@ -595,6 +676,13 @@ class DemoRoutingAPI:
                 )
         return MockAPIResponse(success=True, data={"id": skill_id}, status_code=200)
 
+    def add_user_skills(self, user_id: str, skills: List[Dict]) -> MockAPIResponse:
+        for s in skills:
+            self.add_user_skill(user_id, s["id"], s.get("proficiency", 1.0))
+        return MockAPIResponse(
+            success=True, data=DEMO_USER_SKILLS.get(user_id, []), status_code=200
+        )
+
     def remove_user_skill(self, user_id: str, skill_id: str) -> MockAPIResponse:
         assignments = DEMO_USER_SKILLS.get(user_id, [])
         DEMO_USER_SKILLS[user_id] = [s for s in assignments if s.get("id") != skill_id]
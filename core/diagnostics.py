@@ -1,14 +1,30 @@
 """
 Diagnostics Module
 Tests all API endpoints on connect to verify the backend is healthy.
-Runs automatically when a session starts or credentials are saved.
+Runs automatically when a session starts or credentials are saved, in a
+background thread (start_diagnostics) so the UI does not wait on it.
+
+The running check and the last report are kept in a state backend
+(core.state, Streamlit's session by default), so diagnostics also run
+from CLI tools and the worker; only render_diagnostics_summary needs
+Streamlit.
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-import streamlit as st
+from genesys_cloud.scheduler import Priority, request_priority
+
+from .state import StateBackend, get_state_backend
+
+# Checks run concurrently
+DIAGNOSTIC_WORKERS = 4
+
+# Background diagnostic runs shared by every session
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="diagnostics")
 
 
 @dataclass
@@ -42,22 +58,24 @@ class DiagnosticReport:
         return self.passed + self.failed + self.skipped
 
 
-def run_diagnostics(api: Any, is_demo: bool = False) -> DiagnosticReport:
+def run_diagnostics(
+    api: Any, is_demo: bool = False, max_workers: int = DIAGNOSTIC_WORKERS
+) -> DiagnosticReport:
     """
     Run diagnostic checks against all API subsystems.
 
     Tests each endpoint with a lightweight read-only call to verify
-    the backend is reachable and responding correctly.
+    the backend is reachable and responding correctly. Checks run
+    concurrently at prefetch priority, so they never delay user actions.
 
     Args:
         api: API client (GenesysCloudAPI or DemoAPI)
         is_demo: Whether this is a demo backend
+        max_workers: Checks run at the same time
 
     Returns:
         DiagnosticReport with results for each endpoint
     """
-    import time
-
     report = DiagnosticReport(
         timestamp=datetime.now().isoformat(),
         backend="demo" if is_demo else "live",
@@ -74,12 +92,14 @@ def run_diagnostics(api: Any, is_demo: bool = False) -> DiagnosticReport:
         ("Skills - Get All", "routing.get_skills", _check_skills_all),
     ]
 
-    for name, endpoint, check_fn in checks:
+    def run_check(check: tuple) -> EndpointResult:
+        name, endpoint, check_fn = check
         start = time.time()
         try:
-            ok, msg = check_fn(api)
+            with request_priority(Priority.PREFETCH):
+                ok, msg = check_fn(api)
             elapsed = (time.time() - start) * 1000
-            result = EndpointResult(
+            return EndpointResult(
                 name=name,
                 endpoint=endpoint,
                 status="ok" if ok else "error",
@@ -88,7 +108,7 @@ def run_diagnostics(api: Any, is_demo: bool = False) -> DiagnosticReport:
             )
         except Exception as e:
             elapsed = (time.time() - start) * 1000
-            result = EndpointResult(
+            return EndpointResult(
                 name=name,
                 endpoint=endpoint,
                 status="error",
@@ -96,7 +116,8 @@ def run_diagnostics(api: Any, is_demo: bool = False) -> DiagnosticReport:
                 latency_ms=round(elapsed, 1),
             )
 
-        report.results.append(result)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        report.results = list(pool.map(run_check, checks))
 
     report.passed = sum(1 for r in report.results if r.status == "ok")
     report.failed = sum(1 for r in report.results if r.status == "error")
@@ -165,23 +186,60 @@ def _check_skills_all(api) -> tuple:
     return False, "get_skills returned unexpected type"
 
 
-def get_cached_report() -> Optional[DiagnosticReport]:
+def start_diagnostics(
+    api: Any, is_demo: bool = False, state: Optional[StateBackend] = None
+) -> None:
+    """Run diagnostics in the background; the report appears in get_cached_report()."""
+    state = state or get_state_backend()
+    state.set("_diagnostics_future", _executor.submit(run_diagnostics, api, is_demo))
+
+
+def diagnostics_running(state: Optional[StateBackend] = None) -> bool:
+    """Whether a background diagnostic run has not finished yet."""
+    future = (state or get_state_backend()).get("_diagnostics_future")
+    return future is not None and not future.done()
+
+
+def get_cached_report(
+    state: Optional[StateBackend] = None,
+) -> Optional[DiagnosticReport]:
     """Retrieve cached diagnostic report from session state."""
-    return st.session_state.get("_diagnostics_report")
+    state = state or get_state_backend()
+    future = state.get("_diagnostics_future")
+    if future is not None and future.done():
+        state.pop("_diagnostics_future", None)
+        try:
+            cache_report(future.result(), state)
+        except Exception as e:
+            cache_report(
+                DiagnosticReport(
+                    timestamp=datetime.now().isoformat(),
+                    results=[EndpointResult("Diagnostics", "-", "error", str(e))],
+                    failed=1,
+                ),
+                state,
+            )
+    return state.get("_diagnostics_report")
 
 
-def cache_report(report: DiagnosticReport) -> None:
+def cache_report(
+    report: DiagnosticReport, state: Optional[StateBackend] = None
+) -> None:
     """Cache diagnostic report in session state."""
-    st.session_state["_diagnostics_report"] = report
+    (state or get_state_backend()).set("_diagnostics_report", report)
 
 
-def clear_cached_report() -> None:
+def clear_cached_report(state: Optional[StateBackend] = None) -> None:
     """Clear cached diagnostic report."""
-    st.session_state.pop("_diagnostics_report", None)
+    state = state or get_state_backend()
+    state.pop("_diagnostics_report", None)
+    state.pop("_diagnostics_future", None)
 
 
 def render_diagnostics_summary(report: DiagnosticReport) -> None:
     """Render a compact diagnostics summary in Streamlit."""
+    import streamlit as st
+
     if report.all_ok:
         st.success(f"All {report.total} endpoints OK " f"({report.backend} backend)")
     else:
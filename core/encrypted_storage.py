@@ -8,27 +8,97 @@ Works in both local and hosted (Streamlit Community Cloud) environments:
 
 All sensitive data (credentials, tokens, history) is encrypted at rest using
 Fernet symmetric encryption (AES-128-CBC with HMAC-SHA256).
+
+Session state and secrets come from a state backend (core.state), which
+is Streamlit's session by default; CLI tools and the worker can pass a
+MemoryState or FileState and run without a Streamlit runtime.
+
+Decrypted values are cached in memory, keyed by the ciphertext they came
+from (the session-state token, or the file's mtime/size/inode), so the
+reads on every Streamlit rerun skip decryption and JSON parsing until the
+value changes.
+
+On disk, each key is a `{key}.enc` file by default. With
+ADMIN_LAYERS_STORAGE_BACKEND=single_file all keys share one append-only
+log (storage.kv, see core.kv_store): writes are atomic, batch() commits
+the writes of a rerun with one fsync, and sessions in several processes
+can share the file safely.
+
+Values are JSON; those of COMPRESS_THRESHOLD bytes or more are zlib-
+compressed before encryption. The encrypted payload starts with a format
+byte (FORMAT_JSON / FORMAT_ZLIB); payloads without one are plain JSON
+from earlier versions. On disk, tokens are kept as raw bytes rather than
+base64 text (a third smaller); text tokens from earlier versions are
+still read.
+
+Large values (org snapshots, history archive segments) use segmented
+stream encryption instead (see core.stream_crypto): store_stream() writes
+a `{key}.blob` file through an encrypting stream, and
+open_encrypted_writer()/open_encrypted_reader() give other modules
+file-like access, so neither side needs the whole ciphertext in memory.
 """
 
 import base64
 import hashlib
+import io
 import json
 import os
+import pickle
 import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
 
-import streamlit as st
 from cryptography.fernet import Fernet, InvalidToken
 
+from .kv_store import KVStore
+from .state import StateBackend, StreamlitState, get_state_backend
+from .stream_crypto import SEGMENT_SIZE, SegmentedCipher, StreamDecryptError
+
+# On-disk layouts (ADMIN_LAYERS_STORAGE_BACKEND)
+BACKEND_FILES = "files"
+BACKEND_SINGLE_FILE = "single_file"
+STORAGE_BACKENDS = (BACKEND_FILES, BACKEND_SINGLE_FILE)
+
+KV_FILE = "storage.kv"
+# Suffix given to {key}.enc files once imported into the single file
+MIGRATED_SUFFIX = ".migrated"
+
+# Files of values written with store_stream()
+BLOB_SUFFIX = ".blob"
+
+# Format byte of an encrypted value (legacy values start with JSON text)
+FORMAT_JSON = b"\x01"
+FORMAT_ZLIB = b"\x02"
+
+# JSON of at least this many bytes is compressed before encryption
+COMPRESS_THRESHOLD = 1024
+
+# First byte of a raw (not base64) Fernet token
+_FERNET_VERSION = b"\x80"
+
+
+def _token_from_disk(data: bytes) -> bytes:
+    """Fernet token (base64) from a stored raw or text token."""
+    if data[:1] == _FERNET_VERSION:
+        return base64.urlsafe_b64encode(data)
+    return data.strip()  # base64 text written by earlier versions
+
+
+def _token_to_disk(token: bytes) -> bytes:
+    return base64.urlsafe_b64decode(token)
+
 
 class EncryptedStorage:
     """
     Encrypted key-value storage for sensitive data.
 
     Encryption key priority:
-    1. st.secrets["encryption_key"] (for Streamlit Community Cloud)
+    1. Secret "encryption_key" of the state backend (st.secrets, for
+       Streamlit Community Cloud)
     2. ADMIN_LAYERS_KEY environment variable
     3. Auto-generated per-session key (stored in session state)
 
@@ -37,9 +107,33 @@ class EncryptedStorage:
     2. Session state (for hosted/ephemeral environments)
     """
 
-    def __init__(self):
+    def __init__(
+        self, backend: Optional[str] = None, state: Optional[StateBackend] = None
+    ):
+        """
+        Initialize storage.
+
+        Args:
+            backend: On-disk layout, "files" or "single_file" (default:
+                ADMIN_LAYERS_STORAGE_BACKEND, else "files")
+            state: Session state and secrets (default: process default,
+                see core.state)
+        """
+        self.state = state or get_state_backend()
+        backend = backend or os.environ.get(
+            "ADMIN_LAYERS_STORAGE_BACKEND", BACKEND_FILES
+        )
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage backend: {backend}")
+        self._backend = backend
+        self._kv: Optional[KVStore] = None
+        self._kv_lock = threading.Lock()
         self._fernet: Optional[Fernet] = None
+        self._cipher: Optional[SegmentedCipher] = None
         self._storage_dir: Optional[str] = None
+        # key -> (ciphertext version, value or pickled container, pickled?)
+        self._cache: Dict[str, Tuple[Any, Any, bool]] = {}
+        self._cache_lock = threading.Lock()
         self._init_encryption()
         self._init_storage_dir()
 
@@ -47,13 +141,10 @@ class EncryptedStorage:
         """Initialize the encryption key."""
         key = None
 
-        # 1. Try st.secrets
-        try:
-            secret_key = st.secrets.get("encryption_key")
-            if secret_key:
-                key = self._derive_key(secret_key)
-        except (FileNotFoundError, KeyError, AttributeError):
-            pass
+        # 1. Try secrets (st.secrets)
+        secret_key = self.state.secret("encryption_key")
+        if secret_key:
+            key = self._derive_key(secret_key)
 
         # 2. Try environment variable
         if key is None:
@@ -63,11 +154,16 @@ class EncryptedStorage:
 
         # 3. Auto-generate per-session key
         if key is None:
-            if "_encryption_key" not in st.session_state:
-                st.session_state._encryption_key = Fernet.generate_key().decode()
-            key = st.session_state._encryption_key.encode()
+            if "_encryption_key" not in self.state:
+                self.state.set("_encryption_key", Fernet.generate_key().decode())
+            key = self.state.get("_encryption_key").encode()
+
+        self._set_key(key)
 
+    def _set_key(self, key: bytes) -> None:
+        """Use a Fernet key for values and the streams derived from it."""
         self._fernet = Fernet(key)
+        self._cipher = SegmentedCipher(base64.urlsafe_b64decode(key))
 
     def _derive_key(self, passphrase: str) -> bytes:
         """Derive a Fernet-compatible key from a passphrase."""
@@ -96,15 +192,64 @@ class EncryptedStorage:
                 # No filesystem access - use session state only
                 self._storage_dir = None
 
+    @property
+    def storage_dir(self) -> Optional[str]:
+        """Local storage directory, or None when using session state only."""
+        return self._storage_dir
+
+    def _kv_store(self) -> Optional[KVStore]:
+        """The single-file store, or None for the {key}.enc layout."""
+        if self._backend != BACKEND_SINGLE_FILE or not self._storage_dir:
+            return None
+        path = os.path.join(self._storage_dir, KV_FILE)
+        with self._kv_lock:
+            if self._kv is None or self._kv.path != path:
+                self._kv = KVStore(path)
+                self._import_files(self._kv)
+            return self._kv
+
+    def _import_files(self, kv: KVStore) -> None:
+        """Move {key}.enc files written by the per-file layout into kv."""
+        names = [n for n in os.listdir(self._storage_dir) if n.endswith(".enc")]
+        if not names:
+            return
+        with kv.batch():
+            for name in names:
+                key = name[: -len(".enc")]
+                if key in kv:
+                    continue  # written since, the file is stale
+                try:
+                    with open(os.path.join(self._storage_dir, name), "rb") as f:
+                        kv.put(key, _token_to_disk(_token_from_disk(f.read())))
+                except OSError:
+                    continue
+        for name in names:
+            path = os.path.join(self._storage_dir, name)
+            try:
+                os.replace(path, path + MIGRATED_SUFFIX)
+            except OSError:
+                pass  # imported by another process
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Commit the stores and deletes in the block together.
+
+        With the single-file backend they become one atomic write and one
+        fsync; with the per-file layout this is a no-op.
+        """
+        kv = self._kv_store()
+        if kv is None:
+            yield
+            return
+        with kv.batch():
+            yield
+
     @property
     def is_persistent(self) -> bool:
         """Whether storage persists across sessions."""
         # Persistent if using file storage with a stable key (not auto-generated)
-        has_stable_key = False
-        try:
-            has_stable_key = bool(st.secrets.get("encryption_key"))
-        except (FileNotFoundError, KeyError, AttributeError):
-            pass
+        has_stable_key = bool(self.state.secret("encryption_key"))
         if not has_stable_key:
             has_stable_key = bool(os.environ.get("ADMIN_LAYERS_KEY"))
         return self._storage_dir is not None and has_stable_key
@@ -122,6 +267,188 @@ class EncryptedStorage:
         except (InvalidToken, Exception):
             return None
 
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        """Encrypt raw bytes (e.g. compressed files) into a Fernet token."""
+        assert self._fernet is not None, "Encryption not initialized"
+        return self._fernet.encrypt(data)
+
+    def decrypt_bytes(self, token: bytes) -> Optional[bytes]:
+        """Decrypt an encrypt_bytes() token. Returns None on failure."""
+        try:
+            assert self._fernet is not None, "Encryption not initialized"
+            return self._fernet.decrypt(token)
+        except (InvalidToken, Exception):
+            return None
+
+    # Streams (large values)
+
+    @contextmanager
+    def open_encrypted_writer(self, path: str) -> Iterator[BinaryIO]:
+        """
+        Write a file through segmented encryption.
+
+        The file is written next to path and renamed over it once the
+        block completes; if the block raises, path is left untouched.
+
+        Usage:
+            with storage.open_encrypted_writer(path) as out:
+                out.write(chunk)
+        """
+        assert self._cipher is not None, "Encryption not initialized"
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as raw:
+                writer = self._cipher.writer(raw)
+                try:
+                    yield writer
+                except BaseException:
+                    writer.abort()
+                    raise
+                writer.finish()
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def open_encrypted_reader(self, path: str) -> io.BufferedReader:
+        """
+        Open a file written by open_encrypted_writer() (seekable).
+
+        Raises:
+            OSError: If the file cannot be opened
+            StreamDecryptError: If it is not a stream under this key, or
+                (while reading) a segment fails authentication
+        """
+        assert self._cipher is not None, "Encryption not initialized"
+        raw = open(path, "rb")
+        try:
+            return self._cipher.reader(raw, close_raw=True)
+        except BaseException:
+            raw.close()
+            raise
+
+    def _blob_path(self, key: str) -> Optional[str]:
+        if not self._storage_dir:
+            return None
+        return os.path.join(self._storage_dir, f"{key}{BLOB_SUFFIX}")
+
+    def store_stream(self, key: str, value: Any) -> bool:
+        """
+        Store a large value, JSON-encoded straight into an encrypted stream.
+
+        Unlike store(), neither the JSON text nor the ciphertext is built in
+        memory as a whole. Without a storage directory this is store().
+
+        Returns:
+            True if stored successfully
+        """
+        path = self._blob_path(key)
+        if path is None:
+            return self.store(key, value)
+        self._cache_drop(key)
+        try:
+            with self.open_encrypted_writer(path) as out:
+                text = io.TextIOWrapper(
+                    io.BufferedWriter(out, SEGMENT_SIZE), encoding="utf-8"
+                )
+                json.dump(value, text, default=str)
+                text.flush()
+                text.detach().detach()
+            # Older copy written by store()
+            self._delete_value(key)
+            return True
+        except Exception:
+            return False
+
+    def retrieve_stream(self, key: str) -> Optional[Any]:
+        """
+        Retrieve a value stored with store_stream() (or store()).
+
+        Returns:
+            Decrypted value or None if not found/decryption fails
+        """
+        path = self._blob_path(key)
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            stat = None
+        if stat is None:
+            return self.retrieve(key)
+
+        version = ("blob", stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        hit, value = self._cache_get(key, version)
+        if hit:
+            return value
+        try:
+            with self.open_encrypted_reader(path) as reader:
+                value = json.load(io.TextIOWrapper(reader, encoding="utf-8"))
+        except (OSError, StreamDecryptError, ValueError):
+            return None
+        self._cache_put(key, version, value)
+        return value
+
+    # Value encoding
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        """JSON payload with its format byte, compressed when large."""
+        data = json.dumps(value, default=str).encode("utf-8")
+        if len(data) >= COMPRESS_THRESHOLD:
+            compressed = zlib.compress(data)
+            if len(compressed) < len(data):
+                return FORMAT_ZLIB + compressed
+        return FORMAT_JSON + data
+
+    @staticmethod
+    def _decode(payload: bytes) -> Any:
+        """
+        Value of a decrypted payload (any format).
+
+        Raises:
+            ValueError: If the payload is damaged
+        """
+        marker, body = payload[:1], payload[1:]
+        if marker == FORMAT_ZLIB:
+            try:
+                body = zlib.decompress(body)
+            except zlib.error as e:
+                raise ValueError(str(e))
+        elif marker != FORMAT_JSON:
+            body = payload  # earlier versions: JSON text only
+        text = body.decode("utf-8")
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return text
+
+    # Decrypted value cache
+
+    def _cache_get(self, key: str, version: Any) -> Tuple[bool, Any]:
+        """(hit, value) for a key whose ciphertext is still `version`."""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+        if entry is None or entry[0] != version:
+            return False, None
+        # Containers are handed out as copies, callers may mutate them
+        return True, pickle.loads(entry[1]) if entry[2] else entry[1]
+
+    def _cache_put(self, key: str, version: Any, value: Any) -> None:
+        container = isinstance(value, (dict, list))
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL) if container else value
+        with self._cache_lock:
+            self._cache[key] = (version, data, container)
+
+    def _cache_drop(self, key: str) -> None:
+        with self._cache_lock:
+            self._cache.pop(key, None)
+
+    def clear_cache(self) -> None:
+        """Forget all decrypted values (the next reads decrypt again)."""
+        with self._cache_lock:
+            self._cache.clear()
+
     def store(self, key: str, value: Any) -> bool:
         """
         Store a value with encryption.
@@ -133,20 +460,26 @@ class EncryptedStorage:
         Returns:
             True if stored successfully
         """
+        self._cache_drop(key)
         try:
-            json_data = json.dumps(value, default=str)
-            encrypted = self.encrypt(json_data)
+            token = self.encrypt_bytes(self._encode(value))
 
             # Store in session state (always)
-            if "_encrypted_store" not in st.session_state:
-                st.session_state._encrypted_store = {}
-            st.session_state._encrypted_store[key] = encrypted
+            store = self.state.setdefault("_encrypted_store", {})
+            store[key] = token.decode()
+            self.state.set("_encrypted_store", store)
 
             # Also persist to file if available
-            if self._storage_dir:
+            kv = self._kv_store()
+            if kv is not None:
+                kv.put(key, _token_to_disk(token))
+            elif self._storage_dir:
+                # Write a sibling and rename it, readers never see half a file
                 file_path = os.path.join(self._storage_dir, f"{key}.enc")
-                with open(file_path, "w") as f:
-                    f.write(encrypted)
+                tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(_token_to_disk(token))
+                os.replace(tmp_path, file_path)
 
             return True
         except Exception:
@@ -162,41 +495,78 @@ class EncryptedStorage:
         Returns:
             Decrypted value or None if not found/decryption fails
         """
-        encrypted = None
-
         # Try session state first (fastest)
-        store = st.session_state.get("_encrypted_store", {})
+        store = self.state.get("_encrypted_store", {})
         encrypted = store.get(key)
+        token = encrypted.encode() if encrypted is not None else None
+        version: Any = encrypted
 
         # Fall back to file storage
-        if encrypted is None and self._storage_dir:
+        file_path = None
+        kv = self._kv_store() if token is None else None
+        if kv is not None:
+            found = kv.get_versioned(key)
+            if found is None:
+                return None
+            token = _token_from_disk(found[0])
+            # Uncommitted values (open batch) are versioned by their token
+            version = found[1] or token
+        elif token is None and self._storage_dir:
             file_path = os.path.join(self._storage_dir, f"{key}.enc")
-            if os.path.exists(file_path):
-                try:
-                    with open(file_path, "r") as f:
-                        encrypted = f.read().strip()
-                except (OSError, IOError):
-                    pass
+            try:
+                stat = os.stat(file_path)
+                version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            except OSError:
+                return None
 
-        if encrypted is None:
+        if version is None:
             return None
 
-        decrypted = self.decrypt(encrypted)
-        if decrypted is None:
+        hit, value = self._cache_get(key, version)
+        if hit:
+            return value
+
+        if token is None:
+            try:
+                with open(file_path, "rb") as f:
+                    token = _token_from_disk(f.read())
+            except (OSError, IOError):
+                return None
+
+        payload = self.decrypt_bytes(token)
+        if payload is None:
             return None
 
         try:
-            return json.loads(decrypted)
-        except json.JSONDecodeError:
-            return decrypted
+            value = self._decode(payload)
+        except ValueError:
+            return None
+        self._cache_put(key, version, value)
+        return value
 
     def delete(self, key: str) -> bool:
         """Delete a stored value."""
+        self._cache_drop(key)
+        blob = self._blob_path(key)
         try:
-            store = st.session_state.get("_encrypted_store", {})
-            store.pop(key, None)
+            if blob and os.path.exists(blob):
+                os.remove(blob)
+        except OSError:
+            return False
+        return self._delete_value(key)
 
-            if self._storage_dir:
+    def _delete_value(self, key: str) -> bool:
+        """Delete the store() copy of a value."""
+        try:
+            store = self.state.get("_encrypted_store", {})
+            if store.pop(key, None) is not None:
+                self.state.set("_encrypted_store", store)
+
+            kv = self._kv_store()
+            if kv is not None:
+                if key in kv:
+                    kv.delete(key)
+            elif self._storage_dir:
                 file_path = os.path.join(self._storage_dir, f"{key}.enc")
                 if os.path.exists(file_path):
                     os.remove(file_path)
@@ -373,26 +743,59 @@ class EncryptedStorage:
         """Retrieve encrypted action history."""
         return self.retrieve("action_history")
 
+    # =========================================================================
+    # User Resolution Cache
+    # =========================================================================
+
+    def store_user_cache(self, scope: str, entries: Dict[str, Dict]) -> bool:
+        """Store the email -> user cache of one org (scope)."""
+        return self.store(f"user_cache_{scope}", entries)
+
+    def retrieve_user_cache(self, scope: str) -> Dict[str, Dict]:
+        """Retrieve the email -> user cache of one org (scope)."""
+        data = self.retrieve(f"user_cache_{scope}")
+        return data if isinstance(data, dict) else {}
+
+    def clear_user_cache(self, scope: str) -> bool:
+        """Clear the email -> user cache of one org (scope)."""
+        return self.delete(f"user_cache_{scope}")
+
+    def store_snapshot(self, scope: str, entries: Dict[str, Dict]) -> bool:
+        """Store the list-page snapshot of one org (scope)."""
+        return self.store_stream(f"snapshot_{scope}", entries)
+
+    def retrieve_snapshot(self, scope: str) -> Dict[str, Dict]:
+        """Retrieve the list-page snapshot of one org (scope)."""
+        data = self.retrieve_stream(f"snapshot_{scope}")
+        return data if isinstance(data, dict) else {}
+
+    def clear_snapshot(self, scope: str) -> bool:
+        """Clear the list-page snapshot of one org (scope)."""
+        return self.delete(f"snapshot_{scope}")
+
     def get_storage_info(self) -> Dict[str, Any]:
         """Get storage configuration info for display."""
-        has_secrets_key = False
-        try:
-            has_secrets_key = bool(st.secrets.get("encryption_key"))
-        except (FileNotFoundError, KeyError, AttributeError):
-            pass
-
+        has_secrets_key = bool(self.state.secret("encryption_key"))
         has_env_key = bool(os.environ.get("ADMIN_LAYERS_KEY"))
 
+        kv = self._kv_store()
         return {
             "backend": "filesystem" if self._storage_dir else "session_state",
             "storage_dir": self._storage_dir,
+            "layout": (
+                f"single file ({KV_FILE})"
+                if kv is not None
+                else "one file per key" if self._storage_dir else None
+            ),
             "persistent": self.is_persistent,
+            "state": self.state.name,
             "key_source": (
-                "st.secrets"
+                ("st.secrets" if isinstance(self.state, StreamlitState) else "secrets")
                 if has_secrets_key
                 else "environment" if has_env_key else "session (auto-generated)"
             ),
             "encryption": "Fernet (AES-128-CBC + HMAC-SHA256)",
+            "compression": f"zlib for values of {COMPRESS_THRESHOLD} bytes or more",
         }
 
 
@@ -0,0 +1,385 @@
+"""
+Job Queue Module
+Local SQLite queue of bulk jobs for the out-of-process worker
+(`python -m utilities.worker`).
+
+The UI enqueues jobs (add members, assign/remove skills, ...) and polls
+the cheap `job_progress` rows; the worker claims queued jobs, runs them
+with its own API client and writes progress as it goes. The UI pauses,
+resumes or cancels a job by setting its `control` column, which the
+worker checks between batches. Job payloads
+(email lists etc.) are encrypted with the same key as EncryptedStorage,
+so the UI and the worker must share a stable ADMIN_LAYERS_KEY or
+st.secrets["encryption_key"].
+"""
+
+import json
+import os
+import sqlite3
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .encrypted_storage import EncryptedStorage, get_storage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    target_name TEXT NOT NULL DEFAULT '',
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    worker_id TEXT,
+    summary TEXT,
+    control TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_progress (
+    job_id TEXT PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    succeeded INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    elapsed REAL NOT NULL DEFAULT 0,
+    requests_per_second REAL NOT NULL DEFAULT 0,
+    retries INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+"""
+
+# Columns added after the first release of the schema: table -> column DDL
+MIGRATIONS = {
+    "jobs": {"control": "control TEXT"},
+    "job_progress": {
+        "requests_per_second": "requests_per_second REAL NOT NULL DEFAULT 0",
+        "retries": "retries INTEGER NOT NULL DEFAULT 0",
+    },
+}
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = ("success", "partial", "failed", CANCELLED)
+
+# Control requests the UI can send to a job
+CONTROL_ACTIONS = ("pause", "resume", "cancel")
+
+
+@dataclass
+class Job:
+    """A queued bulk job."""
+
+    id: str
+    kind: str
+    target_id: str
+    target_name: str
+    payload: Dict[str, Any]
+    status: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    worker_id: Optional[str] = None
+    summary: Optional[Dict[str, Any]] = None
+    control: Optional[str] = None
+
+
+@dataclass
+class JobProgress:
+    """Latest progress row written by the worker."""
+
+    job_id: str
+    total: int = 0
+    completed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    requests_per_second: float = 0.0
+    retries: int = 0
+    updated_at: str = ""
+
+    @property
+    def fraction(self) -> float:
+        return self.completed / self.total if self.total else 0.0
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue shared by the UI and worker processes.
+
+    Usage:
+        queue = JobQueue()
+        job_id = queue.enqueue("assign_skill", skill_id, "English",
+                               {"emails": emails, "proficiency": 3.0})
+        ...
+        progress = queue.get_progress(job_id)
+    """
+
+    def __init__(
+        self, path: Optional[str] = None, storage: Optional[EncryptedStorage] = None
+    ):
+        """
+        Initialize queue, creating the database if needed.
+
+        Args:
+            path: SQLite file (default: ~/.admin_layers/jobs.db)
+            storage: Encrypted storage used for payload encryption
+        """
+        self._storage = storage or get_storage()
+        if path is None:
+            base = self._storage.storage_dir or os.path.join(
+                Path.home(), ".admin_layers"
+            )
+            os.makedirs(base, exist_ok=True)
+            path = os.path.join(base, "jobs.db")
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """Add columns missing from databases created by older versions."""
+        for table, columns in MIGRATIONS.items():
+            existing = {
+                row["name"] for row in conn.execute(f"PRAGMA table_info({table})")
+            }
+            for name, ddl in columns.items():
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {ddl}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _to_job(self, row: sqlite3.Row) -> Job:
+        decrypted = self._storage.decrypt(row["payload"])
+        return Job(
+            id=row["id"],
+            kind=row["kind"],
+            target_id=row["target_id"],
+            target_name=row["target_name"],
+            payload=json.loads(decrypted) if decrypted else {},
+            status=row["status"],
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            worker_id=row["worker_id"],
+            summary=json.loads(row["summary"]) if row["summary"] else None,
+            control=row["control"],
+        )
+
+    def enqueue(
+        self, kind: str, target_id: str, target_name: str, payload: Dict[str, Any]
+    ) -> str:
+        """
+        Add a job to the queue.
+
+        Args:
+            kind: Job kind (see utilities.jobs.JOB_KINDS)
+            target_id: Target entity ID
+            target_name: Human-readable target name
+            payload: Job parameters (encrypted at rest)
+
+        Returns:
+            Job ID
+        """
+        job_id = uuid.uuid4().hex[:12]
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, target_id, target_name, payload, "
+                "status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    kind,
+                    target_id,
+                    target_name,
+                    self._storage.encrypt(json.dumps(payload, default=str)),
+                    QUEUED,
+                    now,
+                ),
+            )
+            conn.execute(
+                "INSERT INTO job_progress (job_id, updated_at) VALUES (?, ?)",
+                (job_id, now),
+            )
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[Job]:
+        """
+        Atomically take the oldest queued job and mark it running.
+
+        Returns:
+            The claimed Job, or None if the queue is empty
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (QUEUED,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = datetime.now().isoformat()
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, worker_id = ? "
+                "WHERE id = ?",
+                (RUNNING, now, worker_id, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        job = self._to_job(row)
+        job.status, job.started_at, job.worker_id = RUNNING, now, worker_id
+        return job
+
+    def update_progress(
+        self,
+        job_id: str,
+        total: int,
+        completed: int,
+        succeeded: int,
+        failed: int,
+        elapsed: float,
+        requests_per_second: float = 0.0,
+        retries: int = 0,
+    ) -> None:
+        """Write the latest progress (and request telemetry) for a running job."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE job_progress SET total = ?, completed = ?, succeeded = ?, "
+                "failed = ?, elapsed = ?, requests_per_second = ?, retries = ?, "
+                "updated_at = ? WHERE job_id = ?",
+                (
+                    total,
+                    completed,
+                    succeeded,
+                    failed,
+                    elapsed,
+                    requests_per_second,
+                    retries,
+                    datetime.now().isoformat(),
+                    job_id,
+                ),
+            )
+
+    def set_control(self, job_id: str, action: str) -> None:
+        """
+        Ask the worker to pause, resume or cancel a job.
+
+        A job that is still queued is cancelled immediately.
+
+        Raises:
+            ValueError: If action is not one of CONTROL_ACTIONS
+        """
+        if action not in CONTROL_ACTIONS:
+            raise ValueError(f"Unknown control action: {action}")
+        with self._connect() as conn:
+            if action == "cancel":
+                conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ? "
+                    "WHERE id = ? AND status = ?",
+                    (CANCELLED, datetime.now().isoformat(), job_id, QUEUED),
+                )
+            conn.execute(
+                "UPDATE jobs SET control = ? WHERE id = ?",
+                (None if action == "resume" else action, job_id),
+            )
+
+    def get_control(self, job_id: str) -> Optional[str]:
+        """Pending control request for a job ('pause', 'cancel' or None)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT control FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return row["control"] if row else None
+
+    def finish(
+        self, job_id: str, status: str, summary: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Mark a job finished with 'success', 'partial' or 'failed'."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, summary = ? "
+                "WHERE id = ?",
+                (
+                    status,
+                    datetime.now().isoformat(),
+                    json.dumps(summary or {}, default=str),
+                    job_id,
+                ),
+            )
+
+    def requeue_stale(self, is_alive: Callable[[str], bool]) -> int:
+        """
+        Put jobs whose worker died back in the queue.
+
+        Safe because jobs resume from their checkpoint journal.
+
+        Args:
+            is_alive: Returns whether the worker with this ID is still running
+
+        Returns:
+            Number of jobs requeued
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, worker_id FROM jobs WHERE status = ?", (RUNNING,)
+            ).fetchall()
+            stale = [row["id"] for row in rows if not is_alive(row["worker_id"])]
+            for job_id in stale:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker_id = NULL WHERE id = ?",
+                    (QUEUED, job_id),
+                )
+        return len(stale)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by ID."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def get_progress(self, job_id: str) -> Optional[JobProgress]:
+        """Get the latest progress row for a job (cheap, no decryption)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM job_progress WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return JobProgress(**dict(row)) if row else None
+
+    def list_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Recent jobs with their progress, newest first.
+
+        Payloads are not decrypted, which keeps UI polling cheap.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT j.id, j.kind, j.target_id, j.target_name, j.status, "
+                "j.created_at, j.started_at, j.finished_at, j.summary, j.control, "
+                "p.total, p.completed, p.succeeded, p.failed, p.elapsed, "
+                "p.requests_per_second, p.retries, p.updated_at FROM jobs j LEFT JOIN job_progress p "
+                "ON p.job_id = j.id ORDER BY j.created_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job["summary"] = json.loads(job["summary"]) if job["summary"] else None
+            jobs.append(job)
+        return jobs
@@ -0,0 +1,367 @@
+"""
+Single-File Key-Value Store
+Append-only log of key/value records with an in-memory index, used by
+EncryptedStorage in place of one file per key (see
+ADMIN_LAYERS_STORAGE_BACKEND).
+
+File format:
+    MAGIC | file ID (8), then frames of  length (4) | crc32 (4) | payload
+    payload = op (1) | key length (2) | key (UTF-8) | value
+
+Writes are grouped into transactions: the frames of a transaction are
+followed by a COMMIT frame and written with one write() and one fsync().
+Readers only apply transactions whose COMMIT frame is intact, so a crash
+mid-write loses the unfinished transaction and nothing else. Concurrent
+writers in a process share an fsync (group commit); batch() groups the
+writes of a block, e.g. one Streamlit rerun, into one transaction.
+
+Processes coordinate through an exclusive lock on a sidecar lock file
+while appending or compacting. Readers take no lock: each read opens the
+file and catches up with frames appended since the last one, or rebuilds
+the index if compaction replaced the file. Compaction rewrites the live
+records to a temporary file and renames it over the log.
+"""
+
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MAGIC = b"ALKV\x00\x01\n"
+# Random per file, so readers notice a compacted (replaced) log
+_FILE_ID_SIZE = 8
+_HEADER_SIZE = len(MAGIC) + _FILE_ID_SIZE
+
+# Frame operations
+OP_PUT = 1
+OP_DELETE = 2
+OP_COMMIT = 3
+
+_FRAME = struct.Struct(">II")  # payload length, crc32
+_ENTRY = struct.Struct(">BH")  # op, key length
+
+# Compact when dead records take more than half of a log at least this big
+COMPACT_MIN_BYTES = 1024 * 1024
+
+
+def _frame(op: int, key: str = "", value: bytes = b"") -> bytes:
+    raw_key = key.encode("utf-8")
+    payload = _ENTRY.pack(op, len(raw_key)) + raw_key + value
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+class _FileLock:
+    """Exclusive advisory lock on a sidecar file (between processes)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            yield
+        finally:
+            if fcntl is None:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            os.close(fd)  # also releases flock
+
+
+class KVStore:
+    """
+    Byte values by string key in one append-only file.
+
+    Usage:
+        kv = KVStore(os.path.join(storage_dir, "storage.kv"))
+        kv.put("gc_credentials", token)
+        with kv.batch():
+            kv.put("user_profiles", a)
+            kv.put("active_profile_id", b)   # one write, one fsync
+        value = kv.get("gc_credentials")
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        """
+        Open (or create) a store.
+
+        Args:
+            path: Log file path (a "<path>.lock" file is created next to it)
+            fsync: Flush commits to disk (False for tests and benchmarks)
+        """
+        self.path = path
+        self.fsync = fsync
+        self._lock = _FileLock(path + ".lock")
+        self._mutex = threading.RLock()  # index and group commit state
+        self._commit_lock = threading.Lock()  # one appending thread at a time
+        self._local = threading.local()  # per-thread batch
+        # key -> (value offset, value length, frame length)
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        self._file_id: Optional[bytes] = None
+        self._end = 0  # end of the last committed transaction read
+        self._live = 0  # bytes of frames still referenced by the index
+        # Group commit: ops waiting for the next append, numbered by ticket
+        self._pending: List[Tuple[int, str, bytes]] = []
+        self._submitted = 0
+        self._done = 0  # tickets appended (or failed)
+        self._errors: Dict[int, Exception] = {}
+        self.commits = 0  # appends (fsyncs) by this instance
+        with self._lock.hold():
+            if not os.path.exists(path) or os.path.getsize(path) < _HEADER_SIZE:
+                self._write_new(path, b"")
+
+    def _write_new(self, path: str, frames: bytes) -> None:
+        """Write a complete log file with a new file ID."""
+        with open(path, "wb") as f:
+            f.write(MAGIC + os.urandom(_FILE_ID_SIZE) + frames)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._sync_dir()
+
+    def _sync_dir(self) -> None:
+        """Make renames in the store's directory durable."""
+        if not self.fsync or fcntl is None:
+            return  # directories cannot be opened on Windows
+        fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    # Index
+
+    def _scan(self, f, start: int) -> int:
+        """
+        Apply the committed transactions from `start` (call with mutex held).
+
+        Returns:
+            End offset of the last intact transaction
+        """
+        f.seek(start)
+        data = f.read()
+        pos = 0
+        committed = 0
+        txn: List[Tuple[int, str, int, int, int]] = []
+        while pos + _FRAME.size <= len(data):
+            length, crc = _FRAME.unpack_from(data, pos)
+            body = pos + _FRAME.size
+            payload = data[body : body + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break  # torn tail
+            op, key_length = _ENTRY.unpack_from(payload)
+            end = body + length
+            if op == OP_COMMIT:
+                for t_op, key, offset, size, frame_size in txn:
+                    old = self._index.pop(key, None)
+                    if old is not None:
+                        self._live -= old[2]
+                    if t_op == OP_PUT:
+                        self._index[key] = (offset, size, frame_size)
+                        self._live += frame_size
+                txn = []
+                committed = end
+            else:
+                value_at = body + _ENTRY.size + key_length
+                key = data[body + _ENTRY.size : value_at].decode("utf-8")
+                txn.append((op, key, start + value_at, end - value_at, end - pos))
+            pos = end
+        return start + committed
+
+    def _refresh(self, f) -> None:
+        """Catch up with the log open as f (call with mutex held)."""
+        f.seek(0)
+        header = f.read(_HEADER_SIZE)
+        if header[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a key-value store")
+        if header[len(MAGIC) :] != self._file_id:
+            # First read, or the log was compacted: rebuild the index
+            self._index = {}
+            self._live = 0
+            self._file_id = header[len(MAGIC) :]
+            self._end = _HEADER_SIZE
+        if os.fstat(f.fileno()).st_size > self._end:
+            self._end = self._scan(f, self._end)
+
+    # Reads
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Value of a key (None if missing)."""
+        found = self.get_versioned(key)
+        return found[0] if found else None
+
+    def get_versioned(self, key: str) -> Optional[Tuple[bytes, Optional[Tuple]]]:
+        """
+        Value of a key with a version that changes whenever it is rewritten.
+
+        Returns:
+            (value, version) or None if missing; the version is None for a
+            value written in this thread's open batch
+        """
+        pending = self._batch_op(key)
+        if pending is not None:
+            op, value = pending
+            return (value, None) if op == OP_PUT else None
+        with self._mutex, open(self.path, "rb") as f:
+            self._refresh(f)
+            location = self._index.get(key)
+            if location is None:
+                return None
+            f.seek(location[0])
+            return f.read(location[1]), (self._file_id, location[0])
+
+    def keys(self) -> List[str]:
+        """Stored keys (committed ones)."""
+        with self._mutex, open(self.path, "rb") as f:
+            self._refresh(f)
+            return sorted(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get_versioned(key) is not None
+
+    # Writes
+
+    def _batch_op(self, key: str) -> Optional[Tuple[int, bytes]]:
+        """Latest op on a key in this thread's open batch (read your writes)."""
+        for op, op_key, value in reversed(getattr(self._local, "ops", ())):
+            if op_key == key:
+                return op, value
+        return None
+
+    def put(self, key: str, value: bytes) -> None:
+        """Set a key (committed now, or when the enclosing batch() ends)."""
+        self._submit([(OP_PUT, key, bytes(value))])
+
+    def delete(self, key: str) -> None:
+        """Remove a key (committed now, or when the enclosing batch() ends)."""
+        self._submit([(OP_DELETE, key, b"")])
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Commit this thread's writes in the block as one transaction.
+
+        Nested batches join the outermost one. If the block raises, its
+        writes are discarded.
+        """
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            self._local.ops = []
+        self._local.depth = depth + 1
+        try:
+            yield
+        except BaseException:
+            if depth == 0:
+                self._local.ops = []
+            raise
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                ops, self._local.ops = self._local.ops, []
+                if ops:
+                    self._commit(ops)
+
+    def _submit(self, ops: List[Tuple[int, str, bytes]]) -> None:
+        if getattr(self._local, "depth", 0):
+            self._local.ops.extend(ops)
+        else:
+            self._commit(ops)
+
+    def _commit(self, ops: List[Tuple[int, str, bytes]]) -> None:
+        """
+        Append ops as one transaction, sharing the write with other threads.
+
+        Whoever gets the commit lock appends everything submitted so far;
+        threads whose ops went out in that append return without writing.
+        """
+        with self._mutex:
+            self._pending.append((OP_COMMIT, "", b""))
+            self._pending[-1:-1] = ops
+            self._submitted += 1
+            ticket = self._submitted
+        with self._commit_lock:
+            with self._mutex:
+                if self._done >= ticket:
+                    error = self._errors.pop(ticket, None)
+                    if error is not None:
+                        raise error
+                    return
+                batch, self._pending = self._pending, []
+                upto = self._submitted
+            try:
+                self._append(batch)
+            except Exception as e:
+                with self._mutex:
+                    for failed in range(self._done + 1, upto + 1):
+                        if failed != ticket:
+                            self._errors[failed] = e
+                    self._done = upto
+                raise
+            with self._mutex:
+                self._done = upto
+
+    def _append(self, ops: List[Tuple[int, str, bytes]]) -> None:
+        frames = b"".join(_frame(op, key, value) for op, key, value in ops)
+        with self._lock.hold(), self._mutex:
+            with open(self.path, "r+b") as f:
+                self._refresh(f)
+                # Drop a torn transaction left by a crashed writer
+                f.truncate(self._end)
+                f.seek(self._end)
+                f.write(frames)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+                self.commits += 1
+                self._end = self._scan(f, self._end)
+            if self._should_compact():
+                self._compact()
+
+    # Compaction
+
+    def _should_compact(self) -> bool:
+        return self._end >= COMPACT_MIN_BYTES and self._live * 2 < self._end
+
+    def compact(self) -> None:
+        """Rewrite the log with the live records only."""
+        with self._commit_lock, self._lock.hold(), self._mutex:
+            with open(self.path, "rb") as f:
+                self._refresh(f)
+            self._compact()
+
+    def _compact(self) -> None:
+        """Compact (call with the file lock and mutex held, index current)."""
+        with open(self.path, "rb") as f:
+            frames = []
+            for key, (offset, length, _) in sorted(self._index.items()):
+                f.seek(offset)
+                frames.append(_frame(OP_PUT, key, f.read(length)))
+        if frames:
+            frames.append(_frame(OP_COMMIT))
+        tmp = f"{self.path}.{os.getpid()}.compact"
+        try:
+            self._write_new(tmp, b"".join(frames))
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._sync_dir()
+        with open(self.path, "rb") as f:
+            self._refresh(f)
+
+    @property
+    def size(self) -> int:
+        """Bytes of the log file."""
+        return os.path.getsize(self.path)
@@ -0,0 +1,904 @@
+"""
+Org Mirror
+Local SQLite copy of an org's users, groups, queues, skills and their
+memberships, served through the BackendService interface.
+
+    mirror = get_mirror(scope="org-a")
+    mirror.sync(api)                 # parallel initial sync, deltas after
+    backend = MirrorAPI(mirror, api)
+    backend.users.search("alice")    # answered from the local index
+
+The app syncs it from the Storage page (where list pages and searches
+can be switched to it); `admin-layers-worker --sync-mirror` syncs it
+from the command line, e.g. on a schedule.
+
+Reads come from the mirror; writes go to the live API and, when they
+succeed, are applied to the mirror too. Syncs are incremental: every
+listing is fetched (pages in parallel) and only entities whose change
+token (version / dateModified / memberCount) moved are rewritten, with
+their member lists or skills fetched again. Changes the API does not
+version (e.g. a user's skills) are picked up by sync(api, full=True).
+
+The file holds directory data (names, emails) unencrypted so it can be
+indexed; it is created owner-only (0600) in the same private directory
+as the job queue.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional
+
+from genesys_cloud.membership import (
+    GROUP_MEMBER_BATCH_SIZE,
+    QUEUE_MEMBER_BATCH_SIZE,
+    SyncResult,
+    member_ids,
+    sync_members,
+)
+from genesys_cloud.scheduler import Priority, request_priority
+
+from .encrypted_storage import EncryptedStorage, get_storage
+from .services import ServiceResponse
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    email TEXT NOT NULL DEFAULT '',
+    token TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_name ON users (name COLLATE NOCASE, id);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users (email);
+CREATE TABLE IF NOT EXISTS groups (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    token TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_groups_name ON groups (name COLLATE NOCASE, id);
+CREATE TABLE IF NOT EXISTS queues (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    token TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_queues_name ON queues (name COLLATE NOCASE, id);
+CREATE TABLE IF NOT EXISTS skills (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    token TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_skills_name ON skills (name COLLATE NOCASE, id);
+CREATE TABLE IF NOT EXISTS group_members (
+    group_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (group_id, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_group_members_user ON group_members (user_id);
+CREATE TABLE IF NOT EXISTS queue_members (
+    queue_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (queue_id, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_queue_members_user ON queue_members (user_id);
+CREATE TABLE IF NOT EXISTS user_skills (
+    user_id TEXT NOT NULL,
+    skill_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, skill_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_user_skills_skill ON user_skills (skill_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    resource TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Concurrent API calls during a sync
+MIRROR_WORKERS = 8
+
+# Entities per listing page
+SYNC_PAGE_SIZE = 100
+
+# Maximum rows returned by a search (like one page of the search APIs)
+SEARCH_LIMIT = 100
+
+# Resource -> page fetcher over a backend client
+LISTERS: Dict[str, Callable[[Any, int, int], Any]] = {
+    "users": lambda api, size, page: api.users.list_page(size, page),
+    "groups": lambda api, size, page: api.groups.list_page(size, page),
+    "queues": lambda api, size, page: api.queues.list_page(size, page),
+    "skills": lambda api, size, page: api.routing.list_skills_page(size, page),
+}
+
+# Member resource -> (member table, entity column)
+MEMBER_TABLES = {
+    "groups": ("group_members", "group_id"),
+    "queues": ("queue_members", "queue_id"),
+}
+
+
+class MirrorSyncError(Exception):
+    """A listing or member fetch failed; the mirror was left unchanged."""
+
+
+def change_token(entity: Dict[str, Any]) -> str:
+    """
+    Token that changes whenever the entity does.
+
+    Uses the API's version/dateModified (plus memberCount, which moves on
+    membership changes) and falls back to a hash of the whole entity for
+    backends without version fields (demo mode).
+    """
+    if "version" in entity or "dateModified" in entity:
+        return "|".join(
+            str(entity.get(key, ""))
+            for key in ("version", "dateModified", "memberCount")
+        )
+    encoded = json.dumps(entity, sort_keys=True, default=str).encode()
+    return hashlib.sha1(encoded).hexdigest()
+
+
+@dataclass
+class MirrorSyncResult:
+    """Outcome of one OrgMirror.sync()."""
+
+    full: bool
+    fetched: Dict[str, int] = field(default_factory=dict)  # listed per resource
+    changed: Dict[str, int] = field(default_factory=dict)  # new or modified
+    deleted: Dict[str, int] = field(default_factory=dict)
+    calls: int = 0  # API calls made
+    elapsed: float = 0.0
+
+    @property
+    def total_changed(self) -> int:
+        return sum(self.changed.values()) + sum(self.deleted.values())
+
+
+def mirror_path(
+    scope: Optional[str] = None, storage: Optional[EncryptedStorage] = None
+) -> str:
+    """Default database file of a scope's mirror (its directory is created)."""
+    storage = storage or get_storage()
+    base = storage.storage_dir or os.path.join(Path.home(), ".admin_layers")
+    os.makedirs(base, exist_ok=True)
+    return os.path.join(base, f"mirror_{scope}.db" if scope else "mirror.db")
+
+
+class OrgMirror:
+    """
+    Indexed SQLite mirror of one org.
+
+    Thread-safe: every operation opens its own connection, and sync()
+    writes all of its changes in one transaction, so readers never see a
+    half-applied sync.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        scope: Optional[str] = None,
+        storage: Optional[EncryptedStorage] = None,
+        workers: int = MIRROR_WORKERS,
+    ):
+        """
+        Initialize mirror, creating the database if needed.
+
+        Args:
+            path: SQLite file (default: ~/.admin_layers/mirror[_scope].db)
+            scope: Org identifier used in the default file name
+            storage: Encrypted storage whose directory holds the file
+            workers: Concurrent API calls during a sync
+        """
+        self.path = path or mirror_path(scope, storage)
+        self.workers = workers
+        self._sync_lock = threading.Lock()
+        # Private before the first byte is written (SQLite gives the -wal
+        # and -shm files the database's mode)
+        os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+        os.chmod(self.path, 0o600)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # Reads
+
+    @staticmethod
+    def _check(resource: str) -> None:
+        if resource not in LISTERS:
+            raise ValueError(f"Unknown resource: {resource}")
+
+    def get(self, resource: str, entity_id: str) -> Optional[Dict]:
+        """Entity by ID, or None if not mirrored."""
+        self._check(resource)
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT data FROM {resource} WHERE id = ?", (entity_id,)
+            ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def search(
+        self, resource: str, query: str, limit: int = SEARCH_LIMIT
+    ) -> List[Dict]:
+        """Entities whose name (or, for users, email) contains query."""
+        self._check(resource)
+        pattern = (
+            "%"
+            + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            + "%"
+        )
+        where = "name LIKE ? ESCAPE '\\'"
+        params: List[Any] = [pattern]
+        if resource == "users":
+            where += " OR email LIKE ? ESCAPE '\\'"
+            params.append(pattern.lower())
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT data FROM {resource} WHERE {where} "
+                "ORDER BY name COLLATE NOCASE, id LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def find_user_by_email(self, email: str) -> Optional[Dict]:
+        """User with this exact email (case-insensitive), or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data FROM users WHERE email = ?", (email.strip().lower(),)
+            ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def count(self, resource: str) -> int:
+        self._check(resource)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {resource}").fetchone()[0]
+
+    def page(self, resource: str, page_size: int = 25, page_number: int = 1) -> Dict:
+        """One page of a resource, in the shape of the API's list responses."""
+        self._check(resource)
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM {resource}").fetchone()[0]
+            rows = conn.execute(
+                f"SELECT data FROM {resource} ORDER BY name COLLATE NOCASE, id "
+                "LIMIT ? OFFSET ?",
+                (page_size, (page_number - 1) * page_size),
+            ).fetchall()
+        return {
+            "entities": [json.loads(row["data"]) for row in rows],
+            "pageNumber": page_number,
+            "pageSize": page_size,
+            "pageCount": max(1, (total + page_size - 1) // page_size),
+            "total": total,
+        }
+
+    def iter_all(self, resource: str) -> Generator[Dict, None, None]:
+        """Every entity of a resource, ordered by name."""
+        self._check(resource)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT data FROM {resource} ORDER BY name COLLATE NOCASE, id"
+            ).fetchall()
+        for row in rows:
+            yield json.loads(row["data"])
+
+    def members(self, resource: str, entity_id: str) -> List[Dict]:
+        """Members of a group ('groups') or queue ('queues')."""
+        table, column = MEMBER_TABLES[resource]
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT data FROM {table} WHERE {column} = ?", (entity_id,)
+            ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def memberships(self, resource: str, user_id: str) -> List[Dict]:
+        """Groups ('groups') or queues ('queues') a user belongs to."""
+        table, column = MEMBER_TABLES[resource]
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT e.data FROM {table} m JOIN {resource} e ON e.id = m.{column} "
+                "WHERE m.user_id = ? ORDER BY e.name COLLATE NOCASE",
+                (user_id,),
+            ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def user_skills(self, user_id: str) -> List[Dict]:
+        """Skills assigned to a user."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT data FROM user_skills WHERE user_id = ?", (user_id,)
+            ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def synced_at(self) -> Optional[float]:
+        """Time of the last completed sync, or None if never synced."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MIN(synced_at), COUNT(*) FROM sync_state"
+            ).fetchone()
+        return row[0] if row[1] == len(LISTERS) else None
+
+    # Local writes (applied after successful live writes)
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, resource: str, entity: Dict) -> None:
+        data = json.dumps(entity, default=str)
+        if resource == "users":
+            conn.execute(
+                "INSERT OR REPLACE INTO users (id, name, email, token, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    entity["id"],
+                    entity.get("name") or "",
+                    (entity.get("email") or "").lower(),
+                    change_token(entity),
+                    data,
+                ),
+            )
+        else:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {resource} (id, name, token, data) "
+                "VALUES (?, ?, ?, ?)",
+                (entity["id"], entity.get("name") or "", change_token(entity), data),
+            )
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, resource: str, entity_id: str) -> None:
+        conn.execute(f"DELETE FROM {resource} WHERE id = ?", (entity_id,))
+        if resource in MEMBER_TABLES:
+            table, column = MEMBER_TABLES[resource]
+            conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (entity_id,))
+        elif resource == "users":
+            for table, _ in MEMBER_TABLES.values():
+                conn.execute(f"DELETE FROM {table} WHERE user_id = ?", (entity_id,))
+            conn.execute("DELETE FROM user_skills WHERE user_id = ?", (entity_id,))
+        elif resource == "skills":
+            conn.execute("DELETE FROM user_skills WHERE skill_id = ?", (entity_id,))
+
+    @staticmethod
+    def _replace_members(
+        conn: sqlite3.Connection, resource: str, entity_id: str, members: List[Dict]
+    ) -> None:
+        table, column = MEMBER_TABLES[resource]
+        conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (entity_id,))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {table} ({column}, user_id, data) "
+            "VALUES (?, ?, ?)",
+            [
+                (entity_id, uid, json.dumps(m, default=str))
+                for uid, m in zip(member_ids(members), members)
+            ],
+        )
+
+    @staticmethod
+    def _replace_skills(
+        conn: sqlite3.Connection, user_id: str, skills: List[Dict]
+    ) -> None:
+        conn.execute("DELETE FROM user_skills WHERE user_id = ?", (user_id,))
+        conn.executemany(
+            "INSERT OR REPLACE INTO user_skills (user_id, skill_id, data) "
+            "VALUES (?, ?, ?)",
+            [(user_id, s["id"], json.dumps(s, default=str)) for s in skills],
+        )
+
+    def upsert(self, resource: str, entity: Dict) -> None:
+        """Insert or replace one entity."""
+        self._check(resource)
+        with self._connect() as conn:
+            self._upsert(conn, resource, entity)
+
+    def delete(self, resource: str, entity_id: str) -> None:
+        """Delete one entity and its membership rows."""
+        self._check(resource)
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            self._delete(conn, resource, entity_id)
+            conn.execute("COMMIT")
+
+    def add_members(self, resource: str, entity_id: str, ids: Iterable[str]) -> None:
+        """Record users as members (member data taken from the users table)."""
+        table, column = MEMBER_TABLES[resource]
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            for uid in ids:
+                row = conn.execute(
+                    "SELECT data FROM users WHERE id = ?", (uid,)
+                ).fetchone()
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {table} ({column}, user_id, data) "
+                    "VALUES (?, ?, ?)",
+                    (entity_id, uid, row["data"] if row else json.dumps({"id": uid})),
+                )
+            conn.execute("COMMIT")
+
+    def remove_members(self, resource: str, entity_id: str, ids: Iterable[str]) -> None:
+        table, column = MEMBER_TABLES[resource]
+        with self._connect() as conn:
+            conn.executemany(
+                f"DELETE FROM {table} WHERE {column} = ? AND user_id = ?",
+                [(entity_id, uid) for uid in ids],
+            )
+
+    def set_user_skills(self, user_id: str, skills: List[Dict]) -> None:
+        """Add or update skill assignments ({id, proficiency}) of a user."""
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            for skill in skills:
+                row = conn.execute(
+                    "SELECT name FROM skills WHERE id = ?", (skill["id"],)
+                ).fetchone()
+                entry = {
+                    "id": skill["id"],
+                    "name": row["name"] if row else "",
+                    "state": "active",
+                    "proficiency": skill.get("proficiency", 1.0),
+                }
+                conn.execute(
+                    "INSERT OR REPLACE INTO user_skills (user_id, skill_id, data) "
+                    "VALUES (?, ?, ?)",
+                    (user_id, skill["id"], json.dumps(entry)),
+                )
+            conn.execute("COMMIT")
+
+    def remove_user_skill(self, user_id: str, skill_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM user_skills WHERE user_id = ? AND skill_id = ?",
+                (user_id, skill_id),
+            )
+
+    def clear(self) -> None:
+        """Delete all mirrored data (the next sync is a full one)."""
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            for table in (*LISTERS, "group_members", "queue_members", "user_skills"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.execute("DELETE FROM sync_state")
+            conn.execute("COMMIT")
+
+    # Syncing
+
+    def sync(self, api: Any, full: bool = False) -> MirrorSyncResult:
+        """
+        Bring the mirror up to date with the org.
+
+        All listings are fetched in parallel (page 1 of each resource, then
+        every remaining page); member lists and user skills are fetched
+        only for new or changed entities. Nothing is written unless every
+        fetch succeeded.
+
+        Args:
+            api: Live backend client
+            full: Refetch every member list and user's skills (implied on
+                the first sync)
+
+        Returns:
+            MirrorSyncResult
+
+        Raises:
+            MirrorSyncError: If a fetch failed
+        """
+        with self._sync_lock:
+            started = time.monotonic()
+            result = MirrorSyncResult(full=full or self.synced_at() is None)
+            calls = [0]
+            calls_lock = threading.Lock()
+
+            def call(fn: Callable[[], Any]) -> Any:
+                with calls_lock:
+                    calls[0] += 1
+                with request_priority(Priority.PREFETCH):
+                    return fn()
+
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                listings = self._fetch_listings(api, pool, call)
+                changed: Dict[str, List[Dict]] = {}
+                deleted: Dict[str, List[str]] = {}
+                with self._connect() as conn:
+                    for resource, entities in listings.items():
+                        stored = {
+                            row["id"]: row["token"]
+                            for row in conn.execute(f"SELECT id, token FROM {resource}")
+                        }
+                        changed[resource] = [
+                            e
+                            for e in entities
+                            if result.full or stored.get(e["id"]) != change_token(e)
+                        ]
+                        fetched_ids = {e["id"] for e in entities}
+                        deleted[resource] = [i for i in stored if i not in fetched_ids]
+
+                member_futures = {
+                    (resource, e["id"]): pool.submit(
+                        call,
+                        lambda r=resource, i=e["id"]: _listing(
+                            getattr(api, r).list_members(i), f"{r} {i} members"
+                        ),
+                    )
+                    for resource in MEMBER_TABLES
+                    for e in changed[resource]
+                }
+                skill_futures = {
+                    e["id"]: pool.submit(
+                        call,
+                        lambda i=e["id"]: _listing(
+                            api.routing.list_user_skills(i), f"user {i} skills"
+                        ),
+                    )
+                    for e in changed["users"]
+                }
+                members = {key: _result(f) for key, f in member_futures.items()}
+                skills = {key: _result(f) for key, f in skill_futures.items()}
+
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute("BEGIN")
+                for resource, entities in listings.items():
+                    for entity in changed[resource]:
+                        self._upsert(conn, resource, entity)
+                    for entity_id in deleted[resource]:
+                        self._delete(conn, resource, entity_id)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO sync_state (resource, synced_at, count)"
+                        " VALUES (?, ?, ?)",
+                        (resource, now, len(entities)),
+                    )
+                    result.fetched[resource] = len(entities)
+                    result.changed[resource] = len(changed[resource])
+                    result.deleted[resource] = len(deleted[resource])
+                for (resource, entity_id), entity_members in members.items():
+                    self._replace_members(conn, resource, entity_id, entity_members)
+                for user_id, user_skills in skills.items():
+                    self._replace_skills(conn, user_id, user_skills)
+                conn.execute("COMMIT")
+
+            result.calls = calls[0]
+            result.elapsed = time.monotonic() - started
+            return result
+
+    @staticmethod
+    def _fetch_listings(
+        api: Any, pool: ThreadPoolExecutor, call: Callable
+    ) -> Dict[str, List[Dict]]:
+        """Every entity of every resource, pages fetched concurrently."""
+
+        def fetch(resource: str, page: int) -> Dict:
+            response = call(lambda: LISTERS[resource](api, SYNC_PAGE_SIZE, page))
+            if not response.success:
+                raise MirrorSyncError(
+                    f"Listing {resource} page {page} failed: {response.error}"
+                )
+            return response.data or {}
+
+        firsts = {r: pool.submit(fetch, r, 1) for r in LISTERS}
+        pages: Dict[str, List[Future]] = {}
+        listings: Dict[str, List[Dict]] = {}
+        for resource, future in firsts.items():
+            first = _result(future)
+            listings[resource] = list(first.get("entities", []))
+            pages[resource] = [
+                pool.submit(fetch, resource, n)
+                for n in range(2, first.get("pageCount", 1) + 1)
+            ]
+        for resource, futures in pages.items():
+            for future in futures:
+                listings[resource].extend(_result(future).get("entities", []))
+        # Pages can overlap when entities move between requests; keep one
+        for resource, entities in listings.items():
+            listings[resource] = list({e["id"]: e for e in entities}.values())
+        return listings
+
+
+def _listing(response: Any, what: str) -> List[Dict]:
+    """Data of a complete listing (a partial one would drop rows)."""
+    if not response.success:
+        raise MirrorSyncError(f"Listing {what} failed: {response.error}")
+    return response.data or []
+
+
+def _result(future: Future) -> Any:
+    """Future result, with unexpected errors raised as MirrorSyncError."""
+    try:
+        return future.result()
+    except MirrorSyncError:
+        raise
+    except Exception as e:
+        raise MirrorSyncError(str(e)) from e
+
+
+# Shared mirrors, one per database file (sync() serializes on the instance)
+_mirrors: Dict[str, OrgMirror] = {}
+_mirrors_lock = threading.Lock()
+
+
+def get_mirror(
+    scope: Optional[str] = None, storage: Optional[EncryptedStorage] = None
+) -> OrgMirror:
+    """Shared mirror of an org (default file of the scope)."""
+    path = mirror_path(scope, storage)
+    with _mirrors_lock:
+        mirror = _mirrors.get(path)
+        if mirror is None:
+            mirror = _mirrors[path] = OrgMirror(path)
+        return mirror
+
+
+# =============================================================================
+# BackendService adapter
+# =============================================================================
+
+
+def _ok(data: Any) -> ServiceResponse:
+    return ServiceResponse(success=True, data=data, status_code=200)
+
+
+def _entity(data: Any) -> Optional[Dict]:
+    """Entity returned by a successful write, if the response carries one."""
+    return data if isinstance(data, dict) and data.get("id") else None
+
+
+class _MirrorEndpoint:
+    """Reads from the mirror; writes to the live endpoint, then the mirror."""
+
+    resource = ""
+
+    def __init__(self, mirror: OrgMirror, live: Any):
+        self._mirror = mirror
+        self._live = live
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._live, name)
+
+    def get(self, entity_id: str) -> ServiceResponse:
+        entity = self._mirror.get(self.resource, entity_id)
+        if entity is not None:
+            return _ok(entity)
+        response = self._live.get(entity_id)
+        if response.success and _entity(response.data):
+            self._mirror.upsert(self.resource, response.data)
+        return response
+
+    def search(self, query: str) -> List[Dict]:
+        return self._mirror.search(self.resource, query)
+
+    def list(self, page_size: int = 100) -> Generator[Dict, None, None]:
+        yield from self._mirror.iter_all(self.resource)
+
+    def list_all(self, page_size: int = 100) -> ServiceResponse:
+        return _ok(list(self.list()))
+
+    def list_page(self, page_size: int = 25, page_number: int = 1) -> ServiceResponse:
+        return _ok(self._mirror.page(self.resource, page_size, page_number))
+
+    def update(self, entity_id: str, data: Dict[str, Any]) -> Any:
+        response = self._live.update(entity_id, data)
+        if response.success:
+            entity = _entity(response.data)
+            if entity is None:
+                entity = {**(self._mirror.get(self.resource, entity_id) or {}), **data}
+                entity["id"] = entity_id
+            self._mirror.upsert(self.resource, entity)
+        return response
+
+
+class _MirrorMembersEndpoint(_MirrorEndpoint):
+    batch_size = 0
+
+    def create(self, *args: Any, **kwargs: Any) -> Any:
+        response = self._live.create(*args, **kwargs)
+        if response.success and _entity(response.data):
+            self._mirror.upsert(self.resource, response.data)
+        return response
+
+    def delete(self, entity_id: str) -> Any:
+        response = self._live.delete(entity_id)
+        if response.success:
+            self._mirror.delete(self.resource, entity_id)
+        return response
+
+    def get_members(self, entity_id: str) -> List[Dict]:
+        return self._mirror.members(self.resource, entity_id)
+
+    def list_members(self, entity_id: str) -> ServiceResponse:
+        return _ok(self.get_members(entity_id))
+
+    def add_members(self, entity_id: str, ids: List[str]) -> Any:
+        response = self._live.add_members(entity_id, ids)
+        if response.success:
+            self._mirror.add_members(self.resource, entity_id, ids)
+        return response
+
+    def remove_members(self, entity_id: str, ids: List[str]) -> Any:
+        response = self._live.remove_members(entity_id, ids)
+        if response.success:
+            self._mirror.remove_members(self.resource, entity_id, ids)
+        return response
+
+    def sync_members(
+        self,
+        entity_id: str,
+        target_ids: List[str],
+        remove_extra: bool = True,
+        dry_run: bool = False,
+        current_ids: Optional[List[str]] = None,
+    ) -> SyncResult:
+        return sync_members(
+            self,
+            entity_id,
+            target_ids,
+            self.batch_size,
+            remove_extra=remove_extra,
+            dry_run=dry_run,
+            current_ids=current_ids,
+        )
+
+
+class MirrorUsers(_MirrorEndpoint):
+    resource = "users"
+
+    def search(self, query: str, fields: Optional[List[str]] = None) -> List[Dict]:
+        return self._mirror.search("users", query)
+
+    def search_by_email(self, email: str) -> Optional[Dict]:
+        return self._mirror.find_user_by_email(email)
+
+    def find_by_email(self, email: str) -> ServiceResponse:
+        return _ok(self._mirror.find_user_by_email(email))
+
+    def list(
+        self,
+        page_size: int = 100,
+        max_pages: Optional[int] = None,
+        expand: Optional[List[str]] = None,
+    ) -> Generator[Dict, None, None]:
+        limit = page_size * max_pages if max_pages else None
+        for index, user in enumerate(self._mirror.iter_all("users")):
+            if limit is not None and index >= limit:
+                return
+            if expand and "skills" in expand:
+                user = {**user, "skills": self._mirror.user_skills(user["id"])}
+            yield user
+
+    def list_all(
+        self, page_size: int = 100, expand: Optional[List[str]] = None
+    ) -> ServiceResponse:
+        return _ok(list(self.list(expand=expand)))
+
+    def get_queues(self, user_id: str) -> List[Dict]:
+        return self._mirror.memberships("queues", user_id)
+
+    def get_groups(self, user_id: str) -> ServiceResponse:
+        return _ok({"entities": self._mirror.memberships("groups", user_id)})
+
+
+class MirrorGroups(_MirrorMembersEndpoint):
+    resource = "groups"
+    batch_size = GROUP_MEMBER_BATCH_SIZE
+
+
+class MirrorQueues(_MirrorMembersEndpoint):
+    resource = "queues"
+    batch_size = QUEUE_MEMBER_BATCH_SIZE
+
+
+class MirrorRouting(_MirrorEndpoint):
+    """Skills and user skills from the mirror; languages etc. stay live."""
+
+    resource = "skills"
+
+    def get_skills(self) -> List[Dict]:
+        return list(self._mirror.iter_all("skills"))
+
+    def get_skill(self, skill_id: str) -> ServiceResponse:
+        skill = self._mirror.get("skills", skill_id)
+        if skill is not None:
+            return _ok(skill)
+        response = self._live.get_skill(skill_id)
+        if response.success and _entity(response.data):
+            self._mirror.upsert("skills", response.data)
+        return response
+
+    def list_skills_page(
+        self, page_size: int = 25, page_number: int = 1
+    ) -> ServiceResponse:
+        return self.list_page(page_size, page_number)
+
+    def get_user_skills(self, user_id: str) -> List[Dict]:
+        return self._mirror.user_skills(user_id)
+
+    def list_user_skills(self, user_id: str) -> ServiceResponse:
+        return _ok(self.get_user_skills(user_id))
+
+    def add_user_skill(
+        self, user_id: str, skill_id: str, proficiency: float = 1.0
+    ) -> Any:
+        response = self._live.add_user_skill(user_id, skill_id, proficiency)
+        if response.success:
+            self._mirror.set_user_skills(
+                user_id, [{"id": skill_id, "proficiency": proficiency}]
+            )
+        return response
+
+    def add_user_skills(self, user_id: str, skills: List[Dict]) -> Any:
+        response = self._live.add_user_skills(user_id, skills)
+        if response.success:
+            self._mirror.set_user_skills(user_id, skills)
+        return response
+
+    def remove_user_skill(self, user_id: str, skill_id: str) -> Any:
+        response = self._live.remove_user_skill(user_id, skill_id)
+        if response.success:
+            self._mirror.remove_user_skill(user_id, skill_id)
+        return response
+
+    def create_skill(self, name: str, description: str, state: str) -> Any:
+        response = self._live.create_skill(name, description, state)
+        if response.success and _entity(response.data):
+            self._mirror.upsert("skills", response.data)
+        return response
+
+    def update_skill(self, skill_id: str, data: Dict[str, Any]) -> Any:
+        response = self._live.update_skill(skill_id, data)
+        if response.success:
+            self._mirror.upsert(
+                "skills",
+                _entity(response.data)
+                or {**(self._mirror.get("skills", skill_id) or {}), **data},
+            )
+        return response
+
+    def delete_skill(self, skill_id: str) -> Any:
+        response = self._live.delete_skill(skill_id)
+        if response.success:
+            self._mirror.delete("skills", skill_id)
+        return response
+
+
+class MirrorAPI:
+    """
+    BackendService over an OrgMirror.
+
+    Reads are answered locally; writes go to the live client and are
+    applied to the mirror when they succeed. Everything else (scheduler,
+    metrics, conversations, ...) is the live client's.
+
+    Usage:
+        backend = MirrorAPI(mirror, api)
+        resp = backend.users.list_page(page_size=25, page_number=1)
+    """
+
+    def __init__(self, mirror: OrgMirror, api: Any):
+        self.mirror = mirror
+        self.live = api
+        self.users = MirrorUsers(mirror, api.users)
+        self.groups = MirrorGroups(mirror, api.groups)
+        self.queues = MirrorQueues(mirror, api.queues)
+        self.routing = MirrorRouting(mirror, api.routing)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_") or name == "live":
+            raise AttributeError(name)
+        return getattr(self.live, name)
+
+    def sync(self, full: bool = False) -> MirrorSyncResult:
+        """Sync the mirror from the live client."""
+        return self.mirror.sync(self.live, full=full)
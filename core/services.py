@@ -4,7 +4,8 @@ Defines the backend interface (Protocol classes) that all backends must implemen
 This makes the backend extensible and easily swappable between:
   - Live Genesys Cloud API
   - Demo mode (in-memory mock data)
-  - Future: local database, file-based, etc.
+  - Local SQLite mirror (core/mirror.py, reads only; writes go live)
+  - Future: file-based, etc.
 
 Each resource type has a standard set of endpoints:
   - list_page: paginated listing
@@ -53,10 +54,23 @@ class UsersEndpoint(Protocol):
         """Find a single user by exact email match."""
         ...
 
+    def find_by_email(self, email: str) -> ServiceResponse:
+        """Exact email match; data is the user or None, failure means error."""
+        ...
+
     def list(
-        self, page_size: int = 100, max_pages: Optional[int] = None
+        self,
+        page_size: int = 100,
+        max_pages: Optional[int] = None,
+        expand: Optional[List[str]] = None,
     ) -> Generator[Dict, None, None]:
-        """Iterate all users."""
+        """Iterate all users (expand=["skills"] adds their routing skills)."""
+        ...
+
+    def list_all(
+        self, page_size: int = 100, expand: Optional[List[str]] = None
+    ) -> ServiceResponse:
+        """Get all users (fails if any page fails)."""
         ...
 
     def list_page(self, page_size: int = 25, page_number: int = 1) -> ServiceResponse:
@@ -92,6 +106,10 @@ class GroupsEndpoint(Protocol):
         """Iterate all groups."""
         ...
 
+    def list_all(self, page_size: int = 100) -> ServiceResponse:
+        """Get all groups (fails if any page fails)."""
+        ...
+
     def list_page(self, page_size: int = 25, page_number: int = 1) -> ServiceResponse:
         """Get a single page of groups."""
         ...
@@ -114,6 +132,10 @@ class GroupsEndpoint(Protocol):
         """Get all members of a group."""
         ...
 
+    def list_members(self, group_id: str) -> ServiceResponse:
+        """Get all members of a group (fails if any page fails)."""
+        ...
+
     def add_members(self, group_id: str, member_ids: List[str]) -> ServiceResponse:
         """Add members to a group."""
         ...
@@ -122,6 +144,17 @@ class GroupsEndpoint(Protocol):
         """Remove members from a group."""
         ...
 
+    def sync_members(
+        self,
+        group_id: str,
+        target_ids: List[str],
+        remove_extra: bool = True,
+        dry_run: bool = False,
+        current_ids: Optional[List[str]] = None,
+    ) -> Any:
+        """Reconcile members to a target list (returns a SyncResult)."""
+        ...
+
 
 @runtime_checkable
 class QueuesEndpoint(Protocol):
@@ -139,6 +172,10 @@ class QueuesEndpoint(Protocol):
         """Iterate all queues."""
         ...
 
+    def list_all(self, page_size: int = 100) -> ServiceResponse:
+        """Get all queues (fails if any page fails)."""
+        ...
+
     def list_page(self, page_size: int = 25, page_number: int = 1) -> ServiceResponse:
         """Get a single page of queues."""
         ...
@@ -159,6 +196,10 @@ class QueuesEndpoint(Protocol):
         """Get all members of a queue."""
         ...
 
+    def list_members(self, queue_id: str) -> ServiceResponse:
+        """Get all members of a queue (fails if any page fails)."""
+        ...
+
     def add_members(self, queue_id: str, member_ids: List[str]) -> ServiceResponse:
         """Add members to a queue."""
         ...
@@ -167,6 +208,17 @@ class QueuesEndpoint(Protocol):
         """Remove members from a queue."""
         ...
 
+    def sync_members(
+        self,
+        queue_id: str,
+        target_ids: List[str],
+        remove_extra: bool = True,
+        dry_run: bool = False,
+        current_ids: Optional[List[str]] = None,
+    ) -> Any:
+        """Reconcile members to a target list (returns a SyncResult)."""
+        ...
+
 
 @runtime_checkable
 class RoutingEndpoint(Protocol):
@@ -190,12 +242,20 @@ class RoutingEndpoint(Protocol):
         """Get skills assigned to a user."""
         ...
 
+    def list_user_skills(self, user_id: str) -> ServiceResponse:
+        """Get all skills of a user (fails if any page fails)."""
+        ...
+
     def add_user_skill(
         self, user_id: str, skill_id: str, proficiency: float = 1.0
     ) -> ServiceResponse:
         """Assign a skill to a user."""
         ...
 
+    def add_user_skills(self, user_id: str, skills: List[Dict]) -> ServiceResponse:
+        """Assign several skills ({id, proficiency}) to a user in one call."""
+        ...
+
     def remove_user_skill(self, user_id: str, skill_id: str) -> ServiceResponse:
         """Remove a skill from a user."""
         ...
@@ -260,7 +320,9 @@ def validate_backend(api: Any) -> List[str]:
                 "get",
                 "search",
                 "search_by_email",
+                "find_by_email",
                 "list_page",
+                "list_all",
                 "update",
                 "get_queues",
                 "get_groups",
@@ -272,12 +334,15 @@ def validate_backend(api: Any) -> List[str]:
                 "get",
                 "search",
                 "list_page",
+                "list_all",
                 "create",
                 "update",
                 "delete",
                 "get_members",
+                "list_members",
                 "add_members",
                 "remove_members",
+                "sync_members",
             ]:
                 if not hasattr(sub, method):
                     errors.append(f"Missing: {attr}.{method}")
@@ -286,12 +351,15 @@ def validate_backend(api: Any) -> List[str]:
                 "get",
                 "search",
                 "list_page",
+                "list_all",
                 "create",
                 "update",
                 "delete",
                 "get_members",
+                "list_members",
                 "add_members",
                 "remove_members",
+                "sync_members",
             ]:
                 if not hasattr(sub, method):
                     errors.append(f"Missing: {attr}.{method}")
@@ -301,7 +369,9 @@ def validate_backend(api: Any) -> List[str]:
                 "get_skill",
                 "list_skills_page",
                 "get_user_skills",
+                "list_user_skills",
                 "add_user_skill",
+                "add_user_skills",
                 "remove_user_skill",
                 "create_skill",
                 "update_skill",
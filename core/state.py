@@ -0,0 +1,294 @@
+"""
+State Backends
+Where EncryptedStorage, ActionHistory and diagnostics keep per-session
+state and look up secrets, so they also run without a Streamlit runtime
+(CLI tools, the background worker, benchmarks).
+
+Backends:
+- StreamlitState: st.session_state / st.secrets of the current session
+  (default when Streamlit is installed)
+- MemoryState: a dict in this process
+- FileState: a dict in this process, saved to a JSON file so the next
+  run of a CLI tool or worker sees it (values that are not JSON, e.g.
+  futures, stay in memory)
+
+The process default comes from set_state_backend(), else from
+ADMIN_LAYERS_STATE_BACKEND ("streamlit", "memory" or "file", the file
+being ADMIN_LAYERS_STATE_FILE or ~/.admin_layers/state.json). Memory and
+file backends created from the environment serve the deployment's
+.streamlit/secrets.toml (see load_secrets()).
+
+Usage:
+    from core.state import MemoryState, set_state_backend
+    set_state_backend(MemoryState(secrets={"encryption_key": "..."}))
+    storage = get_storage()   # no Streamlit session needed
+"""
+
+import base64
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+STATE_BACKENDS = ("streamlit", "memory", "file")
+
+STATE_FILE = "state.json"
+
+# Never written by FileState: an auto-generated encryption key next to the
+# data it encrypts would defeat the encryption
+UNSAVED_KEYS = frozenset({"_encryption_key"})
+
+
+class StateBackend(ABC):
+    """Per-session key-value state plus read-only secrets."""
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        """Value of a key, or default."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        """Set a key."""
+
+    @abstractmethod
+    def pop(self, key: str, default: Any = None) -> Any:
+        """Remove a key and return its value (default if missing)."""
+
+    @abstractmethod
+    def __contains__(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def secret(self, name: str) -> Any:
+        """A configured secret (None if not set)."""
+
+    def setdefault(self, key: str, default: Any) -> Any:
+        """Value of a key, set to default first if missing."""
+        if key not in self:
+            self.set(key, default)
+        return self.get(key)
+
+    @property
+    def name(self) -> str:
+        """Short label for diagnostics and the storage page."""
+        return type(self).__name__
+
+
+class StreamlitState(StateBackend):
+    """st.session_state and st.secrets (of whichever session is running)."""
+
+    @staticmethod
+    def _session() -> Any:
+        import streamlit as st
+
+        return st.session_state
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._session().get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        self._session()[key] = value
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        return self._session().pop(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._session()
+
+    def secret(self, name: str) -> Any:
+        try:
+            import streamlit as st
+
+            return st.secrets.get(name)
+        except (ImportError, FileNotFoundError, KeyError, AttributeError):
+            return None
+
+    @property
+    def name(self) -> str:
+        return "streamlit session"
+
+
+def load_secrets() -> Dict[str, Any]:
+    """
+    The deployment's secrets (.streamlit/secrets.toml, as st.secrets reads
+    them without a session), or {} if there are none.
+    """
+    try:
+        import streamlit as st
+
+        return st.secrets.to_dict()
+    except (ImportError, FileNotFoundError, KeyError, AttributeError):
+        return {}
+
+
+class MemoryState(StateBackend):
+    """State in a dict of this process (shared by all its threads)."""
+
+    def __init__(self, secrets: Optional[Dict[str, Any]] = None):
+        """
+        Initialize state.
+
+        Args:
+            secrets: Secrets to serve (e.g. {"encryption_key": ...})
+        """
+        self._data: Dict[str, Any] = {}
+        self._secrets = dict(secrets or {})
+        self._lock = threading.RLock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def setdefault(self, key: str, default: Any) -> Any:
+        with self._lock:
+            return self._data.setdefault(key, default)
+
+    def secret(self, name: str) -> Any:
+        return self._secrets.get(name)
+
+    @property
+    def name(self) -> str:
+        return "process memory"
+
+
+def _to_json(value: Any) -> Any:
+    """JSON form of bytes and deques (tagged so they load back)."""
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, deque):
+        return {"__deque__": list(value), "maxlen": value.maxlen}
+    raise TypeError(f"{type(value).__name__} is not stored")
+
+
+def _from_json(obj: Dict[str, Any]) -> Any:
+    if "__bytes__" in obj:
+        return base64.b64decode(obj["__bytes__"])
+    if "__deque__" in obj:
+        return deque(obj["__deque__"], maxlen=obj.get("maxlen"))
+    return obj
+
+
+class FileState(MemoryState):
+    """
+    MemoryState saved to a JSON file after every change.
+
+    Values are saved as they are when set; mutating a stored container in
+    place is saved with the next change (or save()).
+    """
+
+    def __init__(self, path: str, secrets: Optional[Dict[str, Any]] = None):
+        """
+        Initialize state, loading the file if it exists.
+
+        Args:
+            path: JSON file
+            secrets: Secrets to serve (e.g. {"encryption_key": ...})
+        """
+        super().__init__(secrets)
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f, object_hook=_from_json)
+            if isinstance(data, dict):
+                self._data.update(data)
+        except (OSError, ValueError):
+            pass
+
+    def save(self) -> None:
+        """Write the JSON-serializable values to the file (atomically)."""
+        with self._lock:
+            stored = {}
+            for key, value in self._data.items():
+                if key in UNSAVED_KEYS:
+                    continue
+                try:
+                    stored[key] = json.loads(json.dumps(value, default=_to_json))
+                except (TypeError, ValueError):
+                    continue  # kept in memory only
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(stored, f)
+            os.replace(tmp, self.path)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            super().set(key, value)
+            self.save()
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            missing = key not in self._data
+            value = super().pop(key, default)
+            if not missing:
+                self.save()
+            return value
+
+    def setdefault(self, key: str, default: Any) -> Any:
+        with self._lock:
+            if key not in self._data:
+                self.set(key, default)
+            return self._data[key]
+
+    @property
+    def name(self) -> str:
+        return f"file ({self.path})"
+
+
+# Process default
+_state_backend: Optional[StateBackend] = None
+_state_lock = threading.Lock()
+
+
+def _default_backend() -> StateBackend:
+    choice = os.environ.get("ADMIN_LAYERS_STATE_BACKEND")
+    if choice and choice not in STATE_BACKENDS:
+        raise ValueError(f"Unknown state backend: {choice}")
+    if choice == "memory":
+        return MemoryState(secrets=load_secrets())
+    if choice == "file":
+        path = os.environ.get("ADMIN_LAYERS_STATE_FILE") or os.path.join(
+            Path.home(), ".admin_layers", STATE_FILE
+        )
+        return FileState(path, secrets=load_secrets())
+    if choice is None:
+        try:
+            import streamlit  # noqa: F401
+        except ImportError:
+            return MemoryState()
+    return StreamlitState()
+
+
+def get_state_backend() -> StateBackend:
+    """The process's default state backend."""
+    global _state_backend
+    with _state_lock:
+        if _state_backend is None:
+            _state_backend = _default_backend()
+        return _state_backend
+
+
+def set_state_backend(backend: Optional[StateBackend]) -> None:
+    """
+    Set the process default (None: back to ADMIN_LAYERS_STATE_BACKEND).
+
+    Call before the first get_storage()/get_history(); existing instances
+    keep the backend they were created with.
+    """
+    global _state_backend
+    with _state_lock:
+        _state_backend = backend
@@ -0,0 +1,274 @@
+"""
+Segmented Stream Encryption
+Authenticated encryption of large objects in fixed-size segments, so they
+can be written and read as streams (and read at any offset) without
+holding the whole plaintext or ciphertext in memory.
+
+Fernet (EncryptedStorage.encrypt) needs the whole value at once. This
+format splits the plaintext into SEGMENT_SIZE pieces, each encrypted and
+authenticated on its own with AES-256-GCM:
+
+    header  = MAGIC (4) | version (1) | segment size (4) | salt (16)
+    segment = ciphertext | GCM tag (16)
+
+Every file gets its own key, derived with HKDF from the storage key and
+the random salt. Segment i is encrypted under the nonce
+    0 (7) | i (4) | 1 if last segment else 0 (1)
+with the header as associated data. A segment therefore cannot be moved,
+swapped between files or have its header changed, and cutting a file at
+a segment boundary is detected because the new last segment was not
+sealed as last.
+"""
+
+import io
+import os
+import struct
+from typing import BinaryIO, Optional
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+MAGIC = b"ALSE"
+VERSION = 1
+
+# Plaintext bytes per segment
+SEGMENT_SIZE = 64 * 1024
+# Largest segment size accepted from a header (bounds reader memory)
+MAX_SEGMENT_SIZE = 16 * 1024 * 1024
+
+TAG_SIZE = 16
+SALT_SIZE = 16
+_HEADER = struct.Struct(">4sBI16s")
+HEADER_SIZE = _HEADER.size
+
+_INFO = b"admin-layers segmented stream v1"
+
+
+class StreamDecryptError(ValueError):
+    """Encrypted stream is damaged, truncated or under another key."""
+
+
+def is_segmented(data: bytes) -> bool:
+    """Whether data (at least the first 5 bytes) starts a segmented stream."""
+    return data[:4] == MAGIC and data[4:5] == bytes([VERSION])
+
+
+class SegmentedCipher:
+    """
+    Creates encrypting writers and decrypting readers for one master key.
+
+    Usage:
+        cipher = SegmentedCipher(master_key)
+        with open(path, "wb") as raw, cipher.writer(raw) as out:
+            for chunk in chunks:
+                out.write(chunk)
+        with open(path, "rb") as raw:
+            reader = cipher.reader(raw)
+            reader.seek(offset)
+            data = reader.read(4096)
+    """
+
+    def __init__(self, master_key: bytes, segment_size: int = SEGMENT_SIZE):
+        """
+        Initialize cipher.
+
+        Args:
+            master_key: Secret the per-file keys are derived from
+            segment_size: Plaintext bytes per segment for new streams
+        """
+        if not 0 < segment_size <= MAX_SEGMENT_SIZE:
+            raise ValueError(f"segment_size must be 1..{MAX_SEGMENT_SIZE}")
+        self._master_key = master_key
+        self.segment_size = segment_size
+
+    def _aead(self, salt: bytes) -> AESGCM:
+        key = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=_INFO).derive(
+            self._master_key
+        )
+        return AESGCM(key)
+
+    def writer(self, raw: BinaryIO) -> "EncryptingWriter":
+        """Encrypting file-like object writing to raw (close() to finish)."""
+        salt = os.urandom(SALT_SIZE)
+        header = _HEADER.pack(MAGIC, VERSION, self.segment_size, salt)
+        return EncryptingWriter(raw, self._aead(salt), header, self.segment_size)
+
+    def reader(self, raw: BinaryIO, close_raw: bool = False) -> io.BufferedReader:
+        """
+        Decrypting, seekable file-like object over raw (raw must be seekable).
+
+        Args:
+            raw: Encrypted stream
+            close_raw: Close raw when the reader is closed
+
+        Raises:
+            StreamDecryptError: If raw does not start with a valid header
+        """
+        raw.seek(0)
+        header = raw.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or not is_segmented(header):
+            raise StreamDecryptError("Not a segmented encrypted stream")
+        _, _, segment_size, salt = _HEADER.unpack(header)
+        if not 0 < segment_size <= MAX_SEGMENT_SIZE:
+            raise StreamDecryptError("Invalid segment size")
+        raw_reader = DecryptingReader(raw, self._aead(salt), header, segment_size)
+        raw_reader.close_raw = close_raw
+        return io.BufferedReader(raw_reader, buffer_size=segment_size)
+
+    def encrypt(self, data: bytes) -> bytes:
+        """Whole-buffer convenience: encrypt data into a stream."""
+        out = io.BytesIO()
+        writer = self.writer(out)
+        writer.write(data)
+        writer.finish()
+        return out.getvalue()
+
+    def decrypt(self, token: bytes) -> bytes:
+        """Whole-buffer convenience: decrypt a stream (StreamDecryptError)."""
+        return self.reader(io.BytesIO(token)).read()
+
+
+def _nonce(index: int, last: bool) -> bytes:
+    return b"\x00" * 7 + struct.pack(">IB", index, 1 if last else 0)
+
+
+class EncryptingWriter(io.RawIOBase):
+    """
+    Buffers up to one segment of plaintext and writes sealed segments.
+
+    close() (or finish()) seals the final segment; without it the stream
+    is unreadable, so an interrupted write never passes for a complete one.
+    """
+
+    def __init__(self, raw: BinaryIO, aead: AESGCM, header: bytes, segment_size: int):
+        super().__init__()
+        self._raw = raw
+        self._aead = aead
+        self._header = header
+        self._segment_size = segment_size
+        self._buffer = bytearray()
+        self._index = 0
+        self._finished = False
+        raw.write(header)
+
+    def writable(self) -> bool:
+        return True
+
+    def _seal(self, data: bytes, last: bool) -> None:
+        if self._index >= 2**32:
+            raise OverflowError("Stream too long")
+        self._raw.write(
+            self._aead.encrypt(_nonce(self._index, last), data, self._header)
+        )
+        self._index += 1
+
+    def write(self, data) -> int:
+        if self._finished:
+            raise ValueError("write to a finished stream")
+        self._buffer += data
+        # Keep the last (possibly full) segment back: only close() knows
+        # whether it is the final one
+        size = self._segment_size
+        while len(self._buffer) > size:
+            self._seal(bytes(self._buffer[:size]), last=False)
+            del self._buffer[:size]
+        return len(data)
+
+    def abort(self) -> None:
+        """Stop without sealing: the partial stream stays unreadable."""
+        self._finished = True
+
+    def finish(self) -> None:
+        """Seal the final segment (leaves the raw stream open)."""
+        if not self._finished:
+            self._finished = True
+            self._seal(bytes(self._buffer), last=True)
+            self._buffer.clear()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.finish()
+        super().close()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            # Leave the stream unsealed (unreadable) rather than truncated
+            self.abort()
+        self.close()
+
+
+class DecryptingReader(io.RawIOBase):
+    """Seekable plaintext view of a segmented stream; verifies each segment."""
+
+    def __init__(self, raw: BinaryIO, aead: AESGCM, header: bytes, segment_size: int):
+        super().__init__()
+        self._raw = raw
+        self._aead = aead
+        self._header = header
+        self._segment_size = segment_size
+        body = raw.seek(0, io.SEEK_END) - len(header)
+        if body < TAG_SIZE:
+            raise StreamDecryptError("Truncated stream")
+        sealed = segment_size + TAG_SIZE
+        # All segments are full except the last, which is not empty unless
+        # it is the only one
+        self._segments = 1 + (body - TAG_SIZE - 1) // sealed if body > TAG_SIZE else 1
+        last = body - (self._segments - 1) * sealed - TAG_SIZE
+        self.length = (self._segments - 1) * segment_size + last
+        self._pos = 0
+        self._cached: Optional[int] = None
+        self._plain = b""
+        self.close_raw = False
+
+    def close(self) -> None:
+        if not self.closed and self.close_raw:
+            self._raw.close()
+        super().close()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.length
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._pos = offset
+        return offset
+
+    def _segment(self, index: int) -> bytes:
+        if index != self._cached:
+            sealed = self._segment_size + TAG_SIZE
+            self._raw.seek(len(self._header) + index * sealed)
+            data = self._raw.read(sealed)
+            last = index == self._segments - 1
+            try:
+                self._plain = self._aead.decrypt(
+                    _nonce(index, last), data, self._header
+                )
+            except InvalidTag:
+                raise StreamDecryptError(f"Segment {index} failed authentication")
+            self._cached = index
+        return self._plain
+
+    def readinto(self, buffer) -> int:
+        if self._pos >= self.length:
+            # Verify the final segment even when nothing is left to read,
+            # so a stream cut at a segment boundary is never accepted
+            self._segment(self._segments - 1)
+            return 0
+        index, skip = divmod(self._pos, self._segment_size)
+        chunk = self._segment(index)[skip : skip + len(buffer)]
+        buffer[: len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
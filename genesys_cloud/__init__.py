@@ -6,7 +6,17 @@ A Python SDK for Genesys Cloud API operations.
 
 from .api import APIResponse, GenesysCloudAPI
 from .auth import AuthToken, GenesysAuth
+from .coalesce import WriteCoalescer, WriteOutcome, get_coalescer
 from .config import GenesysConfig, get_regions, load_config, save_config
+from .membership import MembershipDiff, SyncResult, diff_membership
+from .metrics import MetricsSnapshot, RequestMetrics
+from .scheduler import (
+    Priority,
+    RequestScheduler,
+    current_priority,
+    get_scheduler,
+    request_priority,
+)
 
 __all__ = [
     "GenesysConfig",
@@ -17,6 +27,19 @@ __all__ = [
     "AuthToken",
     "GenesysCloudAPI",
     "APIResponse",
+    "WriteCoalescer",
+    "WriteOutcome",
+    "get_coalescer",
+    "MembershipDiff",
+    "SyncResult",
+    "diff_membership",
+    "MetricsSnapshot",
+    "RequestMetrics",
+    "Priority",
+    "RequestScheduler",
+    "current_priority",
+    "get_scheduler",
+    "request_priority",
 ]
 
 __version__ = "1.0.0"
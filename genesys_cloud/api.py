@@ -2,12 +2,34 @@
 Genesys Cloud API client.
 """
 
+import time
 from dataclasses import dataclass
 from typing import Any, Dict, Generator, List, Optional
 
 import requests
 
 from .auth import GenesysAuth
+from .membership import (
+    GROUP_MEMBER_BATCH_SIZE,
+    QUEUE_MEMBER_BATCH_SIZE,
+    SyncResult,
+    sync_members,
+)
+from .metrics import RequestMetrics, route_key
+from .scheduler import Priority, RequestScheduler, get_scheduler
+
+# Retries for rate-limited (429) requests before giving up
+MAX_RETRIES = 3
+# Backoff when a 429 carries no usable Retry-After header (doubles per retry)
+DEFAULT_RETRY_AFTER = 2.0
+
+
+def _retry_after(response: requests.Response, attempt: int) -> float:
+    """Seconds to wait before retrying a 429 response."""
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "")))
+    except ValueError:
+        return DEFAULT_RETRY_AFTER * (2**attempt)
 
 
 @dataclass
@@ -37,17 +59,29 @@ class GenesysCloudAPI:
 
         # Get groups
         groups = api.groups.search("Support")
+
+    Requests are admitted through a RequestScheduler shared by every
+    client using the same OAuth credentials. Wrap bulk work in
+    ``request_priority(Priority.BULK)`` so interactive calls go first.
+    Rate-limited (429) requests are retried after Retry-After, and every
+    request is counted in ``api.metrics``.
     """
 
-    def __init__(self, auth: GenesysAuth):
+    def __init__(self, auth: GenesysAuth, scheduler: Optional[RequestScheduler] = None):
         """
         Initialize API client.
 
         Args:
             auth: Authenticated GenesysAuth instance
+            scheduler: Request scheduler (defaults to the one shared by
+                all clients for the same OAuth client ID)
         """
         self.auth = auth
         self._base_url = auth.config.api_url
+        self.scheduler = scheduler or get_scheduler(
+            f"{auth.config.region}:{auth.config.client_id}"
+        )
+        self.metrics = RequestMetrics()
 
         # Initialize sub-APIs
         self.users = UsersAPI(self)
@@ -63,6 +97,7 @@ class GenesysCloudAPI:
         params: Optional[Dict] = None,
         json: Optional[Dict] = None,
         timeout: int = 30,
+        priority: Optional[Priority] = None,
     ) -> APIResponse:
         """
         Make authenticated API request.
@@ -73,6 +108,8 @@ class GenesysCloudAPI:
             params: Query parameters
             json: JSON body
             timeout: Request timeout in seconds
+            priority: Scheduling class (defaults to the calling thread's
+                class, see request_priority)
 
         Returns:
             APIResponse with result
@@ -82,16 +119,35 @@ class GenesysCloudAPI:
             return APIResponse(success=False, error="Authentication failed")
 
         url = f"{self._base_url}{endpoint}"
+        route = route_key(method, endpoint)
 
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=self.auth.get_headers(),
-                params=params,
-                json=json,
-                timeout=timeout,
-            )
+            for attempt in range(MAX_RETRIES + 1):
+                # Wait for our turn in the shared rate budget
+                self.scheduler.acquire(priority)
+
+                started = time.monotonic()
+                try:
+                    response = requests.request(
+                        method=method,
+                        url=url,
+                        headers=self.auth.get_headers(),
+                        params=params,
+                        json=json,
+                        timeout=timeout,
+                    )
+                except requests.exceptions.RequestException:
+                    self.metrics.record(time.monotonic() - started, None, route)
+                    raise
+                self.metrics.record(
+                    time.monotonic() - started, response.status_code, route
+                )
+
+                if response.status_code != 429 or attempt == MAX_RETRIES:
+                    break
+                # Rate limited: hold the whole OAuth client, then retry
+                self.metrics.record_retry()
+                self.scheduler.backoff(_retry_after(response, attempt))
 
             if response.status_code == 204:
                 return APIResponse(success=True, data=None, status_code=204)
@@ -214,6 +270,38 @@ class GenesysCloudAPI:
         params["pageNumber"] = page_number
         return self.get(endpoint, params=params)
 
+    def get_all(
+        self, endpoint: str, params: Optional[Dict] = None, page_size: int = 100
+    ) -> APIResponse:
+        """
+        Fetch every page of a paginated endpoint, failing if any page fails.
+
+        Unlike paginate(), which stops quietly at a failed page, a partial
+        listing is never passed off as complete.
+
+        Args:
+            endpoint: API endpoint
+            params: Additional query parameters
+            page_size: Results per page
+
+        Returns:
+            APIResponse whose data is the list of all entities, or the
+            response of the first page that failed
+        """
+        entities: List[Dict] = []
+        page = 1
+        while True:
+            response = self.get_page(endpoint, page_size, page, dict(params or {}))
+            if not response.success:
+                return response
+            data = response.data or {}
+            entities.extend(data.get("entities", []))
+            if page >= data.get("pageCount", 1):
+                return APIResponse(
+                    success=True, data=entities, status_code=response.status_code
+                )
+            page += 1
+
 
 class UsersAPI:
     """Users API operations."""
@@ -244,23 +332,37 @@ class UsersAPI:
         response = self._client.post("/api/v2/users/search", json=body)
         return response.data.get("results", []) if response.success else []
 
-    def search_by_email(self, email: str) -> Optional[Dict]:
+    def find_by_email(self, email: str) -> APIResponse:
         """
-        Find user by exact email.
+        Find user by exact email, distinguishing "no such user" from errors.
 
         Args:
             email: Email address
 
         Returns:
-            User dict or None
+            APIResponse whose data is the user dict, or None if no user has
+            this email (success is False only when the search failed)
         """
         body = {"query": [{"type": "EXACT", "fields": ["email"], "value": email}]}
 
         response = self._client.post("/api/v2/users/search", json=body)
         if response.success:
-            results = response.data.get("results", [])
-            return results[0] if results else None
-        return None
+            results = (response.data or {}).get("results", [])
+            response.data = results[0] if results else None
+        return response
+
+    def search_by_email(self, email: str) -> Optional[Dict]:
+        """
+        Find user by exact email.
+
+        Args:
+            email: Email address
+
+        Returns:
+            User dict or None
+        """
+        response = self.find_by_email(email)
+        return response.data if response.success else None
 
     def get_queues(self, user_id: str) -> List[Dict]:
         """Get queues a user belongs to."""
@@ -271,7 +373,10 @@ class UsersAPI:
         return self._client.get(f"/api/v2/users/{user_id}/groups")
 
     def list(
-        self, page_size: int = 100, max_pages: int = None
+        self,
+        page_size: int = 100,
+        max_pages: int = None,
+        expand: Optional[List[str]] = None,
     ) -> Generator[Dict, None, None]:
         """
         List all users.
@@ -279,14 +384,32 @@ class UsersAPI:
         Args:
             page_size: Results per page
             max_pages: Maximum pages to fetch
+            expand: Extra fields per user (e.g. ["skills"])
 
         Yields:
             User dicts
         """
+        params = {"expand": ",".join(expand)} if expand else None
         yield from self._client.paginate(
-            "/api/v2/users", page_size=page_size, max_pages=max_pages
+            "/api/v2/users", params=params, page_size=page_size, max_pages=max_pages
         )
 
+    def list_all(
+        self, page_size: int = 100, expand: Optional[List[str]] = None
+    ) -> APIResponse:
+        """
+        Get all users, failing if any page fails.
+
+        Args:
+            page_size: Results per page
+            expand: Extra fields per user (e.g. ["skills"])
+
+        Returns:
+            APIResponse whose data is the list of user dicts
+        """
+        params = {"expand": ",".join(expand)} if expand else None
+        return self._client.get_all("/api/v2/users", params=params, page_size=page_size)
+
     def list_page(self, page_size: int = 25, page_number: int = 1) -> APIResponse:
         """List users for a specific page."""
         return self._client.get_page(
@@ -338,6 +461,18 @@ class GroupsAPI:
         """
         return list(self._client.paginate(f"/api/v2/groups/{group_id}/members"))
 
+    def list_members(self, group_id: str) -> APIResponse:
+        """
+        Get all members of a group, failing if any page fails.
+
+        Args:
+            group_id: Group ID
+
+        Returns:
+            APIResponse whose data is the list of member user dicts
+        """
+        return self._client.get_all(f"/api/v2/groups/{group_id}/members")
+
     def add_members(self, group_id: str, member_ids: List[str]) -> APIResponse:
         """
         Add members to a group.
@@ -368,10 +503,48 @@ class GroupsAPI:
             f"/api/v2/groups/{group_id}/members", params={"ids": ids_param}
         )
 
+    def sync_members(
+        self,
+        group_id: str,
+        target_ids: List[str],
+        remove_extra: bool = True,
+        dry_run: bool = False,
+        current_ids: Optional[List[str]] = None,
+    ) -> SyncResult:
+        """
+        Reconcile group membership to a target list with minimal calls.
+
+        Fetches current members once, then adds/removes only the
+        differences in chunks of GROUP_MEMBER_BATCH_SIZE.
+
+        Args:
+            group_id: Group ID
+            target_ids: User IDs that should be members
+            remove_extra: Remove members not in target_ids
+            dry_run: Only compute the diff
+            current_ids: Current member IDs if already fetched
+
+        Returns:
+            SyncResult with the diff and applied changes
+        """
+        return sync_members(
+            self,
+            group_id,
+            target_ids,
+            GROUP_MEMBER_BATCH_SIZE,
+            remove_extra=remove_extra,
+            dry_run=dry_run,
+            current_ids=current_ids,
+        )
+
     def list(self, page_size: int = 100) -> Generator[Dict, None, None]:
         """List all groups."""
         yield from self._client.paginate("/api/v2/groups", page_size=page_size)
 
+    def list_all(self, page_size: int = 100) -> APIResponse:
+        """Get all groups, failing if any page fails."""
+        return self._client.get_all("/api/v2/groups", page_size=page_size)
+
     def list_page(self, page_size: int = 25, page_number: int = 1) -> APIResponse:
         """List groups for a specific page."""
         return self._client.get_page(
@@ -423,6 +596,10 @@ class QueuesAPI:
         """Get queue members."""
         return list(self._client.paginate(f"/api/v2/routing/queues/{queue_id}/members"))
 
+    def list_members(self, queue_id: str) -> APIResponse:
+        """Get all members of a queue, failing if any page fails."""
+        return self._client.get_all(f"/api/v2/routing/queues/{queue_id}/members")
+
     def add_members(self, queue_id: str, member_ids: List[str]) -> APIResponse:
         """Add members to a queue."""
         body = [{"id": uid, "joined": True} for uid in member_ids]
@@ -437,10 +614,48 @@ class QueuesAPI:
             f"/api/v2/routing/queues/{queue_id}/members", json=body
         )
 
+    def sync_members(
+        self,
+        queue_id: str,
+        target_ids: List[str],
+        remove_extra: bool = True,
+        dry_run: bool = False,
+        current_ids: Optional[List[str]] = None,
+    ) -> SyncResult:
+        """
+        Reconcile queue membership to a target list with minimal calls.
+
+        Fetches current members once, then adds/removes only the
+        differences in chunks of QUEUE_MEMBER_BATCH_SIZE.
+
+        Args:
+            queue_id: Queue ID
+            target_ids: User IDs that should be members
+            remove_extra: Remove members not in target_ids
+            dry_run: Only compute the diff
+            current_ids: Current member IDs if already fetched
+
+        Returns:
+            SyncResult with the diff and applied changes
+        """
+        return sync_members(
+            self,
+            queue_id,
+            target_ids,
+            QUEUE_MEMBER_BATCH_SIZE,
+            remove_extra=remove_extra,
+            dry_run=dry_run,
+            current_ids=current_ids,
+        )
+
     def list(self, page_size: int = 100) -> Generator[Dict, None, None]:
         """List all queues."""
         yield from self._client.paginate("/api/v2/routing/queues", page_size=page_size)
 
+    def list_all(self, page_size: int = 100) -> APIResponse:
+        """Get all queues, failing if any page fails."""
+        return self._client.get_all("/api/v2/routing/queues", page_size=page_size)
+
     def list_page(self, page_size: int = 25, page_number: int = 1) -> APIResponse:
         """List queues for a specific page."""
         return self._client.get_page(
@@ -542,6 +757,10 @@ class RoutingAPI:
         """Get user's routing skills."""
         return list(self._client.paginate(f"/api/v2/users/{user_id}/routingskills"))
 
+    def list_user_skills(self, user_id: str) -> APIResponse:
+        """Get all of a user's routing skills, failing if any page fails."""
+        return self._client.get_all(f"/api/v2/users/{user_id}/routingskills")
+
     def add_user_skill(
         self, user_id: str, skill_id: str, proficiency: float = 1.0
     ) -> APIResponse:
@@ -549,6 +768,21 @@ class RoutingAPI:
         body = {"id": skill_id, "proficiency": proficiency}
         return self._client.post(f"/api/v2/users/{user_id}/routingskills", json=body)
 
+    def add_user_skills(self, user_id: str, skills: List[Dict]) -> APIResponse:
+        """
+        Add or update several skills of a user in one call.
+
+        Args:
+            user_id: User ID
+            skills: [{"id": skill_id, "proficiency": float}, ...]
+
+        Returns:
+            APIResponse
+        """
+        return self._client.patch(
+            f"/api/v2/users/{user_id}/routingskills/bulk", json=skills
+        )
+
     def remove_user_skill(self, user_id: str, skill_id: str) -> APIResponse:
         """Remove skill from user."""
         return self._client.delete(f"/api/v2/users/{user_id}/routingskills/{skill_id}")
@@ -0,0 +1,340 @@
+"""
+Write coalescing for member and user-skill changes.
+
+Small writes to the same target (several admins, or quick actions in a
+row) are held for a short window, merged per target and sent as one
+call per target and direction:
+- Group/queue members: one add and one remove call per entity (chunked,
+  with bad IDs isolated by bisect_batch).
+- User skills: one bulk add call per user; removals stay one call per
+  skill (the API has no bulk removal).
+
+Within a window the latest change to an ID wins: an add followed by a
+remove of the same ID is sent as the remove only (and vice versa). The
+earlier change is reported as superseded (WriteOutcome.superseded), never
+sent, and is not a success.
+
+Each change carries the client it was submitted with; a target's merged
+calls go out on the client of its latest change. A shared coalescer
+therefore never keeps a session's client alive or sends with the client
+of a session that is gone.
+"""
+
+import threading
+import weakref
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .api import APIResponse
+from .membership import GROUP_MEMBER_BATCH_SIZE, QUEUE_MEMBER_BATCH_SIZE, bisect_batch
+from .scheduler import Priority, current_priority, request_priority
+
+# Seconds a change waits for others to the same target
+DEFAULT_WINDOW = 0.25
+
+MEMBER_BATCH_SIZES = {
+    "groups": GROUP_MEMBER_BATCH_SIZE,
+    "queues": QUEUE_MEMBER_BATCH_SIZE,
+}
+
+# Error of a change replaced by a later one before it was sent
+SUPERSEDED = "Superseded by a later change"
+
+
+@dataclass
+class WriteOutcome:
+    """Per-ID outcome of one submitted change (APIResponse.data)."""
+
+    succeeded: List[str] = field(default_factory=list)
+    # id -> (error, status code)
+    failed: Dict[str, Tuple[str, Optional[int]]] = field(default_factory=dict)
+    superseded: List[str] = field(default_factory=list)  # never sent
+
+
+class _Handle:
+    """Collects per-ID outcomes of one submitted change into its Future."""
+
+    def __init__(self, count: int):
+        self.future: Future = Future()
+        self.outcome = WriteOutcome()
+        self._lock = threading.Lock()
+        self._remaining = count
+        if count == 0:
+            self.future.set_result(APIResponse(success=True, data=self.outcome))
+
+    def resolve(
+        self,
+        item_id: str,
+        success: bool,
+        error: Optional[str] = None,
+        status_code: Optional[int] = None,
+    ) -> None:
+        with self._lock:
+            if success:
+                self.outcome.succeeded.append(item_id)
+            else:
+                self.outcome.failed[item_id] = (error or "Request failed", status_code)
+            self._remaining -= 1
+            if self._remaining:
+                return
+        self._finish()
+
+    def supersede(self, item_id: str) -> None:
+        with self._lock:
+            self.outcome.superseded.append(item_id)
+            self._remaining -= 1
+            if self._remaining:
+                return
+        self._finish()
+
+    def _finish(self) -> None:
+        outcome = self.outcome
+        if outcome.failed:
+            error, status = next(iter(outcome.failed.values()))
+        elif outcome.superseded:
+            error, status = SUPERSEDED, None
+        else:
+            self.future.set_result(APIResponse(success=True, data=outcome))
+            return
+        self.future.set_result(
+            APIResponse(success=False, data=outcome, error=error, status_code=status)
+        )
+
+
+@dataclass
+class _Pending:
+    """Latest pending change to one ID (member or skill) of a target."""
+
+    action: str  # 'add' or 'remove'
+    handles: List[_Handle] = field(default_factory=list)
+    proficiency: float = 0.0
+
+
+@dataclass
+class CoalescerStats:
+    """Counters of a WriteCoalescer."""
+
+    submitted: int = 0  # per-ID changes submitted
+    superseded: int = 0  # changes replaced by a later one before sending
+    calls: int = 0  # API calls made
+
+
+class WriteCoalescer:
+    """
+    Buffers member and user-skill writes and flushes one call per target.
+
+    Each method returns a Future resolving to an APIResponse for that
+    change: successful only if every ID was applied, with a WriteOutcome
+    as data telling which IDs succeeded, failed or were superseded.
+
+    Usage:
+        coalescer = get_coalescer(api)
+        resp = coalescer.add_members("groups", group_id, [user_id], api).result()
+    """
+
+    def __init__(self, api: Any = None, window: float = DEFAULT_WINDOW):
+        """
+        Initialize coalescer.
+
+        Args:
+            api: Default client for changes submitted without one
+            window: Seconds to wait for more changes to a target
+        """
+        self.api = api
+        self.window = window
+        self.stats = CoalescerStats()
+        self._lock = threading.Lock()
+        # target -> {id: _Pending}; target is ('groups'|'queues', entity_id)
+        # for members and ('skills', user_id) for user skills
+        self._pending: Dict[Tuple[str, str], Dict[str, _Pending]] = {}
+        self._priority: Dict[Tuple[str, str], Priority] = {}
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._timers: Dict[Tuple[str, str], threading.Timer] = {}
+
+    # Submitting
+
+    def add_members(
+        self, endpoint: str, entity_id: str, ids: List[str], api: Any = None
+    ) -> Future:
+        """Add users to a group ('groups') or queue ('queues')."""
+        return self._submit((endpoint, entity_id), "add", ids, api)
+
+    def remove_members(
+        self, endpoint: str, entity_id: str, ids: List[str], api: Any = None
+    ) -> Future:
+        """Remove users from a group ('groups') or queue ('queues')."""
+        return self._submit((endpoint, entity_id), "remove", ids, api)
+
+    def add_user_skill(
+        self, user_id: str, skill_id: str, proficiency: float = 1.0, api: Any = None
+    ) -> Future:
+        """Assign a skill to a user."""
+        return self._submit(("skills", user_id), "add", [skill_id], api, proficiency)
+
+    def remove_user_skill(self, user_id: str, skill_id: str, api: Any = None) -> Future:
+        """Remove a skill from a user."""
+        return self._submit(("skills", user_id), "remove", [skill_id], api)
+
+    def _submit(
+        self,
+        target: Tuple[str, str],
+        action: str,
+        ids: List[str],
+        api: Any = None,
+        proficiency: float = 0.0,
+    ) -> Future:
+        if target[0] not in MEMBER_BATCH_SIZES and target[0] != "skills":
+            raise ValueError(f"Unknown endpoint: {target[0]}")
+        api = api if api is not None else self.api
+        if api is None:
+            raise ValueError("No client to send the change with")
+        ids = list(dict.fromkeys(ids))
+        handle = _Handle(len(ids))
+        if not ids:
+            return handle.future
+        superseded: List[Tuple[_Handle, str]] = []
+        with self._lock:
+            pending = self._pending.setdefault(target, {})
+            for item_id in ids:
+                current = pending.get(item_id)
+                if current is not None and current.action != action:
+                    # The newer change wins; the older one is never sent
+                    superseded.extend((h, item_id) for h in current.handles)
+                    self.stats.superseded += len(current.handles)
+                    current = None
+                if current is None:
+                    current = pending[item_id] = _Pending(action)
+                current.handles.append(handle)
+                current.proficiency = proficiency
+            self.stats.submitted += len(ids)
+            self._clients[target] = api
+            priority = current_priority()
+            self._priority[target] = min(self._priority.get(target, priority), priority)
+            if target not in self._timers:
+                timer = threading.Timer(self.window, self._flush_target, (target,))
+                timer.daemon = True
+                self._timers[target] = timer
+                timer.start()
+        for old, item_id in superseded:
+            old.supersede(item_id)
+        return handle.future
+
+    # Flushing
+
+    def flush(self) -> None:
+        """Send every pending change now."""
+        with self._lock:
+            targets = list(self._pending)
+        for target in targets:
+            self._flush_target(target)
+
+    def _flush_target(self, target: Tuple[str, str]) -> None:
+        with self._lock:
+            pending = self._pending.pop(target, None)
+            priority = self._priority.pop(target, Priority.INTERACTIVE)
+            api = self._clients.pop(target, None)
+            timer = self._timers.pop(target, None)
+        if timer is not None:
+            timer.cancel()
+        if not pending:
+            return
+        with request_priority(priority):
+            if target[0] == "skills":
+                self._flush_skills(api, target[1], pending)
+            else:
+                self._flush_members(api, target[0], target[1], pending)
+
+    @staticmethod
+    def _resolve(pending: Dict[str, _Pending], ids: List[str], response: Any) -> None:
+        """Resolve the handles of ids with the response of their call."""
+        for item_id in ids:
+            for handle in pending[item_id].handles:
+                handle.resolve(
+                    item_id,
+                    bool(getattr(response, "success", True)),
+                    getattr(response, "error", None),
+                    getattr(response, "status_code", None),
+                )
+
+    def _send(self, pending: Dict[str, _Pending], ids: List[str], call) -> None:
+        """Send ids in one call(ids)."""
+        try:
+            response = call(ids)
+        except Exception as e:
+            response = APIResponse(success=False, error=str(e))
+        self.stats.calls += 1
+        self._resolve(pending, ids, response)
+
+    def _flush_members(
+        self, client: Any, endpoint: str, entity_id: str, pending: Dict[str, _Pending]
+    ) -> None:
+        api = getattr(client, endpoint)
+        size = MEMBER_BATCH_SIZES[endpoint]
+        for action, call in (
+            ("add", lambda ids: api.add_members(entity_id, ids)),
+            ("remove", lambda ids: api.remove_members(entity_id, ids)),
+        ):
+            ids = [i for i, p in pending.items() if p.action == action]
+            for start in range(0, len(ids), size):
+                chunk = ids[start : start + size]
+                try:
+                    outcomes, calls = bisect_batch(call, chunk)
+                except Exception as e:
+                    outcomes = [(chunk, APIResponse(success=False, error=str(e)))]
+                    calls = 1
+                self.stats.calls += calls
+                for part, response in outcomes:
+                    self._resolve(pending, part, response)
+
+    def _flush_skills(
+        self, client: Any, user_id: str, pending: Dict[str, _Pending]
+    ) -> None:
+        routing = client.routing
+        adds = [i for i, p in pending.items() if p.action == "add"]
+        if len(adds) == 1:
+            self._send(
+                pending,
+                adds,
+                lambda ids: routing.add_user_skill(
+                    user_id, ids[0], pending[ids[0]].proficiency
+                ),
+            )
+        elif adds:
+            self._send(
+                pending,
+                adds,
+                lambda ids: routing.add_user_skills(
+                    user_id,
+                    [{"id": i, "proficiency": pending[i].proficiency} for i in ids],
+                ),
+            )
+        for skill_id in (i for i, p in pending.items() if p.action == "remove"):
+            self._send(
+                pending,
+                [skill_id],
+                lambda ids: routing.remove_user_skill(user_id, ids[0]),
+            )
+
+
+# Coalescers are shared per OAuth client (like schedulers), so changes
+# from different sessions of the same org merge. They hold no client of
+# their own (each change brings one), so the weak key can be collected.
+_coalescers: "weakref.WeakKeyDictionary[Any, WriteCoalescer]" = (
+    weakref.WeakKeyDictionary()
+)
+_coalescers_lock = threading.Lock()
+
+
+def get_coalescer(api: Any) -> WriteCoalescer:
+    """
+    Get the coalescer shared by all clients of the same OAuth client.
+
+    Pass the client with each change (e.g. add_members(..., api=api)).
+    """
+    key = getattr(api, "scheduler", None) or api
+    with _coalescers_lock:
+        coalescer = _coalescers.get(key)
+        if coalescer is None:
+            coalescer = _coalescers[key] = WriteCoalescer()
+        return coalescer
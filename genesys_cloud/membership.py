@@ -0,0 +1,245 @@
+"""
+Membership diff/sync engine.
+
+Reconciles a group or queue to a target member list with the fewest API
+calls: fetch current members once, compute add/remove sets with set
+differences, then apply only the changes in chunked calls. Members that
+are already correct cost nothing, so re-running a sync is cheap and
+naturally idempotent.
+
+A batch call fails as a whole when a single ID in it is bad (deleted
+user, invalid ID). bisect_batch() splits such a batch recursively so only
+the bad IDs fail and the rest is still applied.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Membership endpoints accept a limited number of IDs per request
+GROUP_MEMBER_BATCH_SIZE = 50
+QUEUE_MEMBER_BATCH_SIZE = 100
+
+# Failures that can be caused by individual IDs in a batch. Others (auth,
+# rate limiting, server errors) would fail every half too, so they are
+# not bisected.
+BISECT_STATUSES = frozenset({400, 404, 409, 422})
+
+# Bad IDs per batch that bisection fully isolates within its call budget
+BISECT_MAX_BAD = 3
+
+
+@dataclass
+class MembershipDiff:
+    """Changes needed to turn the current member set into the target set."""
+
+    to_add: List[str] = field(default_factory=list)
+    to_remove: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.to_add and not self.to_remove
+
+    @property
+    def change_count(self) -> int:
+        return len(self.to_add) + len(self.to_remove)
+
+    def request_count(self, batch_size: int) -> int:
+        """Add/remove calls needed to apply the diff in chunks of batch_size."""
+        size = max(1, batch_size)
+        return -(-len(self.to_add) // size) + -(-len(self.to_remove) // size)
+
+
+@dataclass
+class SyncResult:
+    """Outcome of applying a MembershipDiff."""
+
+    diff: MembershipDiff
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    requests: int = 0  # add/remove calls made
+    dry_run: bool = False
+
+    @property
+    def success(self) -> bool:
+        return not self.failed
+
+    @property
+    def status(self) -> str:
+        """'success', 'partial' or 'failed' (matches ActionRecord.status)."""
+        if not self.failed:
+            return "success"
+        return "partial" if self.added or self.removed else "failed"
+
+
+def diff_membership(
+    current: Iterable[str], target: Iterable[str], remove_extra: bool = True
+) -> MembershipDiff:
+    """
+    Compute the member changes needed to reach `target`.
+
+    Args:
+        current: Current member IDs
+        target: Desired member IDs (duplicates ignored, order kept)
+        remove_extra: Remove current members missing from target
+            (False makes the sync add-only)
+
+    Returns:
+        MembershipDiff
+    """
+    current = list(dict.fromkeys(current))
+    target = list(dict.fromkeys(target))
+    current_set = set(current)
+    target_set = set(target)
+    return MembershipDiff(
+        to_add=[uid for uid in target if uid not in current_set],
+        to_remove=(
+            [uid for uid in current if uid not in target_set] if remove_extra else []
+        ),
+        unchanged=len(current_set & target_set),
+    )
+
+
+def member_ids(members: Iterable[Dict[str, Any]]) -> List[str]:
+    """User IDs from a get_members() result (group or queue members)."""
+    ids = (m.get("id") or (m.get("user") or {}).get("id") for m in members)
+    return [uid for uid in ids if uid]
+
+
+def bisect_budget(size: int) -> int:
+    """Maximum calls bisect_batch() spends on a batch of `size` IDs."""
+    if size <= 1:
+        return 1
+    return 1 + 2 * BISECT_MAX_BAD * math.ceil(math.log2(size))
+
+
+def bisect_batch(
+    call: Callable[[List[Any]], Any],
+    ids: Sequence[Any],
+    max_calls: Optional[int] = None,
+) -> Tuple[List[Tuple[List[Any], Any]], int]:
+    """
+    Call a batch endpoint, splitting failing batches to isolate bad IDs.
+
+    A batch that fails with a status in BISECT_STATUSES is split in half
+    and each half retried, recursively, until the failures are narrowed
+    down to single IDs. One bad ID in n costs about 2*log2(n) extra calls.
+    Splitting stops once max_calls would be exceeded; the remaining
+    failing chunks are reported as they are.
+
+    Args:
+        call: Sends one chunk, returns an APIResponse-like object
+        ids: IDs of the batch
+        max_calls: Call budget (default: bisect_budget(len(ids)))
+
+    Returns:
+        Tuple of ([(chunk, response), ...] covering ids in order, calls made)
+    """
+    if max_calls is None:
+        max_calls = bisect_budget(len(ids))
+    outcomes: List[Tuple[List[Any], Any]] = []
+    stack = [list(ids)]
+    calls = 0
+    while stack:
+        chunk = stack.pop()
+        resp = call(chunk)
+        calls += 1
+        if (
+            getattr(resp, "success", True)
+            or len(chunk) == 1
+            or getattr(resp, "status_code", None) not in BISECT_STATUSES
+            or calls + len(stack) + 2 > max_calls
+        ):
+            outcomes.append((chunk, resp))
+            continue
+        mid = len(chunk) // 2
+        # Left half is popped first, so outcomes stay in input order
+        stack.append(chunk[mid:])
+        stack.append(chunk[:mid])
+    return outcomes, calls
+
+
+def apply_membership_diff(
+    diff: MembershipDiff,
+    add: Callable[[List[str]], Any],
+    remove: Callable[[List[str]], Any],
+    batch_size: int,
+    dry_run: bool = False,
+) -> SyncResult:
+    """
+    Apply a diff with chunked add/remove calls.
+
+    Chunks failing because of individual IDs are bisected, so only the
+    bad IDs end up in SyncResult.failed.
+
+    Args:
+        diff: Changes to apply
+        add: Adds a chunk of user IDs (returns an APIResponse-like object)
+        remove: Removes a chunk of user IDs
+        batch_size: Maximum IDs per call
+        dry_run: Only report what would change
+
+    Returns:
+        SyncResult
+    """
+    result = SyncResult(diff=diff, dry_run=dry_run)
+    if dry_run:
+        return result
+
+    size = max(1, batch_size)
+    for ids, call, done in (
+        (diff.to_add, add, result.added),
+        (diff.to_remove, remove, result.removed),
+    ):
+        for start in range(0, len(ids), size):
+            outcomes, calls = bisect_batch(call, ids[start : start + size])
+            result.requests += calls
+            for chunk, resp in outcomes:
+                if getattr(resp, "success", True):
+                    done.extend(chunk)
+                    continue
+                result.failed.extend(chunk)
+                error = getattr(resp, "error", None) or "Request failed"
+                result.errors.append(
+                    f"{chunk[0]}: {error}" if len(chunk) == 1 else error
+                )
+    return result
+
+
+def sync_members(
+    endpoint: Any,
+    entity_id: str,
+    target_ids: Iterable[str],
+    batch_size: int,
+    remove_extra: bool = True,
+    dry_run: bool = False,
+    current_ids: Optional[Iterable[str]] = None,
+) -> SyncResult:
+    """
+    Reconcile an entity's members using its get/add/remove_members methods.
+
+    Args:
+        endpoint: Groups or queues endpoint
+        entity_id: Group or queue ID
+        target_ids: Desired member IDs
+        batch_size: Maximum IDs per add/remove call
+        remove_extra: Remove members not in target_ids
+        dry_run: Only compute the diff
+        current_ids: Current member IDs if already known (skips the fetch)
+
+    Returns:
+        SyncResult
+    """
+    if current_ids is None:
+        current_ids = member_ids(endpoint.get_members(entity_id))
+    diff = diff_membership(current_ids, target_ids, remove_extra=remove_extra)
+    return apply_membership_diff(
+        diff,
+        lambda ids: endpoint.add_members(entity_id, ids),
+        lambda ids: endpoint.remove_members(entity_id, ids),
+        batch_size,
+        dry_run=dry_run,
+    )
@@ -0,0 +1,146 @@
+"""
+Request metrics for Genesys Cloud API calls.
+
+GenesysCloudAPI records every request here: outcome, latency and any
+retries after rate limiting. The bulk telemetry panel and the job worker
+read snapshots to show requests/sec and retry counts next to item
+throughput. Latency is also kept per route so the bulk planner can
+estimate how long an operation will take.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+# Seconds of history used for the current request rate
+DEFAULT_WINDOW = 10.0
+
+_ID_SEGMENT = re.compile(
+    r"/[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+)
+
+
+def route_key(method: str, endpoint: str) -> str:
+    """
+    Route identifier with entity IDs replaced, e.g.
+    'POST /api/v2/groups/{id}/members'.
+    """
+    return f"{method.upper()} {_ID_SEGMENT.sub('/{id}', endpoint)}"
+
+
+@dataclass
+class MetricsSnapshot:
+    """Point-in-time view of a client's request metrics."""
+
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    throttled: int = 0  # 429 responses
+    requests_per_second: float = 0.0
+    avg_latency: float = 0.0  # seconds, over the whole client lifetime
+
+    def since(self, baseline: "MetricsSnapshot") -> "MetricsSnapshot":
+        """Counters accumulated after `baseline` (rate/latency kept as-is)."""
+        return MetricsSnapshot(
+            requests=self.requests - baseline.requests,
+            errors=self.errors - baseline.errors,
+            retries=self.retries - baseline.retries,
+            throttled=self.throttled - baseline.throttled,
+            requests_per_second=self.requests_per_second,
+            avg_latency=self.avg_latency,
+        )
+
+
+class RequestMetrics:
+    """
+    Thread-safe request counters with a sliding window for the current rate.
+
+    Usage:
+        metrics = RequestMetrics()
+        metrics.record(latency=0.12, status_code=200)
+        metrics.snapshot().requests_per_second
+    """
+
+    def __init__(self, window: float = DEFAULT_WINDOW):
+        """
+        Initialize metrics.
+
+        Args:
+            window: Seconds of history used for requests_per_second
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self._recent: Deque[float] = deque()
+        self._first: Optional[float] = None
+        self._requests = 0
+        self._errors = 0
+        self._retries = 0
+        self._throttled = 0
+        self._total_latency = 0.0
+        self._route_latency: Dict[str, List[float]] = {}  # route -> [count, total]
+
+    def _trim(self, now: float) -> None:
+        while self._recent and now - self._recent[0] > self.window:
+            self._recent.popleft()
+
+    def record(
+        self, latency: float, status_code: Optional[int], route: Optional[str] = None
+    ) -> None:
+        """
+        Record a completed request.
+
+        Args:
+            latency: Seconds from send to response
+            status_code: HTTP status (None for network errors)
+            route: route_key() of the request, for per-route latency
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._first is None:
+                self._first = now
+            self._recent.append(now)
+            self._trim(now)
+            self._requests += 1
+            self._total_latency += latency
+            if status_code is None or status_code >= 400:
+                self._errors += 1
+            if status_code == 429:
+                self._throttled += 1
+            if route is not None:
+                stats = self._route_latency.setdefault(route, [0, 0.0])
+                stats[0] += 1
+                stats[1] += latency
+
+    def record_retry(self) -> None:
+        """Record that a request is being retried."""
+        with self._lock:
+            self._retries += 1
+
+    def route_latency(self, route: str) -> Optional[float]:
+        """Mean latency of a route in seconds, or None if never called."""
+        with self._lock:
+            stats = self._route_latency.get(route)
+            return stats[1] / stats[0] if stats else None
+
+    def snapshot(self) -> MetricsSnapshot:
+        """Current counters and request rate."""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            rate = 0.0
+            if self._recent and self._first is not None:
+                span = max(min(self.window, now - self._first), 1.0)
+                rate = len(self._recent) / span
+            return MetricsSnapshot(
+                requests=self._requests,
+                errors=self._errors,
+                retries=self._retries,
+                throttled=self._throttled,
+                requests_per_second=rate,
+                avg_latency=(
+                    self._total_latency / self._requests if self._requests else 0.0
+                ),
+            )
@@ -0,0 +1,250 @@
+"""Tests for utilities.bulk — shared bulk execution engine."""
+
+import threading
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from streamlit.proto.WidgetStates_pb2 import WidgetStates
+from streamlit.runtime.scriptrunner import RerunData, RerunException, StopException
+
+import utilities.base as base
+from core.demo import DemoAPI, MockAPIResponse
+from utilities.bulk import (
+    BulkControl,
+    BulkExecutor,
+    BulkProgress,
+    chunked,
+    format_duration,
+    parse_emails,
+    resolve_emails,
+)
+from utilities.group_manager import GroupManagerUtility
+
+
+class TestBulkExecutor:
+    def test_results_keep_input_order(self):
+        result = BulkExecutor(max_workers=4).run(range(20), lambda i: i * 2)
+        assert [r.item for r in result.results] == list(range(20))
+        assert [r.data for r in result.results] == [i * 2 for i in range(20)]
+        assert result.status == "success"
+
+    def test_batching(self):
+        calls = []
+
+        def fn(batch):
+            calls.append(list(batch))
+            return MockAPIResponse(success=True)
+
+        result = BulkExecutor(max_workers=2, batch_size=3).run(range(7), fn)
+        assert sorted(len(c) for c in calls) == [1, 3, 3]
+        assert len(result.succeeded) == 7
+
+    def test_partial_failure(self):
+        def fn(i):
+            if i % 2:
+                return MockAPIResponse(success=False, error="bad", status_code=400)
+            return MockAPIResponse(success=True)
+
+        result = BulkExecutor().run(range(4), fn)
+        assert result.status == "partial"
+        assert [r.item for r in result.failed] == [1, 3]
+        assert result.failed[0].status_code == 400
+
+    def test_exception_fails_whole_batch(self):
+        def fn(batch):
+            raise RuntimeError("boom")
+
+        result = BulkExecutor(batch_size=2).run(["a", "b"], fn)
+        assert result.status == "failed"
+        assert all(r.error == "boom" for r in result.results)
+
+    def test_failing_batch_is_bisected(self):
+        calls = []
+
+        def fn(batch):
+            calls.append(list(batch))
+            if "bad" in batch:
+                return MockAPIResponse(success=False, error="invalid", status_code=400)
+            return MockAPIResponse(success=True)
+
+        items = [f"u{i}" for i in range(15)] + ["bad"]
+        result = BulkExecutor(max_workers=1, batch_size=16).run(items, fn)
+        assert [r.item for r in result.failed] == ["bad"]
+        assert [r.item for r in result.results] == items
+        assert len(calls) == 9  # 1 + 2 per halving of 16
+
+    def test_bisect_disabled(self):
+        def fn(batch):
+            return MockAPIResponse(success=False, status_code=400)
+
+        executor = BulkExecutor(batch_size=4, bisect=False)
+        assert len(executor.run(range(4), fn).failed) == 4
+
+    def test_progress_is_throttled_but_final(self):
+        seen = []
+        BulkExecutor(progress_interval=60).run(
+            range(50), lambda i: i, on_progress=lambda p: seen.append(p.completed)
+        )
+        assert seen[0] == 0
+        assert seen[-1] == 50
+        assert len(seen) <= 3
+
+
+class TestBulkControl:
+    def test_cancel_stops_between_batches(self):
+        control = BulkControl()
+
+        def fn(batch):
+            if batch[0] == 2:
+                control.cancel()
+            return MockAPIResponse(success=True)
+
+        result = BulkExecutor(max_workers=1, batch_size=2).run(
+            range(8), fn, control=control
+        )
+        assert [r.item for r in result.results] == [0, 1, 2, 3]
+        assert result.cancelled == [4, 5, 6, 7]
+        assert result.status == "cancelled"
+
+    def test_pause_holds_until_resume(self):
+        control = BulkControl()
+        calls = []
+        paused_seen = []
+
+        def fn(i):
+            calls.append(i)
+            if i == 0:
+                control.pause()
+                threading.Timer(0.2, control.resume).start()
+
+        result = BulkExecutor(max_workers=1, progress_interval=0.01).run(
+            range(3),
+            fn,
+            control=control,
+            on_progress=lambda p: paused_seen.append(p.paused),
+        )
+        assert calls == [0, 1, 2]
+        assert any(paused_seen)
+        assert result.status == "success"
+
+    def test_cancel_while_paused(self):
+        control = BulkControl()
+        control.pause()
+        threading.Timer(0.1, control.cancel).start()
+        result = BulkExecutor().run(range(3), lambda i: i, control=control)
+        assert result.results == []
+        assert result.cancelled == [0, 1, 2]
+
+
+class TestBulkProgress:
+    def test_metrics(self):
+        progress = BulkProgress(total=100, completed=25, elapsed=5.0)
+        assert progress.fraction == 0.25
+        assert progress.items_per_second == 5.0
+        assert progress.eta_seconds == 15.0
+        assert "ETA 15s" in progress.describe()
+
+    def test_eta_unknown_before_start(self):
+        assert BulkProgress(total=10).eta_seconds is None
+
+
+class TestHelpers:
+    def test_parse_emails_dedupes(self):
+        raw = "a@x.com\n\nb@x.com\nnot-an-email\na@x.com\n"
+        assert parse_emails(raw) == ["a@x.com", "b@x.com"]
+
+    def test_chunked(self):
+        assert chunked([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+
+    def test_format_duration(self):
+        assert format_duration(42) == "42s"
+        assert format_duration(200) == "3m 20s"
+        assert format_duration(3900) == "1h 05m"
+
+    def test_resolve_emails(self):
+        found, missing, failed = resolve_emails(
+            DemoAPI(), ["alice.johnson@acmecorp.com", "nobody@example.com"]
+        )
+        assert [u["id"] for u in found] == ["user-0000"]
+        assert missing == ["nobody@example.com"]
+        assert failed == []
+
+
+def _stop_click(key):
+    """Rerun request of a click on the button with this key."""
+    states = WidgetStates()
+    widget = states.widgets.add()
+    widget.id = f"$$ID-0123abcd-{key}"
+    widget.trigger_value = True
+    return RerunData(widget_states=states)
+
+
+class FakeRequests:
+    def __init__(self):
+        self.reruns = []
+        self.stops = 0
+
+    def request_rerun(self, rerun_data):
+        self.reruns.append(rerun_data)
+
+    def request_stop(self):
+        self.stops += 1
+
+
+class TestRunBulk:
+    def _run(self, monkeypatch, interrupt):
+        """Run 10 items in batches of 2, interrupted at the second update."""
+        utility = GroupManagerUtility(DemoAPI())
+        requests = FakeRequests()
+        monkeypatch.setattr(
+            base,
+            "get_script_run_ctx",
+            lambda: SimpleNamespace(script_requests=requests),
+        )
+        calls = []
+
+        def progress_callback(bar, panel):
+            def update(progress):
+                calls.append(progress.completed)
+                if len(calls) == 2:
+                    raise interrupt
+
+            return update
+
+        monkeypatch.setattr(utility, "progress_callback", progress_callback)
+        executor = BulkExecutor(max_workers=1, batch_size=2, progress_interval=0)
+        result = utility.run_bulk(
+            executor, list(range(10)), lambda batch: MockAPIResponse(True), "Run"
+        )
+        return result, requests
+
+    def test_stop_cancels_and_returns(self, monkeypatch):
+        result, requests = self._run(
+            monkeypatch, RerunException(_stop_click("group_manager_bulk_stop"))
+        )
+        assert result.status == "cancelled"
+        assert result.results and result.cancelled
+        assert len(result.results) + len(result.cancelled) == 10
+        # The Stop click was handled here, not rerun
+        assert requests.reruns == []
+
+    def test_other_widget_reruns_after_the_run(self, monkeypatch):
+        rerun = RerunData(query_string="page=2")
+        result, requests = self._run(monkeypatch, RerunException(rerun))
+        assert result.status == "success"
+        assert len(result.results) == 10
+        assert requests.reruns == [rerun]
+
+    def test_session_end_stops_and_is_passed_on(self, monkeypatch):
+        result, requests = self._run(monkeypatch, StopException())
+        assert result.status == "cancelled"
+        assert requests.stops == 1
+
+
+class TestWaitWrite:
+    def test_timeout_is_a_failed_response(self, monkeypatch):
+        monkeypatch.setattr(base, "WRITE_TIMEOUT", 0.01)
+        resp = GroupManagerUtility(DemoAPI()).wait_write(Future())
+        assert not resp.success
+        assert resp.data is None
+        assert "may still be applied" in resp.error
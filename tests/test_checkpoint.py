@@ -0,0 +1,148 @@
+"""Tests for core.checkpoint — resumable bulk job journal."""
+
+import os
+import time
+
+import core.checkpoint as checkpoint
+from core.checkpoint import JobJournal, make_job_id
+from core.demo import MockAPIResponse
+from core.encrypted_storage import EncryptedStorage
+from utilities.bulk import BulkExecutor
+
+
+class TestJobJournal:
+    def setup_method(self):
+        self.storage = EncryptedStorage()
+
+    def _open(self, tmp_path, items):
+        return JobJournal.open(
+            "assign_skill", "skill-1", items, storage=self.storage, jobs_dir=tmp_path
+        )
+
+    def test_job_id_is_deterministic(self):
+        assert make_job_id("op", "t", ["a", "b"]) == make_job_id("op", "t", ["a", "b"])
+        assert make_job_id("op", "t", ["a", "b"]) != make_job_id("op", "t", ["b"])
+
+    def test_job_id_includes_details(self, tmp_path):
+        assert make_job_id("op", "t", ["a"], {}) == make_job_id("op", "t", ["a"])
+        assert make_job_id("op", "t", ["a"], {"proficiency": 1.0}) != make_job_id(
+            "op", "t", ["a"], {"proficiency": 5.0}
+        )
+        first = JobJournal.open(
+            "assign_skill",
+            "skill-1",
+            ["u1"],
+            storage=self.storage,
+            jobs_dir=tmp_path,
+            details={"proficiency": 1.0},
+        )
+        first.record("apply", "u1", "done")
+        first.close()
+        other = JobJournal.open(
+            "assign_skill",
+            "skill-1",
+            ["u1"],
+            storage=self.storage,
+            jobs_dir=tmp_path,
+            details={"proficiency": 5.0},
+        )
+        assert not other.resumed
+
+    def test_lines_are_encrypted(self, tmp_path):
+        journal = self._open(tmp_path, ["alice@example.com"])
+        journal.record("apply", "alice@example.com", "done")
+        journal.close()
+        content = open(journal.path, encoding="utf-8").read()
+        assert "alice@example.com" not in content
+        assert "assign_skill" not in content
+
+    def test_resume_skips_done_items(self, tmp_path):
+        items = ["u1", "u2", "u3", "u4"]
+        journal = self._open(tmp_path, items)
+        assert not journal.resumed
+
+        def flaky(uid):
+            ok = uid in ("u1", "u2")
+            return MockAPIResponse(success=ok, error=None if ok else "interrupted")
+
+        BulkExecutor().run(items, flaky, checkpoint=journal.phase("apply"))
+        journal.close()
+
+        resumed = self._open(tmp_path, items)
+        assert resumed.resumed
+        assert resumed.counts("apply") == {"done": 2, "failed": 2}
+
+        calls = []
+
+        def succeed(uid):
+            calls.append(uid)
+            return MockAPIResponse(success=True)
+
+        result = BulkExecutor().run(items, succeed, checkpoint=resumed.phase("apply"))
+        assert sorted(calls) == ["u3", "u4"]
+        assert result.status == "success"
+        assert len(result.results) == 4
+
+    def test_completed_job_starts_fresh(self, tmp_path):
+        journal = self._open(tmp_path, ["u1"])
+        journal.record("apply", "u1", "done")
+        journal.complete()
+
+        again = self._open(tmp_path, ["u1"])
+        assert not again.resumed
+        assert again.get("apply", "u1") is None
+
+    def test_complete_deletes_journal(self, tmp_path):
+        journal = self._open(tmp_path, ["alice@example.com"])
+        journal.record("apply", "alice@example.com", "done")
+        journal.complete()
+        assert journal.completed
+        assert not os.path.exists(journal.path)
+
+    def test_complete_prunes_abandoned_journals(self, tmp_path):
+        stale = self._open(tmp_path, ["u1"])
+        stale.close()
+        old = time.time() - checkpoint.JOURNAL_MAX_AGE - 60
+        os.utime(stale.path, (old, old))
+        recent = self._open(tmp_path, ["u2"])
+        recent.close()
+
+        self._open(tmp_path, ["u3"]).complete()
+        assert not os.path.exists(stale.path)
+        assert os.path.exists(recent.path)
+
+    def test_memory_journals_are_removed_and_capped(self, monkeypatch):
+        monkeypatch.setattr(self.storage, "_storage_dir", None)
+        monkeypatch.setattr(checkpoint, "_memory_journals", {})
+        monkeypatch.setattr(checkpoint, "MAX_MEMORY_JOURNALS", 2)
+        journal = JobJournal.open(
+            "assign_skill", "skill-1", ["u1"], storage=self.storage
+        )
+        assert journal.path is None
+        assert journal.job_id in checkpoint._memory_journals
+        journal.complete()
+        assert journal.job_id not in checkpoint._memory_journals
+
+        ids = [
+            JobJournal.open("assign_skill", "skill-1", [u], storage=self.storage).job_id
+            for u in ("u1", "u2", "u3")
+        ]
+        assert list(checkpoint._memory_journals) == ids[1:]
+
+    def test_phase_keeps_data(self, tmp_path):
+        journal = self._open(tmp_path, ["a@x.com"])
+        journal.phase("resolve", keep_data=True).record(
+            "a@x.com", True, data={"id": "u1"}
+        )
+        journal.close()
+        resumed = self._open(tmp_path, ["a@x.com"])
+        assert resumed.get("resolve", "a@x.com").data == {"id": "u1"}
+
+    def test_other_key_is_ignored(self, tmp_path):
+        journal = self._open(tmp_path, ["u1"])
+        journal.record("apply", "u1", "done")
+        journal.close()
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write("not-a-valid-token\n")
+        resumed = self._open(tmp_path, ["u1"])
+        assert resumed.counts("apply") == {"done": 1, "failed": 0}
@@ -0,0 +1,186 @@
+"""Tests for genesys_cloud.coalesce."""
+
+import gc
+import weakref
+
+import pytest
+
+from genesys_cloud import APIResponse
+from genesys_cloud.coalesce import SUPERSEDED, WriteCoalescer, get_coalescer
+from genesys_cloud.scheduler import RequestScheduler
+
+
+class FakeEndpoint:
+    def __init__(self, calls, name, bad=()):
+        self.calls = calls
+        self.name = name
+        self.bad = set(bad)
+
+    def _call(self, action, entity_id, ids):
+        self.calls.append((self.name, action, entity_id, list(ids)))
+        if self.bad & set(ids):
+            return APIResponse(success=False, error="invalid", status_code=400)
+        return APIResponse(success=True)
+
+    def add_members(self, entity_id, ids):
+        return self._call("add", entity_id, ids)
+
+    def remove_members(self, entity_id, ids):
+        return self._call("remove", entity_id, ids)
+
+
+class FakeRouting:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def add_user_skill(self, user_id, skill_id, proficiency):
+        self.calls.append(("add_user_skill", user_id, skill_id, proficiency))
+        return APIResponse(success=True)
+
+    def add_user_skills(self, user_id, skills):
+        self.calls.append(("add_user_skills", user_id, skills))
+        return APIResponse(success=True)
+
+    def remove_user_skill(self, user_id, skill_id):
+        self.calls.append(("remove_user_skill", user_id, skill_id))
+        return APIResponse(success=True)
+
+
+class FakeAPI:
+    def __init__(self, bad=()):
+        self.calls = []
+        self.groups = FakeEndpoint(self.calls, "groups", bad)
+        self.queues = FakeEndpoint(self.calls, "queues", bad)
+        self.routing = FakeRouting(self.calls)
+
+
+@pytest.fixture
+def api():
+    return FakeAPI()
+
+
+@pytest.fixture
+def coalescer(api):
+    # Long window: tests flush explicitly
+    return WriteCoalescer(api, window=60)
+
+
+class TestMembers:
+    def test_merges_changes_per_target(self, api, coalescer):
+        first = coalescer.add_members("groups", "g1", ["a"])
+        second = coalescer.add_members("groups", "g1", ["b", "a"])
+        other = coalescer.add_members("groups", "g2", ["c"])
+        coalescer.flush()
+        assert sorted(api.calls) == [
+            ("groups", "add", "g1", ["a", "b"]),
+            ("groups", "add", "g2", ["c"]),
+        ]
+        assert first.result().success and second.result().success
+        assert other.result().success
+
+    def test_later_change_supersedes_earlier(self, api, coalescer):
+        added = coalescer.add_members("queues", "q1", ["a", "b"])
+        removed = coalescer.remove_members("queues", "q1", ["a"])
+        coalescer.flush()
+        assert api.calls == [
+            ("queues", "add", "q1", ["b"]),
+            ("queues", "remove", "q1", ["a"]),
+        ]
+        # "a" was never added: the add is not a success and does not list it
+        assert not added.result().success
+        assert added.result().error == SUPERSEDED
+        assert added.result().data.succeeded == ["b"]
+        assert added.result().data.superseded == ["a"]
+        assert removed.result().success
+        assert coalescer.stats.superseded == 1
+        assert coalescer.stats.calls == 2
+
+    def test_fully_superseded_change(self, api, coalescer):
+        added = coalescer.add_members("groups", "g1", ["a"])
+        coalescer.remove_members("groups", "g1", ["a"])
+        coalescer.flush()
+        outcome = added.result().data
+        assert not added.result().success
+        assert (outcome.succeeded, outcome.superseded) == ([], ["a"])
+
+    def test_only_bad_ids_fail(self):
+        api = FakeAPI(bad={"bad"})
+        coalescer = WriteCoalescer(api, window=60)
+        good = coalescer.add_members("groups", "g1", ["a", "b"])
+        bad = coalescer.add_members("groups", "g1", ["bad"])
+        coalescer.flush()
+        assert good.result().success
+        assert bad.result().status_code == 400
+
+    def test_outcome_lists_ids_that_succeeded(self):
+        api = FakeAPI(bad={"bad"})
+        coalescer = WriteCoalescer(api, window=60)
+        mixed = coalescer.remove_members("queues", "q1", ["a", "bad", "b"])
+        coalescer.flush()
+        response = mixed.result()
+        assert not response.success
+        assert sorted(response.data.succeeded) == ["a", "b"]
+        assert response.data.failed == {"bad": ("invalid", 400)}
+
+    def test_window_flushes_automatically(self, api):
+        coalescer = WriteCoalescer(api, window=0.01)
+        future = coalescer.add_members("groups", "g1", ["a"])
+        assert future.result(timeout=5).success
+        assert api.calls == [("groups", "add", "g1", ["a"])]
+
+    def test_unknown_endpoint(self, coalescer):
+        with pytest.raises(ValueError):
+            coalescer.add_members("users", "u1", ["a"])
+
+
+class TestSkills:
+    def test_adds_go_out_as_one_bulk_call(self, api, coalescer):
+        coalescer.add_user_skill("u1", "s1", 2.0)
+        coalescer.add_user_skill("u1", "s2", 3.0)
+        coalescer.add_user_skill("u1", "s1", 4.0)  # latest proficiency wins
+        coalescer.remove_user_skill("u1", "s3")
+        coalescer.flush()
+        assert api.calls == [
+            (
+                "add_user_skills",
+                "u1",
+                [{"id": "s1", "proficiency": 4.0}, {"id": "s2", "proficiency": 3.0}],
+            ),
+            ("remove_user_skill", "u1", "s3"),
+        ]
+
+    def test_single_add_uses_plain_call(self, api, coalescer):
+        coalescer.add_user_skill("u1", "s1", 2.0)
+        coalescer.flush()
+        assert api.calls == [("add_user_skill", "u1", "s1", 2.0)]
+
+
+class TestShared:
+    def test_shared_per_client(self, api):
+        assert get_coalescer(api) is get_coalescer(api)
+
+    def test_changes_go_out_on_their_own_client(self):
+        scheduler = RequestScheduler()
+        first, second = FakeAPI(), FakeAPI()
+        first.scheduler = second.scheduler = scheduler
+        coalescer = get_coalescer(first)
+        assert get_coalescer(second) is coalescer
+        coalescer.window = 60
+        coalescer.add_members("groups", "g1", ["a"], api=first)
+        coalescer.add_members("groups", "g2", ["b"], api=second)
+        coalescer.flush()
+        assert first.calls == [("groups", "add", "g1", ["a"])]
+        assert second.calls == [("groups", "add", "g2", ["b"])]
+
+    def test_does_not_keep_clients_alive(self):
+        api = FakeAPI()
+        get_coalescer(api).add_members("groups", "g1", ["a"], api=api)
+        get_coalescer(api).flush()
+        ref = weakref.ref(api)
+        del api
+        gc.collect()
+        assert ref() is None
+
+    def test_change_without_client(self):
+        with pytest.raises(ValueError):
+            get_coalescer(FakeAPI()).add_members("groups", "g1", ["a"])
@@ -1,7 +1,15 @@
 """Tests for core.diagnostics — endpoint health checks."""
 
+import time
+
 from core.demo import DemoAPI
-from core.diagnostics import run_diagnostics
+from core.diagnostics import (
+    clear_cached_report,
+    diagnostics_running,
+    get_cached_report,
+    run_diagnostics,
+    start_diagnostics,
+)
 
 
 class TestDiagnostics:
@@ -69,3 +77,23 @@ class TestDiagnostics:
         assert not report.all_ok
         assert report.failed > 0
         assert report.backend == "live"
+
+    def test_results_keep_check_order(self):
+        report = run_diagnostics(DemoAPI(), is_demo=True, max_workers=8)
+        assert [r.name for r in report.results][:2] == [
+            "Users - List",
+            "Users - Search",
+        ]
+        assert report.results[-1].name == "Skills - Get All"
+
+    def test_background_run(self):
+        clear_cached_report()
+        start_diagnostics(DemoAPI(), is_demo=True)
+        deadline = time.monotonic() + 5
+        while diagnostics_running():
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        report = get_cached_report()
+        assert report is not None and report.all_ok
+        clear_cached_report()
+        assert get_cached_report() is None
@@ -0,0 +1,246 @@
+"""Tests for core.encrypted_storage (format, cache, single-file backend, streams)."""
+
+import base64
+import json
+import os
+import threading
+import uuid
+
+import pytest
+import streamlit as st
+
+from core.encrypted_storage import (
+    COMPRESS_THRESHOLD,
+    FORMAT_JSON,
+    FORMAT_ZLIB,
+    KV_FILE,
+    MIGRATED_SUFFIX,
+    EncryptedStorage,
+)
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    store = EncryptedStorage()
+    store._storage_dir = str(tmp_path)
+    decrypts = []
+    original = store.decrypt_bytes
+    monkeypatch.setattr(
+        store, "decrypt_bytes", lambda data: decrypts.append(data) or original(data)
+    )
+    store.decrypts = decrypts
+    return store
+
+
+@pytest.fixture
+def key():
+    """Per-test key (session state is shared between tests)."""
+    return f"test_{uuid.uuid4().hex}"
+
+
+def _forget_session_copy(key):
+    """Leave only the file, as in a new session or another process."""
+    st.session_state.get("_encrypted_store", {}).pop(key, None)
+
+
+class TestFormat:
+    def _payload(self, storage, key):
+        with open(os.path.join(storage.storage_dir, f"{key}.enc"), "rb") as f:
+            raw = f.read()
+        return raw, storage.decrypt_bytes(base64.urlsafe_b64encode(raw))
+
+    def test_large_values_are_compressed(self, storage, key):
+        value = [{"id": f"user-{i}", "name": "Agent"} for i in range(200)]
+        storage.store(key, value)
+        raw, payload = self._payload(storage, key)
+        assert payload[:1] == FORMAT_ZLIB
+        assert len(raw) < len(json.dumps(value)) / 4
+        _forget_session_copy(key)
+        assert storage.retrieve(key) == value
+
+    def test_small_values_are_not(self, storage, key):
+        storage.store(key, {"region": "mypurecloud.com"})
+        raw, payload = self._payload(storage, key)
+        assert payload[:1] == FORMAT_JSON
+        assert len(payload) < COMPRESS_THRESHOLD
+        _forget_session_copy(key)
+        assert storage.retrieve(key) == {"region": "mypurecloud.com"}
+
+    def test_values_of_earlier_versions(self, storage, key, tmp_path):
+        # Base64 text token of uncompressed JSON without a format byte
+        with open(os.path.join(tmp_path, f"{key}.enc"), "w") as f:
+            f.write(storage.encrypt(json.dumps(["old", 1])) + "\n")
+        assert storage.retrieve(key) == ["old", 1]
+        with open(os.path.join(tmp_path, f"{key}.enc"), "w") as f:
+            f.write(storage.encrypt("not json"))
+        assert storage.retrieve(key) == "not json"
+
+    def test_concurrent_writes_of_one_key(self, storage, key):
+        results = []
+
+        def write(n):
+            results.extend(storage.store(key, {"n": n}) for _ in range(20))
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(results) and len(results) == 160
+        _forget_session_copy(key)
+        assert storage.retrieve(key)["n"] in range(8)
+
+
+class TestCache:
+    def test_repeated_reads_decrypt_once(self, storage, key):
+        storage.store(key, {"a": 1})
+        assert storage.retrieve(key) == {"a": 1}
+        assert storage.retrieve(key) == {"a": 1}
+        assert len(storage.decrypts) == 1
+
+    def test_reads_return_independent_copies(self, storage, key):
+        storage.store(key, [{"id": "p1"}])
+        first = storage.retrieve(key)
+        first.append({"id": "p2"})
+        first[0]["id"] = "changed"
+        assert storage.retrieve(key) == [{"id": "p1"}]
+
+    def test_store_and_delete_invalidate(self, storage, key):
+        storage.store(key, "old")
+        assert storage.retrieve(key) == "old"
+        storage.store(key, "new")
+        assert storage.retrieve(key) == "new"
+        storage.delete(key)
+        assert storage.retrieve(key) is None
+
+    def test_file_changed_elsewhere_is_reread(self, storage, key, tmp_path):
+        storage.store(key, {"v": 1})
+        _forget_session_copy(key)
+        assert storage.retrieve(key) == {"v": 1}
+        assert storage.retrieve(key) == {"v": 1}
+        assert len(storage.decrypts) == 1
+
+        # Another process rewrites the file (new inode, like an atomic save)
+        path = os.path.join(tmp_path, f"{key}.enc")
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(storage.encrypt('{"v": 2}'))
+        os.replace(tmp, path)
+        assert storage.retrieve(key) == {"v": 2}
+
+    def test_file_removed_elsewhere(self, storage, key, tmp_path):
+        storage.store(key, "x")
+        _forget_session_copy(key)
+        assert storage.retrieve(key) == "x"
+        os.remove(os.path.join(tmp_path, f"{key}.enc"))
+        assert storage.retrieve(key) is None
+
+    def test_active_profile_on_rerun(self, storage, monkeypatch):
+        monkeypatch.setitem(st.session_state, "_encrypted_store", {})
+        profile_id = storage.add_profile({"name": "Ada", "email": "ada@acme.com"})
+        storage.set_active_profile(profile_id)
+        assert storage.get_active_profile()["name"] == "Ada"
+        decrypted = len(storage.decrypts)
+        for _ in range(5):
+            assert storage.get_active_profile()["name"] == "Ada"
+        assert len(storage.decrypts) == decrypted
+
+
+@pytest.fixture
+def single_file(tmp_path):
+    def make():
+        store = EncryptedStorage(backend="single_file")
+        store._storage_dir = str(tmp_path)
+        return store
+
+    return make
+
+
+class TestSingleFile:
+    def test_values_live_in_one_file(self, single_file, key, tmp_path):
+        storage = single_file()
+        storage.store(key, {"a": 1})
+        storage.store(f"{key}_2", [1, 2])
+        _forget_session_copy(key)
+        assert storage.retrieve(key) == {"a": 1}
+        assert sorted(os.listdir(tmp_path)) == [KV_FILE, f"{KV_FILE}.lock"]
+        assert storage.get_storage_info()["layout"] == f"single file ({KV_FILE})"
+
+    def test_other_process_sees_writes_and_deletes(self, single_file, key):
+        writer, reader = single_file(), single_file()
+        writer.store(key, "v1")
+        _forget_session_copy(key)
+        assert reader.retrieve(key) == "v1"
+        writer.store(key, "v2")
+        _forget_session_copy(key)
+        assert reader.retrieve(key) == "v2"
+        writer.delete(key)
+        assert reader.retrieve(key) is None
+
+    def test_batch_commits_once(self, single_file, monkeypatch):
+        monkeypatch.setitem(st.session_state, "_encrypted_store", {})
+        storage = single_file()
+        kv = storage._kv_store()
+        with storage.batch():
+            profile_id = storage.add_profile({"name": "Ada", "email": "a@b.c"})
+            storage.set_active_profile(profile_id)
+        assert kv.commits == 1
+        st.session_state._encrypted_store.clear()
+        assert single_file().get_active_profile()["name"] == "Ada"
+
+    def test_imports_per_file_values(self, storage, single_file, key, tmp_path):
+        storage.store(key, {"legacy": True})
+        _forget_session_copy(key)
+        migrated = single_file()
+        assert migrated.retrieve(key) == {"legacy": True}
+        assert os.path.exists(os.path.join(tmp_path, f"{key}.enc{MIGRATED_SUFFIX}"))
+        assert not os.path.exists(os.path.join(tmp_path, f"{key}.enc"))
+
+
+class TestStreams:
+    def test_store_stream_round_trip(self, storage, key, tmp_path, monkeypatch):
+        entries = {f"users:100:{i}": {"data": ["x" * 50] * 100} for i in range(50)}
+        assert storage.store_stream(key, entries)
+        assert os.path.exists(os.path.join(tmp_path, f"{key}.blob"))
+        opened = []
+        original = storage.open_encrypted_reader
+        monkeypatch.setattr(
+            storage,
+            "open_encrypted_reader",
+            lambda path: opened.append(path) or original(path),
+        )
+        assert storage.retrieve_stream(key) == entries
+        # Cached until the file changes
+        assert storage.retrieve_stream(key) == entries
+        assert len(opened) == 1
+
+    def test_replaces_and_falls_back_to_store_copy(self, storage, key, tmp_path):
+        storage.store(key, {"old": 1})
+        assert storage.retrieve_stream(key) == {"old": 1}
+        storage.store_stream(key, {"new": 2})
+        assert not os.path.exists(os.path.join(tmp_path, f"{key}.enc"))
+        assert storage.retrieve_stream(key) == {"new": 2}
+        storage.delete(key)
+        assert storage.retrieve_stream(key) is None
+
+    def test_damaged_blob(self, storage, key, tmp_path):
+        storage.store_stream(key, list(range(1000)))
+        path = os.path.join(tmp_path, f"{key}.blob")
+        with open(path, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)[0]
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last ^ 0xFF]))
+        assert storage.retrieve_stream(key) is None
+
+    def test_failed_write_keeps_previous_file(self, storage, tmp_path):
+        path = os.path.join(tmp_path, "data.bin")
+        with storage.open_encrypted_writer(path) as out:
+            out.write(b"v1")
+        with pytest.raises(RuntimeError):
+            with storage.open_encrypted_writer(path) as out:
+                out.write(b"v2")
+                raise RuntimeError
+        with storage.open_encrypted_reader(path) as reader:
+            assert reader.read() == b"v1"
+        assert os.listdir(tmp_path) == ["data.bin"]
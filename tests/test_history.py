@@ -0,0 +1,334 @@
+"""Tests for utilities.history (indexed action history)."""
+
+import base64
+import json
+import os
+import uuid
+
+import pytest
+
+import utilities.history as history_module
+from utilities.history import (
+    INLINE_USER_IDS,
+    ActionHistory,
+    RetentionPolicy,
+    pack_ids,
+    unpack_ids,
+)
+
+
+def _record(history, n, **kwargs):
+    params = dict(
+        utility="group_manager",
+        action="add_members",
+        target=f"Group {n}",
+        target_id=f"grp-{n}",
+        details={"n": n},
+        affected_count=1,
+        status="success",
+        user_ids=[f"user-{n}"],
+    )
+    params.update(kwargs)
+    return history.record_action(**params)
+
+
+@pytest.fixture
+def history(tmp_path):
+    return ActionHistory(str(tmp_path))
+
+
+def _targets(records):
+    return [r["target_id"] for r in records]
+
+
+class TestQueries:
+    def test_reads_most_recent_first(self, history):
+        ids = [_record(history, n) for n in range(3)]
+        assert [r["id"] for r in history.get_history()] == ids[::-1]
+        record = history.get_action(ids[1])
+        assert record["details"] == {"n": 1}
+        assert record["user_ids"] == ["user-1"]
+        assert history.get_action("missing") is None
+
+    def test_filters(self, history):
+        _record(history, 1)
+        _record(history, 2, action="remove_members")
+        _record(history, 3, utility="queue_manager", status="partial")
+        assert _targets(history.get_history(action="add_members")) == [
+            "grp-3",
+            "grp-1",
+        ]
+        assert len(history.get_history(utility="group_manager")) == 2
+        assert history.get_history(target_id="grp-2")[0]["action"] == "remove_members"
+        assert _targets(history.get_history_page(status="partial").records) == ["grp-3"]
+        assert len(history.get_history(limit=1)) == 1
+
+    def test_keyset_pages(self, history):
+        for n in range(7):
+            _record(history, n)
+        seen = []
+        cursor = None
+        while True:
+            page = history.get_history_page(limit=3, before=cursor)
+            seen += _targets(page.records)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert seen == [f"grp-{n}" for n in range(6, -1, -1)]
+
+    def test_time_range(self, history):
+        _record(history, 1)
+        middle = history.get_history()[0]["timestamp"]
+        _record(history, 2)
+        assert _targets(history.get_history_page(since=middle).records) == [
+            "grp-2",
+            "grp-1",
+        ]
+        assert history.get_history_page(until=middle).records == []
+
+    def test_shared_between_instances(self, tmp_path, history):
+        _record(history, 1)
+        other = ActionHistory(str(tmp_path))  # e.g. the worker process
+        _record(other, 2)
+        assert _targets(history.get_history()) == ["grp-2", "grp-1"]
+
+    def test_rollback_data(self, history):
+        action_id = _record(history, 1)
+        assert history.get_rollback_data(action_id) == {
+            "utility": "group_manager",
+            "target": "Group 1",
+            "target_id": "grp-1",
+            "user_ids": ["user-1"],
+            "removed_ids": [],
+            "original_action": "add_members",
+        }
+        failed = _record(history, 2, status="failed")
+        assert history.get_rollback_data(failed) is None
+        partial = _record(history, 3, status="partial")
+        assert history.get_rollback_data(partial)["user_ids"] == ["user-3"]
+        skill = _record(history, 4, action="assign_skill")
+        assert history.get_rollback_data(skill) is None
+
+    def test_clear(self, history):
+        _record(history, 1)
+        history.clear_history()
+        assert history.count() == 0
+
+
+class TestRetention:
+    def test_keeps_everything_by_default(self, history):
+        for n in range(600):
+            _record(history, n)
+        assert history.count() == 600
+
+    def test_max_records(self, history):
+        for n in range(10):
+            _record(history, n)
+        history.retention = RetentionPolicy(max_records=4)
+        assert history.apply_retention() == 6
+        assert _targets(history.get_history()) == ["grp-9", "grp-8", "grp-7", "grp-6"]
+
+    def test_max_age(self, history):
+        _record(history, 1)
+        history.retention = RetentionPolicy(max_age_days=1)
+        assert history.apply_retention() == 0
+        history.retention = RetentionPolicy(max_age_days=-1)
+        assert history.apply_retention() == 1
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("ADMIN_LAYERS_HISTORY_MAX_RECORDS", "1000")
+        monkeypatch.delenv("ADMIN_LAYERS_HISTORY_MAX_AGE_DAYS", raising=False)
+        monkeypatch.delenv("ADMIN_LAYERS_HISTORY_ARCHIVE_DAYS", raising=False)
+        assert RetentionPolicy.from_env() == RetentionPolicy(
+            max_records=1000, archive_after_days=30
+        )
+        monkeypatch.setenv("ADMIN_LAYERS_HISTORY_ARCHIVE_DAYS", "0")
+        assert RetentionPolicy.from_env().archive_after_days is None
+
+
+class TestJournal:
+    def test_appends_one_line_per_action(self, history):
+        for n in range(3):
+            _record(history, n)
+        with open(history.history_file, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert [json.loads(line)["target_id"] for line in lines] == [
+            "grp-0",
+            "grp-1",
+            "grp-2",
+        ]
+
+    def test_fsync_policy(self, tmp_path, monkeypatch):
+        calls = []
+        real_fsync = os.fsync
+        monkeypatch.setattr(
+            history_module.os, "fsync", lambda fd: calls.append(fd) or real_fsync(fd)
+        )
+        history = ActionHistory(str(tmp_path), fsync_every=3)
+        for n in range(7):
+            _record(history, n)
+        assert len(calls) == 2
+        history.sync()
+        assert len(calls) == 3
+        history.sync()  # nothing left to flush
+        assert len(calls) == 3
+
+    def test_no_fsync_when_disabled(self, tmp_path, monkeypatch):
+        calls = []
+        monkeypatch.setattr(history_module.os, "fsync", calls.append)
+        history = ActionHistory(str(tmp_path), fsync_every=0)
+        for n in range(20):
+            _record(history, n)
+        assert calls == []
+
+    def test_skips_torn_lines(self, tmp_path, history):
+        _record(history, 1)
+        with open(history.history_file, "a", encoding="utf-8") as f:
+            f.write('{"id": "broken"\n{"id": "partial')
+        reloaded = ActionHistory(str(tmp_path))
+        assert _targets(reloaded.get_history()) == ["grp-1"]
+        # The torn line is ended before the next record
+        _record(reloaded, 2)
+        assert _targets(ActionHistory(str(tmp_path)).get_history()) == [
+            "grp-2",
+            "grp-1",
+        ]
+
+    def test_indexes_lines_a_crash_left_behind(self, tmp_path, history):
+        _record(history, 1)
+        line = {"id": "20240101_000000_000000", "timestamp": "2024-01-01T00:00:00"}
+        with open(history.history_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps({**line, "target_id": "grp-crash"}) + "\n")
+        reloaded = ActionHistory(str(tmp_path))
+        assert _targets(reloaded.get_history()) == ["grp-1", "grp-crash"]
+
+    def test_compaction_empties_indexed_journal(self, history, monkeypatch):
+        monkeypatch.setattr(history_module, "COMPACT_AT", 5)
+        ids = [str(uuid.uuid4()) for _ in range(INLINE_USER_IDS + 1)]
+        long_id = _record(history, 0, user_ids=ids)
+        for n in range(1, 6):
+            _record(history, n)
+        with open(history.history_file, encoding="utf-8") as f:
+            assert len(f.read().splitlines()) == 1
+        assert len(history.get_history()) == 6
+        assert history.get_rollback_data(long_id)["user_ids"] == ids
+        _record(history, 6)
+        assert history.get_history()[0]["target_id"] == "grp-6"
+
+    def test_long_lists_are_packed_in_the_journal(self, history):
+        ids = [str(uuid.uuid4()) for _ in range(INLINE_USER_IDS + 1)]
+        _record(history, 1, user_ids=ids)
+        with open(history.history_file, encoding="utf-8") as f:
+            line = json.loads(f.readline())
+        assert line["user_ids"] == []
+        assert unpack_ids(base64.b64decode(line["user_ids_blob"])) == ids
+
+    def test_converts_legacy_file(self, tmp_path):
+        legacy = [
+            {"id": "b", "timestamp": "2024-02-01T00:00:00", "target_id": "new"},
+            {"id": "a", "timestamp": "2024-01-01T00:00:00", "target_id": "old"},
+        ]
+        with open(os.path.join(tmp_path, "action_history.json"), "w") as f:
+            json.dump(legacy, f)
+        history = ActionHistory(str(tmp_path))
+        assert [r["id"] for r in history.get_history()] == ["b", "a"]
+        assert os.path.exists(os.path.join(tmp_path, "action_history.json.migrated"))
+        with open(history.history_file, encoding="utf-8") as f:
+            assert [json.loads(line)["id"] for line in f] == ["a", "b"]
+
+
+class TestUserIdBlobs:
+    def test_pack_round_trip(self):
+        uuids = [str(uuid.uuid4()) for _ in range(1000)]
+        blob = pack_ids(uuids)
+        assert unpack_ids(blob) == uuids
+        assert len(blob) < 17 * len(uuids)
+        # Non-UUID or non-canonical IDs fall back to compressed text
+        for ids in (["user-0001", "user-0002"], [uuids[0].upper()], []):
+            assert unpack_ids(pack_ids(ids)) == ids
+
+    def test_long_lists_stored_out_of_line(self, history):
+        ids = [str(uuid.uuid4()) for _ in range(INLINE_USER_IDS + 1)]
+        action_id = _record(history, 1, user_ids=ids)
+        record = history.get_history()[0]
+        assert record["user_ids"] == []
+        assert record["user_ids_count"] == len(ids)
+        assert record["user_ids_ref"]
+        assert history.get_rollback_data(action_id)["user_ids"] == ids
+
+    def test_short_lists_stay_inline(self, history):
+        _record(history, 1)
+        record = history.get_history()[0]
+        assert record["user_ids"] == ["user-1"]
+        assert record["user_ids_ref"] is None
+        assert history.get_user_ids(record) == ["user-1"]
+
+    def test_identical_lists_share_a_blob(self, history):
+        ids = [f"user-{n}" for n in range(INLINE_USER_IDS + 1)]
+        _record(history, 1, user_ids=ids)
+        _record(history, 2, user_ids=ids)
+        first, second = history.get_history()
+        assert first["user_ids_ref"] == second["user_ids_ref"]
+
+    def test_retention_drops_unreferenced_blobs(self, history):
+        ids = [f"user-{n}" for n in range(INLINE_USER_IDS + 1)]
+        old = _record(history, 1, user_ids=ids)
+        ref = history.get_action(old)["user_ids_ref"]
+        _record(history, 2)
+        history.retention = RetentionPolicy(max_records=1)
+        history.apply_retention()
+        assert history._store.get_blob(ref) is None
+
+    def test_long_sync_removals_stored_out_of_line(self, history):
+        added = [str(uuid.uuid4()) for _ in range(3)]
+        removed = [str(uuid.uuid4()) for _ in range(INLINE_USER_IDS + 1)]
+        action_id = _record(
+            history,
+            1,
+            action="sync_members",
+            details={"removed_ids": removed, "failed": 0},
+            user_ids=added,
+        )
+        record = history.get_history()[0]
+        assert record["details"]["removed_ids"] == []
+        assert record["details"]["removed_ids_count"] == len(removed)
+        assert record["removed_ids_ref"]
+        data = history.get_rollback_data(action_id)
+        assert data["user_ids"] == added
+        assert data["removed_ids"] == removed
+
+    def test_retention_keeps_blobs_of_removals(self, history):
+        removed = [f"user-{n}" for n in range(INLINE_USER_IDS + 1)]
+        old = _record(
+            history, 1, action="sync_members", details={"removed_ids": removed}
+        )
+        ref = history.get_action(old)["removed_ids_ref"]
+        _record(history, 2, user_ids=[f"u{n}" for n in range(INLINE_USER_IDS + 1)])
+        history.retention = RetentionPolicy(max_records=2)
+        history.apply_retention()
+        assert history.get_rollback_data(old)["removed_ids"] == removed
+        _record(history, 3)
+        history.apply_retention()
+        assert history._store.get_blob(ref) is None
+
+    def test_migrates_older_database(self, tmp_path):
+        import sqlite3
+
+        conn = sqlite3.connect(os.path.join(tmp_path, "action_history.db"))
+        conn.execute(
+            "CREATE TABLE actions (id TEXT PRIMARY KEY, timestamp TEXT NOT NULL, "
+            "utility TEXT NOT NULL, action TEXT NOT NULL, target TEXT NOT NULL "
+            "DEFAULT '', target_id TEXT NOT NULL DEFAULT '', status TEXT NOT NULL, "
+            "affected_count INTEGER NOT NULL DEFAULT 0, details TEXT NOT NULL "
+            "DEFAULT '{}', user_ids TEXT NOT NULL DEFAULT '[]')"
+        )
+        conn.execute(
+            "INSERT INTO actions (id, timestamp, utility, action, status, user_ids) "
+            "VALUES ('a', 't', 'u', 'add_members', 'success', '[\"x\"]')"
+        )
+        conn.commit()
+        conn.close()
+        history = ActionHistory(str(tmp_path))
+        assert history.get_rollback_data("a")["user_ids"] == ["x"]
+        _record(history, 1, user_ids=[f"u{n}" for n in range(INLINE_USER_IDS + 1)])
+        assert history.count() == 2
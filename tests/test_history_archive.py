@@ -0,0 +1,250 @@
+"""Tests for utilities.history_archive (encrypted day segments of old history)."""
+
+import json
+import os
+import uuid
+import zlib
+from dataclasses import asdict
+from datetime import datetime, timedelta
+
+import pytest
+from cryptography.fernet import Fernet
+
+from core.encrypted_storage import EncryptedStorage
+from utilities.history import ActionHistory, ActionRecord, RetentionPolicy
+from utilities.history_archive import ARCHIVE_DIR, HistoryArchive
+
+
+@pytest.fixture
+def storage(tmp_path):
+    store = EncryptedStorage()
+    store._storage_dir = str(tmp_path)
+    return store
+
+
+@pytest.fixture
+def history(tmp_path, storage):
+    return ActionHistory(
+        str(tmp_path), RetentionPolicy(archive_after_days=30), storage=storage
+    )
+
+
+def _add(history, days_ago, n, user_ids=None):
+    """Record an action dated days_ago, at noon (IDs follow the timestamp)."""
+    day = datetime.now().replace(hour=12, minute=0) - timedelta(days=days_ago)
+    when = day - timedelta(minutes=n)
+    history._store.add(
+        asdict(
+            ActionRecord(
+                id=when.strftime("%Y%m%d_%H%M%S_%f"),
+                timestamp=when.isoformat(),
+                utility="group_manager",
+                action="add_members",
+                target=f"Group {n}",
+                target_id=f"grp-{n}",
+                details={},
+                affected_count=1,
+                status="success",
+                user_ids=user_ids or [f"user-{n}"],
+            )
+        )
+    )
+    return when.strftime("%Y%m%d_%H%M%S_%f")
+
+
+def _targets(records):
+    return [r["target_id"] for r in records]
+
+
+class TestRotation:
+    def test_old_records_move_to_day_segments(self, history, tmp_path):
+        for n in range(3):
+            _add(history, 40, n)
+            _add(history, 50, 10 + n)
+        _add(history, 1, 99)
+        history.apply_retention()
+
+        assert history.count() == 1
+        assert history.archived_count() == 6
+        segments = history.archive.segments()
+        assert len(segments) == 2
+        assert [s["count"] for s in segments] == [3, 3]
+        assert segments[0]["start"] <= segments[0]["end"] < segments[1]["start"]
+        # Segments are compressed and encrypted
+        with open(tmp_path / ARCHIVE_DIR / segments[0]["name"], "rb") as f:
+            assert b"grp-1" not in f.read()
+
+    def test_rotation_merges_into_existing_day(self, history):
+        _add(history, 40, 1)
+        history.apply_retention()
+        _add(history, 40, 2)
+        history.apply_retention()
+        assert [s["count"] for s in history.archive.segments()] == [2]
+
+    def test_no_rotation_without_archive_age(self, tmp_path, storage):
+        history = ActionHistory(str(tmp_path), storage=storage)
+        _add(history, 400, 1)
+        history.apply_retention()
+        assert history.count() == 1
+        assert history.archived_count() == 0
+
+
+class TestSearch:
+    def test_pages_continue_into_archive(self, history):
+        for n in range(4):
+            _add(history, 1, n)
+            _add(history, 40, 10 + n)
+        history.apply_retention()
+
+        assert _targets(history.get_history_page(limit=10).records) == [
+            f"grp-{n}" for n in range(4)
+        ]
+        first = history.get_history_page(limit=3, include_archive=True)
+        second = history.get_history_page(
+            limit=3, before=first.next_cursor, include_archive=True
+        )
+        third = history.get_history_page(
+            limit=3, before=second.next_cursor, include_archive=True
+        )
+        assert _targets(first.records + second.records + third.records) == [
+            f"grp-{n}" for n in (0, 1, 2, 3, 10, 11, 12, 13)
+        ]
+        assert third.next_cursor is None
+
+    def test_opens_only_segments_in_range(self, history, monkeypatch):
+        for days in (40, 60, 80):
+            _add(history, days, days)
+        history.apply_retention()
+        opened = []
+        original = history.archive._read
+        monkeypatch.setattr(
+            history.archive,
+            "_read",
+            lambda entry: opened.append(entry["day"]) or original(entry),
+        )
+        since = (datetime.now() - timedelta(days=65)).isoformat()
+        until = (datetime.now() - timedelta(days=50)).isoformat()
+        page = history.get_history_page(since=since, until=until, include_archive=True)
+        assert _targets(page.records) == ["grp-60"]
+        assert opened == [(datetime.now() - timedelta(days=60)).date().isoformat()]
+
+    def test_filters_apply_to_archive(self, history):
+        _add(history, 40, 1)
+        _add(history, 40, 2)
+        history.apply_retention()
+        page = history.get_history_page(target_id="grp-2", include_archive=True)
+        assert _targets(page.records) == ["grp-2"]
+
+    def test_get_action_and_rollback_from_archive(self, history):
+        ids = [str(uuid.uuid4()) for _ in range(500)]
+        action_id = _add(history, 40, 1, user_ids=ids)
+        history.apply_retention()
+        assert history.count() == 0
+        assert history.get_action(action_id)["target_id"] == "grp-1"
+        assert history.get_rollback_data(action_id)["user_ids"] == ids
+
+    def test_sync_removals_survive_archiving(self, history):
+        removed = [str(uuid.uuid4()) for _ in range(500)]
+        action_id = _add(history, 40, 1)
+        record = history.get_action(action_id)
+        history._store.add(
+            {
+                **record,
+                "action": "sync_members",
+                "details": {"removed_ids": removed},
+            }
+        )
+        history.apply_retention()
+        assert history.count() == 0
+        assert history.get_rollback_data(action_id)["removed_ids"] == removed
+
+    def test_segments_of_another_key_are_skipped(self, history, tmp_path):
+        _add(history, 40, 1)
+        history.apply_retention()
+        other = EncryptedStorage()
+        other._set_key(Fernet.generate_key())
+        archive = HistoryArchive(os.path.join(tmp_path, ARCHIVE_DIR), other)
+        assert archive.count() == 1
+        assert archive.query({}, None, None, None, 10) == []
+
+    def test_rotation_sets_aside_segment_of_another_key(self, history, tmp_path):
+        _add(history, 40, 1)
+        history.apply_retention()
+        name = history.archive.segments()[0]["name"]
+        other = EncryptedStorage()
+        other._set_key(Fernet.generate_key())
+        # The key changed: the old segment can no longer be merged into
+        reopened = ActionHistory(
+            str(tmp_path), RetentionPolicy(archive_after_days=30), storage=other
+        )
+        _add(reopened, 40, 2)
+        reopened.apply_retention()
+
+        assert reopened.count() == 0
+        assert reopened.archived_count() == 1
+        assert _targets(reopened.get_history_page(include_archive=True).records) == [
+            "grp-2"
+        ]
+        aside = tmp_path / ARCHIVE_DIR / f"{name}.unreadable"
+        # The old segment is kept, still readable with its own key
+        records = history.archive._decode(str(aside))
+        assert _targets(records) == ["grp-1"]
+
+    def test_segments_before_streaming_encryption_are_read(self, history, storage):
+        _add(history, 40, 1)
+        history.apply_retention()
+        archive = history.archive
+        entry = archive.segments()[0]
+        records = archive._decode(archive._path(entry["name"]))
+        # Rewrite the segment as one Fernet token, the earlier format
+        lines = "\n".join(json.dumps(r) for r in records).encode("utf-8")
+        with open(archive._path(entry["name"]), "wb") as f:
+            f.write(storage.encrypt_bytes(zlib.compress(lines)))
+        archive._cache.clear()
+        assert archive.query({}, None, None, None, 10) == records
+
+
+class TestArchiveRetention:
+    def test_max_age_drops_whole_segments(self, tmp_path, storage):
+        history = ActionHistory(
+            str(tmp_path),
+            RetentionPolicy(archive_after_days=30, max_age_days=45),
+            storage=storage,
+        )
+        _add(history, 40, 1)
+        _add(history, 50, 2)
+        history.apply_retention()
+        assert [s["count"] for s in history.archive.segments()] == [1]
+        assert not os.path.exists(
+            os.path.join(
+                tmp_path,
+                ARCHIVE_DIR,
+                f"{(datetime.now() - timedelta(days=50)).date()}.seg",
+            )
+        )
+
+    def test_max_records_counts_recent_and_archived(self, tmp_path, storage):
+        history = ActionHistory(
+            str(tmp_path),
+            RetentionPolicy(archive_after_days=30, max_records=3),
+            storage=storage,
+        )
+        _add(history, 1, 1)
+        _add(history, 1, 2)
+        _add(history, 40, 3)
+        _add(history, 50, 4)
+        history.apply_retention()
+        assert history.count() == 2
+        assert history.archived_count() == 1
+        assert _targets(history.get_history_page(include_archive=True).records) == [
+            "grp-1",
+            "grp-2",
+            "grp-3",
+        ]
+
+    def test_clear_history_clears_archive(self, history):
+        _add(history, 40, 1)
+        history.apply_retention()
+        history.clear_history()
+        assert history.archived_count() == 0
+        assert history.archive.segments() == []
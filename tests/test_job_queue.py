@@ -0,0 +1,217 @@
+"""Tests for core.job_queue and the background worker."""
+
+import os
+import sqlite3
+
+import pytest
+import streamlit
+from streamlit.runtime.secrets import Secrets
+
+import core.encrypted_storage as encrypted_storage
+import core.state as state_module
+import utilities.history as history
+import utilities.jobs as jobs
+from core.demo import DemoAPI, MockAPIResponse
+from core.encrypted_storage import EncryptedStorage
+from core.job_queue import JobQueue
+from core.mirror import OrgMirror
+from utilities.bulk import BulkControl
+from utilities.history import ActionHistory
+from utilities.jobs import JobKind, QueueJobControl, run_job
+from utilities.worker import main, process_next
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """Encrypted storage, journals and history confined to tmp_path."""
+    store = EncryptedStorage()
+    store._storage_dir = str(tmp_path)
+    monkeypatch.setattr(encrypted_storage, "_storage_instance", store)
+    monkeypatch.setattr(history, "_history_instance", ActionHistory(str(tmp_path)))
+    return store
+
+
+@pytest.fixture
+def queue(tmp_path, storage):
+    return JobQueue(os.path.join(tmp_path, "jobs.db"), storage=storage)
+
+
+class TestJobQueue:
+    def test_enqueue_and_get(self, queue):
+        job_id = queue.enqueue(
+            "assign_skill", "skill-1", "English", {"emails": ["a@x.com"]}
+        )
+        job = queue.get(job_id)
+        assert job.status == "queued"
+        assert job.payload == {"emails": ["a@x.com"]}
+        assert queue.get_progress(job_id).completed == 0
+
+    def test_payload_encrypted_at_rest(self, queue):
+        queue.enqueue("assign_skill", "skill-1", "English", {"emails": ["a@x.com"]})
+        with sqlite3.connect(queue.path) as conn:
+            (payload,) = conn.execute("SELECT payload FROM jobs").fetchone()
+        assert "a@x.com" not in payload
+
+    def test_claim_is_fifo_and_exclusive(self, queue):
+        first = queue.enqueue("remove_skill", "s1", "", {"emails": []})
+        second = queue.enqueue("remove_skill", "s2", "", {"emails": []})
+        assert queue.claim("w1").id == first
+        assert queue.claim("w2").id == second
+        assert queue.claim("w3") is None
+        assert queue.get(first).worker_id == "w1"
+
+    def test_progress_and_finish(self, queue):
+        job_id = queue.enqueue("remove_skill", "s1", "", {"emails": []})
+        queue.claim("w1")
+        queue.update_progress(job_id, 10, 4, 3, 1, 1.5)
+        assert queue.get_progress(job_id).fraction == 0.4
+        queue.finish(job_id, "partial", {"succeeded": 3})
+        listed = queue.list_jobs()[0]
+        assert listed["status"] == "partial"
+        assert listed["summary"] == {"succeeded": 3}
+        assert listed["completed"] == 4
+
+    def test_control(self, queue):
+        running = queue.enqueue("remove_skill", "s1", "", {"emails": []})
+        queued = queue.enqueue("remove_skill", "s2", "", {"emails": []})
+        queue.claim("w1")
+        queue.set_control(running, "pause")
+        assert queue.get_control(running) == "pause"
+        queue.set_control(running, "resume")
+        assert queue.get_control(running) is None
+        queue.set_control(queued, "cancel")
+        assert queue.get(queued).status == "cancelled"
+        with pytest.raises(ValueError):
+            queue.set_control(running, "explode")
+
+    def test_migrates_old_schema(self, tmp_path, storage):
+        path = os.path.join(tmp_path, "old.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                "CREATE TABLE jobs (id TEXT PRIMARY KEY, kind TEXT, target_id TEXT, "
+                "target_name TEXT, payload TEXT, status TEXT, created_at TEXT, "
+                "started_at TEXT, finished_at TEXT, worker_id TEXT, summary TEXT)"
+            )
+        JobQueue(path, storage=storage)
+        with sqlite3.connect(path) as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        assert "control" in columns
+
+    def test_requeue_stale(self, queue):
+        job_id = queue.enqueue("remove_skill", "s1", "", {"emails": []})
+        queue.claim("dead")
+        assert queue.requeue_stale(lambda worker_id: worker_id != "dead") == 1
+        assert queue.get(job_id).status == "queued"
+
+
+class TestWorker:
+    def test_run_job_with_demo_backend(self, storage):
+        queue = JobQueue(os.path.join(storage.storage_dir, "jobs.db"), storage)
+        queue.enqueue(
+            "group_add_members",
+            "grp-0001",
+            "Demo Group",
+            {"emails": ["carol.williams@acmecorp.com", "nobody@example.com"]},
+        )
+        assert process_next(queue, DemoAPI(), "w1")
+        job = queue.list_jobs()[0]
+        assert job["status"] == "success"
+        assert job["summary"]["succeeded"] == 1
+        assert job["summary"]["missing"] == ["nobody@example.com"]
+        assert job["total"] == 1
+
+        record = history.get_history().get_history()[0]
+        assert record["action"] == "add_members"
+        assert record["details"]["job_id"] == job["id"]
+
+    def test_history_status_matches_summary(self, queue):
+        api = DemoAPI()
+        find = api.users.find_by_email
+        api.users.find_by_email = lambda email: (
+            MockAPIResponse(success=False, error="timeout", status_code=504)
+            if email.startswith("bob")
+            else find(email)
+        )
+        queue.enqueue(
+            "group_add_members",
+            "grp-0001",
+            "Demo Group",
+            {"emails": ["carol.williams@acmecorp.com", "bob.smith@acmecorp.com"]},
+        )
+        summary = run_job(api, queue.claim("w1"))
+        assert summary["status"] == "partial"
+        assert history.get_history().get_history()[0]["status"] == "partial"
+
+    def test_stopped_job_is_recorded_rollback_able(self, queue, monkeypatch):
+        api = DemoAPI()
+        control = BulkControl()
+
+        def add(api, job, uid):
+            control.cancel()  # stopped while the first user is added
+            return api.groups.add_members(job.target_id, [uid])
+
+        monkeypatch.setitem(
+            jobs.JOB_KINDS,
+            "group_add_members",
+            JobKind("group_manager", "add_members", 1, 1, add),
+        )
+        queue.enqueue(
+            "group_add_members",
+            "grp-0001",
+            "Demo Group",
+            {"emails": ["carol.williams@acmecorp.com", "alice.johnson@acmecorp.com"]},
+        )
+        summary = run_job(api, queue.claim("w1"), control=control)
+        assert summary["status"] == "cancelled"
+        assert summary["succeeded"] == 1
+        record = history.get_history().get_history()[0]
+        assert record["status"] == "partial"
+        rollback = history.get_history().get_rollback_data(record["id"])
+        assert len(rollback["user_ids"]) == 1
+
+    def test_cancelled_job(self, queue):
+        job_id = queue.enqueue(
+            "assign_skill",
+            "skill-0001",
+            "English",
+            {"emails": ["alice.johnson@acmecorp.com"], "proficiency": 3.0},
+        )
+        queue.claim("w1")
+        queue.set_control(job_id, "cancel")
+        job = queue.get(job_id)
+        summary = run_job(DemoAPI(), job, control=QueueJobControl(queue, job_id))
+        assert summary["status"] == "cancelled"
+        assert summary["succeeded"] == 0
+
+    def test_unknown_kind_fails_job(self, queue):
+        queue.enqueue("bogus", "t", "", {"emails": []})
+        assert process_next(queue, DemoAPI(), "w1")
+        assert queue.list_jobs()[0]["status"] == "failed"
+
+    def test_run_job_rejects_unknown_kind(self, queue):
+        queue.enqueue("bogus", "t", "", {"emails": []})
+        with pytest.raises(ValueError):
+            run_job(DemoAPI(), queue.claim("w1"))
+
+    def test_worker_serves_secrets_toml(self, tmp_path, storage, monkeypatch):
+        (tmp_path / ".streamlit").mkdir()
+        (tmp_path / ".streamlit" / "secrets.toml").write_text(
+            'encryption_key = "worker-secret"\n'
+        )
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(streamlit, "secrets", Secrets())
+        monkeypatch.delenv("ADMIN_LAYERS_STATE_BACKEND", raising=False)
+        monkeypatch.setattr(state_module, "_state_backend", None)
+        try:
+            assert main(["--once", "--demo", "--db", str(tmp_path / "jobs.db")]) == 0
+            backend = state_module.get_state_backend()
+            assert backend.secret("encryption_key") == "worker-secret"
+        finally:
+            state_module.set_state_backend(None)
+
+    def test_sync_mirror_command(self, tmp_path, storage, monkeypatch):
+        monkeypatch.setattr(state_module, "_state_backend", None)
+        assert main(["--sync-mirror", "--demo"]) == 0
+        mirror = OrgMirror(os.path.join(tmp_path, "mirror.db"))
+        assert mirror.synced_at() is not None
+        assert mirror.count("users") == len(list(DemoAPI().users.list()))
@@ -0,0 +1,170 @@
+"""Tests for core.kv_store (single-file key-value store)."""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import core.kv_store as kv_store
+from core.kv_store import KVStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "storage.kv")
+
+
+@pytest.fixture
+def kv(path):
+    return KVStore(path)
+
+
+class TestBasics:
+    def test_put_get_delete(self, kv):
+        assert kv.get("a") is None
+        kv.put("a", b"1")
+        kv.put("b", b"2")
+        kv.put("a", b"3")
+        assert kv.get("a") == b"3"
+        kv.delete("b")
+        assert kv.get("b") is None
+        assert kv.keys() == ["a"]
+
+    def test_reopen(self, kv, path):
+        kv.put("creds", b"token")
+        kv.delete("gone")
+        assert KVStore(path).get("creds") == b"token"
+
+    def test_other_instance_sees_writes(self, kv, path):
+        other = KVStore(path)
+        assert other.get("k") is None
+        kv.put("k", b"v1")
+        assert other.get("k") == b"v1"
+        other.put("k", b"v2")
+        assert kv.get("k") == b"v2"
+
+    def test_version_changes_on_rewrite(self, kv):
+        kv.put("k", b"same")
+        first = kv.get_versioned("k")[1]
+        assert kv.get_versioned("k")[1] == first
+        kv.put("k", b"same")
+        assert kv.get_versioned("k")[1] != first
+
+
+class TestDurability:
+    def test_batch_is_one_commit(self, kv, path):
+        with kv.batch():
+            kv.put("profiles", b"[...]")
+            kv.put("active", b"p1")
+            # Read your writes, others do not see them yet
+            assert kv.get("active") == b"p1"
+            assert KVStore(path).get("active") is None
+        assert kv.commits == 1
+        assert KVStore(path).get("active") == b"p1"
+
+    def test_failed_batch_is_discarded(self, kv):
+        with pytest.raises(RuntimeError):
+            with kv.batch():
+                kv.put("k", b"v")
+                raise RuntimeError
+        assert kv.get("k") is None
+        assert kv.commits == 0
+
+    def test_torn_transaction_is_ignored_and_truncated(self, kv, path):
+        kv.put("k", b"old")
+        size = os.path.getsize(path)
+        with kv.batch():
+            kv.put("k", b"new")
+            kv.put("other", b"x")
+        # Crash before the commit frame reached the disk
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 5)
+
+        reopened = KVStore(path)
+        assert reopened.get("k") == b"old"
+        assert reopened.get("other") is None
+        reopened.put("k", b"after")
+        assert os.path.getsize(path) > size
+        assert KVStore(path).get("k") == b"after"
+        assert KVStore(path).get("other") is None
+
+    def test_corrupt_frame_stops_replay(self, kv, path):
+        kv.put("k", b"good")
+        kv.put("k", b"flipped")
+        with open(path, "r+b") as f:
+            f.seek(-10, os.SEEK_END)
+            f.write(b"X")
+        assert KVStore(path).get("k") == b"good"
+
+    def test_concurrent_puts_share_commits(self, path, monkeypatch):
+        kv = KVStore(path)
+        original = kv._append
+
+        def slow_append(ops):
+            # The first writer waits until all others queued up behind it
+            deadline = time.monotonic() + 5
+            while kv._submitted < 8 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            original(ops)
+
+        monkeypatch.setattr(kv, "_append", slow_append)
+        threads = [
+            threading.Thread(target=kv.put, args=(f"k{i}", b"v")) for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(kv.keys()) == 8
+        assert kv.commits == 2
+
+
+class TestCompaction:
+    def test_compact_keeps_live_values(self, kv, path):
+        for i in range(50):
+            kv.put("hot", str(i).encode())
+        kv.put("cold", b"c")
+        kv.delete("hot")
+        reader = KVStore(path)
+        assert reader.get("cold") == b"c"
+        before = kv.size
+
+        kv.compact()
+        assert kv.size < before
+        assert kv.keys() == ["cold"]
+        # An instance that indexed the old file rebuilds from the new one
+        assert reader.get("cold") == b"c"
+        reader.put("new", b"n")
+        assert kv.get("new") == b"n"
+
+    def test_automatic_compaction(self, kv, monkeypatch):
+        monkeypatch.setattr(kv_store, "COMPACT_MIN_BYTES", 4096)
+        for i in range(200):
+            kv.put("k", os.urandom(100))
+        assert kv.size < 4096 + 200
+        assert len(kv.get("k")) == 100
+
+
+class TestProcesses:
+    def test_writers_in_several_processes(self, kv, path):
+        script = (
+            "import sys\n"
+            "from core.kv_store import KVStore\n"
+            "kv = KVStore(sys.argv[1])\n"
+            "for i in range(25):\n"
+            "    kv.put(f'{sys.argv[2]}-{i}', b'x' * 200)\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-c", script, path, f"p{n}"],
+                cwd=root,
+                env={**os.environ, "PYTHONPATH": root},
+            )
+            for n in range(3)
+        ]
+        assert [p.wait(timeout=60) for p in processes] == [0, 0, 0]
+        assert len(kv.keys()) == 75
@@ -0,0 +1,242 @@
+"""Tests for genesys_cloud.membership and the sync_members endpoints."""
+
+import copy
+import os
+
+import pytest
+
+import core.demo as demo
+import core.encrypted_storage as encrypted_storage
+import utilities.history as history
+from core.demo import DemoAPI
+from core.encrypted_storage import EncryptedStorage
+from core.job_queue import JobQueue
+from genesys_cloud.membership import (
+    MembershipDiff,
+    apply_membership_diff,
+    bisect_batch,
+    bisect_budget,
+    diff_membership,
+    member_ids,
+)
+from utilities.history import ActionHistory
+from utilities.worker import process_next
+
+
+class Response:
+    def __init__(self, success=True, error=None, status_code=None):
+        self.success = success
+        self.error = error
+        self.status_code = status_code
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Demo backend whose membership data is private to the test."""
+    monkeypatch.setattr(
+        demo, "DEMO_GROUP_MEMBERS", copy.deepcopy(demo.DEMO_GROUP_MEMBERS)
+    )
+    monkeypatch.setattr(
+        demo, "DEMO_QUEUE_MEMBERS", copy.deepcopy(demo.DEMO_QUEUE_MEMBERS)
+    )
+    return DemoAPI()
+
+
+class TestDiff:
+    def test_add_remove_unchanged(self):
+        diff = diff_membership(["a", "b", "c"], ["b", "c", "d", "d"])
+        assert diff.to_add == ["d"]
+        assert diff.to_remove == ["a"]
+        assert diff.unchanged == 2
+
+    def test_add_only(self):
+        diff = diff_membership(["a", "b"], ["c"], remove_extra=False)
+        assert diff.to_add == ["c"]
+        assert diff.to_remove == []
+
+    def test_request_count(self):
+        diff = MembershipDiff(to_add=list("abcde"), to_remove=["x"])
+        assert diff.request_count(2) == 4
+        assert MembershipDiff().request_count(50) == 0
+
+    def test_member_ids_handles_nested_users(self):
+        assert member_ids([{"id": "a"}, {"user": {"id": "b"}}, {}]) == ["a", "b"]
+
+
+class TestApply:
+    def test_chunked_calls(self):
+        calls = []
+        diff = MembershipDiff(to_add=list("abcde"), to_remove=["x", "y"])
+        result = apply_membership_diff(
+            diff,
+            lambda ids: calls.append(("add", ids)) or Response(),
+            lambda ids: calls.append(("remove", ids)) or Response(),
+            batch_size=2,
+        )
+        assert calls == [
+            ("add", ["a", "b"]),
+            ("add", ["c", "d"]),
+            ("add", ["e"]),
+            ("remove", ["x", "y"]),
+        ]
+        assert result.requests == 4
+        assert result.status == "success"
+
+    def test_failed_chunk(self):
+        diff = MembershipDiff(to_add=["a", "b"], to_remove=["x"])
+        result = apply_membership_diff(
+            diff,
+            lambda ids: Response(),
+            lambda ids: Response(False, "forbidden"),
+            batch_size=10,
+        )
+        assert result.added == ["a", "b"]
+        assert result.failed == ["x"]
+        assert result.errors == ["x: forbidden"]
+        assert result.status == "partial"
+
+    def test_dry_run_makes_no_calls(self):
+        def fail(ids):
+            raise AssertionError("called")
+
+        result = apply_membership_diff(
+            MembershipDiff(to_add=["a"]), fail, fail, 10, dry_run=True
+        )
+        assert result.dry_run and result.requests == 0
+
+
+class TestBisect:
+    def rejecting(self, bad, status=400):
+        calls = []
+
+        def call(ids):
+            calls.append(ids)
+            if bad & set(ids):
+                return Response(False, "invalid member", status)
+            return Response()
+
+        return call, calls
+
+    def test_isolates_bad_ids(self):
+        ids = [f"u{i}" for i in range(50)]
+        call, calls = self.rejecting({"u7", "u31"})
+        outcomes, made = bisect_batch(call, ids)
+        failed = [c for chunk, r in outcomes if not r.success for c in chunk]
+        applied = [c for chunk, r in outcomes if r.success for c in chunk]
+        assert failed == ["u7", "u31"]
+        assert sorted(applied + failed) == sorted(ids)
+        assert made == len(calls) < len(ids)
+        assert made <= bisect_budget(len(ids))
+
+    def test_batch_wide_errors_not_bisected(self):
+        call, calls = self.rejecting({"u1"}, status=403)
+        outcomes, made = bisect_batch(call, ["u0", "u1", "u2"])
+        assert made == 1
+        assert outcomes[0][0] == ["u0", "u1", "u2"]
+
+    def test_budget_caps_calls(self):
+        ids = [f"u{i}" for i in range(100)]
+        call, calls = self.rejecting(set(ids), status=404)  # e.g. group deleted
+        outcomes, made = bisect_batch(call, ids)
+        assert made <= bisect_budget(100)
+        assert sum(len(chunk) for chunk, _ in outcomes) == 100
+
+    def test_sync_reports_only_bad_ids(self):
+        call, _ = self.rejecting({"c"})
+        result = apply_membership_diff(
+            MembershipDiff(to_add=["a", "b", "c", "d"]), call, call, batch_size=4
+        )
+        assert result.added == ["a", "b", "d"]
+        assert result.failed == ["c"]
+        assert result.errors == ["c: invalid member"]
+
+
+class TestDemoSync:
+    def test_group_sync(self, api):
+        target = member_ids(api.groups.get_members("grp-0003"))[:3] + ["user-0019"]
+        result = api.groups.sync_members("grp-0003", target)
+        assert result.success
+        assert sorted(member_ids(api.groups.get_members("grp-0003"))) == sorted(target)
+        again = api.groups.sync_members("grp-0003", target)
+        assert again.diff.is_empty and again.requests == 0
+
+    def test_queue_sync_from_other_queue(self, api):
+        source = member_ids(api.queues.get_members("queue-0002"))
+        api.queues.sync_members("queue-0003", source)
+        assert sorted(member_ids(api.queues.get_members("queue-0003"))) == sorted(
+            source
+        )
+
+    def test_add_only_dry_run(self, api):
+        before = member_ids(api.groups.get_members("grp-0002"))
+        result = api.groups.sync_members(
+            "grp-0002", ["user-0019"], remove_extra=False, dry_run=True
+        )
+        assert result.diff.to_remove == []
+        assert member_ids(api.groups.get_members("grp-0002")) == before
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    """Job queue with storage and history confined to tmp_path."""
+    store = EncryptedStorage()
+    store._storage_dir = str(tmp_path)
+    monkeypatch.setattr(encrypted_storage, "_storage_instance", store)
+    monkeypatch.setattr(history, "_history_instance", ActionHistory(str(tmp_path)))
+    return JobQueue(os.path.join(tmp_path, "jobs.db"), storage=store)
+
+
+class TestSyncJob:
+    def test_worker_runs_sync_job(self, api, queue):
+        queue.enqueue(
+            "group_sync_members", "grp-0003", "Demo", {"source_id": "grp-0002"}
+        )
+
+        assert process_next(queue, api, "w1")
+        job = queue.list_jobs()[0]
+        assert job["status"] == "success"
+        assert sorted(member_ids(api.groups.get_members("grp-0003"))) == sorted(
+            member_ids(api.groups.get_members("grp-0002"))
+        )
+        record = history.get_history().get_history()[0]
+        assert record["action"] == "sync_members"
+        assert record["details"]["job_id"] == job["id"]
+
+    def test_failed_lookups_skip_removals(self, api, queue, monkeypatch):
+        current = api.groups.get_members("grp-0003")
+        emails = [m["email"] for m in current]
+        find = api.users.find_by_email
+        monkeypatch.setattr(
+            api.users,
+            "find_by_email",
+            lambda email: (
+                Response(success=False, error="HTTP 503", status_code=503)
+                if email == emails[0]
+                else find(email)
+            ),
+        )
+        queue.enqueue("group_sync_members", "grp-0003", "Demo", {"emails": emails})
+
+        assert process_next(queue, api, "w1")
+        job = queue.list_jobs()[0]
+        assert job["status"] == "partial"
+        assert job["summary"]["lookup_failed"] == [emails[0]]
+        # The member whose lookup failed is kept
+        assert current[0]["id"] in member_ids(api.groups.get_members("grp-0003"))
+
+    def test_failed_source_listing_changes_nothing(self, api, queue, monkeypatch):
+        before = member_ids(api.groups.get_members("grp-0003"))
+        monkeypatch.setattr(
+            api.groups,
+            "list_members",
+            lambda group_id: Response(success=False, error="HTTP 500"),
+        )
+        queue.enqueue(
+            "group_sync_members", "grp-0003", "Demo", {"source_id": "grp-0002"}
+        )
+
+        assert process_next(queue, api, "w1")
+        job = queue.list_jobs()[0]
+        assert job["status"] == "failed"
+        assert "HTTP 500" in job["summary"]["errors"][0]
+        assert member_ids(api.groups.get_members("grp-0003")) == before
@@ -0,0 +1,197 @@
+"""Tests for utilities.membership_index (user -> groups/queues/skills)."""
+
+import copy
+import gc
+import time
+import weakref
+
+import pytest
+
+import core.demo as demo
+from core.demo import DemoAPI, MockAPIResponse
+from utilities.membership_index import (
+    MembershipIndex,
+    MembershipIndexError,
+    get_membership_index,
+)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Demo backend whose data is private to the test."""
+    for name in (
+        "DEMO_USERS",
+        "DEMO_GROUPS",
+        "DEMO_QUEUES",
+        "DEMO_SKILLS",
+        "DEMO_USER_SKILLS",
+        "DEMO_GROUP_MEMBERS",
+        "DEMO_QUEUE_MEMBERS",
+    ):
+        monkeypatch.setattr(demo, name, copy.deepcopy(getattr(demo, name)))
+    return DemoAPI()
+
+
+@pytest.fixture
+def index(api):
+    index = MembershipIndex(api, workers=4)
+    index.build()
+    return index
+
+
+def _ids(entities):
+    return {e["id"] for e in entities}
+
+
+class TestBuild:
+    def test_matches_per_user_calls(self, api, index):
+        for user in demo.DEMO_USERS[:10]:
+            uid = user["id"]
+            groups = api.users.get_groups(uid).data["entities"]
+            assert _ids(index.user_groups(uid)) == _ids(groups)
+            assert _ids(index.user_queues(uid)) == _ids(api.users.get_queues(uid))
+            assert _ids(index.user_skills(uid)) == _ids(
+                api.routing.get_user_skills(uid)
+            )
+
+    def test_skill_assignments_keep_proficiency(self, api, index):
+        expected = {s["id"]: s for s in api.routing.get_user_skills("user-0000")}
+        for skill in index.user_skills("user-0000"):
+            assert skill["proficiency"] == expected[skill["id"]]["proficiency"]
+
+    def test_member_listing_calls(self, api, monkeypatch):
+        calls = []
+        original = api.users.get_queues
+        monkeypatch.setattr(
+            api.users, "get_queues", lambda uid: calls.append(uid) or original(uid)
+        )
+        MembershipIndex(api).build()
+        assert calls == []
+
+    def test_summary(self, index):
+        row = index.summary(["user-0000"])[0]
+        assert row["user_id"] == "user-0000"
+        assert row["groups"] == sorted(row["groups"], key=str.lower)
+        assert set(row) == {"user_id", "groups", "queues", "skills"}
+
+    def test_background_build(self, api):
+        index = get_membership_index(api)
+        assert get_membership_index(api) is index
+        assert index.start_build()
+        deadline = time.monotonic() + 5
+        while not index.ready and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert index.ready
+        assert not index.start_build()
+
+    def test_shared_index_does_not_keep_client_alive(self):
+        api = DemoAPI()
+        get_membership_index(api).build()
+        ref = weakref.ref(api)
+        del api
+        gc.collect()
+        assert ref() is None
+
+    @pytest.mark.parametrize(
+        "endpoint, method", [("groups", "list_all"), ("queues", "list_members")]
+    )
+    def test_failed_listing_keeps_previous_index(
+        self, api, index, monkeypatch, endpoint, method
+    ):
+        before = index.members("groups", "grp-0001")
+        built_at = index.built_at
+        demo.DEMO_GROUP_MEMBERS["grp-0001"] = []
+        monkeypatch.setattr(
+            getattr(api, endpoint),
+            method,
+            lambda *a, **k: MockAPIResponse(success=False, error="page 2 failed"),
+        )
+        with pytest.raises(MembershipIndexError, match="page 2 failed"):
+            index.build()
+        assert index.members("groups", "grp-0001") == before
+        assert index.built_at == built_at
+
+    def test_stale_index_is_rebuilt_in_background(self, api):
+        now = [1000.0]
+        index = MembershipIndex(api, max_age=60, clock=lambda: now[0])
+        index.build()
+        assert not index.start_build()
+        demo.DEMO_GROUP_MEMBERS["grp-0001"] = []
+        now[0] += 61
+        assert index.stale
+        assert index.start_build()
+        index._thread.join(5)
+        assert index.ready and not index.stale
+        assert index.members("groups", "grp-0001") == []
+
+    def test_failed_refresh_waits_for_next_period(self, api, monkeypatch):
+        now = [1000.0]
+        index = MembershipIndex(api, max_age=60, clock=lambda: now[0])
+        index.build()
+        now[0] += 61
+        monkeypatch.setattr(
+            api.groups,
+            "list_all",
+            lambda *a, **k: MockAPIResponse(success=False, error="timeout"),
+        )
+        assert index.start_build()
+        index._thread.join(5)
+        assert index.ready and index.error
+        assert not index.start_build()
+        now[0] += 60
+        assert index.start_build()
+        index._thread.join(5)
+
+    def test_unknown_kind(self, index):
+        with pytest.raises(ValueError):
+            index.members("users", "x")
+
+
+class TestUpdates:
+    def test_add_and_remove_members(self, index):
+        index.add("groups", "grp-0005", ["user-0020"])
+        assert "grp-0005" in _ids(index.user_groups("user-0020"))
+        assert "user-0020" in index.members("groups", "grp-0005")
+
+        index.remove("groups", "grp-0005", ["user-0020"])
+        assert "grp-0005" not in _ids(index.user_groups("user-0020"))
+
+    def test_add_skill_records_proficiency(self, index):
+        index.add(
+            "skills", "skill-0012", ["user-0001"], {"id": "skill-0012", "name": "AM"}
+        )
+        index.add(
+            "skills",
+            "skill-0012",
+            ["user-0002"],
+            {"id": "skill-0012", "name": "AM", "proficiency": 4.0},
+        )
+        skills = {s["id"]: s for s in index.user_skills("user-0002")}
+        assert skills["skill-0012"]["proficiency"] == 4.0
+
+    def test_set_members_replaces_listing(self, index):
+        old = index.members("queues", "queue-0005")
+        index.set_members("queues", "queue-0005", [{"id": "user-0029"}])
+        assert index.members("queues", "queue-0005") == ["user-0029"]
+        for uid in old:
+            assert "queue-0005" not in _ids(index.user_queues(uid))
+
+    def test_set_user_skills_and_memberships(self, index):
+        index.set_user_skills("user-0000", [{"id": "skill-0001", "name": "Sales"}])
+        assert _ids(index.user_skills("user-0000")) == {"skill-0001"}
+
+        index.set_user_memberships("groups", "user-0000", [{"id": "grp-new"}])
+        assert _ids(index.user_groups("user-0000")) == {"grp-new"}
+        assert index.members("groups", "grp-new") == ["user-0000"]
+
+    def test_entity_rename_and_delete(self, index):
+        uid = index.members("skills", "skill-0001")[0]
+        index.upsert_entity("skills", {"id": "skill-0001", "name": "Renamed"})
+        names = {s["id"]: s["name"] for s in index.user_skills(uid)}
+        assert names["skill-0001"] == "Renamed"
+
+        members = index.members("groups", "grp-0001")
+        index.remove_entity("groups", "grp-0001")
+        assert index.members("groups", "grp-0001") == []
+        for member in members:
+            assert "grp-0001" not in _ids(index.user_groups(member))
@@ -0,0 +1,101 @@
+"""Tests for genesys_cloud.metrics and 429 retry handling in the API client."""
+
+import requests
+
+from genesys_cloud import GenesysAuth, GenesysCloudAPI
+from genesys_cloud import api as api_module
+from genesys_cloud.metrics import RequestMetrics, route_key
+from genesys_cloud.scheduler import RequestScheduler
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, body="{}"):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = body
+
+    def json(self):
+        return {"message": "rate limited"} if self.status_code == 429 else {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(response=self)
+
+
+def make_api(monkeypatch, responses):
+    auth = GenesysAuth.from_credentials("client", "secret")
+    monkeypatch.setattr(auth, "refresh_if_needed", lambda: True)
+    monkeypatch.setattr(auth, "get_headers", lambda: {})
+    calls = []
+
+    def fake_request(**kwargs):
+        calls.append(kwargs["url"])
+        return responses.pop(0)
+
+    monkeypatch.setattr(api_module.requests, "request", fake_request)
+    return (
+        GenesysCloudAPI(auth, scheduler=RequestScheduler(rate_per_second=None)),
+        calls,
+    )
+
+
+class TestRequestMetrics:
+    def test_counts_and_rate(self):
+        metrics = RequestMetrics()
+        metrics.record(0.1, 200)
+        metrics.record(0.3, 429)
+        metrics.record(0.2, None)
+        metrics.record_retry()
+        snap = metrics.snapshot()
+        assert snap.requests == 3
+        assert snap.errors == 2
+        assert snap.throttled == 1
+        assert snap.retries == 1
+        assert abs(snap.avg_latency - 0.2) < 1e-9
+        assert snap.requests_per_second > 0
+
+    def test_since_baseline(self):
+        metrics = RequestMetrics()
+        metrics.record(0.1, 200)
+        baseline = metrics.snapshot()
+        metrics.record(0.1, 200)
+        metrics.record_retry()
+        delta = metrics.snapshot().since(baseline)
+        assert delta.requests == 1
+        assert delta.retries == 1
+
+    def test_route_latency(self):
+        route = route_key(
+            "post", "/api/v2/groups/0a1b2c3d-0000-4000-8000-00000000abcd/members"
+        )
+        assert route == "POST /api/v2/groups/{id}/members"
+        metrics = RequestMetrics()
+        metrics.record(0.2, 200, route)
+        metrics.record(0.4, 200, route)
+        assert abs(metrics.route_latency(route) - 0.3) < 1e-9
+        assert metrics.route_latency("GET /api/v2/users") is None
+
+
+class TestRetry:
+    def test_retries_429_after_retry_after(self, monkeypatch):
+        api, calls = make_api(
+            monkeypatch,
+            [FakeResponse(429, {"Retry-After": "0"}), FakeResponse(200)],
+        )
+        resp = api.get("/api/v2/users/me")
+        assert resp.success
+        assert len(calls) == 2
+        snap = api.metrics.snapshot()
+        assert snap.retries == 1
+        assert snap.throttled == 1
+
+    def test_gives_up_after_max_retries(self, monkeypatch):
+        monkeypatch.setattr(api_module, "MAX_RETRIES", 1)
+        api, calls = make_api(
+            monkeypatch,
+            [FakeResponse(429, {"Retry-After": "0"}) for _ in range(2)],
+        )
+        resp = api.get("/api/v2/users/me")
+        assert not resp.success
+        assert resp.status_code == 429
+        assert len(calls) == 2
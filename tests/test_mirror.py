@@ -0,0 +1,241 @@
+"""Tests for core.mirror (local SQLite org mirror)."""
+
+import copy
+import os
+
+import pytest
+
+import core.demo as demo
+import core.mirror as core_mirror
+from core.demo import DemoAPI
+from core.encrypted_storage import EncryptedStorage
+from core.mirror import (
+    MirrorAPI,
+    MirrorSyncError,
+    OrgMirror,
+    change_token,
+    get_mirror,
+)
+from core.services import ServiceResponse, validate_backend
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Demo backend whose data is private to the test."""
+    for name in (
+        "DEMO_USERS",
+        "DEMO_GROUPS",
+        "DEMO_QUEUES",
+        "DEMO_SKILLS",
+        "DEMO_USER_SKILLS",
+        "DEMO_GROUP_MEMBERS",
+        "DEMO_QUEUE_MEMBERS",
+    ):
+        monkeypatch.setattr(demo, name, copy.deepcopy(getattr(demo, name)))
+    return DemoAPI()
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    return OrgMirror(os.path.join(tmp_path, "mirror.db"), workers=4)
+
+
+@pytest.fixture
+def backend(api, mirror):
+    mirror.sync(api)
+    return MirrorAPI(mirror, api)
+
+
+class TestChangeToken:
+    def test_uses_version_fields(self):
+        a = {"id": "g", "name": "A", "version": 2, "dateModified": "t1"}
+        assert change_token(a) == change_token({**a, "name": "renamed"})
+        assert change_token(a) != change_token({**a, "version": 3})
+        assert change_token(a) != change_token({**a, "memberCount": 4})
+
+    def test_hashes_unversioned_entities(self):
+        a = {"id": "u", "name": "A"}
+        assert change_token(a) == change_token(dict(a))
+        assert change_token(a) != change_token({**a, "name": "B"})
+
+
+class TestSync:
+    def test_initial_sync_is_full(self, api, mirror):
+        result = mirror.sync(api)
+        assert result.full
+        assert result.fetched["users"] == len(demo.DEMO_USERS)
+        assert result.changed["groups"] == len(demo.DEMO_GROUPS)
+        assert mirror.count("skills") == len(demo.DEMO_SKILLS)
+        assert mirror.synced_at() is not None
+
+    def test_memberships_and_skills(self, api, mirror):
+        mirror.sync(api)
+        assert {m["id"] for m in mirror.members("groups", "grp-0001")} == {
+            m["id"] for m in demo.DEMO_GROUP_MEMBERS["grp-0001"]
+        }
+        assert len(mirror.members("queues", "queue-0005")) == 4
+        assert {s["id"] for s in mirror.user_skills("user-0000")} == {
+            s["id"] for s in demo.DEMO_USER_SKILLS["user-0000"]
+        }
+
+    def test_delta_sync_rewrites_only_changes(self, api, mirror):
+        mirror.sync(api)
+        demo.DEMO_USERS[0]["title"] = "Director"
+        demo.DEMO_GROUPS.pop()
+        api.queues.create({"name": "New Queue"})
+
+        result = mirror.sync(api)
+        assert not result.full
+        assert result.changed == {"users": 1, "groups": 0, "queues": 1, "skills": 0}
+        assert result.deleted["groups"] == 1
+        assert mirror.get("users", "user-0000")["title"] == "Director"
+        assert mirror.count("groups") == len(demo.DEMO_GROUPS)
+        # Listings (1 page each) plus skills of 1 user and members of 1 queue
+        assert result.calls == 4 + 2
+
+    def test_unchanged_sync_makes_listing_calls_only(self, api, mirror):
+        mirror.sync(api)
+        result = mirror.sync(api)
+        assert result.total_changed == 0
+        assert result.calls == 4
+
+    def test_full_resync_refetches_memberships(self, api, mirror):
+        mirror.sync(api)
+        demo.DEMO_GROUP_MEMBERS["grp-0001"] = []
+        assert mirror.sync(api).total_changed == 0
+        assert mirror.members("groups", "grp-0001")
+
+        mirror.sync(api, full=True)
+        assert mirror.members("groups", "grp-0001") == []
+
+    def test_parallel_pages(self, api, mirror, monkeypatch):
+        monkeypatch.setattr(core_mirror, "SYNC_PAGE_SIZE", 7)
+        mirror.sync(api)
+        assert mirror.count("users") == len(demo.DEMO_USERS)
+
+    def test_failed_listing_leaves_mirror_unchanged(self, api, mirror, monkeypatch):
+        mirror.sync(api)
+        demo.DEMO_USERS[0]["title"] = "Director"
+        monkeypatch.setattr(
+            api.queues,
+            "list_page",
+            lambda *a, **k: ServiceResponse(success=False, error="boom"),
+        )
+        with pytest.raises(MirrorSyncError, match="boom"):
+            mirror.sync(api)
+        assert mirror.get("users", "user-0000")["title"] != "Director"
+
+    @pytest.mark.parametrize(
+        "endpoint, method",
+        [("groups", "list_members"), ("routing", "list_user_skills")],
+    )
+    def test_failed_member_listing_aborts_sync(
+        self, api, mirror, monkeypatch, endpoint, method
+    ):
+        monkeypatch.setattr(
+            getattr(api, endpoint),
+            method,
+            lambda *a: ServiceResponse(success=False, error="page 3 failed"),
+        )
+        with pytest.raises(MirrorSyncError, match="page 3 failed"):
+            mirror.sync(api)
+        assert mirror.synced_at() is None
+        assert mirror.count("users") == 0
+
+    def test_file_is_private_from_creation(self, tmp_path, monkeypatch):
+        path = os.path.join(tmp_path, "private.db")
+        modes = []
+        original = core_mirror.sqlite3.connect
+
+        def connect(*args, **kwargs):
+            modes.append(os.stat(path).st_mode & 0o777)
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(core_mirror.sqlite3, "connect", connect)
+        OrgMirror(path)
+        assert modes and set(modes) == {0o600}
+
+    def test_shared_per_scope(self, tmp_path):
+        storage = EncryptedStorage()
+        storage._storage_dir = str(tmp_path)
+        mirror = get_mirror("org-a", storage)
+        assert get_mirror("org-a", storage) is mirror
+        assert get_mirror("org-b", storage) is not mirror
+        assert mirror.path == os.path.join(tmp_path, "mirror_org-a.db")
+
+    def test_deleted_user_drops_memberships(self, api, mirror):
+        mirror.sync(api)
+        demo.DEMO_USERS[:] = demo.DEMO_USERS[1:]
+        mirror.sync(api)
+        assert "user-0000" not in {
+            m["id"] for m in mirror.members("groups", "grp-0001")
+        }
+        assert mirror.user_skills("user-0000") == []
+
+
+class TestMirrorAPI:
+    def test_implements_backend(self, backend):
+        assert validate_backend(backend) == []
+
+    def test_reads(self, backend):
+        page = backend.users.list_page(page_size=10, page_number=3).data
+        assert page["total"] == len(demo.DEMO_USERS)
+        assert page["pageCount"] == 3
+        assert len(page["entities"]) == 10
+
+        assert [u["name"] for u in backend.users.search("alice")] == ["Alice Johnson"]
+        assert backend.users.search("ACMECORP.COM")
+        assert backend.users.search("%") == []
+        user = backend.users.find_by_email("Alice.Johnson@acmecorp.com").data
+        assert user["id"] == "user-0000"
+        assert backend.users.get("user-0000").data["id"] == "user-0000"
+        assert backend.groups.search("tier")
+        assert len(backend.routing.get_skills()) == len(demo.DEMO_SKILLS)
+        users = {u["id"]: u for u in backend.users.list(expand=["skills"])}
+        assert {s["id"] for s in users["user-0000"]["skills"]} == {
+            s["id"] for s in demo.DEMO_USER_SKILLS["user-0000"]
+        }
+
+    def test_user_memberships(self, backend, api):
+        groups = backend.users.get_groups("user-0000").data["entities"]
+        assert {g["id"] for g in groups} == {
+            g["id"] for g in api.users.get_groups("user-0000").data["entities"]
+        }
+        assert {q["id"] for q in backend.users.get_queues("user-0000")} == {
+            q["id"] for q in api.users.get_queues("user-0000")
+        }
+
+    def test_writes_go_through(self, backend, api):
+        assert backend.groups.add_members("grp-0005", ["user-0020"]).success
+        assert "user-0020" in {m["id"] for m in api.groups.get_members("grp-0005")}
+        assert "user-0020" in {m["id"] for m in backend.groups.get_members("grp-0005")}
+
+        backend.queues.remove_members("queue-0005", ["user-0000"])
+        assert "user-0000" not in {
+            m["id"] for m in backend.queues.get_members("queue-0005")
+        }
+
+        backend.routing.add_user_skills(
+            "user-0001", [{"id": "skill-0012", "proficiency": 2.0}]
+        )
+        skills = {s["id"]: s for s in backend.routing.get_user_skills("user-0001")}
+        assert skills["skill-0012"]["name"] == "Account Management"
+
+        backend.users.update("user-0002", {"title": "Lead"})
+        assert backend.users.get("user-0002").data["title"] == "Lead"
+
+    def test_sync_members_uses_mirror(self, backend, api):
+        result = backend.groups.sync_members("grp-0005", ["user-0000", "user-0029"])
+        assert result.diff.to_add == ["user-0029"]
+        assert {m["id"] for m in backend.groups.get_members("grp-0005")} == {
+            "user-0000",
+            "user-0029",
+        }
+
+    def test_get_falls_back_to_live(self, backend, api):
+        created = api.groups.create("Late", "", "official", "public").data
+        assert backend.groups.get(created["id"]).data["name"] == "Late"
+        assert backend.mirror.get("groups", created["id"]) is not None
+
+    def test_other_attributes_are_live(self, backend, api):
+        assert backend.conversations is api.conversations
@@ -0,0 +1,179 @@
+"""Tests for utilities.planner and the email -> user resolution cache."""
+
+import gc
+import weakref
+
+import pytest
+
+from core.encrypted_storage import EncryptedStorage
+from genesys_cloud import APIResponse
+from genesys_cloud.metrics import RequestMetrics
+from genesys_cloud.scheduler import RequestScheduler
+from utilities.bulk import BulkExecutor, BulkResult, ItemResult, resolve_emails
+from utilities.planner import DEFAULT_LATENCY, plan_bulk
+from utilities.resolver import (
+    ResolveError,
+    UserResolver,
+    get_resolver,
+    invalidate_not_found,
+)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    store = EncryptedStorage()
+    store._storage_dir = str(tmp_path)
+    return store
+
+
+class FakeUsers:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def find_by_email(self, email):
+        self.calls += 1
+        if self.fail:
+            return APIResponse(success=False, error="timeout")
+        if email.startswith("missing"):
+            return APIResponse(success=True, data=None)
+        user = {"id": f"id-{email}", "name": email.split("@")[0], "state": "active"}
+        return APIResponse(success=True, data=user)
+
+
+class FakeAPI:
+    def __init__(self, rate=None):
+        self.users = FakeUsers()
+        self.metrics = RequestMetrics()
+        self.scheduler = RequestScheduler(rate_per_second=rate)
+
+
+class TestUserResolver:
+    def test_found_users_are_cached(self):
+        api = FakeAPI()
+        resolver = get_resolver(api)
+        assert resolver.lookup("a@x.com")["id"] == "id-a@x.com"
+        assert resolver.lookup("A@X.com")["id"] == "id-a@x.com"
+        assert api.users.calls == 1
+        assert get_resolver(api) is resolver
+
+    def test_misses_cached_until_ttl(self):
+        now = [1000.0]
+        api = FakeAPI()
+        resolver = UserResolver(api, scope="", miss_ttl=60, clock=lambda: now[0])
+        assert resolver.lookup("missing@x.com") is None
+        assert resolver.lookup("missing@x.com") is None
+        assert api.users.calls == 1
+        now[0] += 61
+        assert resolver.lookup("missing@x.com") is None
+        assert api.users.calls == 2
+
+    def test_users_expire_after_ttl(self):
+        now = [1000.0]
+        api = FakeAPI()
+        resolver = UserResolver(api, scope="", user_ttl=60, clock=lambda: now[0])
+        resolver.lookup("a@x.com")
+        now[0] += 61
+        assert resolver.cached("a@x.com") is None
+
+    def test_failed_search_not_cached(self):
+        api = FakeAPI()
+        api.users.fail = True
+        resolver = get_resolver(api)
+        with pytest.raises(ResolveError):
+            resolver.lookup("a@x.com")
+        api.users.fail = False
+        assert resolver.lookup("a@x.com")["id"] == "id-a@x.com"
+
+    def test_resolve_emails_reuses_cache(self):
+        api = FakeAPI()
+        emails = ["a@x.com", "b@x.com", "missing@x.com"]
+        found, missing, failed = resolve_emails(api, emails)
+        assert [u["email"] for u in found] == ["a@x.com", "b@x.com"]
+        assert missing == ["missing@x.com"]
+        resolve_emails(api, emails)
+        assert api.users.calls == 3
+
+    def test_failed_lookup_is_a_failed_item(self):
+        api = FakeAPI()
+        api.users.fail = True
+        result = BulkExecutor().run(["a@x.com"], get_resolver(api).lookup)
+        assert result.status == "failed"
+        assert "timeout" in result.failed[0].error
+
+    def test_persisted_across_clients(self, storage):
+        first_api = FakeAPI()
+        first = UserResolver(first_api, storage=storage, scope="org")
+        first.lookup("a@x.com")
+        first.flush()
+        api = FakeAPI()
+        second = UserResolver(api, storage=storage, scope="org")
+        assert second.lookup("a@x.com")["name"] == "a"
+        assert api.users.calls == 0
+        other_org = UserResolver(FakeAPI(), storage=storage, scope="other")
+        assert other_org.cached("a@x.com") is None
+
+    def test_shared_resolver_does_not_keep_client_alive(self):
+        api = FakeAPI()
+        get_resolver(api).lookup("a@x.com")
+        ref = weakref.ref(api)
+        del api
+        gc.collect()
+        assert ref() is None
+
+    def test_invalidated_by_404(self):
+        api = FakeAPI()
+        resolver = get_resolver(api)
+        resolver.lookup("a@x.com")
+        result = BulkResult(
+            results=[ItemResult("id-a@x.com", False, error="gone", status_code=404)]
+        )
+        assert invalidate_not_found(api, result) == 1
+        assert resolver.cached("a@x.com") is None
+
+    def test_invalidated_by_404_on_user_dict(self):
+        api = FakeAPI()
+        resolver = get_resolver(api)
+        resolver.lookup("a@x.com")
+        item = {"id": "id-a@x.com", "name": "a", "email": "a@x.com"}
+        batch = ["id-a@x.com", "id-b@x.com"]
+        result = BulkResult(
+            results=[
+                ItemResult(batch, False, error="gone", status_code=404),
+                ItemResult(item, False, error="gone", status_code=404),
+            ]
+        )
+        assert invalidate_not_found(api, result) == 1
+        assert resolver.cached("a@x.com") is None
+
+
+class TestPlanner:
+    def test_counts_lookups_and_batches(self):
+        api = FakeAPI()
+        emails = [f"u{i}@x.com" for i in range(120)]
+        get_resolver(api).lookup(emails[0])
+        plan = plan_bulk(api, "group_add_members", emails)
+        lookups, batches = plan.steps
+        assert (lookups.requests, lookups.cached) == (119, 1)
+        assert batches.requests == 3  # 50 per call
+        assert plan.total_requests == 122
+        assert not lookups.measured and lookups.latency == DEFAULT_LATENCY
+
+    def test_found_count_refines_batches(self):
+        plan = plan_bulk(FakeAPI(), "assign_skill", ["a@x.com", "b@x.com"], found=1)
+        assert plan.steps[1].requests == 1
+
+    def test_measured_latency_and_rate_budget(self):
+        api = FakeAPI(rate=2.0)
+        api.metrics.record(0.1, 200, "POST /api/v2/users/search")
+        plan = plan_bulk(api, "remove_skill", [f"u{i}@x.com" for i in range(10)])
+        lookups, removals = plan.steps
+        assert lookups.measured and lookups.latency == pytest.approx(0.1)
+        # 10 lookups at 2 req/s are rate bound, not latency bound
+        assert lookups.seconds(plan.rate_per_second) == pytest.approx(5.0)
+        assert plan.estimated_seconds == pytest.approx(10.0)
+        assert "20 request(s)" in plan.describe()
+
+    def test_unknown_operation(self):
+        with pytest.raises(ValueError):
+            plan_bulk(FakeAPI(), "bogus", [])
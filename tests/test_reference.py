@@ -0,0 +1,93 @@
+"""Tests for utilities.reference (post-login reference data warm-up)."""
+
+import gc
+import threading
+import weakref
+
+import pytest
+
+from core.demo import DemoAPI
+from genesys_cloud.scheduler import Priority, current_priority
+from utilities.reference import DATASETS, ReferenceCache, get_reference
+
+
+class CountingAPI(DemoAPI):
+    """Demo backend counting get_skills() calls, optionally held on an event."""
+
+    def __init__(self, gate=None):
+        super().__init__()
+        self.calls = 0
+        self.priorities = []
+        gate_event = gate
+        original = self.routing.get_skills
+
+        def get_skills():
+            self.calls += 1
+            self.priorities.append(current_priority())
+            if gate_event is not None:
+                gate_event.wait(5)
+            return original()
+
+        self.routing.get_skills = get_skills
+
+
+class TestReferenceCache:
+    def test_warm_up_fetches_everything_in_background(self):
+        api = CountingAPI()
+        cache = ReferenceCache(api)
+        assert sorted(cache.warm_up()) == sorted(DATASETS)
+        for name in DATASETS:
+            assert cache.get(name)
+        assert api.calls == 1
+        assert api.priorities == [Priority.PREFETCH]
+        assert all(cache.is_warm(name) for name in DATASETS)
+
+    def test_get_waits_for_running_warm_up(self):
+        gate = threading.Event()
+        api = CountingAPI(gate)
+        cache = ReferenceCache(api)
+        cache.warm_up(["skills"])
+        assert not cache.is_warm("skills")
+        threading.Timer(0.05, gate.set).start()
+        assert cache.get("skills")
+        assert api.calls == 1
+
+    def test_warm_up_skips_cached_and_running(self):
+        api = CountingAPI()
+        cache = ReferenceCache(api)
+        cache.get("skills")
+        assert cache.warm_up(["skills"]) == []
+        assert api.calls == 1
+
+    def test_ttl_and_invalidate(self):
+        now = [0.0]
+        api = CountingAPI()
+        cache = ReferenceCache(api, ttl=10, clock=lambda: now[0])
+        cache.get("skills")
+        cache.get("skills")
+        assert api.calls == 1
+        now[0] = 11
+        cache.get("skills")
+        assert api.calls == 2
+        cache.invalidate("skills")
+        cache.get("skills")
+        assert api.calls == 3
+
+    def test_empty_result_is_not_cached(self):
+        api = DemoAPI()
+        api.routing.get_languages = lambda: []
+        cache = ReferenceCache(api)
+        assert cache.get("languages") == []
+        assert not cache.is_warm("languages")
+
+    def test_unknown_dataset(self):
+        with pytest.raises(ValueError):
+            ReferenceCache(DemoAPI()).get("teams")
+
+    def test_shared_cache_does_not_keep_client_alive(self):
+        api = DemoAPI()
+        get_reference(api).get("skills")
+        ref = weakref.ref(api)
+        del api
+        gc.collect()
+        assert ref() is None
@@ -0,0 +1,283 @@
+"""Tests for utilities.rollback (batched rollback of recorded member changes)."""
+
+import copy
+
+import pytest
+
+import core.demo as demo
+import utilities.history as history_module
+from core.demo import DemoAPI, MockAPIResponse
+from genesys_cloud.membership import member_ids
+from utilities.bulk import BulkControl, BulkExecutor
+from utilities.group_manager import GroupManagerUtility
+from utilities.history import ActionHistory
+from utilities.rollback import RollbackEngine, RollbackError
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Demo backend whose data is private to the test."""
+    for name in (
+        "DEMO_USERS",
+        "DEMO_GROUPS",
+        "DEMO_QUEUES",
+        "DEMO_GROUP_MEMBERS",
+        "DEMO_QUEUE_MEMBERS",
+    ):
+        monkeypatch.setattr(demo, name, copy.deepcopy(getattr(demo, name)))
+    return DemoAPI()
+
+
+@pytest.fixture
+def history(tmp_path):
+    return ActionHistory(str(tmp_path))
+
+
+@pytest.fixture
+def engine(api, history):
+    return RollbackEngine(api, history=history, workers=4)
+
+
+def _members(api, endpoint, target_id):
+    return set(member_ids(getattr(api, endpoint).get_members(target_id)))
+
+
+def _outsiders(api, endpoint, target_id, count):
+    members = _members(api, endpoint, target_id)
+    return [u["id"] for u in demo.DEMO_USERS if u["id"] not in members][:count]
+
+
+def _new_users(count):
+    """Users that are in no group or queue yet."""
+    users = [
+        {"id": f"rb-{i:04d}", "name": f"Rollback {i}", "email": f"rb{i}@example.com"}
+        for i in range(count)
+    ]
+    demo.DEMO_USERS.extend(users)
+    return [u["id"] for u in users]
+
+
+def _add(api, history, endpoint, target_id, user_ids, status="success"):
+    """Apply and record an add like the utilities do."""
+    getattr(api, endpoint).add_members(target_id, user_ids)
+    utility = "group_manager" if endpoint == "groups" else "queue_manager"
+    return history.record_action(
+        utility,
+        "add_members",
+        target_id,
+        target_id,
+        {},
+        len(user_ids),
+        status,
+        user_ids,
+    )
+
+
+class TestPlan:
+    def test_inverts_add_remove_and_sync(self, api, history, engine):
+        added = _outsiders(api, "groups", "grp-0001", 3)
+        add_id = _add(api, history, "groups", "grp-0001", added)
+        removed = sorted(_members(api, "queues", "queue-0001"))[:2]
+        api.queues.remove_members("queue-0001", removed)
+        remove_id = history.record_action(
+            "queue_manager",
+            "remove_members",
+            "Q",
+            "queue-0001",
+            {},
+            2,
+            "success",
+            removed,
+        )
+
+        plan = engine.plan([add_id, remove_id])
+        by_target = {t.target_id: t for t in plan.targets}
+        assert sorted(by_target["grp-0001"].to_remove) == sorted(added)
+        assert sorted(by_target["queue-0001"].to_add) == sorted(removed)
+        assert plan.change_count == 5
+        assert plan.request_count == 2
+
+    def test_sync_is_undone_both_ways(self, api, history, engine):
+        result = api.groups.sync_members(
+            "grp-0002", _outsiders(api, "groups", "grp-0002", 2)
+        )
+        sync_id = history.record_action(
+            "group_manager",
+            "sync_members",
+            "G",
+            "grp-0002",
+            {"removed_ids": result.removed},
+            0,
+            result.status,
+            result.added,
+        )
+        plan = engine.plan([sync_id])
+        target = plan.targets[0]
+        assert sorted(target.to_remove) == sorted(result.added)
+        assert sorted(target.to_add) == sorted(result.removed)
+
+    def test_skips_what_cannot_be_rolled_back(self, api, history, engine):
+        failed = _add(api, history, "groups", "grp-0001", ["user-0001"], "failed")
+        skill = history.record_action(
+            "skill_manager",
+            "assign_skill",
+            "S",
+            "skill-0001",
+            {},
+            1,
+            "success",
+            ["user-0001"],
+        )
+        plan = engine.plan([failed, skill, "missing"])
+        assert plan.targets == []
+        assert set(plan.skipped) == {failed, skill, "missing"}
+
+    def test_oldest_action_decides_and_current_state_is_checked(
+        self, api, history, engine
+    ):
+        user = _outsiders(api, "groups", "grp-0003", 1)
+        first = _add(api, history, "groups", "grp-0003", user)
+        api.groups.remove_members("grp-0003", user)
+        second = history.record_action(
+            "group_manager", "remove_members", "G", "grp-0003", {}, 1, "success", user
+        )
+        # Undoing both ends at the state before the add: not a member, as now
+        plan = engine.plan([first, second])
+        assert plan.targets[0].change_count == 0
+        assert plan.targets[0].unchanged == 1
+
+    def test_failed_listing_aborts_planning(self, api, history, engine):
+        added = _outsiders(api, "groups", "grp-0001", 1)
+        action_id = _add(api, history, "groups", "grp-0001", added)
+        api.groups.list_members = lambda gid: MockAPIResponse(
+            success=False, error="timeout", status_code=504
+        )
+        with pytest.raises(RollbackError):
+            engine.plan([action_id])
+
+
+class TestRun:
+    def test_rolls_back_in_chunks_and_records(self, api, history, engine):
+        added = _new_users(120)
+        before = _members(api, "groups", "grp-0004")
+        action_id = _add(api, history, "groups", "grp-0004", added)
+
+        calls = []
+        original = api.groups.remove_members
+        api.groups.remove_members = lambda gid, ids: calls.append(ids) or original(
+            gid, ids
+        )
+        result = engine.run(engine.plan([action_id]))
+
+        assert _members(api, "groups", "grp-0004") == before
+        # Chunks run concurrently, so they may arrive in any order
+        assert sorted(len(c) for c in calls) == [20, 50, 50]
+        assert result.status == "success"
+        assert result.changed == 120
+        record = history.get_action(result.history_id)
+        assert record["utility"] == "rollback"
+        assert record["details"]["actions"] == [action_id]
+        assert history.get_user_ids(record) == result.plan.targets[0].removed
+
+    def test_second_rollback_is_skipped(self, api, history, engine):
+        action_id = _add(
+            api,
+            history,
+            "queues",
+            "queue-0002",
+            _outsiders(api, "queues", "queue-0002", 2),
+        )
+        engine.run(engine.plan([action_id]))
+        plan = engine.plan([action_id])
+        assert plan.skipped == {action_id: "already rolled back"}
+
+    def test_verification_flags_changes_that_did_not_stick(self, api, history, engine):
+        removed = sorted(_members(api, "groups", "grp-0005"))[:1]
+        api.groups.remove_members("grp-0005", removed)
+        action_id = history.record_action(
+            "group_manager",
+            "remove_members",
+            "G",
+            "grp-0005",
+            {},
+            1,
+            "success",
+            removed + ["user-deleted"],
+        )
+        result = engine.run(engine.plan([action_id]))
+        # The demo backend accepts unknown users without adding them
+        assert result.plan.targets[0].mismatched == ["user-deleted"]
+        assert result.status == "partial"
+
+    def test_cancelled_run(self, api, history, engine):
+        action_id = _add(
+            api,
+            history,
+            "groups",
+            "grp-0006",
+            _new_users(60),
+        )
+        control = BulkControl()
+        control.cancel()
+        result = engine.run(engine.plan([action_id]), control=control)
+        assert result.status == "cancelled"
+        assert result.cancelled == 2
+        # Not undone yet: a later rollback applies it
+        assert engine.rolled_back() == set()
+        assert engine.plan([action_id]).targets[0].change_count == 60
+
+    def test_stopped_run_can_be_rolled_back(self, api, history, engine, monkeypatch):
+        monkeypatch.setattr(history_module, "_history_instance", history)
+        before = _members(api, "groups", "grp-0008")
+        users = _outsiders(api, "groups", "grp-0008", 4)
+        control = BulkControl()
+
+        def add(batch):
+            control.cancel()  # Stop clicked while the first batch is in flight
+            return api.groups.add_members("grp-0008", batch)
+
+        executor = BulkExecutor(max_workers=1, batch_size=2, progress_interval=0)
+        result = executor.run(users, add, control=control)
+        assert result.status == "cancelled"
+        added = [r.item for r in result.succeeded]
+        action_id = GroupManagerUtility(api).record_bulk_action(
+            "add_members", "G", "grp-0008", result, user_ids=added
+        )
+        assert history.get_action(action_id)["status"] == "partial"
+
+        plan = engine.plan([action_id])
+        assert plan.targets[0].to_remove == added
+        assert engine.run(plan).status == "success"
+        assert _members(api, "groups", "grp-0008") == before
+
+    def test_runs_recorded_as_cancelled_can_be_rolled_back(self, api, history, engine):
+        added = _outsiders(api, "queues", "queue-0004", 2)
+        action_id = _add(api, history, "queues", "queue-0004", added, "cancelled")
+        assert sorted(engine.plan([action_id]).targets[0].to_remove) == sorted(added)
+
+    def test_partial_rollback_can_be_completed(self, api, history, engine):
+        added = _outsiders(api, "groups", "grp-0007", 2)
+        action_id = _add(api, history, "groups", "grp-0007", added)
+        original = api.groups.remove_members
+        api.groups.remove_members = lambda gid, ids: (
+            MockAPIResponse(success=False, error="invalid", status_code=400)
+            if added[1] in ids
+            else original(gid, ids)
+        )
+        assert engine.run(engine.plan([action_id])).status == "partial"
+        api.groups.remove_members = original
+        plan = engine.plan([action_id])
+        assert plan.targets[0].to_remove == [added[1]]
+        assert engine.run(plan).status == "success"
+        assert engine.rolled_back() == {action_id}
+
+    def test_failed_verification_listing_confirms_nothing(self, api, history, engine):
+        added = _outsiders(api, "queues", "queue-0003", 2)
+        action_id = _add(api, history, "queues", "queue-0003", added)
+        plan = engine.plan([action_id])
+        api.queues.list_members = lambda qid: MockAPIResponse(
+            success=False, error="timeout", status_code=504
+        )
+        result = engine.run(plan)
+        assert sorted(result.plan.targets[0].mismatched) == sorted(added)
+        assert result.status == "partial"
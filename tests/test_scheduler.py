@@ -0,0 +1,96 @@
+"""Tests for genesys_cloud.scheduler — priority request admission."""
+
+import threading
+import time
+
+from genesys_cloud.scheduler import (
+    Priority,
+    RequestScheduler,
+    current_priority,
+    request_priority,
+)
+
+
+class TestRequestPriority:
+    def test_default_is_interactive(self):
+        assert current_priority() == Priority.INTERACTIVE
+
+    def test_context_sets_and_restores(self):
+        with request_priority(Priority.BULK):
+            assert current_priority() == Priority.BULK
+            with request_priority(Priority.PREFETCH):
+                assert current_priority() == Priority.PREFETCH
+            assert current_priority() == Priority.BULK
+        assert current_priority() == Priority.INTERACTIVE
+
+    def test_priority_is_per_thread(self):
+        seen = []
+        with request_priority(Priority.BULK):
+            t = threading.Thread(target=lambda: seen.append(current_priority()))
+            t.start()
+            t.join()
+        assert seen == [Priority.INTERACTIVE]
+
+
+class TestRequestScheduler:
+    def test_unlimited_never_waits(self):
+        scheduler = RequestScheduler(rate_per_second=None)
+        for _ in range(100):
+            assert scheduler.acquire(Priority.BULK) == 0.0
+
+    def test_reserve_kept_for_interactive(self):
+        scheduler = RequestScheduler(rate_per_second=0.5, burst=2, reserve=1)
+        scheduler.acquire(Priority.BULK)
+        # The last token is reserved: interactive gets it immediately
+        assert scheduler.acquire(Priority.INTERACTIVE) < 0.1
+
+    def test_interactive_jumps_queue(self):
+        scheduler = RequestScheduler(rate_per_second=10, burst=1, reserve=0)
+        scheduler.acquire(Priority.INTERACTIVE)  # drain the bucket
+        order = []
+
+        def worker(priority):
+            scheduler.acquire(priority)
+            order.append(priority)
+
+        threads = [
+            threading.Thread(target=worker, args=(Priority.BULK,)) for _ in range(3)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(0.02)
+        interactive = threading.Thread(target=worker, args=(Priority.INTERACTIVE,))
+        interactive.start()
+        for t in threads + [interactive]:
+            t.join(timeout=5)
+
+        assert order[0] == Priority.INTERACTIVE
+        assert order.count(Priority.BULK) == 3
+
+    def test_waiters_are_promoted(self):
+        scheduler = RequestScheduler(rate_per_second=10, burst=1, max_wait=0.05)
+        prefetch_ticket = type("T", (), {})()
+        prefetch_ticket.priority = Priority.PREFETCH
+        prefetch_ticket.enqueued_at = 0.0
+        assert scheduler._effective_priority(prefetch_ticket, 0.0) == 2
+        assert scheduler._effective_priority(prefetch_ticket, 0.06) == 1
+        assert scheduler._effective_priority(prefetch_ticket, 1.0) == 0
+
+    def test_queue_depth_empty(self):
+        scheduler = RequestScheduler()
+        assert scheduler.queue_depth() == {
+            "interactive": 0,
+            "bulk": 0,
+            "prefetch": 0,
+        }
+
+    def test_backoff_holds_all_classes(self):
+        scheduler = RequestScheduler(rate_per_second=100, burst=10)
+        scheduler.backoff(0.2)
+        assert scheduler.acquire(Priority.INTERACTIVE) >= 0.15
+
+    def test_backoff_applies_when_unlimited(self):
+        scheduler = RequestScheduler(rate_per_second=None)
+        scheduler.backoff(0.1)
+        assert scheduler.acquire(Priority.BULK) >= 0.05
+        assert scheduler.acquire(Priority.BULK) == 0.0
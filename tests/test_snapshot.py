@@ -0,0 +1,163 @@
+"""Tests for utilities.snapshot (stale-while-revalidate list pages)."""
+
+import copy
+import gc
+import threading
+import time
+import weakref
+
+import pytest
+
+import core.demo as demo
+from core.demo import DemoAPI
+from core.encrypted_storage import EncryptedStorage
+from core.services import ServiceResponse
+from utilities import snapshot as snapshot_module
+from utilities.snapshot import ListSnapshot, get_snapshot
+
+
+@pytest.fixture
+def storage(tmp_path):
+    store = EncryptedStorage()
+    store._storage_dir = str(tmp_path)
+    return store
+
+
+@pytest.fixture
+def scope(tmp_path):
+    """Per-test scope (encrypted storage also caches in session state)."""
+    return f"org-{tmp_path.name}"
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(demo, "DEMO_GROUPS", copy.deepcopy(demo.DEMO_GROUPS))
+    return DemoAPI()
+
+
+def wait_refresh(snapshot, *page):
+    deadline = time.monotonic() + 5
+    while snapshot.refreshing(*page):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+class TestListSnapshot:
+    def test_first_load_is_fetched(self, api, storage, scope):
+        snapshot = ListSnapshot(api, storage=storage, scope=scope)
+        page = snapshot.page("groups", 25, 1)
+        assert not page.stale and not page.refreshing
+        assert page.data["total"] == len(demo.DEMO_GROUPS)
+        assert "groups:25:1" in storage.retrieve_snapshot(scope)
+
+    def test_fresh_page_is_not_refetched(self, api, storage, scope, monkeypatch):
+        snapshot = ListSnapshot(api, storage=storage, scope=scope)
+        snapshot.page("groups", 25, 1)
+        monkeypatch.setattr(api.groups, "list_page", pytest.fail)
+        assert not snapshot.page("groups", 25, 1).stale
+
+    def test_restart_serves_snapshot_then_fresh_data(self, api, storage, scope):
+        ListSnapshot(api, storage=storage, scope=scope).page("groups", 25, 1)
+        demo.DEMO_GROUPS[0]["name"] = "Renamed"
+
+        restarted = ListSnapshot(api, storage=storage, scope=scope)
+        page = restarted.page("groups", 25, 1)
+        assert page.stale and page.refreshing
+        assert page.data["entities"][0]["name"] != "Renamed"
+
+        wait_refresh(restarted, "groups", 25, 1)
+        page = restarted.page("groups", 25, 1)
+        assert not page.stale
+        assert page.data["entities"][0]["name"] == "Renamed"
+
+    def test_refresh_does_not_block(self, api, storage, scope, monkeypatch):
+        ListSnapshot(api, storage=storage, scope=scope).page("groups", 25, 1)
+        release = threading.Event()
+        live = api.groups.list_page
+
+        def slow(*args, **kwargs):
+            release.wait(5)
+            return live(*args, **kwargs)
+
+        monkeypatch.setattr(api.groups, "list_page", slow)
+        restarted = ListSnapshot(api, storage=storage, scope=scope)
+        started = time.monotonic()
+        assert restarted.page("groups", 25, 1).refreshing
+        assert time.monotonic() - started < 1
+        release.set()
+        wait_refresh(restarted, "groups", 25, 1)
+
+    def test_failed_refresh_keeps_snapshot(self, api, storage, scope, monkeypatch):
+        ListSnapshot(api, storage=storage, scope=scope).page("groups", 25, 1)
+        calls = []
+
+        def failing(*args, **kwargs):
+            calls.append(1)
+            return ServiceResponse(success=False, error="unavailable")
+
+        monkeypatch.setattr(api.groups, "list_page", failing)
+        restarted = ListSnapshot(api, storage=storage, scope=scope)
+        restarted.page("groups", 25, 1)
+        wait_refresh(restarted, "groups", 25, 1)
+        page = restarted.page("groups", 25, 1)
+        assert page.stale and not page.refreshing
+        assert page.error == "unavailable"
+        assert page.data["entities"]
+        # No retry until the backoff has passed
+        restarted.page("groups", 25, 1)
+        assert len(calls) == 1
+
+    def test_first_load_failure(self, api, storage, scope, monkeypatch):
+        monkeypatch.setattr(
+            api.groups,
+            "list_page",
+            lambda *a, **k: ServiceResponse(success=False, error="down"),
+        )
+        page = ListSnapshot(api, storage=storage, scope=scope).page("groups", 25, 1)
+        assert page.data is None and page.error == "down"
+
+    def test_invalidate_revalidates(self, api, storage, scope):
+        snapshot = ListSnapshot(api, storage=storage, scope=scope)
+        snapshot.page("groups", 25, 1)
+        snapshot.invalidate("queues")
+        assert not snapshot.page("groups", 25, 1).refreshing
+        snapshot.invalidate("groups")
+        assert snapshot.page("groups", 25, 1).refreshing
+        wait_refresh(snapshot, "groups", 25, 1)
+
+    def test_expired_page_revalidates(self, api, storage, scope):
+        now = [1000.0]
+        snapshot = ListSnapshot(
+            api, storage=storage, scope=scope, fresh_seconds=60, clock=lambda: now[0]
+        )
+        snapshot.page("groups", 25, 1)
+        now[0] += 61
+        assert snapshot.page("groups", 25, 1).refreshing
+        wait_refresh(snapshot, "groups", 25, 1)
+
+    def test_page_limit(self, api, storage, scope, monkeypatch):
+        monkeypatch.setattr(snapshot_module, "MAX_PAGES", 2)
+        now = [0.0]
+        snapshot = ListSnapshot(api, storage=storage, scope=scope, clock=lambda: now[0])
+        for number in (1, 2, 3):
+            now[0] += 1
+            snapshot.page("groups", 1, number)
+        assert set(storage.retrieve_snapshot(scope)) == {"groups:1:2", "groups:1:3"}
+
+    def test_memory_only_without_scope(self, api, storage):
+        snapshot = ListSnapshot(api, storage=storage)
+        assert snapshot.scope is None
+        snapshot.page("skills", 25, 1)
+        assert storage.retrieve_snapshot("None") == {}
+
+    def test_unknown_resource(self, api, storage, scope):
+        with pytest.raises(ValueError):
+            ListSnapshot(api, storage=storage, scope=scope).page("teams", 25, 1)
+
+    def test_shared_snapshot_does_not_keep_client_alive(self):
+        api = DemoAPI()
+        get_snapshot(api)
+        ref = weakref.ref(api)
+        del api
+        gc.collect()
+        assert ref() is None
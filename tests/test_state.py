@@ -0,0 +1,148 @@
+"""Tests for core.state (state backends for running without Streamlit)."""
+
+import json
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import pytest
+import streamlit
+from streamlit.runtime.secrets import Secrets
+
+import core.state as state_module
+from core.demo import DemoAPI
+from core.diagnostics import get_cached_report, start_diagnostics
+from core.encrypted_storage import EncryptedStorage
+from core.state import (
+    FileState,
+    MemoryState,
+    StreamlitState,
+    get_state_backend,
+    load_secrets,
+    set_state_backend,
+)
+from utilities.history import ActionHistory
+
+
+@pytest.fixture
+def reset_default(monkeypatch):
+    monkeypatch.setattr(state_module, "_state_backend", None)
+    yield
+    set_state_backend(None)
+
+
+class TestFileState:
+    def test_values_survive_a_restart(self, tmp_path):
+        path = str(tmp_path / "state.json")
+        state = FileState(path)
+        state.set("count", 3)
+        state.set("blob", b"\x00\x01")
+        state.set("records", deque([{"id": "a"}], maxlen=5))
+        state.setdefault("store", {"k": "token"})
+
+        reloaded = FileState(path)
+        assert reloaded.get("count") == 3
+        assert reloaded.get("blob") == b"\x00\x01"
+        assert reloaded.get("records") == deque([{"id": "a"}], maxlen=5)
+        assert reloaded.get("store") == {"k": "token"}
+        reloaded.pop("count")
+        assert "count" not in FileState(path)
+
+    def test_unserializable_values_stay_in_memory(self, tmp_path):
+        path = str(tmp_path / "state.json")
+        state = FileState(path)
+        future = Future()
+        state.set("_diagnostics_future", future)
+        state.set("_encryption_key", "generated")
+        assert state.get("_diagnostics_future") is future
+        with open(path) as f:
+            assert json.load(f) == {}
+
+
+class TestDefault:
+    def test_streamlit_by_default(self, reset_default, monkeypatch):
+        monkeypatch.delenv("ADMIN_LAYERS_STATE_BACKEND", raising=False)
+        assert isinstance(get_state_backend(), StreamlitState)
+
+    def test_from_env(self, reset_default, monkeypatch, tmp_path):
+        monkeypatch.setenv("ADMIN_LAYERS_STATE_BACKEND", "file")
+        monkeypatch.setenv("ADMIN_LAYERS_STATE_FILE", str(tmp_path / "s.json"))
+        backend = get_state_backend()
+        assert isinstance(backend, FileState)
+        assert get_state_backend() is backend
+
+    def test_env_backends_serve_secrets_toml(
+        self, reset_default, monkeypatch, tmp_path
+    ):
+        (tmp_path / ".streamlit").mkdir()
+        (tmp_path / ".streamlit" / "secrets.toml").write_text(
+            'encryption_key = "from-toml"\n'
+        )
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(streamlit, "secrets", Secrets())
+        monkeypatch.setenv("ADMIN_LAYERS_STATE_BACKEND", "memory")
+        assert get_state_backend().secret("encryption_key") == "from-toml"
+
+    def test_no_secrets_toml(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.setattr(streamlit, "secrets", Secrets())
+        assert load_secrets() == {}
+
+    def test_explicit(self, reset_default):
+        memory = MemoryState()
+        set_state_backend(memory)
+        assert get_state_backend() is memory
+
+
+class TestHeadless:
+    def test_storage_with_memory_state(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("ADMIN_LAYERS_KEY", raising=False)
+        state = MemoryState(secrets={"encryption_key": "cli-secret"})
+        storage = EncryptedStorage(state=state)
+        storage._storage_dir = str(tmp_path)
+        assert storage.is_persistent
+        assert storage.store("settings", {"model": "x"})
+        assert state.get("_encrypted_store")["settings"]
+
+        # Another process with the same secret reads the file
+        other = EncryptedStorage(
+            state=MemoryState(secrets={"encryption_key": "cli-secret"})
+        )
+        other._storage_dir = str(tmp_path)
+        assert other.retrieve("settings") == {"model": "x"}
+        assert storage.get_storage_info()["key_source"] == "secrets"
+
+    def test_generated_key_lives_in_the_state(self, monkeypatch):
+        monkeypatch.delenv("ADMIN_LAYERS_KEY", raising=False)
+        state = MemoryState()
+        first = EncryptedStorage(state=state)
+        token = first.encrypt("x")
+        assert EncryptedStorage(state=state).decrypt(token) == "x"
+        assert EncryptedStorage(state=MemoryState()).decrypt(token) is None
+
+    def test_history_without_filesystem(self, tmp_path):
+        blocked = tmp_path / "file"
+        blocked.write_text("")
+        state = FileState(str(tmp_path / "state.json"))
+        history = ActionHistory(str(blocked / "history"), state=state)
+        assert history.backend_info == "session state (ephemeral)"
+        action_id = history.record_action(
+            "group_manager", "add_members", "G", "grp-1", {}, 1, "success", ["u1"]
+        )
+        # Kept in the state file, so the next run of a CLI tool sees it
+        again = ActionHistory(
+            str(blocked / "history"), state=FileState(str(tmp_path / "state.json"))
+        )
+        assert again.get_action(action_id)["target_id"] == "grp-1"
+
+    def test_diagnostics(self):
+        state = MemoryState()
+        start_diagnostics(DemoAPI(), is_demo=True, state=state)
+        deadline = time.monotonic() + 30
+        while get_cached_report(state) is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        report = get_cached_report(state)
+        assert report.backend == "demo"
+        assert report.all_ok
+        assert "_diagnostics_future" not in state
@@ -0,0 +1,99 @@
+"""Tests for core.stream_crypto (segmented stream encryption)."""
+
+import io
+import os
+
+import pytest
+
+from core.stream_crypto import (
+    HEADER_SIZE,
+    TAG_SIZE,
+    SegmentedCipher,
+    StreamDecryptError,
+)
+
+SEGMENT = 64
+
+
+@pytest.fixture
+def cipher():
+    return SegmentedCipher(os.urandom(32), segment_size=SEGMENT)
+
+
+class TestRoundTrip:
+    @pytest.mark.parametrize(
+        "size", [0, 1, SEGMENT - 1, SEGMENT, SEGMENT + 1, 3 * SEGMENT, 1000]
+    )
+    def test_sizes(self, cipher, size):
+        data = os.urandom(size)
+        token = cipher.encrypt(data)
+        segments = max(1, -(-size // SEGMENT))
+        assert len(token) == HEADER_SIZE + size + segments * TAG_SIZE
+        assert cipher.decrypt(token) == data
+
+    def test_streamed_writes(self, cipher):
+        out = io.BytesIO()
+        with cipher.writer(out) as writer:
+            for i in range(100):
+                writer.write(bytes([i]) * 7)
+        assert cipher.decrypt(out.getvalue()) == b"".join(
+            bytes([i]) * 7 for i in range(100)
+        )
+
+    def test_seek_reads_only_needed_segments(self, cipher):
+        data = bytes(range(256)) * 4
+        reader = cipher.reader(io.BytesIO(cipher.encrypt(data)))
+        reader.seek(700)
+        assert reader.read(10) == data[700:710]
+        reader.seek(-5, io.SEEK_END)
+        assert reader.read() == data[-5:]
+        reader.seek(3)
+        assert reader.read(SEGMENT * 2) == data[3 : 3 + SEGMENT * 2]
+
+    def test_each_stream_has_its_own_key(self, cipher):
+        assert cipher.encrypt(b"same") != cipher.encrypt(b"same")
+
+
+class TestAuthentication:
+    def test_flipped_byte(self, cipher):
+        token = bytearray(cipher.encrypt(os.urandom(200)))
+        token[HEADER_SIZE + SEGMENT + 20] ^= 1
+        reader = cipher.reader(io.BytesIO(bytes(token)))
+        assert reader.read(SEGMENT)  # the first segment is intact
+        with pytest.raises(StreamDecryptError):
+            reader.read()
+
+    def test_truncated_at_segment_boundary(self, cipher):
+        token = cipher.encrypt(os.urandom(3 * SEGMENT))
+        cut = token[: HEADER_SIZE + 2 * (SEGMENT + TAG_SIZE)]
+        with pytest.raises(StreamDecryptError):
+            cipher.decrypt(cut)
+
+    def test_segments_cannot_be_reordered(self, cipher):
+        token = cipher.encrypt(os.urandom(3 * SEGMENT))
+        sealed = SEGMENT + TAG_SIZE
+        first = token[HEADER_SIZE : HEADER_SIZE + sealed]
+        second = token[HEADER_SIZE + sealed : HEADER_SIZE + 2 * sealed]
+        swapped = (
+            token[:HEADER_SIZE] + second + first + token[HEADER_SIZE + 2 * sealed :]
+        )
+        with pytest.raises(StreamDecryptError):
+            cipher.decrypt(swapped)
+
+    def test_other_key(self, cipher):
+        token = cipher.encrypt(b"secret")
+        with pytest.raises(StreamDecryptError):
+            SegmentedCipher(os.urandom(32)).decrypt(token)
+
+    def test_unfinished_stream_is_unreadable(self, cipher):
+        out = io.BytesIO()
+        with pytest.raises(RuntimeError):
+            with cipher.writer(out) as writer:
+                writer.write(os.urandom(3 * SEGMENT))
+                raise RuntimeError
+        with pytest.raises(StreamDecryptError):
+            cipher.decrypt(out.getvalue())
+
+    def test_not_a_stream(self, cipher):
+        with pytest.raises(StreamDecryptError):
+            cipher.decrypt(b"gAAAAAB-fernet-token")
@@ -0,0 +1,147 @@
+"""Tests for utilities.user_index (in-memory user search index)."""
+
+import copy
+import time
+
+import pytest
+
+import core.demo as demo
+from core.demo import DemoAPI, MockAPIResponse
+from utilities.user_index import UserIndex, get_user_index
+
+USERS = [
+    {"id": "u1", "name": "Alice Johnson", "email": "alice.johnson@acme.com"},
+    {"id": "u2", "name": "Alan Smith", "email": "asmith@acme.com"},
+    {"id": "u3", "name": "Mark Johnson", "email": "mark@acme.com"},
+    {"id": "u4", "name": "Zoe Park", "email": "zoe@acme.com"},
+]
+
+
+@pytest.fixture
+def index():
+    index = UserIndex()
+    index.build(copy.deepcopy(USERS))
+    return index
+
+
+def _ids(users):
+    return [u["id"] for u in users]
+
+
+class TestLookups:
+    def test_build(self, index):
+        assert index.ready
+        assert len(index) == 4
+        assert index.get("u2")["name"] == "Alan Smith"
+
+    def test_by_email_is_case_insensitive(self, index):
+        assert index.by_email(" Mark@ACME.com")["id"] == "u3"
+        assert index.by_email("nobody@acme.com") is None
+
+    def test_prefix_matches_name_words_and_email(self, index):
+        assert set(_ids(index.prefix("al"))) == {"u1", "u2"}
+        assert _ids(index.prefix("john")) == ["u1", "u3"]
+        assert _ids(index.prefix("asm")) == ["u2"]
+        assert _ids(index.prefix("alice j")) == ["u1"]
+        assert index.prefix("") == []
+
+    def test_prefix_limit(self, index):
+        assert len(index.prefix("a", limit=1)) == 1
+
+    def test_fuzzy_matches_typos(self, index):
+        assert "u3" in _ids(index.search("jonson"))
+        assert _ids(index.similar("zoe parc")) == ["u4"]
+        assert index.search("qqqq") == []
+
+    def test_fuzzy_can_be_disabled(self):
+        index = UserIndex(fuzzy=False)
+        index.build(USERS)
+        assert index.search("jonson") == []
+
+    def test_search_ranks_exact_email_first(self, index):
+        assert _ids(index.search("mark@acme.com")) == ["u3"]
+        assert len(index.search("a", limit=2)) == 2
+
+
+class TestUpdates:
+    def test_upsert_merges_and_reindexes(self, index):
+        index.upsert({"id": "u2", "name": "Alan Brooks"})
+        assert index.get("u2")["email"] == "asmith@acme.com"
+        assert _ids(index.prefix("brook")) == ["u2"]
+        assert index.prefix("smith") == []
+
+    def test_upsert_new_user_and_email_change(self, index):
+        index.upsert({"id": "u5", "name": "Nina Ortiz", "email": "nina@acme.com"})
+        index.upsert({"id": "u4", "email": "zoe.park@acme.com"})
+        assert index.by_email("nina@acme.com")["id"] == "u5"
+        assert index.by_email("zoe@acme.com") is None
+        assert index.by_email("zoe.park@acme.com")["id"] == "u4"
+
+    def test_remove(self, index):
+        index.remove("u3")
+        assert index.get("u3") is None
+        assert index.by_email("mark@acme.com") is None
+        assert _ids(index.prefix("john")) == ["u1"]
+        assert "u3" not in _ids(index.search("jonson"))
+
+
+class TestBackgroundBuild:
+    def test_start_build_from_demo(self, monkeypatch):
+        monkeypatch.setattr(demo, "DEMO_USERS", copy.deepcopy(demo.DEMO_USERS))
+        api = DemoAPI()
+        index = get_user_index(api)
+        assert get_user_index(api) is index
+        assert index.start_build(api)
+        deadline = time.monotonic() + 5
+        while not index.ready and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(index) == len(demo.DEMO_USERS)
+        assert not index.start_build(api)
+
+    def test_failed_build_is_not_retried_by_default(self):
+        class Broken:
+            class users:
+                @staticmethod
+                def list_all(page_size=100):
+                    raise RuntimeError("boom")
+
+        index = UserIndex()
+        index.start_build(Broken)
+        index._thread.join(5)
+        assert index.error == "boom"
+        assert not index.ready
+        assert not index.start_build(Broken)
+        assert index.start_build(Broken, retry=True)
+        index._thread.join(5)
+
+    def test_failed_listing_keeps_previous_index(self, monkeypatch):
+        monkeypatch.setattr(demo, "DEMO_USERS", copy.deepcopy(demo.DEMO_USERS))
+        api = DemoAPI()
+        now = [1000.0]
+        index = UserIndex(max_age=60, clock=lambda: now[0])
+        index.build(api.users.list())
+        now[0] += 61
+        monkeypatch.setattr(
+            api.users,
+            "list_all",
+            lambda **k: MockAPIResponse(success=False, error="page 4 failed"),
+        )
+        assert index.start_build(api)
+        index._thread.join(5)
+        assert "page 4 failed" in index.error
+        assert index.ready and len(index) == len(demo.DEMO_USERS)
+        assert not index.start_build(api)
+
+    def test_stale_index_is_rebuilt(self, monkeypatch):
+        monkeypatch.setattr(demo, "DEMO_USERS", copy.deepcopy(demo.DEMO_USERS))
+        api = DemoAPI()
+        now = [1000.0]
+        index = UserIndex(max_age=60, clock=lambda: now[0])
+        assert index.start_build(api)
+        index._thread.join(5)
+        demo.DEMO_USERS.append({"id": "u-new", "name": "Newcomer", "email": "n@x.com"})
+        assert not index.start_build(api)
+        now[0] += 61
+        assert index.start_build(api)
+        index._thread.join(5)
+        assert index.by_email("n@x.com")["id"] == "u-new"
@@ -2,11 +2,94 @@
 Base utility class for Genesys Cloud utilities.
 """
 
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import (
+    RerunException,
+    StopException,
+    get_script_run_ctx,
+)
+
+from core.checkpoint import JobJournal
+from core.demo import is_demo_mode
+from core.encrypted_storage import get_storage
+from core.job_queue import JobQueue
+from genesys_cloud.api import APIResponse
+from genesys_cloud.coalesce import WriteCoalescer, get_coalescer
+from genesys_cloud.membership import (
+    GROUP_MEMBER_BATCH_SIZE,
+    QUEUE_MEMBER_BATCH_SIZE,
+    SyncResult,
+    member_ids,
+)
+from genesys_cloud.scheduler import Priority, request_priority
+
+from .bulk import (
+    BulkControl,
+    BulkExecutor,
+    BulkProgress,
+    BulkResult,
+    format_duration,
+    parse_emails,
+    resolve_emails,
+)
+from .history import get_history, record_status
+from .membership_index import MembershipIndex, get_membership_index
+from .planner import BulkPlan, plan_bulk
+from .reference import DATASETS, ReferenceCache, get_reference
+from .resolver import invalidate_not_found
+from .snapshot import get_snapshot
+
+# Seconds to wait for a coalesced write (window plus the calls themselves)
+WRITE_TIMEOUT = 60.0
+
+# Seconds between checks for background results (diagnostics, list refreshes)
+POLL_INTERVAL = 1.0
+
+
+def rerun_when(done: Callable[[], bool], interval: float = POLL_INTERVAL) -> None:
+    """
+    Rerun the app once done() returns True, polling in a fragment.
+
+    Without fragment support (Streamlit < 1.37) the result shows on the
+    next interaction instead.
+    """
+    if not hasattr(st, "fragment"):
+        return
+
+    def _poll() -> None:
+        if done():
+            st.rerun()
+
+    st.fragment(run_every=interval)(_poll)()
+
+
+def _clicked(rerun_data: Any, key: str) -> bool:
+    """Whether a rerun request was triggered by the button with this key."""
+    states = getattr(rerun_data, "widget_states", None)
+    for widget in getattr(states, "widgets", []):
+        # Element IDs of keyed widgets end with "-<key>"
+        if widget.id.split("-", 2)[-1] == key and widget.HasField("trigger_value"):
+            return widget.trigger_value
+    return False
+
+
+def _request_again(rerun_data: Any, stop: bool) -> None:
+    """Hand a held rerun (or stop) request back to the script runner."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    if stop:
+        ctx.script_requests.request_stop()
+    elif rerun_data is not None:
+        ctx.script_requests.request_rerun(rerun_data)
 
 
 @dataclass
@@ -165,3 +248,729 @@ class BaseUtility(ABC):
         config = self.get_config()
         full_key = f"{config.id}_{key}"
         st.session_state[full_key] = value
+
+    # Small writes
+
+    @property
+    def coalescer(self) -> WriteCoalescer:
+        """
+        Write buffer for single member/skill changes, shared by every
+        session of the org, so concurrent changes go out merged. Pass
+        api=self.api with each change.
+        """
+        return get_coalescer(self.api)
+
+    def wait_write(self, future: Future) -> Any:
+        """
+        Wait for a coalesced write and return its APIResponse.
+
+        A write still pending after WRITE_TIMEOUT (e.g. held back by rate
+        limiting) is returned as a failed response without data; it may
+        still be applied later.
+        """
+        try:
+            return future.result(timeout=WRITE_TIMEOUT)
+        except FutureTimeoutError:
+            return APIResponse(
+                success=False,
+                error=f"No response after {WRITE_TIMEOUT:.0f}s; the change may "
+                "still be applied, refresh to check",
+            )
+
+    @property
+    def reference(self) -> ReferenceCache:
+        """Skills, queues, groups, languages and wrap-up codes, warmed at login."""
+        return get_reference(self.api)
+
+    @property
+    def memberships(self) -> MembershipIndex:
+        """Reverse index of user -> groups, queues and skills."""
+        return get_membership_index(self.api)
+
+    # List pages
+
+    def load_list_page(
+        self, resource: str, page_size: int, page_number: int, noun: str
+    ) -> Optional[Dict]:
+        """
+        A list page from the org snapshot, revalidated in the background.
+
+        Renders a caption when the page is cached and swaps in the fresh
+        page once the refresh lands.
+
+        Args:
+            resource: 'users', 'groups', 'queues' or 'skills'
+            page_size: Rows per page
+            page_number: Page to load
+            noun: Plural shown in messages (e.g. 'groups')
+
+        Returns:
+            API page data, or None if it could not be loaded (error shown)
+        """
+        snapshot = get_snapshot(self.api)
+        with st.spinner(f"Loading {noun}..."):
+            page = snapshot.page(resource, page_size, page_number)
+        if page.data is None:
+            st.error(f"Failed to load {noun}: {page.error}")
+            return None
+        if page.stale:
+            age = format_duration(time.time() - (page.fetched_at or time.time()))
+            status = "refreshing..." if page.refreshing else "refresh failed"
+            st.caption(f"🕒 Cached {noun} from {age} ago · {status}")
+            if page.error and not page.refreshing:
+                st.caption(page.error)
+        if page.refreshing:
+            rerun_when(
+                lambda: not snapshot.refreshing(resource, page_size, page_number)
+            )
+        return page.data
+
+    def invalidate_lists(self, resource: str) -> None:
+        """Revalidate cached list pages and reference data after a change."""
+        get_snapshot(self.api).invalidate(resource)
+        if resource in DATASETS:
+            self.reference.invalidate(resource)
+
+    # Bulk operation helpers
+
+    def progress_callback(
+        self, progress_bar: Any, panel: Any = None
+    ) -> Callable[[BulkProgress], None]:
+        """
+        Build a bulk progress callback that drives an st.progress element.
+
+        Args:
+            progress_bar: Element returned by st.progress()
+            panel: Optional st.empty() placeholder for the telemetry panel
+
+        Returns:
+            Callback for BulkExecutor.run(on_progress=...)
+        """
+        metrics = getattr(self.api, "metrics", None)
+        baseline = metrics.snapshot() if metrics else None
+
+        def _update(progress: BulkProgress) -> None:
+            progress_bar.progress(min(progress.fraction, 1.0), text=progress.describe())
+            if panel is not None:
+                telemetry = metrics.snapshot().since(baseline) if metrics else None
+                self._render_telemetry(panel, progress, telemetry)
+
+        return _update
+
+    def _render_telemetry(self, panel: Any, progress: BulkProgress, telemetry) -> None:
+        """Live throughput panel: item and request rates, outcomes, ETA."""
+        eta = progress.eta_seconds
+        with panel.container():
+            cols = st.columns(6)
+            cols[0].metric("Items/s", f"{progress.items_per_second:.1f}")
+            cols[1].metric(
+                "Requests/s",
+                f"{telemetry.requests_per_second:.1f}" if telemetry else "—",
+            )
+            cols[2].metric("Succeeded", progress.succeeded)
+            cols[3].metric("Failed", progress.failed)
+            cols[4].metric("Retries", telemetry.retries if telemetry else "—")
+            cols[5].metric(
+                "ETA",
+                (
+                    format_duration(eta)
+                    if eta is not None and progress.completed < progress.total
+                    else "—"
+                ),
+            )
+
+    def run_bulk(
+        self,
+        executor: BulkExecutor,
+        items: List[Any],
+        fn: Callable[[Any], Any],
+        label: str,
+        journal: Optional[JobJournal] = None,
+    ) -> BulkResult:
+        """
+        Run a bulk apply step with a progress bar, telemetry panel and Stop.
+
+        Streamlit interrupts the script at its next UI update when a
+        widget is used, so progress updates hold the interruption while the
+        run goes on:
+        - Stop turns it into BulkControl.cancel(): the batches in flight
+          finish and the run returns with the untried items in
+          result.cancelled. Submitting the same input again resumes where
+          the run stopped.
+        - Any other widget does not stop the run. Its rerun (with the
+          widget's new state) is requested again when the run is over and
+          takes effect at the caller's next Streamlit call, so callers
+          close the journal and record the action before rendering.
+
+        Args:
+            executor: Configured executor
+            items: Items to process
+            fn: Called with one item (or one batch)
+            label: Progress bar label
+            journal: Job journal for checkpointing the 'apply' phase
+
+        Returns:
+            BulkResult of the run
+        """
+        stop_key = f"{self.get_config().id}_bulk_stop"
+        stop = st.empty()
+        stop.button(
+            "⏹ Stop",
+            key=stop_key,
+            help="Stop after the current batch. Submit the same input again "
+            "to resume.",
+        )
+        bar = st.progress(0.0, text=label)
+        panel = st.empty()
+        update = self.progress_callback(bar, panel)
+        control = BulkControl()
+        held: List[Any] = []  # rerun requests (RerunData) held during the run
+        stopped = []  # StopException: the session is ending, no more output
+
+        def ui(render: Callable[..., Any], *args: Any) -> None:
+            if stopped:
+                return
+            try:
+                render(*args)
+            except RerunException as e:
+                if _clicked(e.rerun_data, stop_key):
+                    control.cancel()
+                else:
+                    held.append(e.rerun_data)
+            except StopException:
+                stopped.append(True)
+                control.cancel()
+
+        result = executor.run(
+            items,
+            fn,
+            on_progress=lambda progress: ui(update, progress),
+            checkpoint=journal.phase("apply") if journal else None,
+            control=control,
+        )
+        invalidate_not_found(self.api, result)
+        ui(stop.empty)
+        ui(bar.empty)
+        if result.cancelled:
+            ui(
+                st.warning,
+                f"Stopped: {len(result.cancelled)} item(s) not attempted. "
+                "Submit the same input again to resume.",
+            )
+        _request_again(held[-1] if held else None, bool(stopped))
+        return result
+
+    def resolve_emails(
+        self, emails: List[str], journal: Optional[JobJournal] = None
+    ) -> Tuple[List[Dict], List[str], List[str]]:
+        """
+        Resolve emails to users with a progress bar.
+
+        Args:
+            emails: Email addresses to resolve
+            journal: Job journal; lookups done by an interrupted run are reused
+
+        Returns:
+            Tuple of (found users as {id, name, email}, missing emails,
+            emails whose lookup failed)
+        """
+        bar = st.progress(0.0, text="Resolving users...")
+        found, missing, failed = resolve_emails(
+            self.api,
+            emails,
+            on_progress=self.progress_callback(bar),
+            checkpoint=journal.phase("resolve", keep_data=True) if journal else None,
+        )
+        bar.empty()
+        return found, missing, failed
+
+    def render_bulk_plan(self, operation: str, emails: List[str]) -> BulkPlan:
+        """
+        Show the cost plan of a bulk operation before it runs.
+
+        Args:
+            operation: Planner operation (see utilities.planner.OPERATIONS)
+            emails: Email addresses to process
+
+        Returns:
+            The rendered BulkPlan
+        """
+        plan = plan_bulk(self.api, operation, emails)
+        lookups, mutation = plan.steps
+        st.markdown("#### Plan")
+        cols = st.columns(4)
+        cols[0].metric(
+            "Lookups",
+            lookups.requests,
+            help=f"{lookups.cached} of {lookups.items} emails already cached",
+        )
+        cols[1].metric(
+            "Batches",
+            mutation.requests,
+            help="Upper bound: assumes every email resolves to a user",
+        )
+        cols[2].metric("Total requests", plan.total_requests)
+        cols[3].metric("Est. duration", plan.duration_text)
+        with st.expander("Plan details"):
+            st.dataframe(
+                pd.DataFrame(plan.rows()), hide_index=True, use_container_width=True
+            )
+            if plan.rate_per_second:
+                st.caption(f"Rate budget: {plan.rate_per_second:g} requests/s")
+        return plan
+
+    def dry_run_summary(self, operation: str, emails: List[str], found: int) -> str:
+        """
+        Cost of running a previewed operation for real.
+
+        The preview resolved every email, so the real run reuses the cached
+        lookups and only pays for the mutation batches.
+        """
+        plan = plan_bulk(self.api, operation, emails, found=found)
+        return f"Running it now needs {plan.describe()}."
+
+    def open_job_journal(
+        self,
+        operation: str,
+        target_id: str,
+        items: List[str],
+        details: Optional[Dict[str, Any]] = None,
+    ) -> JobJournal:
+        """
+        Open the checkpoint journal for a bulk job, announcing a resume.
+
+        Args:
+            operation: Operation name (e.g. 'group_add_members')
+            target_id: Target entity ID
+            items: Input items identifying the job
+            details: Extra fields for the journal header
+
+        Returns:
+            JobJournal to pass to resolve_emails() and BulkExecutor.run()
+        """
+        journal = JobJournal.open(operation, target_id, items, details=details)
+        if journal.resumed:
+            counts = journal.counts("apply")
+            st.info(
+                f"Resuming interrupted job: {counts['done']} item(s) already "
+                f"applied, {counts['failed']} to retry."
+            )
+        return journal
+
+    def render_bulk_failures(
+        self, result: BulkResult, labels: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Show the failed items of a bulk run.
+
+        Args:
+            result: Completed bulk run
+            labels: Optional display label per item (e.g. user ID -> email)
+        """
+        if not result.failed:
+            return
+        labels = labels or {}
+        st.warning(f"{len(result.failed)} of {len(result.results)} failed.")
+        rows = []
+        for r in result.failed:
+            if isinstance(r.item, dict):
+                key = r.item.get("id", "")
+                label = labels.get(key, r.item.get("email") or key)
+            else:
+                label = labels.get(r.item, str(r.item))
+            rows.append(
+                {
+                    "Item": label,
+                    "Status": r.status_code or "",
+                    "Error": r.error or "Failed",
+                }
+            )
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+    def finish_job(self, journal: Optional[JobJournal], result: BulkResult) -> None:
+        """
+        Close a job journal after its run.
+
+        A fully successful job is marked complete. Otherwise the journal
+        stays open, so submitting the same input retries only failed (or
+        never attempted) items.
+        """
+        if journal is None:
+            return
+        if result.failed or result.cancelled:
+            journal.close()
+        else:
+            journal.complete(result.status)
+
+    def record_bulk_action(
+        self,
+        action: str,
+        target: str,
+        target_id: str,
+        result: BulkResult,
+        user_ids: List[str],
+        details: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Record a bulk run in action history.
+
+        Args:
+            action: Action type (e.g. 'add_members')
+            target: Human-readable target name
+            target_id: Target ID
+            result: Completed (or stopped) bulk run; a stopped run that changed
+                something is recorded as partial, so it can be rolled back
+            user_ids: IDs that were changed successfully (for rollback)
+            details: Extra details to store
+
+        Returns:
+            Action ID
+        """
+        return get_history().record_action(
+            utility=self.get_config().id,
+            action=action,
+            target=target,
+            target_id=target_id,
+            details={
+                **(details or {}),
+                "requested": len(result.results),
+                "failed": len(result.failed),
+                "cancelled": len(result.cancelled),
+                "elapsed_seconds": round(result.elapsed, 2),
+            },
+            affected_count=len(user_ids),
+            status=record_status(result.status, len(user_ids)),
+            user_ids=user_ids,
+        )
+
+    def record_action(
+        self,
+        action: str,
+        target: str,
+        target_id: str,
+        user_ids: List[str],
+        details: Optional[Dict[str, Any]] = None,
+        status: str = "success",
+    ) -> str:
+        """
+        Record a single (non-bulk) change in action history.
+
+        Args:
+            action: Action type (e.g. 'remove_members')
+            target: Human-readable target name
+            target_id: Target ID
+            user_ids: IDs that were changed (for rollback)
+            details: Extra details to store
+            status: 'success', 'failed' or 'partial'
+
+        Returns:
+            Action ID
+        """
+        return get_history().record_action(
+            utility=self.get_config().id,
+            action=action,
+            target=target,
+            target_id=target_id,
+            details=details or {},
+            affected_count=len(user_ids),
+            status=status,
+            user_ids=user_ids,
+        )
+
+    # Background worker helpers
+
+    def background_jobs_available(self) -> bool:
+        """
+        Whether bulk jobs can be handed to the background worker.
+
+        The worker runs in its own process, so it needs a live org and
+        storage it can read (filesystem plus a stable encryption key).
+        """
+        return not is_demo_mode() and get_storage().is_persistent
+
+    def background_job_checkbox(self, key: str) -> bool:
+        """Render the 'Run in background worker' option when available."""
+        if not self.background_jobs_available():
+            return False
+        return st.checkbox(
+            "Run in background worker",
+            key=key,
+            help="Queue the job for `admin-layers-worker` instead of running it "
+            "in this browser session. Track it on the Background Jobs page.",
+        )
+
+    def enqueue_background_job(
+        self,
+        kind: str,
+        target_id: str,
+        target_name: str,
+        emails: List[str],
+        **params: Any,
+    ) -> str:
+        """
+        Queue a bulk job for the background worker.
+
+        Args:
+            kind: Job kind (see utilities.jobs.JOB_KINDS)
+            target_id: Target entity ID
+            target_name: Human-readable target name
+            emails: User emails to process
+            **params: Extra job parameters (e.g. proficiency)
+
+        Returns:
+            Job ID
+        """
+        job_id = JobQueue().enqueue(
+            kind, target_id, target_name, {"emails": emails, **params}
+        )
+        scope = f" for {len(emails)} email(s)" if emails else ""
+        st.success(
+            f"Queued background job `{job_id}`{scope}. "
+            "Track it on the Background Jobs page."
+        )
+        return job_id
+
+    # Membership sync
+
+    def render_membership_sync(
+        self, endpoint_name: str, entity_id: str, entity_name: str, key_prefix: str
+    ) -> bool:
+        """
+        Render the Sync Members page for a group or queue.
+
+        The target member list comes from pasted/uploaded emails or from
+        another entity of the same type. Current members are fetched once
+        and only the difference is applied, in chunked add/remove calls.
+
+        Args:
+            endpoint_name: 'groups' or 'queues'
+            entity_id: Entity being synced
+            entity_name: Entity display name
+            key_prefix: Widget key prefix (e.g. 'gm')
+
+        Returns:
+            True if members were changed (callers refresh their member list)
+        """
+        noun = endpoint_name[:-1]
+        endpoint = getattr(self.api, endpoint_name)
+        st.markdown("### Sync Members")
+        st.caption(
+            f"Make this {noun}'s membership match a target list. Members "
+            "already in place are left alone; only the differences are applied."
+        )
+
+        source = st.radio(
+            "Target members from",
+            ["Email list", f"Another {noun}"],
+            horizontal=True,
+            key=f"{key_prefix}_sync_source",
+        )
+        emails_text, source_entity = "", None
+        if source == "Email list":
+            emails_text = st.text_area(
+                "Emails (one per line)",
+                height=160,
+                placeholder="alice@company.com\nbob@company.com",
+                key=f"{key_prefix}_sync_paste",
+            )
+            uploaded = st.file_uploader(
+                "...or a CSV/TXT file",
+                type=["csv", "txt"],
+                key=f"{key_prefix}_sync_upload",
+            )
+            if uploaded:
+                emails_text = "\n".join(
+                    line.split(",")[0].strip().strip('"')
+                    for line in uploaded.read().decode("utf-8").split("\n")
+                    if "@" in line
+                )
+        else:
+            query = st.text_input(
+                f"Search {endpoint_name}", key=f"{key_prefix}_sync_search"
+            )
+            matches = [
+                e
+                for e in (endpoint.search(query) if query else [])
+                if e.get("id") != entity_id
+            ]
+            if matches:
+                source_entity = st.selectbox(
+                    "Copy members from",
+                    matches,
+                    format_func=lambda e: e.get("name", e.get("id", "")),
+                    key=f"{key_prefix}_sync_from",
+                )
+            elif query:
+                st.info(f"No matching {endpoint_name}.")
+
+        c1, c2 = st.columns(2)
+        remove_extra = c1.checkbox(
+            "Remove members not in target",
+            value=True,
+            key=f"{key_prefix}_sync_remove",
+            help="Untick for an add-only sync.",
+        )
+        dry_run = c2.checkbox(
+            "Preview only (dry run)", value=True, key=f"{key_prefix}_sync_dryrun"
+        )
+        background = self.background_job_checkbox(f"{key_prefix}_sync_background")
+        if not st.button(
+            "Preview Changes" if dry_run else "Sync",
+            type="primary",
+            key=f"{key_prefix}_sync_run",
+        ):
+            return False
+
+        emails = parse_emails(emails_text) if source == "Email list" else []
+        if source == "Email list" and not emails:
+            st.error("No valid email addresses found.")
+            return False
+        if source != "Email list" and source_entity is None:
+            st.error(f"Choose a {noun} to copy members from.")
+            return False
+
+        st.markdown("---")
+        if background and not dry_run:
+            params: Dict[str, Any] = {"remove_extra": remove_extra}
+            if source_entity is not None:
+                params["source_id"] = source_entity["id"]
+            self.enqueue_background_job(
+                f"{noun}_sync_members", entity_id, entity_name, emails, **params
+            )
+            return False
+
+        labels: Dict[str, str] = {}
+        failed: List[str] = []
+        if emails:
+            found, missing, failed = self.resolve_emails(emails)
+            if missing:
+                st.warning(
+                    f"{len(missing)} email(s) not found and left out of the "
+                    f"target: {', '.join(missing[:10])}"
+                    + ("..." if len(missing) > 10 else "")
+                )
+            if failed and remove_extra:
+                # A failed lookup may hide a current member: never remove
+                # on an incomplete target
+                remove_extra = False
+                st.warning(
+                    f"{len(failed)} lookup(s) failed, so no members are "
+                    "removed this time. Run the sync again to retry them."
+                )
+            elif failed:
+                st.warning(f"{len(failed)} lookup(s) failed and were skipped.")
+            target_ids = [u["id"] for u in found]
+            labels.update({u["id"]: u["email"] or u["name"] for u in found})
+        else:
+            listing = endpoint.list_members(source_entity["id"])
+            if not listing.success:
+                st.error(f"Could not list the source members: {listing.error}")
+                return False
+            target_ids = member_ids(listing.data)
+            labels.update(_member_labels(listing.data))
+
+        listing = endpoint.list_members(entity_id)
+        if not listing.success:
+            st.error(f"Could not list the current members: {listing.error}")
+            return False
+        current_ids = member_ids(listing.data)
+        labels.update(_member_labels(listing.data))
+        with request_priority(Priority.BULK):
+            result: SyncResult = endpoint.sync_members(
+                entity_id,
+                target_ids,
+                remove_extra=remove_extra,
+                dry_run=dry_run,
+                current_ids=current_ids,
+            )
+        self._render_sync_result(
+            result,
+            len(current_ids),
+            len(set(target_ids)),
+            labels,
+            (
+                GROUP_MEMBER_BATCH_SIZE
+                if endpoint_name == "groups"
+                else QUEUE_MEMBER_BATCH_SIZE
+            ),
+        )
+        if dry_run or result.diff.is_empty:
+            return False
+
+        get_history().record_action(
+            utility=self.get_config().id,
+            action="sync_members",
+            target=entity_name,
+            target_id=entity_id,
+            details={
+                "source": source_entity["id"] if source_entity else "emails",
+                "removed_ids": result.removed,
+                "failed": len(result.failed),
+                "lookup_failed": len(failed),
+                "requests": result.requests,
+            },
+            affected_count=len(result.added) + len(result.removed),
+            status=result.status,
+            user_ids=result.added,
+        )
+        return bool(result.added or result.removed)
+
+    def _render_sync_result(
+        self,
+        result: SyncResult,
+        current: int,
+        target: int,
+        labels: Dict[str, str],
+        batch_size: int,
+    ) -> None:
+        """Diff summary, change lists and outcome of a membership sync."""
+        diff = result.diff
+        cols = st.columns(6)
+        cols[0].metric("Current", current)
+        cols[1].metric("Target", target)
+        cols[2].metric("To add", len(diff.to_add))
+        cols[3].metric("To remove", len(diff.to_remove))
+        cols[4].metric("Unchanged", diff.unchanged)
+        cols[5].metric("API calls", diff.request_count(batch_size))
+
+        if diff.is_empty:
+            st.success("Already in sync — nothing to change.")
+            return
+        c1, c2 = st.columns(2)
+        for col, title, ids in (
+            (c1, "Add", diff.to_add),
+            (c2, "Remove", diff.to_remove),
+        ):
+            with col:
+                st.markdown(f"**{title}** ({len(ids)})")
+                if ids:
+                    st.dataframe(
+                        pd.DataFrame({"Member": [labels.get(i, i) for i in ids]}),
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+        if result.dry_run:
+            st.info("Dry run — uncheck 'Preview only' to apply.")
+        elif result.success:
+            st.success(
+                f"Added {len(result.added)}, removed {len(result.removed)} "
+                f"in {result.requests} call(s)."
+            )
+        else:
+            st.warning(
+                f"Added {len(result.added)}, removed {len(result.removed)}; "
+                f"{len(result.failed)} change(s) failed."
+            )
+            for error in result.errors[:5]:
+                st.caption(error)
+
+
+def _member_labels(members: List[Dict]) -> Dict[str, str]:
+    """User ID -> email (or name) for group or queue members."""
+    labels = {}
+    for m in members:
+        user = m.get("user") or m
+        uid = m.get("id") or user.get("id")
+        if uid:
+            labels[uid] = user.get("email") or user.get("name") or m.get("name") or uid
+    return labels
@@ -0,0 +1,459 @@
+"""
+Bulk Execution Engine
+Shared engine for per-item bulk operations (resolve emails, add members,
+assign skills, ...).
+
+Provides bounded concurrency, batching, per-item result capture,
+partial-failure reporting, throughput/ETA metrics, throttled progress
+callbacks and cancel/pause between batches. Progress callbacks always run
+on the calling thread, so they can safely update Streamlit elements.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from genesys_cloud.membership import bisect_batch
+from genesys_cloud.scheduler import Priority, request_priority
+
+from .resolver import get_resolver
+
+# Concurrent per-user calls for skill assignment/removal
+SKILL_WORKERS = 4
+# Concurrent email lookups in resolve_emails()
+RESOLVE_WORKERS = 4
+
+
+@dataclass
+class ItemResult:
+    """Outcome of a single item in a bulk run."""
+
+    item: Any
+    success: bool
+    data: Any = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+
+
+@dataclass
+class BulkProgress:
+    """Snapshot of a bulk run in progress."""
+
+    total: int
+    completed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    resumed: int = 0  # already done in a previous run (from checkpoint)
+    elapsed: float = 0.0
+    paused: bool = False
+
+    @property
+    def fraction(self) -> float:
+        return self.completed / self.total if self.total else 1.0
+
+    @property
+    def items_per_second(self) -> float:
+        processed = self.completed - self.resumed
+        return processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Estimated seconds remaining (None until throughput is known)."""
+        rate = self.items_per_second
+        if not rate:
+            return None
+        return (self.total - self.completed) / rate
+
+    def describe(self) -> str:
+        """Short human-readable progress line."""
+        text = f"{self.completed}/{self.total}"
+        if self.failed:
+            text += f" ({self.failed} failed)"
+        if self.items_per_second:
+            text += f" · {self.items_per_second:.1f}/s"
+        eta = self.eta_seconds
+        if self.paused:
+            text += " · paused"
+        elif eta is not None and self.completed < self.total:
+            text += f" · ETA {format_duration(eta)}"
+        return text
+
+
+@dataclass
+class BulkResult:
+    """Per-item results of a completed bulk run."""
+
+    results: List[ItemResult] = field(default_factory=list)
+    elapsed: float = 0.0
+    cancelled: List[Any] = field(default_factory=list)  # items never attempted
+
+    @property
+    def succeeded(self) -> List[ItemResult]:
+        return [r for r in self.results if r.success]
+
+    @property
+    def failed(self) -> List[ItemResult]:
+        return [r for r in self.results if not r.success]
+
+    @property
+    def status(self) -> str:
+        """
+        'success', 'partial' or 'failed' (matches ActionRecord.status), or
+        'cancelled' when the run was stopped before every item was tried.
+        """
+        if self.cancelled:
+            return "cancelled"
+        if not self.failed:
+            return "success"
+        return "partial" if self.succeeded else "failed"
+
+    @property
+    def items_per_second(self) -> float:
+        return len(self.results) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration as e.g. '45s', '3m 20s' or '1h 05m'."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {(seconds % 3600) // 60:02d}m"
+
+
+def chunked(items: Sequence[Any], size: int) -> List[List[Any]]:
+    """Split items into lists of at most `size` elements."""
+    size = max(1, size)
+    return [list(items[i : i + size]) for i in range(0, len(items), size)]
+
+
+class BulkControl:
+    """
+    Cancel/pause token for a bulk run.
+
+    BulkExecutor checks it before submitting each batch: a paused run
+    lets in-flight batches finish and then waits; a cancelled run stops
+    submitting and returns the untried items in BulkResult.cancelled.
+    Subclasses can override refresh() to pull state from elsewhere (the
+    background worker reads it from the job queue).
+
+    Usage:
+        control = BulkControl()
+        threading.Timer(30, control.cancel).start()
+        result = executor.run(items, fn, control=control)
+    """
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set() and not self.cancelled
+
+    def cancel(self) -> None:
+        """Stop after the batches already in flight."""
+        self._cancelled.set()
+        self._running.set()
+
+    def pause(self) -> None:
+        """Hold new batches until resume() or cancel()."""
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self) -> None:
+        """Continue a paused run."""
+        self._running.set()
+
+    def refresh(self) -> None:
+        """Update state from an external source (no-op by default)."""
+
+    def wait(self, timeout: float) -> None:
+        """Sleep while paused, waking early on resume or cancel."""
+        self._running.wait(timeout)
+
+
+def _outcome_to_results(batch: List[Any], outcome: Any) -> List[ItemResult]:
+    """
+    Normalize whatever a bulk function returned into per-item results.
+
+    Accepts a list of ItemResult, a response object with ``success`` /
+    ``error`` / ``status_code`` (applied to every item in the batch), or
+    any other value (treated as success with that value as data).
+    """
+    if (
+        isinstance(outcome, list)
+        and outcome
+        and all(isinstance(r, ItemResult) for r in outcome)
+    ):
+        return outcome
+    if hasattr(outcome, "success"):
+        return [
+            ItemResult(
+                item=item,
+                success=bool(outcome.success),
+                data=getattr(outcome, "data", None),
+                error=getattr(outcome, "error", None),
+                status_code=getattr(outcome, "status_code", None),
+            )
+            for item in batch
+        ]
+    return [ItemResult(item=item, success=True, data=outcome) for item in batch]
+
+
+@dataclass
+class _CallFailed:
+    """Outcome of a bulk function that raised."""
+
+    error: str
+    success: bool = False
+    status_code: Optional[int] = None
+
+
+def _safe_call(fn: Callable, arg: Any) -> Any:
+    try:
+        return fn(arg)
+    except Exception as e:
+        return _CallFailed(error=str(e), status_code=getattr(e, "status_code", None))
+
+
+class BulkExecutor:
+    """
+    Runs a function over many items with bounded concurrency.
+
+    Usage:
+        executor = BulkExecutor(max_workers=4)
+        result = executor.run(
+            found, lambda u: api.routing.add_user_skill(u["id"], skill_id),
+            on_progress=lambda p: bar.progress(p.fraction, text=p.describe()),
+        )
+
+        # Batched: fn receives a list of items
+        executor = BulkExecutor(max_workers=1, batch_size=50)
+        result = executor.run(ids, lambda b: api.groups.add_members(gid, b))
+
+    A batch rejected because of individual items (e.g. one deleted user
+    ID) is bisected, so only the bad items fail (see bisect_batch).
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        batch_size: int = 1,
+        progress_interval: float = 0.25,
+        priority: Priority = Priority.BULK,
+        bisect: bool = True,
+    ):
+        """
+        Initialize executor.
+
+        Args:
+            max_workers: Maximum batches in flight at once
+            batch_size: Items per call (1 calls fn with a single item)
+            progress_interval: Minimum seconds between progress callbacks
+            priority: Scheduling class for API calls made by fn
+            bisect: Split failing batches to isolate the bad items
+        """
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
+        self.progress_interval = progress_interval
+        self.priority = priority
+        self.bisect = bisect
+
+    def _call(self, fn: Callable, batch: List[Any]) -> List[ItemResult]:
+        with request_priority(self.priority):
+            if self.batch_size > 1 and self.bisect:
+                outcomes, _ = bisect_batch(lambda chunk: _safe_call(fn, chunk), batch)
+                return [
+                    result
+                    for chunk, outcome in outcomes
+                    for result in _outcome_to_results(chunk, outcome)
+                ]
+            arg = batch if self.batch_size > 1 else batch[0]
+            return _outcome_to_results(batch, _safe_call(fn, arg))
+
+    def run(
+        self,
+        items: Iterable[Any],
+        fn: Callable[[Any], Any],
+        on_progress: Optional[Callable[[BulkProgress], None]] = None,
+        checkpoint: Optional[Any] = None,
+        key: Optional[Callable[[Any], str]] = None,
+        control: Optional[BulkControl] = None,
+    ) -> BulkResult:
+        """
+        Run fn over all items.
+
+        Args:
+            items: Items to process
+            fn: Called with one item (or one batch when batch_size > 1)
+            on_progress: Throttled callback receiving BulkProgress
+            checkpoint: Journal phase (core.checkpoint.JournalPhase); items
+                already recorded as done are skipped, new outcomes recorded
+            key: Checkpoint key for an item (default: the item itself, or
+                its "id" for dicts)
+            control: Cancel/pause token checked between batches
+
+        Returns:
+            BulkResult with one ItemResult per item that was tried, in
+            input order (untried items of a cancelled run in .cancelled)
+        """
+        items = list(items)
+        key = key or item_key
+        slots: List[Optional[ItemResult]] = [None] * len(items)
+        progress = BulkProgress(total=len(items))
+
+        todo: List[int] = []
+        for index, item in enumerate(items):
+            saved = checkpoint.get(key(item)) if checkpoint else None
+            if saved is not None and saved.status == "done":
+                slots[index] = ItemResult(item=item, success=True, data=saved.data)
+                progress.resumed += 1
+            else:
+                todo.append(index)
+        progress.completed = progress.succeeded = progress.resumed
+
+        batches = chunked(todo, self.batch_size)
+        start = time.monotonic()
+        last_report = 0.0
+
+        def report(force: bool = False) -> None:
+            nonlocal last_report
+            now = time.monotonic()
+            progress.elapsed = now - start
+            if on_progress and (force or now - last_report >= self.progress_interval):
+                last_report = now
+                on_progress(progress)
+
+        report(force=True)
+        stopped = False
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending: Dict[Future, List[int]] = {}
+            next_batch = 0
+            while (next_batch < len(batches) and not stopped) or pending:
+                if control is not None:
+                    control.refresh()
+                    stopped = control.cancelled
+                    progress.paused = control.paused
+
+                # Keep a bounded window of batches in flight
+                while (
+                    next_batch < len(batches)
+                    and len(pending) < self.max_workers
+                    and not (stopped or progress.paused)
+                ):
+                    indexes = batches[next_batch]
+                    batch = [items[i] for i in indexes]
+                    pending[pool.submit(self._call, fn, batch)] = indexes
+                    next_batch += 1
+
+                if not pending:
+                    if progress.paused:
+                        report()
+                        control.wait(self.progress_interval or 0.25)
+                    continue
+
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    indexes = pending.pop(future)
+                    for index, result in zip(indexes, future.result()):
+                        slots[index] = result
+                        if checkpoint:
+                            checkpoint.record(
+                                key(result.item),
+                                result.success,
+                                data=result.data,
+                                error=result.error,
+                            )
+                        progress.completed += 1
+                        if result.success:
+                            progress.succeeded += 1
+                        else:
+                            progress.failed += 1
+                report()
+
+        progress.paused = False
+        report(force=True)
+        return BulkResult(
+            results=[r for r in slots if r is not None],
+            elapsed=progress.elapsed,
+            cancelled=[items[i] for batch in batches[next_batch:] for i in batch],
+        )
+
+
+def item_key(item: Any) -> str:
+    """Default checkpoint key: the item itself, or its "id" for dicts."""
+    if isinstance(item, dict):
+        return str(item.get("id", ""))
+    return str(item)
+
+
+def parse_emails(raw: str) -> List[str]:
+    """Extract unique email addresses (one per line), preserving order."""
+    return list(
+        dict.fromkeys(e.strip() for e in raw.split("\n") if e.strip() and "@" in e)
+    )
+
+
+def resolve_emails(
+    api: Any,
+    emails: List[str],
+    executor: Optional[BulkExecutor] = None,
+    on_progress: Optional[Callable[[BulkProgress], None]] = None,
+    checkpoint: Optional[Any] = None,
+    control: Optional[BulkControl] = None,
+) -> Tuple[List[Dict], List[str], List[str]]:
+    """
+    Resolve email addresses to users concurrently.
+
+    Lookups go through the client's UserResolver, so emails resolved by
+    an earlier run, preview or upload cost no API call.
+
+    Args:
+        api: Backend client
+        emails: Email addresses to resolve
+        executor: Executor to use (default: RESOLVE_WORKERS workers)
+        on_progress: Throttled progress callback
+        checkpoint: Journal phase; resolved users are kept so a resumed
+            job does not look them up again
+        control: Cancel/pause token; emails not looked up before a cancel
+            appear in none of the lists
+
+    Returns:
+        Tuple of (found users as {id, name, email}, missing emails, emails
+        whose lookup failed). A failed lookup says nothing about whether
+        the user exists, so never treat it as missing (e.g. to remove a
+        member).
+    """
+
+    resolver = get_resolver(api)
+    resolver.load()
+    executor = executor or BulkExecutor(max_workers=RESOLVE_WORKERS)
+    result = executor.run(
+        emails,
+        resolver.lookup,
+        on_progress=on_progress,
+        checkpoint=checkpoint,
+        control=control,
+    )
+    resolver.flush()
+
+    found, missing, failed = [], [], []
+    for r in result.results:
+        if not r.success:
+            failed.append(r.item)
+        elif r.data:
+            found.append(
+                {"id": r.data["id"], "name": r.data.get("name", ""), "email": r.item}
+            )
+        else:
+            missing.append(r.item)
+    return found, missing, failed
@@ -8,7 +8,10 @@ from typing import Dict, List
 import pandas as pd
 import streamlit as st
 
+from genesys_cloud.membership import GROUP_MEMBER_BATCH_SIZE
+
 from .base import BaseUtility, UtilityConfig
+from .bulk import BulkExecutor, parse_emails
 
 
 class GroupManagerUtility(BaseUtility):
@@ -52,6 +55,7 @@ class GroupManagerUtility(BaseUtility):
                 ("gm_nav_detail", "\U0001f465 Members", "detail"),
                 ("gm_nav_add", "\U00002795 Add Members", "add"),
                 ("gm_nav_remove", "\U00002796 Remove Members", "remove"),
+                ("gm_nav_sync", "\U0001f504 Sync Members", "sync"),
                 ("gm_nav_edit", "\U0000270f\ufe0f Edit Group", "edit"),
                 ("gm_nav_delete", "\U0001f5d1\ufe0f Delete Group", "delete"),
                 ("gm_nav_export", "\U0001f4e5 Export", "export"),
@@ -69,6 +73,7 @@ class GroupManagerUtility(BaseUtility):
             "detail": self._page_detail,
             "add": self._page_add,
             "remove": self._page_remove,
+            "sync": self._page_sync,
             "export": self._page_export,
             "create": self._page_create,
             "edit": self._page_edit,
@@ -84,7 +89,10 @@ class GroupManagerUtility(BaseUtility):
         if resp.success:
             self.set_state("group_id", group_id)
             self.set_state("group_info", resp.data)
-            self.set_state("members", self.api.groups.get_members(group_id))
+            members = self.api.groups.get_members(group_id)
+            self.set_state("members", members)
+            self.memberships.upsert_entity("groups", resp.data)
+            self.memberships.set_members("groups", group_id, members)
             self.set_state("page", "detail")
         else:
             st.error(f"Failed to load group: {resp.error}")
@@ -92,7 +100,10 @@ class GroupManagerUtility(BaseUtility):
     def _refresh_members(self) -> None:
         gid = self.get_state("group_id")
         if gid:
-            self.set_state("members", self.api.groups.get_members(gid))
+            members = self.api.groups.get_members(gid)
+            self.set_state("members", members)
+            self.memberships.set_members("groups", gid, members)
+            self.invalidate_lists("groups")  # member counts changed
 
     def _action_bar(self) -> None:
         info = self.get_state("group_info")
@@ -154,15 +165,10 @@ class GroupManagerUtility(BaseUtility):
             )
             self.set_state("list_page_number", page_number)
 
-        with st.spinner("Loading groups..."):
-            resp = self.api.groups.list_page(
-                page_size=page_size, page_number=page_number
-            )
-        if not resp.success:
-            st.error(f"Failed to load groups: {resp.error}")
+        data = self.load_list_page("groups", page_size, page_number, "groups")
+        if data is None:
             return
 
-        data = resp.data or {}
         all_groups = data.get("entities", [])
         total = data.get("total", len(all_groups))
         page_count = data.get("pageCount", 1)
@@ -250,6 +256,7 @@ class GroupManagerUtility(BaseUtility):
                 visibility=visibility,
             )
             if resp.success:
+                self.invalidate_lists("groups")
                 st.success("Group created.")
                 self.set_state("group_id", resp.data.get("id"))
                 self.set_state("group_info", resp.data)
@@ -285,6 +292,7 @@ class GroupManagerUtility(BaseUtility):
             }
             resp = self.api.groups.update(info.get("id"), payload)
             if resp.success:
+                self.invalidate_lists("groups")
                 st.success("Group updated.")
                 self._load_group(info.get("id"))
                 st.rerun()
@@ -308,6 +316,8 @@ class GroupManagerUtility(BaseUtility):
         ):
             resp = self.api.groups.delete(info.get("id"))
             if resp.success:
+                self.invalidate_lists("groups")
+                self.memberships.remove_entity("groups", info.get("id"))
                 st.success("Group deleted.")
                 self.set_state("group_info", None)
                 self.set_state("group_id", "")
@@ -395,30 +405,35 @@ class GroupManagerUtility(BaseUtility):
             "Process", type="primary", use_container_width=True, key="gm_run_add"
         )
 
+        background = self.background_job_checkbox("gm_background")
+
         if run and emails_text:
-            self._execute_add(emails_text, dry_run)
+            self._execute_add(emails_text, dry_run, background)
 
-    def _execute_add(self, raw: str, dry_run: bool) -> None:
-        emails = list(
-            dict.fromkeys(e.strip() for e in raw.split("\n") if e.strip() and "@" in e)
-        )
+    def _execute_add(self, raw: str, dry_run: bool, background: bool = False) -> None:
+        emails = parse_emails(raw)
         if not emails:
             st.error("No valid email addresses found.")
             return
 
         st.markdown("---")
-        progress = st.progress(0)
-        found, missing = [], []
-        for i, email in enumerate(emails):
-            progress.progress((i + 1) / len(emails))
-            user = self.api.users.search_by_email(email)
-            if user:
-                found.append(
-                    {"id": user["id"], "name": user.get("name", ""), "email": email}
-                )
-            else:
-                missing.append(email)
-        progress.empty()
+        group_id = self.get_state("group_id")
+        if background and not dry_run:
+            self.enqueue_background_job(
+                "group_add_members",
+                group_id,
+                self.get_state("group_info", {}).get("name", group_id),
+                emails,
+            )
+            return
+        journal = (
+            None
+            if dry_run
+            else self.open_job_journal("group_add_members", group_id, emails)
+        )
+        if dry_run:
+            self.render_bulk_plan("group_add_members", emails)
+        found, missing, failed = self.resolve_emails(emails, journal)
 
         c1, c2 = st.columns(2)
         with c1:
@@ -434,21 +449,52 @@ class GroupManagerUtility(BaseUtility):
                 st.error(f"**{len(missing)}** not found")
                 for e in missing:
                     st.caption(f"- {e}")
+            if failed:
+                st.warning(f"**{len(failed)}** lookup(s) failed, run again to retry")
 
         if not found:
             return
         if dry_run:
-            st.info(f"Dry run complete. {len(found)} users would be added.")
+            st.info(
+                f"Dry run complete. {len(found)} users would be added. "
+                + self.dry_run_summary("group_add_members", emails, len(found))
+            )
             return
 
-        resp = self.api.groups.add_members(
-            self.get_state("group_id"), [u["id"] for u in found]
+        result = self.run_bulk(
+            BulkExecutor(max_workers=1, batch_size=GROUP_MEMBER_BATCH_SIZE),
+            [u["id"] for u in found],
+            lambda ids: self.api.groups.add_members(group_id, ids),
+            "Adding members...",
+            journal,
         )
-        if resp.success:
-            st.success(f"Added {len(found)} members to group.")
+        self.finish_job(journal, result)
+
+        added = [r.item for r in result.succeeded]
+        self.record_bulk_action(
+            "add_members",
+            self.get_state("group_info", {}).get("name", group_id),
+            group_id,
+            result,
+            user_ids=added,
+        )
+        if added:
+            st.success(f"Added {len(added)} members to group.")
+        self.render_bulk_failures(result, {u["id"]: u["email"] for u in found})
+        self._refresh_members()
+
+    def _page_sync(self) -> None:
+        info = self.get_state("group_info")
+        if not info:
+            self.set_state("page", "list")
+            st.rerun()
+            return
+        self._group_header()
+        group_id = self.get_state("group_id")
+        if self.render_membership_sync(
+            "groups", group_id, info.get("name", group_id), "gm"
+        ):
             self._refresh_members()
-        else:
-            st.error(f"Failed: {resp.error}")
 
     def _page_remove(self) -> None:
         info = self.get_state("group_info")
@@ -489,12 +535,28 @@ class GroupManagerUtility(BaseUtility):
                 "Remove Selected", type="primary", disabled=not confirm, key="gm_rm_btn"
             ):
                 ids = [options[s] for s in selected]
-                resp = self.api.groups.remove_members(self.get_state("group_id"), ids)
+                resp = self.wait_write(
+                    self.coalescer.remove_members(
+                        "groups", self.get_state("group_id"), ids, api=self.api
+                    )
+                )
+                # Record what was applied, even when other IDs failed
+                removed = resp.data.succeeded if resp.data else []
+                if removed:
+                    self.record_action(
+                        "remove_members",
+                        info.get("name", self.get_state("group_id")),
+                        self.get_state("group_id"),
+                        removed,
+                        status="success" if resp.success else "partial",
+                    )
+                    self._refresh_members()
                 if resp.success:
                     st.success(f"Removed {len(selected)} members.")
-                    self._refresh_members()
                     st.rerun()
                 else:
+                    if removed:
+                        st.warning(f"Removed {len(removed)} of {len(ids)} members.")
                     st.error(f"Failed: {resp.error}")
 
     def _page_export(self) -> None:
@@ -3,16 +3,137 @@
 Action History Module
 Stores all operations locally for audit and rollback purposes.
 Supports both local filesystem and cloud (session state) backends.
+
+On the filesystem, history is an append-only journal
+(~/.admin_layers/action_history.jsonl, one JSON record per line) shared
+by the app and the background worker process: recording an action
+appends one line, flushed on every write and fsynced every FSYNC_EVERY
+records. The journal is indexed by a SQLite table (action_history.db)
+in the same write transaction, so filtered queries (utility, action,
+target, status, time range) use indexes instead of scanning every
+record, the history page pages through it with keyset cursors, and
+retention is a policy (maximum records and/or age) rather than a fixed
+cap. Once all of its lines are indexed and checkpointed, the journal is
+emptied past COMPACT_AT lines. A JSON file written by earlier versions
+is converted once.
+
+Records older than the policy's archive age are rotated out of the table
+into compressed, encrypted day segments (see history_archive), so the
+table stays small while months of history remain searchable.
+
+Long user ID lists (e.g. a 10k-member bulk add, or the users a sync
+removed) are not stored in the record: they are packed (16 bytes per
+UUID, zlib-compressed) into a content-addressed blob that the record
+references, and only loaded when rollback asks for them.
 """
 
+import base64
+import hashlib
 import json
 import os
+import sqlite3
+import uuid
+import zlib
+from collections import deque
 from dataclasses import asdict, dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from core.encrypted_storage import EncryptedStorage, get_storage
+from core.state import StateBackend, get_state_backend
+
+from .history_archive import ARCHIVE_DIR, HistoryArchive
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS actions (
+    id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    utility TEXT NOT NULL,
+    action TEXT NOT NULL,
+    target TEXT NOT NULL DEFAULT '',
+    target_id TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL,
+    affected_count INTEGER NOT NULL DEFAULT 0,
+    details TEXT NOT NULL DEFAULT '{}',
+    user_ids TEXT NOT NULL DEFAULT '[]',
+    user_ids_ref TEXT,
+    user_ids_count INTEGER NOT NULL DEFAULT 0,
+    removed_ids_ref TEXT
+);
+CREATE TABLE IF NOT EXISTS id_blobs (
+    digest TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS journal_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    offset INTEGER NOT NULL,
+    lines INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_actions_time ON actions (timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_actions_utility ON actions (utility, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_actions_action ON actions (action, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_actions_target ON actions (target_id, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_actions_status ON actions (status, timestamp, id);
+"""
+
+# Columns added after the first release of the schema: table -> column DDL
+MIGRATIONS = {
+    "actions": {
+        "user_ids_ref": "user_ids_ref TEXT",
+        "user_ids_count": "user_ids_count INTEGER NOT NULL DEFAULT 0",
+        "removed_ids_ref": "removed_ids_ref TEXT",
+    },
+}
+
+# Files in the storage directory
+JOURNAL_NAME = "action_history.jsonl"
+INDEX_NAME = "action_history.db"
+
+# Journal lines that trigger emptying the (fully indexed) journal
+COMPACT_AT = 2000
 
-import streamlit as st
+# fsync the journal after this many records (0: leave it to the OS)
+FSYNC_EVERY = 10
+
+# User ID lists longer than this are stored out-of-line as packed blobs
+INLINE_USER_IDS = 100
+
+# Record field of an out-of-line ID list -> field of its blob digest
+# (removed_ids lives in details, as syncs record it there)
+ID_REFS = {"user_ids": "user_ids_ref", "removed_ids": "removed_ids_ref"}
+
+# Packed ID blob formats (first byte)
+_IDS_UUID = 1  # zlib(16-byte UUIDs)
+_IDS_TEXT = 2  # zlib(newline-separated IDs), for non-UUID IDs
+
+# Records kept in session state when no filesystem is available
+MAX_SESSION_HISTORY = 500
+
+# Apply the retention policy every this many recorded actions
+RETENTION_EVERY = 100
+
+# Actions get_rollback_data() can invert, and statuses of runs that changed
+# something (the user IDs of a partial run are the ones that succeeded;
+# "cancelled" is what stopped runs were recorded as before record_status())
+ROLLBACK_ACTIONS = ("add_members", "remove_members", "sync_members")
+ROLLBACK_STATUSES = ("success", "partial", "cancelled")
+
+# Default age (days) at which records are rotated into the archive
+ARCHIVE_AFTER_DAYS = 30
+
+# Records moved into the archive per transaction
+ROTATE_BATCH = 5000
+
+
+def record_status(status: str, changed: int) -> str:
+    """
+    ActionRecord status of a run: a stopped ('cancelled') run is 'partial'
+    if it changed something before it stopped, else 'failed'.
+    """
+    if status == "cancelled":
+        return "partial" if changed else "failed"
+    return status
 
 
 @dataclass
@@ -28,7 +149,570 @@ class ActionRecord:
     details: Dict[str, Any]
     affected_count: int
     status: str  # 'success', 'failed', 'partial'
-    user_ids: List[str]  # IDs affected for potential rollback
+    user_ids: List[str]  # IDs affected for potential rollback (if inline)
+    user_ids_ref: Optional[str] = None  # blob digest of out-of-line user_ids
+    user_ids_count: int = 0
+    removed_ids_ref: Optional[str] = None  # same for details["removed_ids"]
+
+
+@dataclass
+class RetentionPolicy:
+    """How much history to keep (None: no limit)."""
+
+    max_records: Optional[int] = None
+    max_age_days: Optional[float] = None
+    archive_after_days: Optional[float] = None  # None: never archive
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        """
+        Read ADMIN_LAYERS_HISTORY_MAX_RECORDS / _MAX_AGE_DAYS (unset: no
+        limit) and ADMIN_LAYERS_HISTORY_ARCHIVE_DAYS (unset: ARCHIVE_AFTER_DAYS,
+        0: never archive).
+        """
+        records = os.environ.get("ADMIN_LAYERS_HISTORY_MAX_RECORDS")
+        days = os.environ.get("ADMIN_LAYERS_HISTORY_MAX_AGE_DAYS")
+        archive = float(
+            os.environ.get("ADMIN_LAYERS_HISTORY_ARCHIVE_DAYS") or ARCHIVE_AFTER_DAYS
+        )
+        return cls(
+            max_records=int(records) if records else None,
+            max_age_days=float(days) if days else None,
+            archive_after_days=archive if archive > 0 else None,
+        )
+
+
+@dataclass
+class HistoryPage:
+    """One page of history, most recent first."""
+
+    records: List[Dict]
+    next_cursor: Optional[str] = None  # before= for the next (older) page
+
+
+def _cursor(record: Dict) -> str:
+    return f"{record['timestamp']}|{record['id']}"
+
+
+def _parse_cursor(cursor: str) -> Tuple[str, str]:
+    timestamp, _, action_id = cursor.partition("|")
+    return timestamp, action_id
+
+
+def _cutoff(days: float) -> str:
+    return (datetime.now() - timedelta(days=days)).isoformat()
+
+
+def pack_ids(ids: List[str]) -> bytes:
+    """Compact encoding of an ID list: 16 bytes per UUID, compressed."""
+    packed = []
+    for user_id in ids:
+        try:
+            value = uuid.UUID(user_id)
+        except (AttributeError, TypeError, ValueError):
+            break
+        if str(value) != user_id:
+            break  # not canonical, would not round-trip
+        packed.append(value.bytes)
+    else:
+        return bytes([_IDS_UUID]) + zlib.compress(b"".join(packed))
+    return bytes([_IDS_TEXT]) + zlib.compress("\n".join(ids).encode("utf-8"))
+
+
+def unpack_ids(blob: bytes) -> List[str]:
+    """Decode pack_ids() output."""
+    data = zlib.decompress(blob[1:])
+    if blob[0] == _IDS_UUID:
+        return [str(uuid.UUID(bytes=data[i : i + 16])) for i in range(0, len(data), 16)]
+    if blob[0] == _IDS_TEXT:
+        text = data.decode("utf-8")
+        return text.split("\n") if text else []
+    raise ValueError(f"Unknown ID blob format: {blob[0]}")
+
+
+def _split_ids(record: Dict) -> Tuple[Dict, List[Tuple[str, bytes]]]:
+    """
+    Move long ID lists (user_ids, details["removed_ids"]) out of a record.
+
+    Returns:
+        (record referencing them, [(digest, blob), ...])
+    """
+    ids = record.get("user_ids") or []
+    record = {**record, "user_ids_count": record.get("user_ids_count") or len(ids)}
+    blobs = []
+    if len(ids) > INLINE_USER_IDS:
+        blob = pack_ids(ids)
+        digest = hashlib.sha256(blob).hexdigest()
+        record.update(user_ids=[], user_ids_ref=digest)
+        blobs.append((digest, blob))
+    details = record.get("details") or {}
+    removed = details.get("removed_ids") or []
+    if len(removed) > INLINE_USER_IDS:
+        blob = pack_ids(removed)
+        digest = hashlib.sha256(blob).hexdigest()
+        record["details"] = {
+            **details,
+            "removed_ids": [],
+            "removed_ids_count": len(removed),
+        }
+        record["removed_ids_ref"] = digest
+        blobs.append((digest, blob))
+    return record, blobs
+
+
+def _journal_line(record: Dict) -> str:
+    """One journal line: the record, its long ID lists packed inline."""
+    record, blobs = _split_ids(record)
+    packed = dict(blobs)
+    for field, ref in ID_REFS.items():
+        if record.get(ref) in packed:
+            blob = packed[record[ref]]
+            record[f"{field}_blob"] = base64.b64encode(blob).decode("ascii")
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+    return line + "\n"
+
+
+class _SessionStore:
+    """Records in session state (oldest first), for ephemeral deployments."""
+
+    def __init__(self, state: StateBackend):
+        self._state = state
+        data = state.get("_action_history_data")
+        if not isinstance(data, deque):
+            # Older sessions kept a list, most recent first
+            data = deque(reversed(data or []), maxlen=MAX_SESSION_HISTORY)
+            state.set("_action_history_data", data)
+        self._records: Deque[Dict] = data
+        self._blobs: Dict[str, bytes] = state.setdefault("_action_history_blobs", {})
+
+    def _changed(self) -> None:
+        """Hand the mutated containers back (for backends that persist)."""
+        self._state.set("_action_history_data", self._records)
+        self._state.set("_action_history_blobs", self._blobs)
+
+    def add(self, record: Dict) -> None:
+        record, blobs = _split_ids(record)
+        self._blobs.update(blobs)
+        self._records.append(record)
+        self._changed()
+
+    def get_blob(self, digest: str) -> Optional[bytes]:
+        return self._blobs.get(digest)
+
+    def sync(self) -> None:
+        pass
+
+    def query(
+        self,
+        filters: Dict[str, str],
+        before: Optional[str],
+        since: Optional[str],
+        until: Optional[str],
+        limit: int,
+    ) -> List[Dict]:
+        key = _parse_cursor(before) if before else None
+        results = []
+        for record in reversed(self._records):
+            if key and (record["timestamp"], record["id"]) >= key:
+                continue
+            if since and record["timestamp"] < since:
+                continue
+            if until and record["timestamp"] >= until:
+                continue
+            if any(record.get(k) != v for k, v in filters.items()):
+                continue
+            results.append(record)
+            if len(results) >= limit:
+                break
+        return results
+
+    def get(self, action_id: str) -> Optional[Dict]:
+        for record in reversed(self._records):
+            if record.get("id") == action_id:
+                return record
+        return None
+
+    def count(self) -> int:
+        return len(self._records)
+
+    def prune(
+        self, policy: RetentionPolicy, archive: Optional[HistoryArchive] = None
+    ) -> int:
+        before = len(self._records)
+        if policy.max_age_days is not None:
+            cutoff = _cutoff(policy.max_age_days)
+            while self._records and self._records[0]["timestamp"] < cutoff:
+                self._records.popleft()
+        if policy.max_records is not None:
+            while len(self._records) > policy.max_records:
+                self._records.popleft()
+        # Blobs no retained record references
+        refs = {r.get(ref) for r in self._records for ref in ID_REFS.values()}
+        for digest in [d for d in self._blobs if d not in refs]:
+            del self._blobs[digest]
+        if before != len(self._records):
+            self._changed()
+        return before - len(self._records)
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._blobs.clear()
+        self._changed()
+
+
+class _SQLiteStore:
+    """
+    Records in an append-only journal, indexed by a SQLite table.
+
+    Every write holds the database's write lock (BEGIN IMMEDIATE) while it
+    appends to the journal and indexes the new lines, so processes append
+    one at a time and the index follows the journal in the same
+    transaction. Lines a crash left unindexed are picked up on open.
+    """
+
+    def __init__(self, path: str, journal: str, fsync_every: int = FSYNC_EVERY):
+        self.path = path
+        self.journal = journal
+        self.fsync_every = fsync_every
+        self._unsynced = 0
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+        self._import_legacy(os.path.dirname(path))
+        with self._connect() as conn:
+            self._write(conn, lambda: None)
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """Add columns missing from databases created by older versions."""
+        for table, columns in MIGRATIONS.items():
+            existing = {
+                row["name"] for row in conn.execute(f"PRAGMA table_info({table})")
+            }
+            for name, ddl in columns.items():
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {ddl}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _import_legacy(self, storage_dir: str) -> None:
+        """Convert action_history.json (pre-journal format) once."""
+        legacy = os.path.join(storage_dir, "action_history.json")
+        if not os.path.exists(legacy):
+            return
+        try:
+            with open(legacy, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            # The journal is oldest first
+            records = sorted(records, key=lambda r: r.get("timestamp", ""))
+            with self._connect() as conn:
+                self._write(conn, lambda: self._append(records))
+            os.replace(legacy, legacy + ".migrated")
+        except (json.JSONDecodeError, IOError, OSError, sqlite3.Error):
+            pass
+
+    def _write(self, conn: sqlite3.Connection, append: Callable[[], None]) -> None:
+        """Run append() under the write lock, then index the new lines."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            append()
+            lines = self._catch_up(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if lines >= COMPACT_AT:
+            self._compact(conn)
+
+    def _append(self, records: List[Dict]) -> None:
+        """Append records to the journal (write lock held)."""
+        data = "".join(_journal_line(record) for record in records).encode("utf-8")
+        with open(self.journal, "a+b") as f:
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data  # end a line torn by a crash
+            f.write(data)
+            f.flush()
+            self._unsynced += len(records)
+            if self.fsync_every and self._unsynced >= self.fsync_every:
+                os.fsync(f.fileno())
+                self._unsynced = 0
+
+    def _catch_up(self, conn: sqlite3.Connection) -> int:
+        """
+        Index journal lines past the indexed offset (write lock held).
+
+        Returns:
+            Lines in the journal
+        """
+        row = conn.execute("SELECT offset, lines FROM journal_state").fetchone()
+        offset, lines = (row["offset"], row["lines"]) if row else (0, 0)
+        try:
+            with open(self.journal, "rb") as f:
+                if os.fstat(f.fileno()).st_size < offset:
+                    offset, lines = 0, 0  # truncated since (see _compact)
+                f.seek(offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            chunk = b""
+        end = chunk.rfind(b"\n") + 1  # a partial last line is read later
+        records = []
+        for line in chunk[:end].splitlines():
+            lines += 1
+            try:
+                records.append(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue  # torn by a crash
+        self._index(conn, records)
+        conn.execute(
+            "INSERT OR REPLACE INTO journal_state (id, offset, lines) VALUES (0, ?, ?)",
+            (offset + end, lines),
+        )
+        return lines
+
+    def _compact(self, conn: sqlite3.Connection) -> None:
+        """
+        Empty a journal whose lines are all indexed.
+
+        The index is checkpointed into the database file first, so no
+        record exists only in the truncated journal.
+        """
+        busy, log, checkpointed = conn.execute("PRAGMA wal_checkpoint(FULL)").fetchone()
+        if busy or log != checkpointed:
+            return  # readers still on old pages; try on a later write
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT offset FROM journal_state").fetchone()
+            if row is None or row["offset"] != os.path.getsize(self.journal):
+                conn.execute("ROLLBACK")  # appended since the checkpoint
+                return
+            with open(self.journal, "wb") as f:
+                os.fsync(f.fileno())
+            conn.execute("UPDATE journal_state SET offset = 0, lines = 0")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def sync(self) -> None:
+        """fsync journal lines appended since the last fsync."""
+        if not self._unsynced:
+            return
+        try:
+            with open(self.journal, "ab") as f:
+                os.fsync(f.fileno())
+            self._unsynced = 0
+        except (IOError, OSError):
+            pass
+
+    @staticmethod
+    def _row(record: Dict) -> Tuple:
+        return (
+            record["id"],
+            record.get("timestamp", ""),
+            record.get("utility", ""),
+            record.get("action", ""),
+            record.get("target") or "",
+            record.get("target_id") or "",
+            record.get("status", ""),
+            record.get("affected_count", 0),
+            json.dumps(record.get("details") or {}, ensure_ascii=False, default=str),
+            json.dumps(record.get("user_ids") or []),
+            record.get("user_ids_ref"),
+            record.get("user_ids_count", 0),
+            record.get("removed_ids_ref"),
+        )
+
+    def _index(self, conn: sqlite3.Connection, records: List[Dict]) -> None:
+        """Insert journal records (in the caller's transaction)."""
+        rows, blobs = [], []
+        for record in records:
+            if not record.get("id"):
+                continue
+            record, record_blobs = _split_ids(record)
+            for field, ref in ID_REFS.items():
+                embedded = record.pop(f"{field}_blob", None)
+                if embedded and record.get(ref):
+                    blobs.append((record[ref], base64.b64decode(embedded)))
+            rows.append(self._row(record))
+            blobs.extend(record_blobs)
+        conn.executemany("INSERT OR IGNORE INTO id_blobs VALUES (?, ?)", blobs)
+        conn.executemany(
+            "INSERT OR REPLACE INTO actions (id, timestamp, utility, action, target, "
+            "target_id, status, affected_count, details, user_ids, user_ids_ref, "
+            "user_ids_count, removed_ids_ref) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+            rows,
+        )
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> Dict:
+        record = dict(row)
+        record["details"] = json.loads(record["details"])
+        record["user_ids"] = json.loads(record["user_ids"])
+        return record
+
+    def add(self, record: Dict) -> None:
+        with self._connect() as conn:
+            self._write(conn, lambda: self._append([record]))
+
+    def get_blob(self, digest: str) -> Optional[bytes]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data FROM id_blobs WHERE digest = ?", (digest,)
+            ).fetchone()
+        return bytes(row["data"]) if row else None
+
+    def query(
+        self,
+        filters: Dict[str, str],
+        before: Optional[str],
+        since: Optional[str],
+        until: Optional[str],
+        limit: int,
+    ) -> List[Dict]:
+        clauses = [f"{column} = ?" for column in filters]
+        params: List[Any] = list(filters.values())
+        if before:
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(_parse_cursor(before))
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM actions {where} "
+                "ORDER BY timestamp DESC, id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [self._record(row) for row in rows]
+
+    def get(self, action_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM actions WHERE id = ?", (action_id,)
+            ).fetchone()
+        return self._record(row) if row else None
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM actions").fetchone()[0]
+
+    def prune(
+        self, policy: RetentionPolicy, archive: Optional[HistoryArchive] = None
+    ) -> int:
+        removed = 0
+        with self._connect() as conn:
+            # The write lock also serializes archive maintenance between processes
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if policy.max_age_days is not None:
+                    removed += conn.execute(
+                        "DELETE FROM actions WHERE timestamp < ?",
+                        (_cutoff(policy.max_age_days),),
+                    ).rowcount
+                if policy.max_records is not None:
+                    removed += conn.execute(
+                        "DELETE FROM actions WHERE id IN (SELECT id FROM actions "
+                        "ORDER BY timestamp DESC, id DESC LIMIT -1 OFFSET ?)",
+                        (policy.max_records,),
+                    ).rowcount
+                if removed:
+                    self._delete_orphan_blobs(conn)
+                if archive is not None:
+                    keep = None
+                    if policy.max_records is not None:
+                        hot = conn.execute("SELECT COUNT(*) FROM actions").fetchone()[0]
+                        keep = max(0, policy.max_records - hot)
+                    cutoff = None
+                    if policy.max_age_days is not None:
+                        cutoff = _cutoff(policy.max_age_days)
+                    removed += archive.prune(cutoff=cutoff, keep=keep)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return removed
+
+    @staticmethod
+    def _delete_orphan_blobs(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "DELETE FROM id_blobs WHERE digest NOT IN (SELECT user_ids_ref "
+            "FROM actions WHERE user_ids_ref IS NOT NULL UNION SELECT "
+            "removed_ids_ref FROM actions WHERE removed_ids_ref IS NOT NULL)"
+        )
+
+    def rotate(self, cutoff: str, archive: HistoryArchive) -> int:
+        """
+        Move records older than cutoff into the archive.
+
+        Each batch is written to the archive and deleted from the table in
+        one write transaction; if writing fails the records stay here.
+
+        Returns:
+            Number of records moved
+        """
+        moved = 0
+        while True:
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    rows = conn.execute(
+                        "SELECT * FROM actions WHERE timestamp < ? "
+                        "ORDER BY timestamp, id LIMIT ?",
+                        (cutoff, ROTATE_BATCH),
+                    ).fetchall()
+                    records = [self._record(row) for row in rows]
+                    for record in records:
+                        # Archived records carry their packed ID lists
+                        for field, ref in ID_REFS.items():
+                            if not record.get(ref):
+                                continue
+                            blob = conn.execute(
+                                "SELECT data FROM id_blobs WHERE digest = ?",
+                                (record[ref],),
+                            ).fetchone()
+                            if blob:
+                                record[f"{field}_blob"] = base64.b64encode(
+                                    bytes(blob["data"])
+                                ).decode("ascii")
+                    archive.add(records)
+                    conn.executemany(
+                        "DELETE FROM actions WHERE id = ?",
+                        [(r["id"],) for r in records],
+                    )
+                    if records:
+                        self._delete_orphan_blobs(conn)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            moved += len(records)
+            if len(records) < ROTATE_BATCH:
+                return moved
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                with open(self.journal, "wb") as f:
+                    os.fsync(f.fileno())
+                self._unsynced = 0
+                conn.execute("DELETE FROM actions")
+                conn.execute("DELETE FROM id_blobs")
+                conn.execute("DELETE FROM journal_state")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
 
 
 class ActionHistory:
@@ -37,18 +721,41 @@ class ActionHistory:
     Stores all operations for audit and rollback.
 
     Backend priority:
-    1. Local filesystem (~/.admin_layers/action_history.json)
-    2. Streamlit session state (for cloud/ephemeral environments)
-
-    When encrypted storage is available, history is also
-    persisted to encrypted storage for cross-session access.
+    1. Local filesystem (~/.admin_layers/action_history.jsonl indexed by
+       action_history.db, older records in encrypted day segments under
+       history_archive/)
+    2. Session state of a state backend (Streamlit's for cloud/ephemeral
+       environments, see core.state; latest MAX_SESSION_HISTORY records)
     """
 
-    def __init__(self, storage_dir: str = None):
-        """Initialize history storage."""
+    def __init__(
+        self,
+        storage_dir: str = None,
+        retention: Optional[RetentionPolicy] = None,
+        storage: Optional[EncryptedStorage] = None,
+        state: Optional[StateBackend] = None,
+        fsync_every: int = FSYNC_EVERY,
+    ):
+        """
+        Initialize history storage.
+
+        Args:
+            storage_dir: Directory of the journal (default: ~/.admin_layers)
+            retention: Records to keep and when to archive them
+                (default: everything, never archived)
+            storage: Encrypted storage whose key encrypts archive segments
+                (default: global instance)
+            state: Session state used without a filesystem (default:
+                process default, see core.state)
+            fsync_every: fsync the journal after this many records (1: every
+                record, 0: never; lines are always flushed to the OS)
+        """
         self._use_filesystem = False
         self.storage_dir = None
         self.history_file = None
+        self.archive: Optional[HistoryArchive] = None
+        self.retention = retention or RetentionPolicy()
+        self._recorded = 0
 
         if storage_dir is None:
             try:
@@ -69,39 +776,25 @@ class ActionHistory:
             except (OSError, PermissionError):
                 self._use_filesystem = False
 
+        self._store = None
         if self._use_filesystem:
-            self.storage_dir = storage_dir
-            self.history_file = os.path.join(storage_dir, "action_history.json")
-
-        # Load existing history
-        self._history: List[Dict] = self._load_history()
-
-    def _load_history(self) -> List[Dict]:
-        """Load history from filesystem or session state."""
-        # Try filesystem first
-        if self._use_filesystem and self.history_file:
-            if os.path.exists(self.history_file):
-                try:
-                    with open(self.history_file, "r", encoding="utf-8") as f:
-                        return json.load(f)
-                except (json.JSONDecodeError, IOError):
-                    pass
-
-        # Fall back to session state
-        return st.session_state.get("_action_history_data", [])
-
-    def _save_history(self) -> None:
-        """Save history to filesystem and session state."""
-        # Always save to session state
-        st.session_state._action_history_data = self._history
-
-        # Also save to filesystem if available
-        if self._use_filesystem and self.history_file:
             try:
-                with open(self.history_file, "w", encoding="utf-8") as f:
-                    json.dump(self._history, f, indent=2, ensure_ascii=False)
-            except (IOError, OSError):
-                pass
+                self.history_file = os.path.join(storage_dir, JOURNAL_NAME)
+                self._store = _SQLiteStore(
+                    os.path.join(storage_dir, INDEX_NAME),
+                    self.history_file,
+                    fsync_every,
+                )
+                self.storage_dir = storage_dir
+                self.archive = HistoryArchive(
+                    os.path.join(storage_dir, ARCHIVE_DIR), storage
+                )
+            except (sqlite3.Error, OSError):
+                self._use_filesystem = False
+                self.history_file = None
+        if self._store is None:
+            self._store = _SessionStore(state or get_state_backend())
+        self.apply_retention()
 
     def _generate_id(self) -> str:
         """Generate a unique action ID."""
@@ -149,15 +842,18 @@ class ActionHistory:
             user_ids=user_ids or [],
         )
 
-        self._history.insert(0, asdict(record))  # Most recent first
-
-        # Keep only last 500 actions
-        self._history = self._history[:500]
+        self._store.add(asdict(record))
 
-        self._save_history()
+        self._recorded += 1
+        if self._recorded % RETENTION_EVERY == 0:
+            self.apply_retention()
 
         return action_id
 
+    def sync(self) -> None:
+        """Force recorded actions to disk."""
+        self._store.sync()
+
     def get_history(
         self,
         utility: str = None,
@@ -177,53 +873,138 @@ class ActionHistory:
         Returns:
             List of action records
         """
-        results = self._history
-
-        if utility:
-            results = [r for r in results if r.get("utility") == utility]
+        return self.get_history_page(
+            utility=utility, action=action, target_id=target_id, limit=limit
+        ).records
 
-        if action:
-            results = [r for r in results if r.get("action") == action]
+    def get_history_page(
+        self,
+        limit: int = 50,
+        before: Optional[str] = None,
+        utility: Optional[str] = None,
+        action: Optional[str] = None,
+        target_id: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        include_archive: bool = False,
+    ) -> HistoryPage:
+        """
+        One page of filtered history, most recent first (keyset pagination).
 
-        if target_id:
-            results = [r for r in results if r.get("target_id") == target_id]
+        Args:
+            limit: Records per page
+            before: next_cursor of the previous page (None: newest page)
+            utility, action, target_id, status: Exact-match filters
+            since, until: ISO timestamp range [since, until)
+            include_archive: Continue into archived records once the recent
+                ones are exhausted (opens only segments in range)
 
-        return results[:limit]
+        Returns:
+            HistoryPage with next_cursor set when older records may exist
+        """
+        filters = {
+            column: value
+            for column, value in (
+                ("utility", utility),
+                ("action", action),
+                ("target_id", target_id),
+                ("status", status),
+            )
+            if value
+        }
+        records = self._store.query(filters, before, since, until, limit)
+        if include_archive and self.archive is not None and len(records) < limit:
+            # Archived records are all older than the table's
+            after = _cursor(records[-1]) if records else before
+            records += self.archive.query(
+                filters, after, since, until, limit - len(records)
+            )
+        next_cursor = _cursor(records[-1]) if len(records) == limit else None
+        return HistoryPage(records=records, next_cursor=next_cursor)
 
     def get_action(self, action_id: str) -> Optional[Dict]:
-        """Get a specific action by ID."""
-        for record in self._history:
-            if record.get("id") == action_id:
-                return record
-        return None
+        """Get a specific action by ID (recent or archived)."""
+        record = self._store.get(action_id)
+        if record is None and self.archive is not None:
+            record = self.archive.get(action_id)
+        return record
+
+    def count(self) -> int:
+        """Number of recent (not archived) records."""
+        return self._store.count()
+
+    def archived_count(self) -> int:
+        """Number of archived records."""
+        return self.archive.count() if self.archive is not None else 0
+
+    def apply_retention(self) -> int:
+        """
+        Archive records past the archive age, then drop records (recent or
+        archived) outside the retention policy.
+
+        Returns:
+            Number of records removed
+        """
+        if self.archive is not None and self.retention.archive_after_days:
+            self._store.rotate(_cutoff(self.retention.archive_after_days), self.archive)
+        return self._store.prune(self.retention, self.archive)
 
     def get_rollback_data(self, action_id: str) -> Optional[Dict]:
         """
         Get data needed to rollback an action.
 
+        Member adds, removals and syncs of groups and queues can be rolled
+        back; for partial runs only the changes that were applied.
+
         Returns:
-            Dict with target_id and user_ids if action is rollback-able
+            Dict with utility, target, target_id, user_ids (changed by the
+            action), removed_ids (syncs only) and original_action if the
+            action is rollback-able
         """
         action = self.get_action(action_id)
         if not action:
             return None
 
-        if action.get("status") != "success":
+        if action.get("status") not in ROLLBACK_STATUSES:
             return None
 
-        if action.get("action") not in ["add_members", "remove_members"]:
+        if action.get("action") not in ROLLBACK_ACTIONS:
             return None
 
         return {
+            "utility": action.get("utility"),
+            "target": action.get("target"),
             "target_id": action.get("target_id"),
-            "user_ids": action.get("user_ids", []),
+            "user_ids": self.get_user_ids(action),
+            "removed_ids": self.get_removed_ids(action),
             "original_action": action.get("action"),
         }
 
+    def _load_ids(self, record: Dict, field: str, inline: List[str]) -> List[str]:
+        """An ID list of a record, loading it if stored out-of-line."""
+        digest = record.get(ID_REFS[field])
+        if not digest:
+            return inline
+        if record.get(f"{field}_blob"):
+            return unpack_ids(base64.b64decode(record[f"{field}_blob"]))
+        blob = self._store.get_blob(digest)
+        return unpack_ids(blob) if blob else []
+
+    def get_user_ids(self, record: Dict) -> List[str]:
+        """User IDs of a record, loading an out-of-line list if needed."""
+        return self._load_ids(record, "user_ids", record.get("user_ids", []))
+
+    def get_removed_ids(self, record: Dict) -> List[str]:
+        """User IDs a sync removed (details["removed_ids"]), loaded if needed."""
+        details = record.get("details") or {}
+        return self._load_ids(record, "removed_ids", details.get("removed_ids", []))
+
     def clear_history(self) -> None:
-        """Clear all history."""
-        self._history = []
-        self._save_history()
+        """Clear all history, archive included."""
+        self._store.clear()
+        if self.archive is not None:
+            self.archive.clear()
 
     @property
     def backend_info(self) -> str:
@@ -241,5 +1022,9 @@ def get_history() -> ActionHistory:
     """Get the global history instance."""
     global _history_instance
     if _history_instance is None:
-        _history_instance = ActionHistory()
+        retention = RetentionPolicy.from_env()
+        if not get_storage().is_persistent:
+            # Segments encrypted with a per-session key would be unreadable later
+            retention.archive_after_days = None
+        _history_instance = ActionHistory(retention=retention)
     return _history_instance
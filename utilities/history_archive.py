@@ -0,0 +1,367 @@
+"""
+History Archive
+Compressed, encrypted day segments of old action history.
+
+ActionHistory keeps recent actions in its SQLite table and rotates older
+ones here: one segment file per day (zlib-compressed JSON lines, encrypted
+with the app's storage key in a segmented stream, see core.stream_crypto,
+so a segment is compressed, encrypted and parsed piece by piece and
+never held whole as ciphertext) plus a plaintext manifest listing each
+segment's time range and record count. Opening the history only reads the
+SQLite table; searches over months of history read the manifest and open
+just the segments whose time range overlaps the query.
+
+Layout:
+    <history dir>/history_archive/manifest.json
+    <history dir>/history_archive/2026-09-01.seg
+"""
+
+import json
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.encrypted_storage import EncryptedStorage, get_storage
+from core.stream_crypto import SEGMENT_SIZE, StreamDecryptError
+
+# Directory of the archive, next to action_history.db
+ARCHIVE_DIR = "history_archive"
+
+MANIFEST_FILE = "manifest.json"
+SEGMENT_SUFFIX = ".seg"
+
+# Decoded segments kept in memory (paging through old history)
+SEGMENT_CACHE = 4
+
+# Suffix of segments set aside because they could not be decrypted
+UNREADABLE_SUFFIX = ".unreadable"
+
+logger = logging.getLogger("admin_layers.history_archive")
+
+
+class HistoryArchive:
+    """
+    Day segments of archived action records.
+
+    Writers (rotation, pruning) are serialized by the caller; ActionHistory
+    runs them inside a write transaction of its database, which every
+    process sharing the history directory goes through.
+
+    Usage:
+        archive = HistoryArchive(os.path.join(storage_dir, ARCHIVE_DIR))
+        archive.add(old_records)
+        records = archive.query({"utility": "group_manager"}, None,
+                                since, until, limit=50)
+    """
+
+    def __init__(self, directory: str, storage: Optional[EncryptedStorage] = None):
+        """
+        Initialize the archive.
+
+        Args:
+            directory: Directory of the segments and manifest
+            storage: Encrypted storage whose key encrypts segments
+                (default: global instance)
+        """
+        self.directory = directory
+        self._storage = storage
+        self._lock = threading.Lock()
+        # name -> (file version, records oldest first)
+        self._cache: "OrderedDict[str, Tuple[Tuple[int, int], List[Dict]]]" = (
+            OrderedDict()
+        )
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def storage(self) -> EncryptedStorage:
+        if self._storage is None:
+            self._storage = get_storage()
+        return self._storage
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _replace(self, name: str, data: bytes) -> None:
+        """Write a file atomically (readers see the old or the new version)."""
+        path = self._path(name)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    # Manifest
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """
+        Manifest entries, oldest first.
+
+        Returns:
+            [{"name", "day", "start", "end", "count", "bytes"}, ...] where
+            start/end are the first and last record timestamps
+        """
+        try:
+            with open(self._path(MANIFEST_FILE), "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return []
+        return (
+            sorted(entries, key=lambda e: e["day"]) if isinstance(entries, list) else []
+        )
+
+    def _write_manifest(self, entries: List[Dict[str, Any]]) -> None:
+        entries = sorted(entries, key=lambda e: e["day"])
+        self._replace(MANIFEST_FILE, json.dumps(entries, indent=1).encode("utf-8"))
+
+    def count(self) -> int:
+        """Number of archived records."""
+        return sum(e["count"] for e in self.segments())
+
+    # Segments
+
+    def _read(self, entry: Dict[str, Any]) -> List[Dict]:
+        """
+        Records of a segment, oldest first.
+
+        Raises:
+            ValueError: If the segment cannot be decrypted (other key)
+        """
+        path = self._path(entry["name"])
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return []
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._cache.get(entry["name"])
+            if cached and cached[0] == version:
+                self._cache.move_to_end(entry["name"])
+                return cached[1]
+        try:
+            records = self._decode(path)
+        except (StreamDecryptError, zlib.error):
+            raise ValueError(f"Cannot decrypt history segment {entry['name']}")
+        with self._lock:
+            self._cache[entry["name"]] = (version, records)
+            while len(self._cache) > SEGMENT_CACHE:
+                self._cache.popitem(last=False)
+        return records
+
+    def _decode(self, path: str) -> List[Dict]:
+        """Decrypt, decompress and parse a segment file chunk by chunk."""
+        try:
+            reader = self.storage.open_encrypted_reader(path)
+        except StreamDecryptError:
+            # Segment written before streaming encryption (one Fernet token)
+            with open(path, "rb") as f:
+                data = self.storage.decrypt_bytes(f.read())
+            if data is None:
+                raise
+            return [
+                json.loads(line) for line in zlib.decompress(data).splitlines() if line
+            ]
+        records = []
+        decompressor = zlib.decompressobj()
+        tail = b""
+        with reader:
+            for chunk in iter(lambda: reader.read(SEGMENT_SIZE), b""):
+                lines = (tail + decompressor.decompress(chunk)).split(b"\n")
+                tail = lines.pop()
+                records.extend(json.loads(line) for line in lines if line)
+        tail += decompressor.flush()
+        if not decompressor.eof:
+            raise zlib.error("Incomplete segment")
+        records.extend(json.loads(line) for line in tail.split(b"\n") if line)
+        return records
+
+    def _write(self, day: str, records: List[Dict]) -> Dict[str, Any]:
+        """Write a day segment; returns its manifest entry."""
+        records.sort(key=lambda r: (r["timestamp"], r["id"]))
+        name = f"{day}{SEGMENT_SUFFIX}"
+        path = self._path(name)
+        compressor = zlib.compressobj()
+        with self.storage.open_encrypted_writer(path) as out:
+            for i, record in enumerate(records):
+                line = json.dumps(record, ensure_ascii=False, default=str)
+                prefix = "\n" if i else ""
+                out.write(compressor.compress((prefix + line).encode("utf-8")))
+            out.write(compressor.flush())
+        return {
+            "name": name,
+            "day": day,
+            "start": records[0]["timestamp"],
+            "end": records[-1]["timestamp"],
+            "count": len(records),
+            "bytes": os.path.getsize(path),
+        }
+
+    def add(self, records: Iterable[Dict]) -> int:
+        """
+        Archive records, merged into their day's segment.
+
+        Records already archived (same ID) are replaced, so a rotation
+        interrupted after writing segments can simply run again. A day
+        segment that cannot be decrypted (written with another key) is
+        renamed to "<name>.unreadable" and left for recovery; the day
+        starts a new segment.
+
+        Returns:
+            Number of records written
+        """
+        by_day: Dict[str, Dict[str, Dict]] = {}
+        for record in records:
+            by_day.setdefault(record["timestamp"][:10], {})[record["id"]] = record
+        if not by_day:
+            return 0
+        entries = {e["day"]: e for e in self.segments()}
+        for day, new in by_day.items():
+            merged = {}
+            if day in entries:
+                try:
+                    merged = {r["id"]: r for r in self._read(entries[day])}
+                except ValueError:
+                    self._set_aside(entries[day])
+            merged.update(new)
+            entries[day] = self._write(day, list(merged.values()))
+        self._write_manifest(list(entries.values()))
+        return sum(len(new) for new in by_day.values())
+
+    def _set_aside(self, entry: Dict[str, Any]) -> None:
+        """Rename an undecryptable segment out of the archive, keeping its bytes."""
+        path = self._path(entry["name"])
+        aside = path + UNREADABLE_SUFFIX
+        n = 1
+        while os.path.exists(aside):
+            aside = f"{path}{UNREADABLE_SUFFIX}.{n}"
+            n += 1
+        try:
+            os.replace(path, aside)
+        except OSError:
+            pass
+        logger.warning(
+            "History segment %s cannot be decrypted; moved to %s (%d records)",
+            entry["name"],
+            os.path.basename(aside),
+            entry["count"],
+        )
+
+    # Queries
+
+    def query(
+        self,
+        filters: Dict[str, str],
+        before: Optional[str],
+        since: Optional[str],
+        until: Optional[str],
+        limit: int,
+    ) -> List[Dict]:
+        """
+        Archived records matching exact-match filters, most recent first.
+
+        Args:
+            filters: column -> value
+            before: Keyset cursor "timestamp|id" (only older records)
+            since, until: ISO timestamp range [since, until)
+            limit: Maximum records
+
+        Returns:
+            Records from the segments overlapping the range (segments that
+            cannot be decrypted are skipped)
+        """
+        key = tuple(before.partition("|")[::2]) if before else None
+        results: List[Dict] = []
+        for entry in reversed(self.segments()):
+            if since and entry["end"] < since:
+                break  # this and all older segments end before the range
+            if until and entry["start"] >= until:
+                continue
+            if key and entry["start"] > key[0]:
+                continue
+            try:
+                records = self._read(entry)
+            except ValueError:
+                continue
+            for record in reversed(records):
+                if key and (record["timestamp"], record["id"]) >= key:
+                    continue
+                if since and record["timestamp"] < since:
+                    break
+                if until and record["timestamp"] >= until:
+                    continue
+                if any(record.get(k) != v for k, v in filters.items()):
+                    continue
+                results.append(record)
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def get(self, action_id: str) -> Optional[Dict]:
+        """An archived record by ID (opens the segments of its day)."""
+        # IDs start with the creation date (YYYYMMDD), the timestamp is taken
+        # just after, so the record is in that day's segment or the next one
+        try:
+            created = datetime.strptime(action_id[:8], "%Y%m%d").date()
+        except ValueError:
+            return None
+        days = {created.isoformat(), (created + timedelta(days=1)).isoformat()}
+        for entry in self.segments():
+            if entry["day"] not in days:
+                continue
+            try:
+                for record in self._read(entry):
+                    if record["id"] == action_id:
+                        return record
+            except ValueError:
+                continue
+        return None
+
+    # Maintenance
+
+    def prune(self, cutoff: Optional[str] = None, keep: Optional[int] = None) -> int:
+        """
+        Drop whole segments.
+
+        Args:
+            cutoff: Drop segments whose records are all older (ISO timestamp)
+            keep: Drop the oldest segments while more records are archived
+
+        Returns:
+            Number of records dropped
+        """
+        entries = self.segments()
+        total = sum(e["count"] for e in entries)
+        dropped = []
+        while entries and (
+            (cutoff and entries[0]["end"] < cutoff)
+            or (keep is not None and total > keep)
+        ):
+            entry = entries.pop(0)
+            total -= entry["count"]
+            dropped.append(entry)
+        if not dropped:
+            return 0
+        self._write_manifest(entries)
+        for entry in dropped:
+            try:
+                os.remove(self._path(entry["name"]))
+            except OSError:
+                pass
+            with self._lock:
+                self._cache.pop(entry["name"], None)
+        return sum(e["count"] for e in dropped)
+
+    def clear(self) -> None:
+        """Delete every segment and the manifest."""
+        for name in os.listdir(self.directory):
+            if name.endswith(SEGMENT_SUFFIX) or name == MANIFEST_FILE:
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    pass
+        with self._lock:
+            self._cache.clear()
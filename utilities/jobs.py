@@ -0,0 +1,351 @@
+"""
+Background Jobs
+Bulk operations the utilities can hand to the out-of-process worker
+(see utilities.worker and core.job_queue).
+
+A job runs exactly like its interactive counterpart: it resolves emails,
+applies the change with BulkExecutor, checkpoints to the same JobJournal
+(so a job started in the UI and finished by the worker, or vice versa,
+never repeats work) and records action history.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from core.checkpoint import JobJournal
+from core.job_queue import Job, JobQueue
+from genesys_cloud.membership import (
+    GROUP_MEMBER_BATCH_SIZE,
+    QUEUE_MEMBER_BATCH_SIZE,
+    member_ids,
+)
+
+from .bulk import (
+    SKILL_WORKERS,
+    BulkControl,
+    BulkExecutor,
+    BulkProgress,
+    BulkResult,
+    resolve_emails,
+)
+from .history import get_history, record_status
+from .resolver import invalidate_not_found
+
+
+@dataclass
+class JobKind:
+    """
+    How to run one kind of background job.
+
+    Attributes:
+        utility: Utility ID recorded in action history
+        action: History action name
+        batch_size: Users per API call (1 for per-user endpoints)
+        max_workers: Concurrent calls
+        apply: fn(api, job, item) performing one call; item is a list of
+            user IDs when batch_size > 1, otherwise a user ID
+        journal_details: Payload keys stored in the journal header
+    """
+
+    utility: str
+    action: str
+    batch_size: int
+    max_workers: int
+    apply: Callable[[Any, Job, Any], Any]
+    journal_details: tuple = ()
+
+
+JOB_KINDS: Dict[str, JobKind] = {
+    "group_add_members": JobKind(
+        utility="group_manager",
+        action="add_members",
+        batch_size=GROUP_MEMBER_BATCH_SIZE,
+        max_workers=1,
+        apply=lambda api, job, ids: api.groups.add_members(job.target_id, ids),
+    ),
+    "queue_add_members": JobKind(
+        utility="queue_manager",
+        action="add_members",
+        batch_size=QUEUE_MEMBER_BATCH_SIZE,
+        max_workers=1,
+        apply=lambda api, job, ids: api.queues.add_members(job.target_id, ids),
+    ),
+    "assign_skill": JobKind(
+        utility="skill_manager",
+        action="assign_skill",
+        batch_size=1,
+        max_workers=SKILL_WORKERS,
+        apply=lambda api, job, uid: api.routing.add_user_skill(
+            uid, job.target_id, job.payload.get("proficiency", 0.0)
+        ),
+        journal_details=("proficiency",),
+    ),
+    "remove_skill": JobKind(
+        utility="skill_manager",
+        action="remove_skill",
+        batch_size=1,
+        max_workers=SKILL_WORKERS,
+        apply=lambda api, job, uid: api.routing.remove_user_skill(uid, job.target_id),
+    ),
+}
+
+
+# Membership sync jobs: kind -> (utility, endpoint attribute). The payload
+# holds the target as "emails" or as "source_id" (another entity whose
+# members are copied), plus "remove_extra".
+SYNC_JOB_KINDS: Dict[str, tuple] = {
+    "group_sync_members": ("group_manager", "groups"),
+    "queue_sync_members": ("queue_manager", "queues"),
+}
+
+
+class QueueJobControl(BulkControl):
+    """BulkControl driven by the job's control column in the job queue."""
+
+    def __init__(self, queue: JobQueue, job_id: str, poll_interval: float = 1.0):
+        super().__init__()
+        self.queue = queue
+        self.job_id = job_id
+        self.poll_interval = poll_interval
+        self._last_poll = 0.0
+
+    def refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._last_poll < self.poll_interval:
+            return
+        self._last_poll = now
+        action = self.queue.get_control(self.job_id)
+        if action == "cancel":
+            self.cancel()
+        elif action == "pause":
+            self.pause()
+        else:
+            self.resume()
+
+
+def run_job(
+    api,
+    job: Job,
+    on_progress: Optional[Callable[[BulkProgress], None]] = None,
+    control: Optional[BulkControl] = None,
+) -> Dict[str, Any]:
+    """
+    Run a background job to completion (or until cancelled).
+
+    Args:
+        api: Backend client (GenesysCloudAPI or DemoAPI)
+        job: Claimed job
+        on_progress: Called with apply-phase progress
+        control: Cancel/pause token checked between batches
+
+    Returns:
+        Summary dict with status, requested, succeeded, failed, missing,
+        lookup_failed, cancelled, elapsed_seconds and errors (first few
+        failures)
+
+    Raises:
+        ValueError: If the job kind is unknown
+    """
+    if job.kind in SYNC_JOB_KINDS:
+        return _run_sync_job(api, job, control)
+    kind = JOB_KINDS.get(job.kind)
+    if kind is None:
+        raise ValueError(f"Unknown job kind: {job.kind}")
+
+    emails: List[str] = job.payload.get("emails", [])
+    details = {k: job.payload[k] for k in kind.journal_details if k in job.payload}
+    journal = JobJournal.open(job.kind, job.target_id, emails, details=details)
+
+    found, missing, failed = resolve_emails(
+        api,
+        emails,
+        checkpoint=journal.phase("resolve", keep_data=True),
+        control=control,
+    )
+    if control is not None and control.cancelled:
+        # Keep the journal so a resubmitted job resumes the lookups
+        journal.close()
+        return _summary("cancelled", emails, missing=missing)
+    lookup_errors = [f"{e}: lookup failed" for e in failed[:20]]
+    if not found:
+        if failed:
+            journal.close()  # a rerun retries the failed lookups
+        else:
+            journal.complete("failed")
+        return _summary(
+            "failed",
+            emails,
+            missing=missing,
+            lookup_failed=failed,
+            errors=lookup_errors or ["No users found"],
+        )
+
+    executor = BulkExecutor(max_workers=kind.max_workers, batch_size=kind.batch_size)
+    result: BulkResult = executor.run(
+        [u["id"] for u in found],
+        lambda item: kind.apply(api, job, item),
+        on_progress=on_progress,
+        checkpoint=journal.phase("apply"),
+        control=control,
+    )
+    invalidate_not_found(api, result)
+    status = result.status
+    if failed and status == "success":
+        status = "partial"
+    if result.failed or result.cancelled or failed:
+        journal.close()
+    else:
+        journal.complete(status)
+
+    changed = [r.item for r in result.succeeded]
+    get_history().record_action(
+        utility=kind.utility,
+        action=kind.action,
+        target=job.target_name or job.target_id,
+        target_id=job.target_id,
+        details={
+            **details,
+            "job_id": job.id,
+            "requested": len(result.results),
+            "failed": len(result.failed),
+            "lookup_failed": len(failed),
+            "cancelled": len(result.cancelled),
+            "elapsed_seconds": round(result.elapsed, 2),
+        },
+        affected_count=len(changed),
+        status=record_status(status, len(changed)),
+        user_ids=changed,
+    )
+    by_id = {u["id"]: u["email"] for u in found}
+    return _summary(
+        status,
+        emails,
+        succeeded=len(changed),
+        failed=len(result.failed),
+        cancelled=len(result.cancelled),
+        missing=missing,
+        lookup_failed=failed,
+        elapsed=result.elapsed,
+        errors=lookup_errors
+        + [
+            f"{by_id.get(r.item, r.item)}: {r.error or 'Failed'}"
+            for r in result.failed[:20]
+        ],
+    )
+
+
+def _run_sync_job(
+    api, job: Job, control: Optional[BulkControl] = None
+) -> Dict[str, Any]:
+    """
+    Reconcile a group or queue to the job's target members.
+
+    A sync is idempotent (it only applies the remaining difference), so it
+    needs no checkpoint journal: a cancelled or failed job is simply rerun.
+    """
+    utility, endpoint_name = SYNC_JOB_KINDS[job.kind]
+    endpoint = getattr(api, endpoint_name)
+    emails: List[str] = job.payload.get("emails", [])
+    start = time.monotonic()
+
+    missing: List[str] = []
+    failed: List[str] = []
+    warnings: List[str] = []
+    remove_extra = job.payload.get("remove_extra", True)
+    source_id = job.payload.get("source_id")
+    if source_id:
+        listing = endpoint.list_members(source_id)
+        if not listing.success:
+            return _summary(
+                "failed",
+                emails,
+                errors=[f"Listing the members of {source_id} failed: {listing.error}"],
+            )
+        target_ids = member_ids(listing.data)
+    else:
+        found, missing, failed = resolve_emails(api, emails, control=control)
+        target_ids = [u["id"] for u in found]
+    if control is not None and control.cancelled:
+        return _summary("cancelled", emails, missing=missing)
+    if failed and remove_extra:
+        # A failed lookup may hide a current member: never remove on an
+        # incomplete target
+        remove_extra = False
+        warnings.append(
+            f"{len(failed)} lookup(s) failed, so no members were removed; "
+            "rerun the job to retry them"
+        )
+
+    listing = endpoint.list_members(job.target_id)
+    if not listing.success:
+        return _summary(
+            "failed",
+            emails,
+            missing=missing,
+            lookup_failed=failed,
+            errors=[f"Listing the current members failed: {listing.error}"],
+        )
+    result = endpoint.sync_members(
+        job.target_id,
+        target_ids,
+        remove_extra=remove_extra,
+        current_ids=member_ids(listing.data),
+    )
+    changed = len(result.added) + len(result.removed)
+    status = "partial" if failed and result.status == "success" else result.status
+    if not result.diff.is_empty:
+        get_history().record_action(
+            utility=utility,
+            action="sync_members",
+            target=job.target_name or job.target_id,
+            target_id=job.target_id,
+            details={
+                "job_id": job.id,
+                "source": source_id or "emails",
+                "removed_ids": result.removed,
+                "failed": len(result.failed),
+                "lookup_failed": len(failed),
+                "requests": result.requests,
+            },
+            affected_count=changed,
+            status=record_status(status, changed),
+            user_ids=result.added,
+        )
+    summary = _summary(
+        status,
+        emails,
+        succeeded=changed,
+        failed=len(result.failed),
+        missing=missing,
+        lookup_failed=failed,
+        elapsed=time.monotonic() - start,
+        errors=warnings + result.errors[:20],
+    )
+    summary.update(added=len(result.added), removed=len(result.removed))
+    return summary
+
+
+def _summary(
+    status: str,
+    emails: List[str],
+    succeeded: int = 0,
+    failed: int = 0,
+    cancelled: int = 0,
+    missing: Optional[List[str]] = None,
+    lookup_failed: Optional[List[str]] = None,
+    elapsed: float = 0.0,
+    errors: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Job summary stored with the finished job."""
+    return {
+        "status": status,
+        "requested": len(emails),
+        "succeeded": succeeded,
+        "failed": failed,
+        "cancelled": cancelled,
+        "missing": missing or [],
+        "lookup_failed": lookup_failed or [],
+        "elapsed_seconds": round(elapsed, 2),
+        "errors": errors or [],
+    }
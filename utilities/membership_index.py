@@ -0,0 +1,411 @@
+"""
+Membership Index
+Reverse index of an org's memberships: user -> groups, queues and skills.
+
+Asking the API which groups and queues a user is in costs a call (or a
+paged listing) per user. The index is built once from bulk listings
+instead: the members of every group and queue, fetched concurrently at
+prefetch priority, and every user's skills from a single users.list_all()
+listing with expand=["skills"]. The user pages and membership reports then
+answer from memory. A build fails (and the previous index, if any, stays
+in place) unless every listing came back complete.
+
+Writes made in the app are applied in place (add()/remove(),
+set_members(), set_user_skills(), ...). Changes made elsewhere (another
+admin, the worker) are picked up by a background rebuild once the index
+is older than INDEX_MAX_AGE; the old index is served until it lands.
+"""
+
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from genesys_cloud.scheduler import Priority, request_priority
+
+# Concurrent member listings while building
+INDEX_WORKERS = 8
+
+# Users per page when listing users with their skills
+INDEX_PAGE_SIZE = 500
+
+# Seconds before start_build() refreshes a built index in the background
+INDEX_MAX_AGE = 30 * 60.0
+
+# Memberships tracked by the index
+KINDS = ("groups", "queues", "skills")
+
+
+def _skill_entity(assignment: Dict[str, Any]) -> Dict[str, Any]:
+    """The skill of an assignment, without the user's proficiency."""
+    return {"id": assignment["id"], "name": assignment.get("name", "")}
+
+
+class MembershipIndexError(Exception):
+    """A listing failed, so the index would be incomplete."""
+
+
+def _complete(response: Any, what: str) -> List[Dict[str, Any]]:
+    """Data of a complete listing."""
+    if not response.success:
+        raise MembershipIndexError(f"Listing {what} failed: {response.error}")
+    return response.data or []
+
+
+class MembershipIndex:
+    """
+    Memberships of one backend client, indexed both ways.
+
+    For groups and queues an entry is the group/queue dict; for skills it
+    is the user's skill assignment (id, name, proficiency, state).
+
+    Usage:
+        index = get_membership_index(api)
+        index.start_build()
+        if index.ready:
+            groups = index.user_groups(user_id)
+    """
+
+    def __init__(
+        self,
+        api: Any,
+        workers: int = INDEX_WORKERS,
+        max_age: float = INDEX_MAX_AGE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize an empty index.
+
+        Args:
+            api: Backend client (GenesysCloudAPI or DemoAPI)
+            workers: Concurrent member listings while building
+            max_age: Seconds before a built index is refreshed
+            clock: Time source
+        """
+        # Weak: get_membership_index() keys the shared index by this client
+        self._api = weakref.ref(api)
+        self.workers = workers
+        self.max_age = max_age
+        self._clock = clock
+        self.ready = False
+        self.error: Optional[str] = None
+        self.built_at: Optional[float] = None
+        self._started_at: Optional[float] = None  # last build attempt
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        # kind -> entity_id -> group, queue or skill
+        self._entities: Dict[str, Dict[str, Dict[str, Any]]] = {k: {} for k in KINDS}
+        # kind -> entity_id -> user_id -> member record / skill assignment
+        self._members: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = {
+            k: {} for k in KINDS
+        }
+        # kind -> user_id -> entity IDs
+        self._by_user: Dict[str, Dict[str, Set[str]]] = {k: {} for k in KINDS}
+
+    @property
+    def api(self) -> Any:
+        api = self._api()
+        if api is None:
+            raise ReferenceError("Backend client no longer exists")
+        return api
+
+    @staticmethod
+    def _check(kind: str) -> None:
+        if kind not in KINDS:
+            raise ValueError(f"Unknown membership kind: {kind}")
+
+    # Building
+
+    def build(self) -> Dict[str, int]:
+        """
+        Rebuild from bulk listings (blocking).
+
+        Returns:
+            Memberships indexed per kind
+
+        Raises:
+            MembershipIndexError: If a listing failed (the index is left
+                as it was)
+        """
+        api = self.api
+        groups = _complete(api.groups.list_all(), "groups")
+        queues = _complete(api.queues.list_all(), "queues")
+        endpoints = [(api.groups, g) for g in groups]
+        endpoints += [(api.queues, q) for q in queues]
+
+        def members(job):
+            endpoint, entity = job
+            with request_priority(Priority.PREFETCH):
+                response = endpoint.list_members(entity["id"])
+            return _complete(response, f"the members of {entity['id']}")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            listings = list(pool.map(members, endpoints))
+        users = _complete(
+            api.users.list_all(page_size=INDEX_PAGE_SIZE, expand=["skills"]), "users"
+        )
+        skills = {u["id"]: u.get("skills") or [] for u in users if u.get("id")}
+
+        entities: Dict[str, Dict[str, Dict[str, Any]]] = {k: {} for k in KINDS}
+        member_map: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = {
+            k: {} for k in KINDS
+        }
+        for (endpoint, entity), listing in zip(endpoints, listings):
+            kind = "groups" if endpoint is api.groups else "queues"
+            entities[kind][entity["id"]] = entity
+            member_map[kind][entity["id"]] = {
+                m["id"]: m for m in listing if m.get("id")
+            }
+        for user_id, assignments in skills.items():
+            for skill in assignments:
+                if skill.get("id"):
+                    entities["skills"].setdefault(skill["id"], _skill_entity(skill))
+                    member_map["skills"].setdefault(skill["id"], {})[user_id] = skill
+
+        by_user: Dict[str, Dict[str, Set[str]]] = {k: {} for k in KINDS}
+        for kind, per_entity in member_map.items():
+            for entity_id, entity_members in per_entity.items():
+                for user_id in entity_members:
+                    by_user[kind].setdefault(user_id, set()).add(entity_id)
+
+        with self._lock:
+            self._entities = entities
+            self._members = member_map
+            self._by_user = by_user
+            self.ready = True
+            self.error = None
+            self.built_at = self._clock()
+        return {kind: sum(len(ids) for ids in by_user[kind].values()) for kind in KINDS}
+
+    @property
+    def stale(self) -> bool:
+        """Whether the index is older than max_age."""
+        with self._lock:
+            return self.built_at is not None and (
+                self._clock() - self.built_at >= self.max_age
+            )
+
+    def start_build(self, retry: bool = False) -> bool:
+        """
+        Build in a background thread (prefetch priority).
+
+        A built index is rebuilt once stale (at most once per max_age, so
+        a failing refresh is not retried on every call); it stays ready
+        meanwhile.
+
+        Args:
+            retry: Start again after a failed first build
+
+        Returns:
+            True if a build was started (False if running, current or failed)
+        """
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return False
+            if self.ready:
+                since_attempt = self._clock() - (self._started_at or 0.0)
+                if not self.stale or since_attempt < self.max_age:
+                    return False
+            elif self.error and not retry:
+                return False
+            self._started_at = self._clock()
+            self._thread = threading.Thread(
+                target=self._build_in_background, daemon=True, name="membership-index"
+            )
+            self._thread.start()
+            return True
+
+    def _build_in_background(self) -> None:
+        try:
+            with request_priority(Priority.PREFETCH):
+                self.build()
+        except Exception as e:
+            with self._lock:
+                self.error = str(e)
+
+    @property
+    def building(self) -> bool:
+        with self._lock:
+            return bool(self._thread and self._thread.is_alive())
+
+    # Lookups
+
+    def _memberships(self, kind: str, user_id: str) -> List[Dict[str, Any]]:
+        self._check(kind)
+        with self._lock:
+            ids = self._by_user[kind].get(user_id, set())
+            if kind == "skills":
+                found = [self._members[kind][i][user_id] for i in ids]
+            else:
+                found = [self._entities[kind][i] for i in ids]
+        return sorted(found, key=lambda e: (e.get("name") or "").lower())
+
+    def user_groups(self, user_id: str) -> List[Dict[str, Any]]:
+        """Groups the user is a member of, by name."""
+        return self._memberships("groups", user_id)
+
+    def user_queues(self, user_id: str) -> List[Dict[str, Any]]:
+        """Queues the user is a member of, by name."""
+        return self._memberships("queues", user_id)
+
+    def user_skills(self, user_id: str) -> List[Dict[str, Any]]:
+        """The user's skill assignments, by skill name."""
+        return self._memberships("skills", user_id)
+
+    def members(self, kind: str, entity_id: str) -> List[str]:
+        """User IDs of a group's or queue's members, or of a skill's holders."""
+        self._check(kind)
+        with self._lock:
+            return list(self._members[kind].get(entity_id, {}))
+
+    def summary(self, user_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Cross-entity report rows: each user's groups, queues and skills.
+
+        Returns:
+            [{"user_id", "groups", "queues", "skills"}, ...] with names
+        """
+        rows = []
+        for user_id in user_ids:
+            row: Dict[str, Any] = {"user_id": user_id}
+            for kind in KINDS:
+                row[kind] = [
+                    e.get("name", e.get("id")) for e in self._memberships(kind, user_id)
+                ]
+            rows.append(row)
+        return rows
+
+    # Incremental updates
+
+    def _link(self, kind: str, entity_id: str, user_id: str, record: Dict) -> None:
+        """Record a membership (call with lock held)."""
+        self._members[kind].setdefault(entity_id, {})[user_id] = record
+        self._by_user[kind].setdefault(user_id, set()).add(entity_id)
+
+    def _unlink(self, kind: str, entity_id: str, user_id: str) -> None:
+        """Drop a membership (call with lock held)."""
+        self._members[kind].get(entity_id, {}).pop(user_id, None)
+        ids = self._by_user[kind].get(user_id)
+        if ids is not None:
+            ids.discard(entity_id)
+            if not ids:
+                del self._by_user[kind][user_id]
+
+    def add(
+        self,
+        kind: str,
+        entity_id: str,
+        user_ids: Iterable[str],
+        entity: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Record users added to a group/queue or given a skill.
+
+        Args:
+            kind: 'groups', 'queues' or 'skills'
+            entity_id: Group, queue or skill ID
+            user_ids: Users added
+            entity: The entity (for skills, the assignment incl. proficiency)
+        """
+        self._check(kind)
+        with self._lock:
+            known = self._entities[kind].setdefault(entity_id, {"id": entity_id})
+            if entity is not None:
+                known.update(entity)
+            for user_id in user_ids:
+                record = dict(known) if kind == "skills" else {"id": user_id}
+                self._link(kind, entity_id, user_id, record)
+
+    def remove(self, kind: str, entity_id: str, user_ids: Iterable[str]) -> None:
+        """Record users removed from a group/queue or a skill."""
+        self._check(kind)
+        with self._lock:
+            for user_id in user_ids:
+                self._unlink(kind, entity_id, user_id)
+
+    def set_members(
+        self, kind: str, entity_id: str, members: List[Dict[str, Any]]
+    ) -> None:
+        """Replace a group's or queue's members with a fresh listing."""
+        self._check(kind)
+        with self._lock:
+            for user_id in list(self._members[kind].get(entity_id, {})):
+                self._unlink(kind, entity_id, user_id)
+            self._entities[kind].setdefault(entity_id, {"id": entity_id})
+            for member in members:
+                if member.get("id"):
+                    self._link(kind, entity_id, member["id"], member)
+
+    def set_user_skills(self, user_id: str, skills: List[Dict[str, Any]]) -> None:
+        """Replace a user's skill assignments with a fresh listing."""
+        with self._lock:
+            for skill_id in list(self._by_user["skills"].get(user_id, set())):
+                self._unlink("skills", skill_id, user_id)
+            for skill in skills:
+                if skill.get("id"):
+                    self._entities["skills"].setdefault(
+                        skill["id"], _skill_entity(skill)
+                    )
+                    self._link("skills", skill["id"], user_id, skill)
+
+    def set_user_memberships(
+        self, kind: str, user_id: str, entities: List[Dict[str, Any]]
+    ) -> None:
+        """Replace the groups or queues of a user with a fresh listing."""
+        self._check(kind)
+        with self._lock:
+            for entity_id in list(self._by_user[kind].get(user_id, set())):
+                self._unlink(kind, entity_id, user_id)
+            for entity in entities:
+                if entity.get("id"):
+                    self._entities[kind][entity["id"]] = entity
+                    self._link(kind, entity["id"], user_id, {"id": user_id})
+
+    def upsert_entity(self, kind: str, entity: Dict[str, Any]) -> None:
+        """Record a created or renamed group, queue or skill."""
+        self._check(kind)
+        if not entity.get("id"):
+            return
+        with self._lock:
+            merged = {**self._entities[kind].get(entity["id"], {}), **entity}
+            self._entities[kind][entity["id"]] = merged
+            if kind == "skills":
+                for record in self._members[kind].get(entity["id"], {}).values():
+                    if "name" in entity:
+                        record["name"] = entity["name"]
+
+    def remove_entity(self, kind: str, entity_id: str) -> None:
+        """Drop a deleted group, queue or skill with its memberships."""
+        self._check(kind)
+        with self._lock:
+            for user_id in list(self._members[kind].get(entity_id, {})):
+                self._unlink(kind, entity_id, user_id)
+            self._members[kind].pop(entity_id, None)
+            self._entities[kind].pop(entity_id, None)
+
+    def clear(self) -> None:
+        """Forget everything; the next start_build() rebuilds."""
+        with self._lock:
+            self._entities = {k: {} for k in KINDS}
+            self._members = {k: {} for k in KINDS}
+            self._by_user = {k: {} for k in KINDS}
+            self.ready = False
+            self.error = None
+            self.built_at = None
+            self._started_at = None
+
+
+_indexes: "weakref.WeakKeyDictionary[Any, MembershipIndex]" = (
+    weakref.WeakKeyDictionary()
+)
+_indexes_lock = threading.Lock()
+
+
+def get_membership_index(api: Any) -> MembershipIndex:
+    """Get the membership index shared by everything using this backend client."""
+    with _indexes_lock:
+        index = _indexes.get(api)
+        if index is None:
+            index = _indexes[api] = MembershipIndex(api)
+        return index
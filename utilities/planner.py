@@ -0,0 +1,211 @@
+"""
+Bulk Planner
+Turns a bulk operation into an explicit plan before anything is changed:
+lookup calls, mutation batches, total requests and an estimated duration
+from measured route latencies and the client's current rate budget.
+
+Planning itself makes no API calls; lookups already in the client's
+UserResolver cache are counted as free.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from genesys_cloud.membership import GROUP_MEMBER_BATCH_SIZE, QUEUE_MEMBER_BATCH_SIZE
+
+from .bulk import RESOLVE_WORKERS, SKILL_WORKERS, format_duration
+from .resolver import get_resolver
+
+# Latency assumed for a route that has not been called yet (seconds)
+DEFAULT_LATENCY = 0.3
+
+RESOLVE_ROUTE = "POST /api/v2/users/search"
+
+
+@dataclass(frozen=True)
+class Operation:
+    """
+    Cost model of one bulk operation.
+
+    Attributes:
+        label: Name of the mutation step
+        route: route_key() of the mutation call
+        batch_size: Users per call
+        max_workers: Concurrent calls
+    """
+
+    label: str
+    route: str
+    batch_size: int
+    max_workers: int
+
+
+OPERATIONS: Dict[str, Operation] = {
+    "group_add_members": Operation(
+        "Add members",
+        "POST /api/v2/groups/{id}/members",
+        GROUP_MEMBER_BATCH_SIZE,
+        1,
+    ),
+    "queue_add_members": Operation(
+        "Add members",
+        "POST /api/v2/routing/queues/{id}/members",
+        QUEUE_MEMBER_BATCH_SIZE,
+        1,
+    ),
+    "assign_skill": Operation(
+        "Assign skill",
+        "POST /api/v2/users/{id}/routingskills",
+        1,
+        SKILL_WORKERS,
+    ),
+    "remove_skill": Operation(
+        "Remove skill",
+        "DELETE /api/v2/users/{id}/routingskills/{id}",
+        1,
+        SKILL_WORKERS,
+    ),
+}
+
+
+@dataclass
+class PlanStep:
+    """One phase of a plan (user lookups or the mutation itself)."""
+
+    name: str
+    items: int
+    requests: int
+    workers: int
+    latency: float  # seconds per request
+    measured: bool  # latency measured on this client (vs. DEFAULT_LATENCY)
+    cached: int = 0  # items served from cache
+
+    def seconds(self, rate_per_second: Optional[float]) -> float:
+        """Duration bound by latency across workers or by the rate budget."""
+        if not self.requests:
+            return 0.0
+        latency_bound = math.ceil(self.requests / self.workers) * self.latency
+        rate_bound = self.requests / rate_per_second if rate_per_second else 0.0
+        return max(latency_bound, rate_bound)
+
+
+@dataclass
+class BulkPlan:
+    """Explicit cost plan of a bulk operation."""
+
+    operation: str
+    steps: List[PlanStep] = field(default_factory=list)
+    rate_per_second: Optional[float] = None  # None when unlimited
+    blocked_seconds: float = 0.0  # remaining 429 backoff
+
+    @property
+    def total_requests(self) -> int:
+        return sum(step.requests for step in self.steps)
+
+    @property
+    def estimated_seconds(self) -> float:
+        return self.blocked_seconds + sum(
+            step.seconds(self.rate_per_second) for step in self.steps
+        )
+
+    @property
+    def duration_text(self) -> str:
+        """Estimated duration, e.g. '3m 20s' or '<1s'."""
+        return _duration(self.estimated_seconds)
+
+    def describe(self) -> str:
+        """One-line summary, e.g. '12 request(s) · ~4s'."""
+        return f"{self.total_requests} request(s) · ~{self.duration_text}"
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Table rows, one per step."""
+        return [
+            {
+                "Step": step.name,
+                "Items": step.items,
+                "Cached": step.cached,
+                "Requests": step.requests,
+                "Concurrency": step.workers,
+                "Latency": f"{step.latency * 1000:.0f} ms"
+                + ("" if step.measured else " (est.)"),
+                "Duration": _duration(step.seconds(self.rate_per_second)),
+            }
+            for step in self.steps
+        ]
+
+
+def _duration(seconds: float) -> str:
+    return "<1s" if 0 < seconds < 1 else format_duration(seconds)
+
+
+def _latency(metrics: Any, route: str) -> Tuple[float, bool]:
+    """(latency, measured) for a route, falling back to the client average."""
+    if metrics is not None:
+        latency = metrics.route_latency(route)
+        if latency is not None:
+            return latency, True
+        snapshot = metrics.snapshot()
+        if snapshot.requests:
+            return snapshot.avg_latency, True
+    return DEFAULT_LATENCY, False
+
+
+def plan_bulk(
+    api: Any, operation: str, emails: List[str], found: Optional[int] = None
+) -> BulkPlan:
+    """
+    Plan a bulk operation over a list of emails.
+
+    Args:
+        api: Backend client
+        operation: Key of OPERATIONS (e.g. 'group_add_members')
+        emails: Email addresses to process
+        found: Users the emails resolve to, if known (otherwise every
+            email is assumed to resolve, an upper bound)
+
+    Returns:
+        BulkPlan
+
+    Raises:
+        ValueError: If the operation is unknown
+    """
+    op = OPERATIONS.get(operation)
+    if op is None:
+        raise ValueError(f"Unknown operation: {operation}")
+
+    metrics = getattr(api, "metrics", None)
+    scheduler = getattr(api, "scheduler", None)
+    cached, uncached = get_resolver(api).partition(emails)
+    users = len(emails) if found is None else found
+    resolve_latency, resolve_measured = _latency(metrics, RESOLVE_ROUTE)
+    apply_latency, apply_measured = _latency(metrics, op.route)
+
+    return BulkPlan(
+        operation=operation,
+        steps=[
+            PlanStep(
+                "Resolve users",
+                items=len(emails),
+                requests=len(uncached),
+                workers=RESOLVE_WORKERS,
+                latency=resolve_latency,
+                measured=resolve_measured,
+                cached=len(cached),
+            ),
+            PlanStep(
+                op.label,
+                items=users,
+                requests=math.ceil(users / op.batch_size),
+                workers=op.max_workers,
+                latency=apply_latency,
+                measured=apply_measured,
+            ),
+        ],
+        rate_per_second=(
+            scheduler.rate_per_second
+            if scheduler is not None and scheduler.is_limited
+            else None
+        ),
+        blocked_seconds=scheduler.blocked_seconds if scheduler is not None else 0.0,
+    )
@@ -8,7 +8,10 @@ from typing import Dict, List, Optional
 import pandas as pd
 import streamlit as st
 
+from genesys_cloud.membership import QUEUE_MEMBER_BATCH_SIZE
+
 from .base import BaseUtility, UtilityConfig
+from .bulk import BulkExecutor, parse_emails
 
 
 class QueueManagerUtility(BaseUtility):
@@ -52,6 +55,7 @@ class QueueManagerUtility(BaseUtility):
                 ("qm_nav_view", "\U0001f465 Members", "view"),
                 ("qm_nav_add", "\U00002795 Add Members", "add"),
                 ("qm_nav_remove", "\U00002796 Remove Members", "remove"),
+                ("qm_nav_sync", "\U0001f504 Sync Members", "sync"),
                 ("qm_nav_config", "\U00002699\ufe0f Config", "config"),
                 ("qm_nav_edit", "\U0000270f\ufe0f Edit Queue", "edit"),
                 ("qm_nav_delete", "\U0001f5d1\ufe0f Delete Queue", "delete"),
@@ -70,6 +74,7 @@ class QueueManagerUtility(BaseUtility):
             "view": self._page_view,
             "add": self._page_add,
             "remove": self._page_remove,
+            "sync": self._page_sync,
             "config": self._page_config,
             "export": self._page_export,
             "create": self._page_create,
@@ -86,7 +91,10 @@ class QueueManagerUtility(BaseUtility):
         if resp.success:
             self.set_state("queue_id", queue_id)
             self.set_state("queue_info", resp.data)
-            self.set_state("members", self.api.queues.get_members(queue_id))
+            members = self.api.queues.get_members(queue_id)
+            self.set_state("members", members)
+            self.memberships.upsert_entity("queues", resp.data)
+            self.memberships.set_members("queues", queue_id, members)
             self.set_state("page", "view")
         else:
             st.error(f"Failed to load queue: {resp.error}")
@@ -94,7 +102,10 @@ class QueueManagerUtility(BaseUtility):
     def _refresh_members(self) -> None:
         qid = self.get_state("queue_id")
         if qid:
-            self.set_state("members", self.api.queues.get_members(qid))
+            members = self.api.queues.get_members(qid)
+            self.set_state("members", members)
+            self.memberships.set_members("queues", qid, members)
+            self.invalidate_lists("queues")  # member counts changed
 
     def _action_bar(self) -> None:
         info = self.get_state("queue_info")
@@ -172,15 +183,10 @@ class QueueManagerUtility(BaseUtility):
             )
             self.set_state("list_page_number", page_number)
 
-        with st.spinner("Loading queues..."):
-            resp = self.api.queues.list_page(
-                page_size=page_size, page_number=page_number
-            )
-        if not resp.success:
-            st.error(f"Failed to load queues: {resp.error}")
+        data = self.load_list_page("queues", page_size, page_number, "queues")
+        if data is None:
             return
 
-        data = resp.data or {}
         all_queues = data.get("entities", [])
         total = data.get("total", len(all_queues))
         page_count = data.get("pageCount", 1)
@@ -288,6 +294,7 @@ class QueueManagerUtility(BaseUtility):
             }
             resp = self.api.queues.create(payload)
             if resp.success:
+                self.invalidate_lists("queues")
                 st.success("Queue created.")
                 self.set_state("queue_id", resp.data.get("id"))
                 self.set_state("queue_info", resp.data)
@@ -354,6 +361,7 @@ class QueueManagerUtility(BaseUtility):
             }
             resp = self.api.queues.update(info.get("id"), payload)
             if resp.success:
+                self.invalidate_lists("queues")
                 st.success("Queue updated.")
                 self._load_queue(info.get("id"))
                 st.rerun()
@@ -377,6 +385,8 @@ class QueueManagerUtility(BaseUtility):
         ):
             resp = self.api.queues.delete(info.get("id"))
             if resp.success:
+                self.invalidate_lists("queues")
+                self.memberships.remove_entity("queues", info.get("id"))
                 st.success("Queue deleted.")
                 self.set_state("queue_info", None)
                 self.set_state("queue_id", "")
@@ -464,30 +474,35 @@ class QueueManagerUtility(BaseUtility):
             "Process", type="primary", use_container_width=True, key="qm_run_add"
         )
 
+        background = self.background_job_checkbox("qm_background")
+
         if run and emails_text:
-            self._execute_add(emails_text, dry_run)
+            self._execute_add(emails_text, dry_run, background)
 
-    def _execute_add(self, raw: str, dry_run: bool) -> None:
-        emails = list(
-            dict.fromkeys(e.strip() for e in raw.split("\n") if e.strip() and "@" in e)
-        )
+    def _execute_add(self, raw: str, dry_run: bool, background: bool = False) -> None:
+        emails = parse_emails(raw)
         if not emails:
             st.error("No valid email addresses found.")
             return
 
         st.markdown("---")
-        progress = st.progress(0)
-        found, missing = [], []
-        for i, email in enumerate(emails):
-            progress.progress((i + 1) / len(emails))
-            user = self.api.users.search_by_email(email)
-            if user:
-                found.append(
-                    {"id": user["id"], "name": user.get("name", ""), "email": email}
-                )
-            else:
-                missing.append(email)
-        progress.empty()
+        queue_id = self.get_state("queue_id")
+        if background and not dry_run:
+            self.enqueue_background_job(
+                "queue_add_members",
+                queue_id,
+                self.get_state("queue_info", {}).get("name", queue_id),
+                emails,
+            )
+            return
+        journal = (
+            None
+            if dry_run
+            else self.open_job_journal("queue_add_members", queue_id, emails)
+        )
+        if dry_run:
+            self.render_bulk_plan("queue_add_members", emails)
+        found, missing, failed = self.resolve_emails(emails, journal)
 
         c1, c2 = st.columns(2)
         with c1:
@@ -503,23 +518,53 @@ class QueueManagerUtility(BaseUtility):
                 st.error(f"**{len(missing)}** not found")
                 for e in missing:
                     st.caption(f"- {e}")
+            if failed:
+                st.warning(f"**{len(failed)}** lookup(s) failed, run again to retry")
 
         if not found:
             return
         if dry_run:
             st.info(
-                f"Dry run complete. {len(found)} users would be added. Uncheck 'Preview only' to execute."
+                f"Dry run complete. {len(found)} users would be added. "
+                + self.dry_run_summary("queue_add_members", emails, len(found))
+                + " Uncheck 'Preview only' to execute."
             )
             return
 
-        resp = self.api.queues.add_members(
-            self.get_state("queue_id"), [u["id"] for u in found]
+        result = self.run_bulk(
+            BulkExecutor(max_workers=1, batch_size=QUEUE_MEMBER_BATCH_SIZE),
+            [u["id"] for u in found],
+            lambda ids: self.api.queues.add_members(queue_id, ids),
+            "Adding members...",
+            journal,
         )
-        if resp.success:
-            st.success(f"Added {len(found)} members to queue.")
+        self.finish_job(journal, result)
+
+        added = [r.item for r in result.succeeded]
+        self.record_bulk_action(
+            "add_members",
+            self.get_state("queue_info", {}).get("name", queue_id),
+            queue_id,
+            result,
+            user_ids=added,
+        )
+        if added:
+            st.success(f"Added {len(added)} members to queue.")
+        self.render_bulk_failures(result, {u["id"]: u["email"] for u in found})
+        self._refresh_members()
+
+    def _page_sync(self) -> None:
+        info = self.get_state("queue_info")
+        if not info:
+            self.set_state("page", "list")
+            st.rerun()
+            return
+        self._queue_header()
+        queue_id = self.get_state("queue_id")
+        if self.render_membership_sync(
+            "queues", queue_id, info.get("name", queue_id), "qm"
+        ):
             self._refresh_members()
-        else:
-            st.error(f"Failed: {resp.error}")
 
     def _page_remove(self) -> None:
         info = self.get_state("queue_info")
@@ -566,12 +611,30 @@ class QueueManagerUtility(BaseUtility):
                 "Remove Selected", type="primary", disabled=not confirm, key="qm_rm_btn"
             ):
                 ids = [options[s] for s in selected]
-                resp = self.api.queues.remove_members(self.get_state("queue_id"), ids)
+                resp = self.wait_write(
+                    self.coalescer.remove_members(
+                        "queues", self.get_state("queue_id"), ids, api=self.api
+                    )
+                )
+                # Record what was applied, even when other IDs failed
+                removed = resp.data.succeeded if resp.data else []
+                if removed:
+                    self.record_action(
+                        "remove_members",
+                        info.get("name", self.get_state("queue_id")),
+                        self.get_state("queue_id"),
+                        removed,
+                        status="success" if resp.success else "partial",
+                    )
+                    self._refresh_members()
                 if resp.success:
                     st.success(f"Removed {len(selected)} members from queue.")
-                    self._refresh_members()
                     st.rerun()
                 else:
+                    if removed:
+                        st.warning(
+                            f"Removed {len(removed)} of {len(ids)} members from queue."
+                        )
                     st.error(f"Failed: {resp.error}")
 
     def _page_config(self) -> None:
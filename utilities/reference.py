@@ -0,0 +1,179 @@
+"""
+Reference Data
+Shared cache of the org's small, slow-changing lists: skills, queues,
+groups, languages and wrap-up codes.
+
+warm_up() is started right after login and fetches every list
+concurrently in the background at prefetch priority, so the first skill
+picker or skill page a user opens reads warm data instead of paging
+through get_skills(). A list requested while its warm-up is still running
+waits for that fetch instead of starting another.
+"""
+
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from genesys_cloud.scheduler import Priority, request_priority
+
+# Seconds a fetched list is served before it is fetched again
+REFERENCE_TTL = 300.0
+
+# Seconds get() waits for a warm-up fetch already running
+WARM_UP_TIMEOUT = 60.0
+
+# Dataset -> fetcher over a backend client
+DATASETS: Dict[str, Callable[[Any], List[Dict]]] = {
+    "skills": lambda api: api.routing.get_skills(),
+    "queues": lambda api: list(api.queues.list()),
+    "groups": lambda api: list(api.groups.list()),
+    "languages": lambda api: api.routing.get_languages(),
+    "wrapup_codes": lambda api: api.routing.get_wrapup_codes(),
+}
+
+# Warm-ups shared by every session
+_executor = ThreadPoolExecutor(max_workers=len(DATASETS), thread_name_prefix="warmup")
+
+
+class ReferenceCache:
+    """
+    Reference lists of one backend client.
+
+    Empty results are not cached: the SDK's paginated getters return []
+    on errors, and an empty list is cheap to fetch again.
+
+    Usage:
+        reference = get_reference(api)
+        reference.warm_up()            # after login, returns immediately
+        skills = reference.get("skills")
+    """
+
+    def __init__(
+        self,
+        api: Any,
+        ttl: float = REFERENCE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            api: Backend client (GenesysCloudAPI or DemoAPI)
+            ttl: Seconds a fetched list stays valid
+            clock: Time source
+        """
+        # Weak: get_reference() keys the shared cache by this client
+        self._api = weakref.ref(api)
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data: Dict[str, Tuple[List[Dict], float]] = {}  # name -> (items, at)
+        self._pending: Dict[str, Future] = {}
+
+    @property
+    def api(self) -> Any:
+        api = self._api()
+        if api is None:
+            raise ReferenceError("Backend client no longer exists")
+        return api
+
+    @staticmethod
+    def _check(name: str) -> None:
+        if name not in DATASETS:
+            raise ValueError(f"Unknown reference data: {name}")
+
+    def _fresh(self, name: str) -> Optional[List[Dict]]:
+        """Cached list if still valid (call with lock held)."""
+        cached = self._data.get(name)
+        if cached is None or self._clock() - cached[1] > self.ttl:
+            return None
+        return cached[0]
+
+    def _fetch(self, name: str) -> List[Dict]:
+        """Fetch a list and cache it (any thread)."""
+        items = DATASETS[name](self.api)
+        if items:
+            with self._lock:
+                self._data[name] = (items, self._clock())
+        return items
+
+    def _prefetch(self, name: str) -> List[Dict]:
+        with request_priority(Priority.PREFETCH):
+            return self._fetch(name)
+
+    def warm_up(self, names: Optional[List[str]] = None) -> List[str]:
+        """
+        Start background fetches of lists that are not cached yet.
+
+        Args:
+            names: Datasets to warm (default: all)
+
+        Returns:
+            Names of the fetches started
+        """
+        started = []
+        for name in names or list(DATASETS):
+            self._check(name)
+            with self._lock:
+                if self._fresh(name) is not None or name in self._pending:
+                    continue
+                future = _executor.submit(self._prefetch, name)
+                self._pending[name] = future
+            future.add_done_callback(lambda _, n=name: self._done(n))
+            started.append(name)
+        return started
+
+    def _done(self, name: str) -> None:
+        with self._lock:
+            future = self._pending.get(name)
+            if future is not None and future.done():
+                del self._pending[name]
+
+    def get(self, name: str) -> List[Dict]:
+        """
+        A reference list: cached, from a running warm-up, or fetched now.
+
+        Raises:
+            ValueError: If the dataset is unknown
+        """
+        self._check(name)
+        with self._lock:
+            items = self._fresh(name)
+            future = self._pending.get(name)
+        if items is not None:
+            return items
+        if future is not None:
+            try:
+                return future.result(timeout=WARM_UP_TIMEOUT)
+            except Exception:
+                pass  # fall back to a fetch of our own
+        return self._fetch(name)
+
+    def is_warm(self, name: str) -> bool:
+        """Whether a list is cached and valid."""
+        self._check(name)
+        with self._lock:
+            return self._fresh(name) is not None
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop a cached list (or all) after a change."""
+        with self._lock:
+            if name is None:
+                self._data.clear()
+            else:
+                self._data.pop(name, None)
+
+
+_caches: "weakref.WeakKeyDictionary[Any, ReferenceCache]" = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def get_reference(api: Any) -> ReferenceCache:
+    """Get the reference cache shared by everything using this backend client."""
+    with _caches_lock:
+        cache = _caches.get(api)
+        if cache is None:
+            cache = _caches[api] = ReferenceCache(api)
+        return cache
@@ -0,0 +1,276 @@
+"""
+User Resolver
+Email -> user lookups shared by every bulk flow of a backend client.
+
+Resolutions are cached per client and, for a live org, persisted in
+encrypted storage, so overlapping uploads do not look up the same
+addresses again:
+- Found users are kept for USER_TTL (IDs are stable; a 404 on a cached
+  ID drops the entry early, see invalidate_not_found()).
+- Misses are kept for MISS_TTL, so a user created later is still found.
+- Failed searches (network/API errors) are never cached; lookup() raises
+  ResolveError so callers do not mistake them for misses.
+"""
+
+import hashlib
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.encrypted_storage import EncryptedStorage, get_storage
+
+# Seconds a resolved user / a miss stays valid
+USER_TTL = 7 * 24 * 3600.0
+MISS_TTL = 6 * 3600.0
+
+
+def cache_scope(api: Any) -> Optional[str]:
+    """
+    Storage scope of a client's cache: one per org (region + OAuth client).
+
+    Returns:
+        Scope string, or None for clients without an org (demo mode),
+        whose cache is kept in memory only
+    """
+    config = getattr(getattr(api, "auth", None), "config", None)
+    if config is None:
+        return None
+    identity = f"{config.region}:{config.client_id}"
+    return hashlib.sha256(identity.encode()).hexdigest()[:16]
+
+
+class ResolveError(Exception):
+    """An email search failed, so whether the user exists is unknown."""
+
+    def __init__(self, email: str, error: Optional[str], status_code=None):
+        super().__init__(f"Lookup of {email} failed: {error or 'unknown error'}")
+        self.email = email
+        self.status_code = status_code
+
+
+class UserResolver:
+    """
+    Cached email -> {id, name, state} lookups for one backend client.
+
+    Storage is only touched by load() and flush(); call them from the
+    Streamlit script thread, lookups themselves may run in worker threads.
+
+    Usage:
+        resolver = get_resolver(api)
+        resolver.load()
+        user = resolver.lookup("alice@company.com")
+        resolver.flush()  # persist new resolutions
+    """
+
+    def __init__(
+        self,
+        api: Any,
+        storage: Optional[EncryptedStorage] = None,
+        scope: Optional[str] = None,
+        user_ttl: float = USER_TTL,
+        miss_ttl: float = MISS_TTL,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize resolver.
+
+        Args:
+            api: Backend client (GenesysCloudAPI or DemoAPI)
+            storage: Encrypted storage (default: global instance)
+            scope: Persistence scope (default: cache_scope(api); None keeps
+                the cache in memory)
+            user_ttl: Seconds a found user stays cached
+            miss_ttl: Seconds a miss stays cached
+            clock: Time source (wall clock, entries outlive the process)
+        """
+        # Weak: get_resolver() keys the shared resolver by this client
+        self._api = weakref.ref(api)
+        self.scope = scope if scope is not None else cache_scope(api)
+        self._storage = storage
+        self.user_ttl = user_ttl
+        self.miss_ttl = miss_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._dirty = 0
+        self._removed = False
+
+    @property
+    def api(self) -> Any:
+        api = self._api()
+        if api is None:
+            raise ReferenceError("Backend client no longer exists")
+        return api
+
+    @property
+    def storage(self) -> EncryptedStorage:
+        if self._storage is None:
+            self._storage = get_storage()
+        return self._storage
+
+    @staticmethod
+    def _key(email: str) -> str:
+        return email.strip().lower()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Entries, loaded from storage on first use (call with lock held)."""
+        if self._entries is None:
+            self._entries = (
+                self.storage.retrieve_user_cache(self.scope) if self.scope else {}
+            )
+        return self._entries
+
+    def load(self) -> None:
+        """Load persisted resolutions (no-op once loaded)."""
+        with self._lock:
+            self._load()
+
+    def _fresh(self, email: str) -> Optional[Dict[str, Any]]:
+        """Unexpired entry for an email (call with lock held)."""
+        entries = self._load()
+        key = self._key(email)
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        ttl = self.user_ttl if entry.get("id") else self.miss_ttl
+        if self._clock() - entry.get("at", 0) > ttl:
+            del entries[key]
+            self._removed = True
+            return None
+        return entry
+
+    @staticmethod
+    def _user(entry: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        if not entry.get("id"):
+            return None
+        return {"id": entry["id"], "name": entry["name"], "state": entry["state"]}
+
+    def cached(self, email: str) -> Optional[Dict[str, str]]:
+        """Cached user for an email, without calling the API."""
+        with self._lock:
+            entry = self._fresh(email)
+            return self._user(entry) if entry else None
+
+    def lookup(self, email: str) -> Optional[Dict[str, str]]:
+        """
+        Resolve an email, calling the API only when nothing fresh is cached.
+
+        Returns:
+            {id, name, state} or None if no user has this email
+
+        Raises:
+            ResolveError: If the search failed
+        """
+        with self._lock:
+            entry = self._fresh(email)
+        if entry is not None:
+            return self._user(entry)
+
+        response = self.api.users.find_by_email(email)
+        if not response.success:
+            raise ResolveError(email, response.error, response.status_code)
+        found = response.data
+        entry = {
+            "id": found["id"] if found else None,
+            "name": found.get("name", "") if found else "",
+            "state": found.get("state", "") if found else "",
+            "at": self._clock(),
+        }
+        with self._lock:
+            self._load()[self._key(email)] = entry
+            self._dirty += 1
+        return self._user(entry)
+
+    def partition(self, emails: List[str]) -> Tuple[List[str], List[str]]:
+        """Split emails into (fresh in cache, needs an API call)."""
+        with self._lock:
+            known = {e for e in emails if self._fresh(e) is not None}
+        return [e for e in emails if e in known], [e for e in emails if e not in known]
+
+    def invalidate(self, user_id: str) -> int:
+        """
+        Drop cached resolutions pointing at a user ID (e.g. after a 404).
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            entries = self._load()
+            stale = [k for k, v in entries.items() if v.get("id") == user_id]
+            for key in stale:
+                del entries[key]
+            if stale:
+                self._removed = True
+        return len(stale)
+
+    def flush(self) -> None:
+        """Persist changes (merged with entries other processes saved)."""
+        if not self.scope:
+            with self._lock:
+                self._dirty = 0
+                self._removed = False
+            return
+        with self._lock:
+            if not self._dirty and not self._removed:
+                return
+            merged = dict(self._load())
+            if not self._removed:
+                # Keep newer resolutions another process (e.g. the worker) saved
+                for key, entry in self.storage.retrieve_user_cache(self.scope).items():
+                    if entry.get("at", 0) > merged.get(key, {}).get("at", 0):
+                        merged[key] = entry
+            self._entries = merged
+            self._dirty = 0
+            self._removed = False
+        self.storage.store_user_cache(self.scope, merged)
+
+    def clear(self) -> None:
+        """Forget all cached resolutions, including persisted ones."""
+        with self._lock:
+            self._entries = {}
+            self._dirty = 0
+            self._removed = False
+        if self.scope:
+            self.storage.clear_user_cache(self.scope)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+
+def invalidate_not_found(api: Any, result: Any) -> int:
+    """
+    Drop cached users whose per-user call in a BulkResult returned 404.
+
+    Only single-user items count, given as a user ID or a user dict with
+    an "id": a 404 on a batch call refers to the group or queue, not to
+    its members.
+
+    Returns:
+        Number of cache entries removed
+    """
+    resolver = get_resolver(api)
+    removed = 0
+    for r in result.failed:
+        if r.status_code != 404:
+            continue
+        user_id = r.item.get("id") if isinstance(r.item, dict) else r.item
+        if isinstance(user_id, str):
+            removed += resolver.invalidate(user_id)
+    if removed:
+        resolver.flush()
+    return removed
+
+
+_resolvers: "weakref.WeakKeyDictionary[Any, UserResolver]" = weakref.WeakKeyDictionary()
+_resolvers_lock = threading.Lock()
+
+
+def get_resolver(api: Any) -> UserResolver:
+    """Get the resolver shared by everything using this backend client."""
+    with _resolvers_lock:
+        resolver = _resolvers.get(api)
+        if resolver is None:
+            resolver = _resolvers[api] = UserResolver(api)
+        return resolver
@@ -0,0 +1,400 @@
+"""
+Rollback Engine
+Undoes recorded membership changes (see ActionHistory.get_rollback_data).
+
+Selected actions are inverted into per-target member changes: an add is
+undone by removing the users it added, a removal by adding them back and
+a sync by both. When several selected actions touch the same user of a
+group or queue, the oldest one decides (undoing them newest first ends
+there).
+
+The changes are checked against current membership first, so users
+already in the rolled-back state cost nothing (planning fails if a
+membership cannot be listed completely). The rest is applied as
+chunked add/remove calls that BulkExecutor runs concurrently (chunks
+rejected because of individual IDs are bisected). Afterwards the touched
+groups and queues are listed again to verify the result, and the rollback
+is recorded as its own history entry.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from genesys_cloud.membership import (
+    GROUP_MEMBER_BATCH_SIZE,
+    QUEUE_MEMBER_BATCH_SIZE,
+    MembershipDiff,
+    SyncResult,
+    apply_membership_diff,
+    member_ids,
+)
+
+from .bulk import (
+    BulkControl,
+    BulkExecutor,
+    BulkProgress,
+    chunked,
+)
+from .history import ActionHistory, get_history
+from .membership_index import get_membership_index
+
+# Chunks in flight at once
+ROLLBACK_WORKERS = 4
+
+# Utility of a recorded action -> endpoint whose members it changed
+ENDPOINTS = {"group_manager": "groups", "queue_manager": "queues"}
+
+BATCH_SIZES = {"groups": GROUP_MEMBER_BATCH_SIZE, "queues": QUEUE_MEMBER_BATCH_SIZE}
+
+# Recent rollback entries checked for actions that were already undone
+ROLLBACK_LOOKBACK = 1000
+
+
+class RollbackError(Exception):
+    """Current membership could not be listed, so no plan was made."""
+
+
+@dataclass
+class TargetRollback:
+    """Member changes that roll back one group or queue, and their outcome."""
+
+    endpoint: str  # 'groups' or 'queues'
+    target_id: str
+    target: str
+    to_add: List[str] = field(default_factory=list)
+    to_remove: List[str] = field(default_factory=list)
+    unchanged: int = 0  # users already in the rolled-back state
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    mismatched: List[str] = field(default_factory=list)  # not confirmed after
+
+    @property
+    def change_count(self) -> int:
+        return len(self.to_add) + len(self.to_remove)
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts stored in the rollback's history entry."""
+        return {
+            "endpoint": self.endpoint,
+            "target_id": self.target_id,
+            "target": self.target,
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "failed": len(self.failed),
+            "unchanged": self.unchanged,
+            "mismatched": len(self.mismatched),
+        }
+
+
+@dataclass
+class RollbackPlan:
+    """What rolling back a set of actions changes."""
+
+    action_ids: List[str]  # actions rolled back, newest first
+    skipped: Dict[str, str] = field(default_factory=dict)  # action ID -> reason
+    targets: List[TargetRollback] = field(default_factory=list)
+
+    @property
+    def change_count(self) -> int:
+        return sum(t.change_count for t in self.targets)
+
+    @property
+    def request_count(self) -> int:
+        """Add/remove calls needed (without bisection of bad chunks)."""
+        return sum(
+            MembershipDiff(to_add=t.to_add, to_remove=t.to_remove).request_count(
+                BATCH_SIZES[t.endpoint]
+            )
+            for t in self.targets
+        )
+
+
+@dataclass
+class RollbackResult:
+    """Outcome of a rollback run."""
+
+    plan: RollbackPlan
+    elapsed: float = 0.0
+    cancelled: int = 0  # chunks never sent
+    history_id: Optional[str] = None
+
+    @property
+    def changed(self) -> int:
+        return sum(len(t.added) + len(t.removed) for t in self.plan.targets)
+
+    @property
+    def failed(self) -> int:
+        return sum(len(t.failed) for t in self.plan.targets)
+
+    @property
+    def mismatched(self) -> int:
+        return sum(len(t.mismatched) for t in self.plan.targets)
+
+    @property
+    def status(self) -> str:
+        """'success', 'partial', 'failed' or 'cancelled' (like BulkResult)."""
+        if self.cancelled:
+            return "cancelled"
+        if not self.failed and not self.mismatched:
+            return "success"
+        return "partial" if self.changed else "failed"
+
+
+@dataclass
+class _Chunk:
+    """One add or remove call of a rollback."""
+
+    target: TargetRollback
+    operation: str  # 'add' or 'remove'
+    user_ids: List[str]
+
+
+class RollbackEngine:
+    """
+    Plans and runs rollbacks of recorded member changes.
+
+    Usage:
+        engine = RollbackEngine(api)
+        plan = engine.plan([action_id, ...])
+        result = engine.run(plan, on_progress=...)
+    """
+
+    def __init__(
+        self,
+        api: Any,
+        history: Optional[ActionHistory] = None,
+        workers: int = ROLLBACK_WORKERS,
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            api: Backend client (GenesysCloudAPI or DemoAPI)
+            history: Action history (default: global instance)
+            workers: Add/remove calls in flight at once
+        """
+        self.api = api
+        self.history = history or get_history()
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+
+    def rolled_back(self) -> Set[str]:
+        """
+        IDs of actions fully undone by recent rollbacks.
+
+        Partial, failed and cancelled rollbacks do not count: rolling the
+        action back again only applies what is still missing.
+        """
+        page = self.history.get_history_page(
+            limit=ROLLBACK_LOOKBACK, utility="rollback", action="rollback"
+        )
+        return {
+            action_id
+            for record in page.records
+            if record.get("status") == "success"
+            for action_id in (record.get("details") or {}).get("actions", [])
+        }
+
+    def _listings(self, targets: Iterable[Tuple[str, str]]) -> Dict:
+        """(endpoint, target ID) -> complete member listing, fetched concurrently."""
+        targets = list(targets)
+
+        def listing(key: Tuple[str, str]) -> Any:
+            endpoint, target_id = key
+            return getattr(self.api, endpoint).list_members(target_id)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return dict(zip(targets, pool.map(listing, targets)))
+
+    def _current_members(self, targets: Iterable[Tuple[str, str]]) -> Dict:
+        """
+        (endpoint, target ID) -> current member IDs.
+
+        Raises:
+            RollbackError: If a listing failed (a partial one would turn
+                existing members into users to add, and vice versa)
+        """
+        current = {}
+        for key, response in self._listings(targets).items():
+            if not response.success:
+                raise RollbackError(
+                    f"Listing the members of {key[1]} failed: {response.error}"
+                )
+            current[key] = set(member_ids(response.data))
+        return current
+
+    def plan(self, action_ids: Iterable[str]) -> RollbackPlan:
+        """
+        Invert actions into the member changes still needed.
+
+        Args:
+            action_ids: Actions to roll back (any order)
+
+        Returns:
+            RollbackPlan; actions that cannot be rolled back are listed in
+            skipped with the reason
+
+        Raises:
+            RollbackError: If the current members of a target could not be
+                listed
+        """
+        undone = self.rolled_back()
+        selected: List[Tuple[str, Dict]] = []
+        skipped: Dict[str, str] = {}
+        for action_id in dict.fromkeys(action_ids):
+            data = self.history.get_rollback_data(action_id)
+            if data is None:
+                skipped[action_id] = "not a successful member change"
+            elif data["utility"] not in ENDPOINTS:
+                skipped[action_id] = f"{data['utility']} actions are not supported"
+            elif action_id in undone:
+                skipped[action_id] = "already rolled back"
+            else:
+                selected.append((action_id, data))
+        # Newest first (IDs are timestamps), so the oldest action is applied last
+        selected.sort(key=lambda item: item[0], reverse=True)
+
+        # (endpoint, target ID) -> user ID -> member after the rollback
+        desired: Dict[Tuple[str, str], Dict[str, bool]] = {}
+        names: Dict[Tuple[str, str], str] = {}
+        for _, data in selected:
+            key = (ENDPOINTS[data["utility"]], data["target_id"])
+            names[key] = data.get("target") or data["target_id"]
+            state = desired.setdefault(key, {})
+            was_added = data["original_action"] in ("add_members", "sync_members")
+            for user_id in data["user_ids"]:
+                state[user_id] = not was_added
+            for user_id in data["removed_ids"]:
+                state[user_id] = True
+
+        current = self._current_members(desired)
+        targets = []
+        for key, state in desired.items():
+            target = TargetRollback(
+                endpoint=key[0], target_id=key[1], target=names[key]
+            )
+            for user_id, member in state.items():
+                if member and user_id not in current[key]:
+                    target.to_add.append(user_id)
+                elif not member and user_id in current[key]:
+                    target.to_remove.append(user_id)
+                else:
+                    target.unchanged += 1
+            targets.append(target)
+        return RollbackPlan(
+            action_ids=[action_id for action_id, _ in selected],
+            skipped=skipped,
+            targets=targets,
+        )
+
+    def _apply(self, chunk: _Chunk) -> SyncResult:
+        """Send one chunk (bisected on per-ID failures)."""
+        target = chunk.target
+        endpoint = getattr(self.api, target.endpoint)
+        if chunk.operation == "add":
+            diff = MembershipDiff(to_add=chunk.user_ids)
+        else:
+            diff = MembershipDiff(to_remove=chunk.user_ids)
+        result = apply_membership_diff(
+            diff,
+            lambda ids: endpoint.add_members(target.target_id, ids),
+            lambda ids: endpoint.remove_members(target.target_id, ids),
+            BATCH_SIZES[target.endpoint],
+        )
+        with self._lock:
+            target.added.extend(result.added)
+            target.removed.extend(result.removed)
+            target.failed.extend(result.failed)
+            target.errors.extend(result.errors)
+        return result
+
+    def _verify(self, plan: RollbackPlan) -> None:
+        """List the targets again and flag changes that did not stick."""
+        touched = [t for t in plan.targets if t.added or t.removed]
+        listings = self._listings((t.endpoint, t.target_id) for t in touched)
+        for target in touched:
+            response = listings[(target.endpoint, target.target_id)]
+            if not response.success:
+                # Nothing is confirmed without a complete listing
+                target.errors.append(f"Verification failed: {response.error}")
+                target.mismatched = target.added + target.removed
+                continue
+            members = set(member_ids(response.data))
+            target.mismatched = [u for u in target.added if u not in members] + [
+                u for u in target.removed if u in members
+            ]
+
+    def run(
+        self,
+        plan: RollbackPlan,
+        on_progress: Optional[Callable[[BulkProgress], None]] = None,
+        control: Optional[BulkControl] = None,
+        verify: bool = True,
+    ) -> RollbackResult:
+        """
+        Apply a plan, verify it and record it in history.
+
+        Args:
+            plan: Plan from plan()
+            on_progress: Throttled progress callback (one item per chunk)
+            control: Cancel/pause token checked between chunks
+            verify: List the touched targets again afterwards
+
+        Returns:
+            RollbackResult (per-target outcome in plan.targets)
+        """
+        chunks = [
+            _Chunk(target, operation, ids)
+            for target in plan.targets
+            for operation, user_ids in (
+                ("add", target.to_add),
+                ("remove", target.to_remove),
+            )
+            for ids in chunked(user_ids, BATCH_SIZES[target.endpoint])
+        ]
+        bulk = BulkExecutor(max_workers=self.workers).run(
+            chunks, self._apply, on_progress=on_progress, control=control
+        )
+        if verify:
+            self._verify(plan)
+
+        index = get_membership_index(self.api)
+        for target in plan.targets:
+            if target.added:
+                index.add(target.endpoint, target.target_id, target.added)
+            if target.removed:
+                index.remove(target.endpoint, target.target_id, target.removed)
+
+        result = RollbackResult(
+            plan=plan, elapsed=bulk.elapsed, cancelled=len(bulk.cancelled)
+        )
+        if plan.action_ids:
+            result.history_id = self._record(result)
+        return result
+
+    def _record(self, result: RollbackResult) -> str:
+        plan = result.plan
+        changed = [u for t in plan.targets for u in t.added + t.removed]
+        if len(plan.action_ids) == 1 and len(plan.targets) == 1:
+            target = plan.targets[0].target
+        else:
+            target = f"{len(plan.action_ids)} actions"
+        return self.history.record_action(
+            utility="rollback",
+            action="rollback",
+            target=target,
+            target_id=plan.action_ids[0] if len(plan.action_ids) == 1 else "",
+            details={
+                "actions": plan.action_ids,
+                "targets": [t.summary() for t in plan.targets],
+                "skipped": plan.skipped,
+                "elapsed_seconds": round(result.elapsed, 2),
+            },
+            affected_count=len(changed),
+            status=result.status,
+            user_ids=list(dict.fromkeys(changed)),
+        )
@@ -9,6 +9,8 @@ import pandas as pd
 import streamlit as st
 
 from .base import BaseUtility, UtilityConfig
+from .bulk import SKILL_WORKERS, BulkExecutor, parse_emails
+from .resolver import ResolveError, get_resolver
 
 
 class SkillManagerUtility(BaseUtility):
@@ -125,7 +127,7 @@ class SkillManagerUtility(BaseUtility):
     def _load_skills(self) -> List[Dict]:
         with st.spinner("Loading skills..."):
             try:
-                skills = self.api.routing.get_skills()
+                skills = self.reference.get("skills")
                 self.set_state("skills", skills)
                 return skills
             except Exception as e:
@@ -162,15 +164,10 @@ class SkillManagerUtility(BaseUtility):
             )
             self.set_state("list_page_number", page_number)
 
-        with st.spinner("Loading skills..."):
-            resp = self.api.routing.list_skills_page(
-                page_size=page_size, page_number=page_number
-            )
-        if not resp.success:
-            st.error(f"Failed to load skills: {resp.error}")
+        data = self.load_list_page("skills", page_size, page_number, "skills")
+        if data is None:
             return
 
-        data = resp.data or {}
         skills = data.get("entities", [])
         total = data.get("total", len(skills))
         page_count = data.get("pageCount", 1)
@@ -281,6 +278,7 @@ class SkillManagerUtility(BaseUtility):
                 name=name, description=description, state=state
             )
             if resp.success:
+                self.invalidate_lists("skills")
                 st.success("Skill created.")
                 self.set_state("skills", [])
                 self.set_state("skill_id", resp.data.get("id"))
@@ -313,6 +311,10 @@ class SkillManagerUtility(BaseUtility):
             payload = {"name": name, "description": description, "state": state}
             resp = self.api.routing.update_skill(info.get("id"), payload)
             if resp.success:
+                self.invalidate_lists("skills")
+                self.memberships.upsert_entity(
+                    "skills", {"id": info.get("id"), "name": name}
+                )
                 st.success("Skill updated.")
                 self.set_state("skills", [])
                 self._load_skill(info.get("id"))
@@ -337,6 +339,8 @@ class SkillManagerUtility(BaseUtility):
         ):
             resp = self.api.routing.delete_skill(info.get("id"))
             if resp.success:
+                self.invalidate_lists("skills")
+                self.memberships.remove_entity("skills", info.get("id"))
                 st.success("Skill deleted.")
                 self.set_state("skills", [])
                 self.set_state("skill_info", None)
@@ -396,7 +400,16 @@ class SkillManagerUtility(BaseUtility):
         with st.spinner("Looking up user..."):
             user = None
             if "@" in user_input:
-                user = self.api.users.search_by_email(user_input)
+                resolver = get_resolver(self.api)
+                resolver.load()
+                try:
+                    user = resolver.lookup(user_input)
+                except ResolveError as e:
+                    st.error(str(e))
+                    return
+                resolver.flush()
+                if user:
+                    user = {**user, "email": user_input.strip()}
             else:
                 resp = self.api.users.get(user_input)
                 if resp.success:
@@ -410,6 +423,7 @@ class SkillManagerUtility(BaseUtility):
 
             self.set_state("current_user_info", user)
             user_skills = self.api.routing.get_user_skills(user["id"])
+            self.memberships.set_user_skills(user["id"], user_skills)
             self.set_state("current_user_skills", user_skills)
             st.rerun()
 
@@ -456,10 +470,12 @@ class SkillManagerUtility(BaseUtility):
             "Process", type="primary", use_container_width=True, key="sm_run_assign"
         )
 
+        background = self.background_job_checkbox("sm_background")
+
         if run and emails_text and selected_name:
             skill_id = skill_map[selected_name]
             self._execute_assign(
-                emails_text, skill_id, selected_name, proficiency, dry_run
+                emails_text, skill_id, selected_name, proficiency, dry_run, background
             )
 
     def _execute_assign(
@@ -469,27 +485,29 @@ class SkillManagerUtility(BaseUtility):
         skill_name: str,
         proficiency: float,
         dry_run: bool,
+        background: bool = False,
     ) -> None:
-        emails = list(
-            dict.fromkeys(e.strip() for e in raw.split("\n") if e.strip() and "@" in e)
-        )
+        emails = parse_emails(raw)
         if not emails:
             st.error("No valid emails found.")
             return
 
         st.markdown("---")
-        progress = st.progress(0)
-        found, missing = [], []
-        for i, email in enumerate(emails):
-            progress.progress((i + 1) / len(emails))
-            user = self.api.users.search_by_email(email)
-            if user:
-                found.append(
-                    {"id": user["id"], "name": user.get("name", ""), "email": email}
-                )
-            else:
-                missing.append(email)
-        progress.empty()
+        if background and not dry_run:
+            self.enqueue_background_job(
+                "assign_skill", skill_id, skill_name, emails, proficiency=proficiency
+            )
+            return
+        journal = (
+            None
+            if dry_run
+            else self.open_job_journal(
+                "assign_skill", skill_id, emails, {"proficiency": proficiency}
+            )
+        )
+        if dry_run:
+            self.render_bulk_plan("assign_skill", emails)
+        found, missing, failed = self.resolve_emails(emails, journal)
 
         c1, c2 = st.columns(2)
         with c1:
@@ -505,32 +523,46 @@ class SkillManagerUtility(BaseUtility):
                 st.error(f"**{len(missing)}** not found")
                 for e in missing:
                     st.caption(f"- {e}")
+            if failed:
+                st.warning(f"**{len(failed)}** lookup(s) failed, run again to retry")
 
         if not found:
             return
         if dry_run:
             st.info(
-                f"Dry run: would assign '{skill_name}' (proficiency {proficiency}) to {len(found)} users."
+                f"Dry run: would assign '{skill_name}' (proficiency {proficiency}) to {len(found)} users. "
+                + self.dry_run_summary("assign_skill", emails, len(found))
             )
             return
 
         st.markdown("---")
         st.markdown(f"**Assigning:** {skill_name} (proficiency {proficiency})")
-        prog = st.progress(0)
-        ok, fail = 0, 0
-        for i, u in enumerate(found):
-            prog.progress((i + 1) / len(found))
-            resp = self.api.routing.add_user_skill(u["id"], skill_id, proficiency)
-            if resp.success:
-                ok += 1
-            else:
-                fail += 1
-                st.caption(f"Failed for {u['email']}: {resp.error}")
-        prog.empty()
-
-        st.success(f"Assigned to {ok} users.")
-        if fail:
-            st.warning(f"{fail} failed.")
+        result = self.run_bulk(
+            BulkExecutor(max_workers=SKILL_WORKERS),
+            found,
+            lambda u: self.api.routing.add_user_skill(u["id"], skill_id, proficiency),
+            "Assigning skill...",
+            journal,
+        )
+        self.finish_job(journal, result)
+
+        assigned = [r.item["id"] for r in result.succeeded]
+        self.memberships.add(
+            "skills",
+            skill_id,
+            assigned,
+            {"id": skill_id, "name": skill_name, "proficiency": proficiency},
+        )
+        self.record_bulk_action(
+            "assign_skill",
+            skill_name,
+            skill_id,
+            result,
+            user_ids=assigned,
+            details={"proficiency": proficiency},
+        )
+        st.success(f"Assigned to {len(assigned)} users.")
+        self.render_bulk_failures(result)
 
     def _page_remove(self) -> None:
         st.markdown("## Bulk Remove Skill")
@@ -555,6 +587,7 @@ class SkillManagerUtility(BaseUtility):
         c1, c2 = st.columns(2)
         dry_run = c1.checkbox("Preview only (dry run)", value=True, key="sm_rm_dryrun")
         confirm = c2.checkbox("I confirm removal", key="sm_rm_confirm")
+        background = self.background_job_checkbox("sm_rm_background")
 
         if st.button(
             "Remove Skill",
@@ -565,31 +598,33 @@ class SkillManagerUtility(BaseUtility):
         ):
             if emails_text and selected_name:
                 skill_id = skill_map[selected_name]
-                self._execute_remove(emails_text, skill_id, selected_name, dry_run)
+                self._execute_remove(
+                    emails_text, skill_id, selected_name, dry_run, background
+                )
 
     def _execute_remove(
-        self, raw: str, skill_id: str, skill_name: str, dry_run: bool
+        self,
+        raw: str,
+        skill_id: str,
+        skill_name: str,
+        dry_run: bool,
+        background: bool = False,
     ) -> None:
-        emails = list(
-            dict.fromkeys(e.strip() for e in raw.split("\n") if e.strip() and "@" in e)
-        )
+        emails = parse_emails(raw)
         if not emails:
             st.error("No valid emails found.")
             return
 
         st.markdown("---")
-        progress = st.progress(0)
-        found, missing = [], []
-        for i, email in enumerate(emails):
-            progress.progress((i + 1) / len(emails))
-            user = self.api.users.search_by_email(email)
-            if user:
-                found.append(
-                    {"id": user["id"], "name": user.get("name", ""), "email": email}
-                )
-            else:
-                missing.append(email)
-        progress.empty()
+        if background and not dry_run:
+            self.enqueue_background_job("remove_skill", skill_id, skill_name, emails)
+            return
+        journal = (
+            None if dry_run else self.open_job_journal("remove_skill", skill_id, emails)
+        )
+        if dry_run:
+            self.render_bulk_plan("remove_skill", emails)
+        found, missing, failed = self.resolve_emails(emails, journal)
 
         c1, c2 = st.columns(2)
         with c1:
@@ -597,30 +632,36 @@ class SkillManagerUtility(BaseUtility):
         with c2:
             if missing:
                 st.error(f"**{len(missing)}** not found")
+            if failed:
+                st.warning(f"**{len(failed)}** lookup(s) failed, run again to retry")
 
         if not found:
             return
         if dry_run:
-            st.info(f"Dry run: would remove '{skill_name}' from {len(found)} users.")
+            st.info(
+                f"Dry run: would remove '{skill_name}' from {len(found)} users. "
+                + self.dry_run_summary("remove_skill", emails, len(found))
+            )
             return
 
         st.markdown("---")
         st.markdown(f"**Removing:** {skill_name}")
-        prog = st.progress(0)
-        ok, fail = 0, 0
-        for i, u in enumerate(found):
-            prog.progress((i + 1) / len(found))
-            resp = self.api.routing.remove_user_skill(u["id"], skill_id)
-            if resp.success:
-                ok += 1
-            else:
-                fail += 1
-                st.caption(f"Failed for {u['email']}: {resp.error}")
-        prog.empty()
+        result = self.run_bulk(
+            BulkExecutor(max_workers=SKILL_WORKERS),
+            found,
+            lambda u: self.api.routing.remove_user_skill(u["id"], skill_id),
+            "Removing skill...",
+            journal,
+        )
+        self.finish_job(journal, result)
 
-        st.success(f"Removed from {ok} users.")
-        if fail:
-            st.warning(f"{fail} failed.")
+        removed = [r.item["id"] for r in result.succeeded]
+        self.memberships.remove("skills", skill_id, removed)
+        self.record_bulk_action(
+            "remove_skill", skill_name, skill_id, result, user_ids=removed
+        )
+        st.success(f"Removed from {len(removed)} users.")
+        self.render_bulk_failures(result)
 
     def _page_export(self) -> None:
         st.markdown("## Export Skills")
@@ -0,0 +1,246 @@
+"""
+List Snapshot
+Stale-while-revalidate cache of list pages (users, groups, queues, skills).
+
+The pages an admin has viewed are kept in encrypted storage per org, so
+after a login (or a restart) list pages render immediately from the last
+snapshot, marked stale, while a background thread fetches them again.
+The next rerun after the refresh lands shows the fresh page.
+
+A page fetched in this session counts as fresh for FRESH_SECONDS; after
+that, or after invalidate() (e.g. a group was created), it is served
+stale and revalidated the same way.
+"""
+
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from core.encrypted_storage import EncryptedStorage, get_storage
+from core.mirror import LISTERS
+
+from .resolver import cache_scope
+
+# Seconds a page fetched in this session is served without revalidating
+FRESH_SECONDS = 60.0
+
+# Pages kept per org (least recently fetched dropped first)
+MAX_PAGES = 50
+
+# Background refreshes shared by every session
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="snapshot")
+
+
+@dataclass
+class SnapshotPage:
+    """A list page as served by ListSnapshot."""
+
+    data: Optional[Dict[str, Any]]  # API page ({entities, total, pageCount, ...})
+    fetched_at: Optional[float] = None  # wall-clock time of the fetch
+    stale: bool = False  # from an older snapshot, not yet revalidated
+    refreshing: bool = False  # a background refresh is running
+    error: Optional[str] = None  # last fetch error, if it failed
+
+
+class ListSnapshot:
+    """
+    List pages of one backend client, served stale-while-revalidate.
+
+    Storage is only touched by load(), page() and flush(); call them from
+    the Streamlit script thread (refreshes run in worker threads).
+
+    Usage:
+        snapshot = get_snapshot(api)
+        page = snapshot.page("groups", 25, 1)
+        if page.stale: ...  # show page.data, marked as cached
+    """
+
+    def __init__(
+        self,
+        api: Any,
+        storage: Optional[EncryptedStorage] = None,
+        scope: Optional[str] = None,
+        fresh_seconds: float = FRESH_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize snapshot.
+
+        Args:
+            api: Backend client (GenesysCloudAPI or DemoAPI)
+            storage: Encrypted storage (default: global instance)
+            scope: Persistence scope (default: cache_scope(api); None keeps
+                the snapshot in memory)
+            fresh_seconds: Seconds a fetched page is served without a refresh
+            clock: Time source (wall clock, snapshots outlive the process)
+        """
+        # Weak: get_snapshot() keys the shared instance by this client
+        self._api = weakref.ref(api)
+        self.scope = scope if scope is not None else cache_scope(api)
+        self._storage = storage
+        self.fresh_seconds = fresh_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._fresh: Set[str] = set()  # keys fetched in this process
+        self._pending: Dict[str, Future] = {}
+        self._errors: Dict[str, Tuple[str, float]] = {}  # key -> (error, at)
+        self._dirty = False
+
+    @property
+    def api(self) -> Any:
+        api = self._api()
+        if api is None:
+            raise ReferenceError("Backend client no longer exists")
+        return api
+
+    @property
+    def storage(self) -> EncryptedStorage:
+        if self._storage is None:
+            self._storage = get_storage()
+        return self._storage
+
+    @staticmethod
+    def _key(resource: str, page_size: int, page_number: int) -> str:
+        return f"{resource}:{page_size}:{page_number}"
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Entries, loaded from storage on first use (call with lock held)."""
+        if self._entries is None:
+            self._entries = (
+                self.storage.retrieve_snapshot(self.scope) if self.scope else {}
+            )
+        return self._entries
+
+    def load(self) -> None:
+        """Load the persisted snapshot (no-op once loaded)."""
+        with self._lock:
+            self._load()
+
+    def _store(self, key: str, data: Dict[str, Any]) -> None:
+        """Record a fetched page (call with lock held)."""
+        entries = self._load()
+        entries[key] = {"data": data, "at": self._clock()}
+        self._fresh.add(key)
+        self._errors.pop(key, None)
+        while len(entries) > MAX_PAGES:
+            oldest = min(entries, key=lambda k: entries[k].get("at", 0))
+            del entries[oldest]
+        self._dirty = True
+
+    def _collect(self, key: str) -> None:
+        """Apply a finished background refresh (call with lock held)."""
+        future = self._pending.get(key)
+        if future is None or not future.done():
+            return
+        del self._pending[key]
+        try:
+            response = future.result()
+        except Exception as e:
+            self._errors[key] = (str(e), self._clock())
+            return
+        if response.success:
+            self._store(key, response.data or {})
+        else:
+            self._errors[key] = (response.error or "Request failed", self._clock())
+
+    def _fetch(self, resource: str, page_size: int, page_number: int) -> Any:
+        return LISTERS[resource](self.api, page_size, page_number)
+
+    def page(self, resource: str, page_size: int, page_number: int) -> SnapshotPage:
+        """
+        A list page: fresh, stale (with a refresh started) or fetched now.
+
+        Only a page that was never seen is fetched synchronously.
+
+        Raises:
+            ValueError: If the resource is unknown
+        """
+        if resource not in LISTERS:
+            raise ValueError(f"Unknown resource: {resource}")
+        key = self._key(resource, page_size, page_number)
+        with self._lock:
+            self._collect(key)
+            entry = self._load().get(key)
+        if entry is None:
+            try:
+                response = self._fetch(resource, page_size, page_number)
+            except Exception as e:
+                return SnapshotPage(data=None, error=str(e))
+            if not response.success:
+                return SnapshotPage(data=None, error=response.error or "Request failed")
+            with self._lock:
+                self._store(key, response.data or {})
+                entry = self._entries[key]
+        else:
+            with self._lock:
+                now = self._clock()
+                fresh = (
+                    key in self._fresh and now - entry.get("at", 0) < self.fresh_seconds
+                )
+                # After a failed refresh, wait before trying again
+                failed = self._errors.get(key)
+                backoff = failed is not None and now - failed[1] < self.fresh_seconds
+                if not fresh and not backoff and key not in self._pending:
+                    self._pending[key] = _executor.submit(
+                        self._fetch, resource, page_size, page_number
+                    )
+        self.flush()
+        with self._lock:
+            refreshing = key in self._pending
+            failed = self._errors.get(key)
+            return SnapshotPage(
+                data=entry["data"],
+                fetched_at=entry.get("at"),
+                stale=refreshing or key not in self._fresh,
+                refreshing=refreshing,
+                error=failed[0] if failed else None,
+            )
+
+    def refreshing(self, resource: str, page_size: int, page_number: int) -> bool:
+        """Whether a background refresh of the page is still running."""
+        with self._lock:
+            future = self._pending.get(self._key(resource, page_size, page_number))
+            return future is not None and not future.done()
+
+    def invalidate(self, resource: Optional[str] = None) -> None:
+        """Revalidate pages of a resource (or all) on their next use."""
+        with self._lock:
+            prefix = f"{resource}:" if resource else ""
+            self._fresh = {k for k in self._fresh if not k.startswith(prefix)}
+
+    def flush(self) -> None:
+        """Persist pages fetched since the last flush."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            entries = dict(self._load())
+        if self.scope:
+            self.storage.store_snapshot(self.scope, entries)
+
+    def clear(self) -> None:
+        """Forget all pages, including persisted ones."""
+        with self._lock:
+            self._entries = {}
+            self._fresh.clear()
+            self._errors.clear()
+            self._dirty = False
+        if self.scope:
+            self.storage.clear_snapshot(self.scope)
+
+
+_snapshots: "weakref.WeakKeyDictionary[Any, ListSnapshot]" = weakref.WeakKeyDictionary()
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(api: Any) -> ListSnapshot:
+    """Get the snapshot shared by everything using this backend client."""
+    with _snapshots_lock:
+        snapshot = _snapshots.get(api)
+        if snapshot is None:
+            snapshot = _snapshots[api] = ListSnapshot(api)
+        return snapshot
@@ -0,0 +1,332 @@
+"""
+User Index
+In-process index of every user of an org for instant lookups and
+type-ahead search, built from users.list_all().
+
+- ID and email lookups are dict hits.
+- Prefix search runs on a sorted list of (term, user_id) pairs with
+  bisect, where terms are the full name, each name word and the email.
+- Optional trigram matching finds names with typos when prefixes do not
+  fill the result list.
+
+Updates are incremental (upsert()/remove()), so edits made in the app
+are visible without rebuilding. A build fails unless the listing came
+back complete, and start_build() rebuilds an index older than
+INDEX_MAX_AGE in the background (users created or changed elsewhere).
+"""
+
+import math
+import re
+import threading
+import time
+import weakref
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from genesys_cloud.scheduler import Priority, request_priority
+
+# Users per page when listing users
+INDEX_PAGE_SIZE = 500
+
+# Seconds before start_build() refreshes a built index in the background
+INDEX_MAX_AGE = 30 * 60.0
+
+# Default number of search results
+SEARCH_LIMIT = 20
+
+# Minimum share of a query's trigrams a fuzzy match must contain
+FUZZY_THRESHOLD = 0.6
+
+_WORD = re.compile(r"[\w']+")
+
+
+class UserIndexError(Exception):
+    """The user listing failed, so the index would be incomplete."""
+
+
+def _terms(user: Dict[str, Any]) -> Set[str]:
+    """Searchable terms of a user: full name, name words and email."""
+    name = (user.get("name") or "").lower().strip()
+    terms = {name} | set(_WORD.findall(name))
+    email = (user.get("email") or "").lower().strip()
+    if email:
+        terms.add(email)
+    terms.discard("")
+    return terms
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Trigrams of each word, padded so word starts weigh more."""
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class UserIndex:
+    """
+    Users of one org, indexed by ID, email and name/email prefix.
+
+    Thread-safe; build() may run in a background thread while lookups
+    answer from what is loaded so far (see ready).
+
+    Usage:
+        index = get_user_index(api)
+        index.start_build(api)
+        if index.ready:
+            matches = index.search("ali")
+    """
+
+    def __init__(
+        self,
+        fuzzy: bool = True,
+        max_age: float = INDEX_MAX_AGE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize an empty index.
+
+        Args:
+            fuzzy: Keep trigram postings for typo-tolerant search
+            max_age: Seconds before a built index is refreshed
+            clock: Time source
+        """
+        self.fuzzy = fuzzy
+        self.max_age = max_age
+        self._clock = clock
+        self.ready = False
+        self.error: Optional[str] = None
+        self.built_at: Optional[float] = None
+        self._started_at: Optional[float] = None  # last build attempt
+        self._lock = threading.RLock()
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_email: Dict[str, str] = {}
+        self._prefix: List[Tuple[str, str]] = []  # sorted (term, user_id)
+        self._grams: Dict[str, Set[str]] = {}  # trigram -> user IDs
+        self._thread: Optional[threading.Thread] = None
+
+    # Building
+
+    def build(self, users: Iterable[Dict[str, Any]]) -> int:
+        """
+        Replace the index with a stream of users.
+
+        Returns:
+            Number of users indexed
+        """
+        by_id: Dict[str, Dict[str, Any]] = {}
+        for user in users:
+            if user.get("id"):
+                by_id[user["id"]] = user
+        by_email = {}
+        prefix = []
+        grams: Dict[str, Set[str]] = {}
+        for user_id, user in by_id.items():
+            email = (user.get("email") or "").lower()
+            if email:
+                by_email[email] = user_id
+            prefix.extend((term, user_id) for term in _terms(user))
+            if self.fuzzy:
+                for gram in _trigrams(user.get("name") or ""):
+                    grams.setdefault(gram, set()).add(user_id)
+        prefix.sort()
+        with self._lock:
+            self._by_id = by_id
+            self._by_email = by_email
+            self._prefix = prefix
+            self._grams = grams
+            self.ready = True
+            self.error = None
+            self.built_at = self._clock()
+        return len(by_id)
+
+    @property
+    def stale(self) -> bool:
+        """Whether the index is older than max_age."""
+        with self._lock:
+            return self.built_at is not None and (
+                self._clock() - self.built_at >= self.max_age
+            )
+
+    def start_build(self, api: Any, retry: bool = False) -> bool:
+        """
+        Build from api.users.list_all() in a background thread (prefetch priority).
+
+        A built index is rebuilt once stale (at most once per max_age, so
+        a failing refresh is not retried on every call); it stays ready
+        meanwhile.
+
+        Args:
+            api: Backend client (GenesysCloudAPI or DemoAPI)
+            retry: Start again after a failed first build
+
+        Returns:
+            True if a build was started (False if running, current or failed)
+        """
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return False
+            if self.ready:
+                since_attempt = self._clock() - (self._started_at or 0.0)
+                if not self.stale or since_attempt < self.max_age:
+                    return False
+            elif self.error and not retry:
+                return False
+            self._started_at = self._clock()
+            self._thread = threading.Thread(
+                target=self._build_from, args=(api,), daemon=True, name="user-index"
+            )
+            self._thread.start()
+            return True
+
+    def _build_from(self, api: Any) -> None:
+        try:
+            with request_priority(Priority.PREFETCH):
+                response = api.users.list_all(page_size=INDEX_PAGE_SIZE)
+            if not response.success:
+                # A partial listing would hide users until the next rebuild
+                raise UserIndexError(f"Listing users failed: {response.error}")
+            self.build(response.data or [])
+        except Exception as e:
+            with self._lock:
+                self.error = str(e)
+
+    @property
+    def building(self) -> bool:
+        with self._lock:
+            return bool(self._thread and self._thread.is_alive())
+
+    # Incremental updates
+
+    def _unlink(self, user_id: str) -> None:
+        """Remove a user's postings (call with lock held)."""
+        old = self._by_id.pop(user_id, None)
+        if old is None:
+            return
+        email = (old.get("email") or "").lower()
+        if self._by_email.get(email) == user_id:
+            del self._by_email[email]
+        for term in _terms(old):
+            i = bisect_left(self._prefix, (term, user_id))
+            if i < len(self._prefix) and self._prefix[i] == (term, user_id):
+                del self._prefix[i]
+        if self.fuzzy:
+            for gram in _trigrams(old.get("name") or ""):
+                ids = self._grams.get(gram)
+                if ids is not None:
+                    ids.discard(user_id)
+                    if not ids:
+                        del self._grams[gram]
+
+    def upsert(self, user: Dict[str, Any]) -> None:
+        """Add a user or apply changes to one already indexed."""
+        user_id = user.get("id")
+        if not user_id:
+            return
+        with self._lock:
+            merged = {**self._by_id.get(user_id, {}), **user}
+            self._unlink(user_id)
+            self._by_id[user_id] = merged
+            email = (merged.get("email") or "").lower()
+            if email:
+                self._by_email[email] = user_id
+            for term in _terms(merged):
+                insort(self._prefix, (term, user_id))
+            if self.fuzzy:
+                for gram in _trigrams(merged.get("name") or ""):
+                    self._grams.setdefault(gram, set()).add(user_id)
+
+    def remove(self, user_id: str) -> None:
+        """Drop a user (e.g. deleted in the org)."""
+        with self._lock:
+            self._unlink(user_id)
+
+    # Lookups
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._by_id.get(user_id)
+
+    def by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """User with this exact email (case-insensitive)."""
+        with self._lock:
+            user_id = self._by_email.get(email.strip().lower())
+            return self._by_id.get(user_id) if user_id else None
+
+    def prefix(self, query: str, limit: int = SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        """Users with a name word, full name or email starting with query."""
+        query = query.strip().lower()
+        if not query:
+            return []
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            i = bisect_left(self._prefix, (query, ""))
+            while i < len(self._prefix) and len(found) < limit:
+                term, user_id = self._prefix[i]
+                if not term.startswith(query):
+                    break
+                found.setdefault(user_id, self._by_id[user_id])
+                i += 1
+        return list(found.values())
+
+    def similar(self, query: str, limit: int = SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        """Users whose name shares most of the query's trigrams (typo-tolerant)."""
+        grams = _trigrams(query)
+        if not self.fuzzy or len(query.strip()) < 3 or not grams:
+            return []
+        needed = math.ceil(FUZZY_THRESHOLD * len(grams))
+        with self._lock:
+            postings = sorted((self._grams.get(gram, set()) for gram in grams), key=len)
+            # A match lacks at most len - needed trigrams, so it contains
+            # one of the len - needed + 1 rarest: only those are scanned
+            candidates: Set[str] = set()
+            for ids in postings[: len(postings) - needed + 1]:
+                candidates |= ids
+            scores = Counter(
+                {
+                    user_id: sum(user_id in ids for ids in postings)
+                    for user_id in candidates
+                }
+            )
+            return [
+                self._by_id[user_id]
+                for user_id, score in scores.most_common(limit)
+                if score >= needed
+            ]
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        """
+        Type-ahead search: exact email, then prefixes, then fuzzy matches.
+
+        Returns:
+            Up to limit users, best matches first
+        """
+        exact = self.by_email(query) if "@" in query else None
+        results = {exact["id"]: exact} if exact else {}
+        for user in self.prefix(query, limit):
+            results.setdefault(user["id"], user)
+        if len(results) < limit:
+            for user in self.similar(query, limit):
+                if len(results) >= limit:
+                    break
+                results.setdefault(user["id"], user)
+        return list(results.values())[:limit]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._by_id)
+
+
+_indexes: "weakref.WeakKeyDictionary[Any, UserIndex]" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_user_index(api: Any) -> UserIndex:
+    """Get the user index shared by everything using this backend client."""
+    with _indexes_lock:
+        index = _indexes.get(api)
+        if index is None:
+            index = _indexes[api] = UserIndex()
+        return index
@@ -8,7 +8,8 @@ from typing import Dict, List, Optional
 import pandas as pd
 import streamlit as st
 
-from .base import BaseUtility, UtilityConfig
+from .base import BaseUtility, UtilityConfig, rerun_when
+from .user_index import get_user_index
 
 
 class UserManagerUtility(BaseUtility):
@@ -81,6 +82,7 @@ class UserManagerUtility(BaseUtility):
             return
         resp = self.api.users.get(user_id)
         if resp.success:
+            get_user_index(self.api).upsert(resp.data)
             self.set_state("user_id", user_id)
             self.set_state("user_info", resp.data)
             self.set_state("page", "detail")
@@ -102,6 +104,11 @@ class UserManagerUtility(BaseUtility):
         self.set_state("page", "list")
         st.rerun()
 
+    def _memberships_ready(self) -> bool:
+        """Start the membership index build; True once it can answer."""
+        self.memberships.start_build()
+        return self.memberships.ready
+
     def _action_bar(self) -> None:
         info = self.get_state("user_info")
         if not info:
@@ -167,15 +174,10 @@ class UserManagerUtility(BaseUtility):
             )
             self.set_state("list_page_number", page_number)
 
-        with st.spinner("Loading users (this may take a moment)..."):
-            resp = self.api.users.list_page(
-                page_size=page_size, page_number=page_number
-            )
-        if not resp.success:
-            st.error(f"Failed to load users: {resp.error}")
+        data = self.load_list_page("users", page_size, page_number, "users")
+        if data is None:
             return
 
-        data = resp.data or {}
         all_users = data.get("entities", [])
         total = data.get("total", len(all_users))
         page_count = data.get("pageCount", 1)
@@ -195,6 +197,14 @@ class UserManagerUtility(BaseUtility):
             label_visibility="collapsed",
         )
 
+        # With the user index loaded, a search covers every user, not
+        # just this page
+        index = get_user_index(self.api)
+        index.start_build(self.api)
+        if search and index.ready:
+            all_users = index.search(search, limit=page_size)
+            total = len(index)
+
         df = pd.DataFrame(
             [
                 {
@@ -209,7 +219,7 @@ class UserManagerUtility(BaseUtility):
             ]
         )
 
-        if search and not df.empty:
+        if search and not index.ready and not df.empty:
             sl = search.lower()
             mask = (
                 df["Name"].str.lower().str.contains(sl, na=False)
@@ -218,15 +228,19 @@ class UserManagerUtility(BaseUtility):
             )
             df = df[mask]
 
-        st.caption(
-            f"Showing {len(df)} of {total} users (Page {page_number} of {page_count})"
-        )
+        if search and index.ready:
+            st.caption(f"Showing {len(df)} best matches of {total} users")
+        else:
+            st.caption(
+                f"Showing {len(df)} of {total} users "
+                f"(Page {page_number} of {page_count})"
+            )
         st.dataframe(df, use_container_width=True, hide_index=True, height=400)
 
         st.markdown("---")
         st.markdown("##### Open a user")
         filtered = all_users
-        if search:
+        if search and not index.ready:
             sl = search.lower()
             filtered = [
                 u
@@ -259,6 +273,29 @@ class UserManagerUtility(BaseUtility):
             mime="text/csv",
             key="um_dl_csv",
         )
+        if self.memberships.ready:
+            # Groups, queues and skills of the listed users, from memory
+            report = pd.DataFrame(
+                [
+                    {
+                        "Name": name,
+                        "Email": email,
+                        "Groups": "; ".join(row["groups"]),
+                        "Queues": "; ".join(row["queues"]),
+                        "Skills": "; ".join(row["skills"]),
+                    }
+                    for name, email, row in zip(
+                        df["Name"], df["Email"], self.memberships.summary(df["ID"])
+                    )
+                ]
+            )
+            st.download_button(
+                "Export Memberships CSV",
+                data=report.to_csv(index=False),
+                file_name="user_memberships.csv",
+                mime="text/csv",
+                key="um_dl_memberships",
+            )
 
     def _page_search(self) -> None:
         st.markdown("## Search Users")
@@ -269,7 +306,24 @@ class UserManagerUtility(BaseUtility):
             key="um_search_input",
         )
 
-        if st.button("Search", type="primary", key="um_search_btn") and search_query:
+        index = get_user_index(self.api)
+        index.start_build(self.api)
+        if index.ready:
+            # Type-ahead from the in-memory index, no API call per query
+            self.set_state(
+                "search_results", index.search(search_query) if search_query else []
+            )
+        elif index.building:
+            st.caption("Indexing users for instant search...")
+            rerun_when(lambda: not index.building)
+        elif index.error:
+            st.caption(f"User index unavailable: {index.error}")
+
+        if (
+            not index.ready
+            and st.button("Search", type="primary", key="um_search_btn")
+            and search_query
+        ):
             with st.spinner("Searching..."):
                 if "@" in search_query:
                     user = self.api.users.search_by_email(search_query)
@@ -324,6 +378,7 @@ class UserManagerUtility(BaseUtility):
             return
 
         self._user_header()
+        self._memberships_ready()  # warm up the group/queue/skill tabs
 
         st.markdown("## User Profile")
         st.caption(
@@ -405,10 +460,21 @@ class UserManagerUtility(BaseUtility):
                     disabled=not confirm,
                     key="um_quick_group_btn",
                 ):
-                    resp = self.api.groups.add_members(
-                        group_map[selected_group], [info["id"]]
+                    resp = self.wait_write(
+                        self.coalescer.add_members(
+                            "groups",
+                            group_map[selected_group],
+                            [info["id"]],
+                            api=self.api,
+                        )
                     )
                     if resp.success:
+                        self.memberships.add(
+                            "groups",
+                            group_map[selected_group],
+                            [info["id"]],
+                            {"id": group_map[selected_group], "name": selected_group},
+                        )
                         st.success("User added to group.")
                         self.set_state("user_groups", None)
                     else:
@@ -417,7 +483,7 @@ class UserManagerUtility(BaseUtility):
                 st.caption("Enter a group search term to load matches.")
 
         with tab_skill:
-            skills = self.api.routing.get_skills()
+            skills = self.reference.get("skills")
             if skills:
                 skill_map = {s.get("name", ""): s.get("id") for s in skills}
                 selected_skill = st.selectbox(
@@ -435,10 +501,25 @@ class UserManagerUtility(BaseUtility):
                     disabled=not confirm,
                     key="um_quick_skill_btn",
                 ):
-                    resp = self.api.routing.add_user_skill(
-                        info["id"], skill_map[selected_skill], proficiency
+                    resp = self.wait_write(
+                        self.coalescer.add_user_skill(
+                            info["id"],
+                            skill_map[selected_skill],
+                            proficiency,
+                            api=self.api,
+                        )
                     )
                     if resp.success:
+                        self.memberships.add(
+                            "skills",
+                            skill_map[selected_skill],
+                            [info["id"]],
+                            {
+                                "id": skill_map[selected_skill],
+                                "name": selected_skill,
+                                "proficiency": proficiency,
+                            },
+                        )
                         st.success("Skill assigned.")
                         self.set_state("user_skills_list", None)
                     else:
@@ -470,10 +551,21 @@ class UserManagerUtility(BaseUtility):
                     disabled=not confirm,
                     key="um_quick_queue_btn",
                 ):
-                    resp = self.api.queues.add_members(
-                        queue_map[selected_queue], [info["id"]]
+                    resp = self.wait_write(
+                        self.coalescer.add_members(
+                            "queues",
+                            queue_map[selected_queue],
+                            [info["id"]],
+                            api=self.api,
+                        )
                     )
                     if resp.success:
+                        self.memberships.add(
+                            "queues",
+                            queue_map[selected_queue],
+                            [info["id"]],
+                            {"id": queue_map[selected_queue], "name": selected_queue},
+                        )
                         st.success("User added to queue.")
                         self.set_state("user_queues_list", None)
                     else:
@@ -515,6 +607,8 @@ class UserManagerUtility(BaseUtility):
             }
             resp = self.api.users.update(info["id"], payload)
             if resp.success:
+                self.invalidate_lists("users")
+                get_user_index(self.api).upsert({"id": info["id"], **payload})
                 st.success("User updated.")
                 self._load_user(info["id"])
                 st.rerun()
@@ -532,8 +626,12 @@ class UserManagerUtility(BaseUtility):
         st.markdown("### Groups")
 
         groups = self.get_state("user_groups")
+        if groups is None and self._memberships_ready():
+            groups = self.memberships.user_groups(info["id"])
+            self.set_state("user_groups", groups)
 
-        if groups is None:
+        refresh = st.button("Refresh", key="um_grp_refresh")
+        if groups is None or refresh:
             with st.spinner("Loading user groups..."):
                 resp = self.api.users.get_groups(info["id"])
                 if resp.success:
@@ -543,15 +641,12 @@ class UserManagerUtility(BaseUtility):
                     )
                     if not isinstance(groups, list):
                         groups = []
+                    self.memberships.set_user_memberships("groups", info["id"], groups)
                 else:
                     st.error(f"Failed: {resp.error}")
                     groups = []
                 self.set_state("user_groups", groups)
 
-        if st.button("Refresh", key="um_grp_refresh"):
-            self.set_state("user_groups", None)
-            st.rerun()
-
         if not groups:
             st.info("No groups found for this user.")
             return
@@ -581,16 +676,17 @@ class UserManagerUtility(BaseUtility):
         st.markdown("### Skills")
 
         skills = self.get_state("user_skills_list")
+        if skills is None and self._memberships_ready():
+            skills = self.memberships.user_skills(info["id"])
+            self.set_state("user_skills_list", skills)
 
-        if skills is None:
+        refresh = st.button("Refresh", key="um_skills_refresh")
+        if skills is None or refresh:
             with st.spinner("Loading user skills..."):
                 skills = self.api.routing.get_user_skills(info["id"])
+                self.memberships.set_user_skills(info["id"], skills)
                 self.set_state("user_skills_list", skills)
 
-        if st.button("Refresh", key="um_skills_refresh"):
-            self.set_state("user_skills_list", None)
-            st.rerun()
-
         if not skills:
             st.info("No skills assigned to this user.")
             return
@@ -620,16 +716,17 @@ class UserManagerUtility(BaseUtility):
         st.markdown("### Queues")
 
         queues = self.get_state("user_queues_list")
+        if queues is None and self._memberships_ready():
+            queues = self.memberships.user_queues(info["id"])
+            self.set_state("user_queues_list", queues)
 
-        if queues is None:
+        refresh = st.button("Refresh", key="um_queues_refresh")
+        if queues is None or refresh:
             with st.spinner("Loading user queues..."):
                 queues = self.api.users.get_queues(info["id"])
+                self.memberships.set_user_memberships("queues", info["id"], queues)
                 self.set_state("user_queues_list", queues)
 
-        if st.button("Refresh", key="um_queues_refresh"):
-            self.set_state("user_queues_list", None)
-            st.rerun()
-
         if not queues:
             st.info("No queues found for this user.")
             return
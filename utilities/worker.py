@@ -0,0 +1,225 @@
+"""
+Background Job Worker
+Standalone process that runs bulk jobs queued by the Streamlit UI.
+
+Usage:
+    admin-layers-worker                # poll forever
+    admin-layers-worker --once         # drain the queue and exit
+    admin-layers-worker --sync-mirror  # sync the local org mirror and exit
+    python -m utilities.worker --demo  # run against the demo backend
+
+The worker authenticates with its own API client, using GENESYS_* env
+vars / config.json or the credentials saved in encrypted storage (which
+requires the same ADMIN_LAYERS_KEY as the UI). Progress is written to
+the job queue's progress table, which the UI polls.
+
+There is no Streamlit session in the worker: its state lives in process
+memory unless ADMIN_LAYERS_STATE_BACKEND says otherwise (see core.state),
+and its secrets (encryption_key) come from .streamlit/secrets.toml.
+"""
+
+import argparse
+import logging
+import os
+import socket
+import sys
+import time
+from typing import Optional
+
+from core.demo import DemoAPI
+from core.encrypted_storage import get_storage
+from core.job_queue import JobQueue
+from core.mirror import MirrorSyncError, get_mirror
+from core.state import MemoryState, load_secrets, set_state_backend
+from genesys_cloud import GenesysAuth, GenesysCloudAPI
+
+from .bulk import BulkProgress
+from .jobs import QueueJobControl, run_job
+from .resolver import cache_scope
+
+logger = logging.getLogger("admin_layers.worker")
+
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+def build_api(demo: bool = False):
+    """
+    Create the worker's API client.
+
+    Returns:
+        GenesysCloudAPI or DemoAPI, or None if no credentials are available
+    """
+    if demo:
+        return DemoAPI()
+
+    auth = GenesysAuth.from_config()
+    if auth is None:
+        creds = get_storage().retrieve_credentials()
+        if creds:
+            auth = GenesysAuth.from_credentials(
+                creds["client_id"],
+                creds["client_secret"],
+                creds.get("region", "mypurecloud.com"),
+            )
+    if auth is None:
+        return None
+
+    success, message = auth.authenticate()
+    if not success:
+        logger.error("Authentication failed: %s", message)
+        return None
+    return GenesysCloudAPI(auth)
+
+
+def _worker_alive(worker_id: Optional[str]) -> bool:
+    """Whether a worker ID ("host:pid") names a live process (other hosts: yes)."""
+    host, _, pid = (worker_id or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return bool(worker_id)
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def process_next(queue: JobQueue, api, worker_id: str) -> bool:
+    """
+    Claim and run one queued job.
+
+    Returns:
+        True if a job was processed, False if the queue was empty
+    """
+    job = queue.claim(worker_id)
+    if job is None:
+        return False
+
+    logger.info("Running job %s (%s -> %s)", job.id, job.kind, job.target_name)
+    metrics = getattr(api, "metrics", None)
+    baseline = metrics.snapshot() if metrics else None
+
+    def _progress(progress: BulkProgress) -> None:
+        telemetry = metrics.snapshot().since(baseline) if metrics else None
+        queue.update_progress(
+            job.id,
+            total=progress.total,
+            completed=progress.completed,
+            succeeded=progress.succeeded,
+            failed=progress.failed,
+            elapsed=progress.elapsed,
+            requests_per_second=telemetry.requests_per_second if telemetry else 0.0,
+            retries=telemetry.retries if telemetry else 0,
+        )
+
+    try:
+        summary = run_job(
+            api, job, on_progress=_progress, control=QueueJobControl(queue, job.id)
+        )
+    except Exception as e:
+        logger.exception("Job %s crashed", job.id)
+        queue.finish(job.id, "failed", {"errors": [str(e)]})
+        return True
+
+    queue.finish(job.id, summary["status"], summary)
+    logger.info(
+        "Job %s %s: %d succeeded, %d failed, %d not found, %d lookups failed",
+        job.id,
+        summary["status"],
+        summary["succeeded"],
+        summary["failed"],
+        len(summary["missing"]),
+        len(summary.get("lookup_failed", [])),
+    )
+    return True
+
+
+def sync_mirror(api, full: bool = False) -> int:
+    """
+    Sync the local org mirror of api's org (see core.mirror).
+
+    Returns:
+        Exit code (1 if a listing failed and the mirror was left unchanged)
+    """
+    mirror = get_mirror(cache_scope(api))
+    try:
+        result = mirror.sync(api, full=full)
+    except MirrorSyncError as e:
+        logger.error("Mirror sync failed: %s", e)
+        return 1
+    logger.info(
+        "Mirror %s synced (%s): %d changed, %d API calls in %.1fs",
+        mirror.path,
+        "full" if result.full else "delta",
+        result.total_changed,
+        result.calls,
+        result.elapsed,
+    )
+    return 0
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Worker entry point."""
+    parser = argparse.ArgumentParser(description="Admin Layers background worker")
+    parser.add_argument(
+        "--once", action="store_true", help="Exit when the queue is empty"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help="Seconds between queue polls",
+    )
+    parser.add_argument("--db", help="Job queue database path")
+    parser.add_argument("--demo", action="store_true", help="Use the demo backend")
+    parser.add_argument(
+        "--sync-mirror",
+        action="store_true",
+        help="Sync the local org mirror instead of running jobs, then exit",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="With --sync-mirror: refetch every member list and user's skills",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s"
+    )
+    if not os.environ.get("ADMIN_LAYERS_STATE_BACKEND"):
+        set_state_backend(MemoryState(secrets=load_secrets()))
+
+    api = build_api(demo=args.demo)
+    if api is None:
+        logger.error(
+            "No Genesys Cloud credentials found. Set GENESYS_CLIENT_ID/"
+            "GENESYS_CLIENT_SECRET or save credentials in the app with a "
+            "stable ADMIN_LAYERS_KEY."
+        )
+        return 1
+    if args.sync_mirror:
+        return sync_mirror(api, full=args.full)
+
+    queue = JobQueue(args.db)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    requeued = queue.requeue_stale(_worker_alive)
+    if requeued:
+        logger.info("Requeued %d job(s) interrupted by a stopped worker", requeued)
+    logger.info("Worker %s polling %s", worker_id, queue.path)
+
+    try:
+        while True:
+            if process_next(queue, api, worker_id):
+                continue
+            if args.once:
+                return 0
+            time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        logger.info("Worker stopped")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())